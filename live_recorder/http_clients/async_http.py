@@ -1,4 +1,9 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import http.cookiejar
+import os
+import threading
+import weakref
 import httpx
 from typing import Dict, Any
 from .. import utils
@@ -6,6 +11,59 @@ from .. import utils
 OptionalStr = str | None
 OptionalDict = Dict[str, Any] | None
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Long-lived clients keep connections alive across spider calls and polling sweeps.
+CLIENT_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv('LIVE_HTTP_MAX_CONNECTIONS', '100')),
+    max_keepalive_connections=int(os.getenv('LIVE_HTTP_MAX_KEEPALIVE', '20')),
+    keepalive_expiry=float(os.getenv('LIVE_HTTP_KEEPALIVE_EXPIRY', '60')),
+)
+
+# An httpx client is bound to the event loop that opened its connections,
+# so clients are registered per loop, then per (proxy, verify, http2).
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, httpx.AsyncClient]]" = \
+    weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def _no_cookie_jar() -> http.cookiejar.CookieJar:
+    # Spiders pass cookies explicitly per request; a shared client must not
+    # carry Set-Cookie values from one room or platform into the next request.
+    return http.cookiejar.CookieJar(policy=http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+
+
+def get_async_client(proxy_addr: OptionalStr = None, verify: bool = False, http2: bool = True) -> httpx.AsyncClient:
+    """Return the shared client for the running event loop and connection settings."""
+    proxy_addr = utils.handle_proxy_addr(proxy_addr)
+    http2 = http2 and HTTP2_AVAILABLE
+    loop = asyncio.get_running_loop()
+    key = (proxy_addr, verify, http2)
+    with _clients_lock:
+        loop_clients = _clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                proxy=proxy_addr,
+                verify=verify,
+                http2=http2,
+                limits=CLIENT_LIMITS,
+                cookies=_no_cookie_jar(),
+            )
+            loop_clients[key] = client
+    return client
+
+
+async def aclose_clients() -> None:
+    """Close every shared client of the running event loop (call before the loop exits)."""
+    with _clients_lock:
+        loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(*(client.aclose() for client in loop_clients.values()), return_exceptions=True)
+
 
 async def async_req(
         url: str,
@@ -25,13 +83,11 @@ async def async_req(
     if headers is None:
         headers = {}
     try:
-        proxy_addr = utils.handle_proxy_addr(proxy_addr)
+        client = get_async_client(proxy_addr, verify=verify, http2=http2)
         if data or json_data:
-            async with httpx.AsyncClient(proxy=proxy_addr, timeout=timeout, verify=verify, http2=http2) as client:
-                response = await client.post(url, data=data, json=json_data, headers=headers)
+            response = await client.post(url, data=data, json=json_data, headers=headers, timeout=timeout)
         else:
-            async with httpx.AsyncClient(proxy=proxy_addr, timeout=timeout, verify=verify, http2=http2) as client:
-                response = await client.get(url, headers=headers, follow_redirects=True)
+            response = await client.get(url, headers=headers, follow_redirects=True, timeout=timeout)
 
         if redirect_url:
             return str(response.url)
@@ -50,10 +106,9 @@ async def get_response_status(url: str, proxy_addr: OptionalStr = None, headers:
                               timeout: int = 10, abroad: bool = False, verify: bool = False, http2=False) -> bool:
 
     try:
-        proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=timeout, verify=verify) as client:
-            response = await client.head(url, headers=headers, follow_redirects=True)
-            return response.status_code == 200
+        client = get_async_client(proxy_addr, verify=verify, http2=False)
+        response = await client.head(url, headers=headers, follow_redirects=True, timeout=timeout)
+        return response.status_code == 200
     except Exception as e:
         print(e)
     return False
@@ -13,6 +13,7 @@ import execjs
 import httpx
 import urllib.request
 from . import JS_SCRIPT_PATH, utils
+from .http_clients.async_http import get_async_client
 
 no_proxy_handler = urllib.request.ProxyHandler({})
 opener = urllib.request.build_opener(no_proxy_handler)
@@ -55,19 +56,19 @@ async def get_sec_user_id(url: str, proxy_addr: str | None = None, headers: dict
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=15) as client:
-            response = await client.get(url, headers=headers, follow_redirects=True)
-            redirect_url = response.url
-            if 'reflow/' in str(redirect_url):
-                match = re.search(r'sec_user_id=([\w_\-]+)&', str(redirect_url))
-                if match:
-                    sec_user_id = match.group(1)
-                    room_id = str(redirect_url).split('?')[0].rsplit('/', maxsplit=1)[1]
-                    return room_id, sec_user_id
-                else:
-                    raise RuntimeError("Could not find sec_user_id in the URL.")
+        client = get_async_client(proxy_addr, verify=True, http2=False)
+        response = await client.get(url, headers=headers, follow_redirects=True, timeout=15)
+        redirect_url = response.url
+        if 'reflow/' in str(redirect_url):
+            match = re.search(r'sec_user_id=([\w_\-]+)&', str(redirect_url))
+            if match:
+                sec_user_id = match.group(1)
+                room_id = str(redirect_url).split('?')[0].rsplit('/', maxsplit=1)[1]
+                return room_id, sec_user_id
             else:
-                raise UnsupportedUrlError("The redirect URL does not contain 'reflow/'.")
+                raise RuntimeError("Could not find sec_user_id in the URL.")
+        else:
+            raise UnsupportedUrlError("The redirect URL does not contain 'reflow/'.")
     except UnsupportedUrlError as e:
         raise e
     except Exception as e:
@@ -81,24 +82,24 @@ async def get_unique_id(url: str, proxy_addr: str | None = None, headers: dict |
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=15) as client:
-            response = await client.get(url, headers=headers, follow_redirects=True)
-            redirect_url = str(response.url)
-            if 'reflow/' in str(redirect_url):
-                raise UnsupportedUrlError("Unsupported URL")
-            sec_user_id = redirect_url.split('?')[0].rsplit('/', maxsplit=1)[1]
-            headers['Cookie'] = ('ttwid=1%7C4ejCkU2bKY76IySQENJwvGhg1IQZrgGEupSyTKKfuyk%7C1740470403%7Cbc9a'
-                                 'd2ee341f1a162f9e27f4641778030d1ae91e31f9df6553a8f2efa3bdb7b4; __ac_nonce=06'
-                                 '83e59f3009cc48fbab0; __ac_signature=_02B4Z6wo00f01mG6waQAAIDB9JUCzFb6.TZhmsU'
-                                 'AAPBf34; __ac_referer=__ac_blank')
-            user_page_response = await client.get(f'https://www.iesdouyin.com/share/user/{sec_user_id}',
-                                                headers=headers, follow_redirects=True)
-            matches = re.findall(r'unique_id":"(.*?)","verification_type', user_page_response.text)
-            if matches:
-                unique_id = matches[-1]
-                return unique_id
-            else:
-                raise RuntimeError("Could not find unique_id in the response.")
+        client = get_async_client(proxy_addr, verify=True, http2=False)
+        response = await client.get(url, headers=headers, follow_redirects=True, timeout=15)
+        redirect_url = str(response.url)
+        if 'reflow/' in str(redirect_url):
+            raise UnsupportedUrlError("Unsupported URL")
+        sec_user_id = redirect_url.split('?')[0].rsplit('/', maxsplit=1)[1]
+        headers['Cookie'] = ('ttwid=1%7C4ejCkU2bKY76IySQENJwvGhg1IQZrgGEupSyTKKfuyk%7C1740470403%7Cbc9a'
+                             'd2ee341f1a162f9e27f4641778030d1ae91e31f9df6553a8f2efa3bdb7b4; __ac_nonce=06'
+                             '83e59f3009cc48fbab0; __ac_signature=_02B4Z6wo00f01mG6waQAAIDB9JUCzFb6.TZhmsU'
+                             'AAPBf34; __ac_referer=__ac_blank')
+        user_page_response = await client.get(f'https://www.iesdouyin.com/share/user/{sec_user_id}',
+                                              headers=headers, follow_redirects=True, timeout=15)
+        matches = re.findall(r'unique_id":"(.*?)","verification_type', user_page_response.text)
+        if matches:
+            unique_id = matches[-1]
+            return unique_id
+        else:
+            raise RuntimeError("Could not find unique_id in the response.")
     except UnsupportedUrlError as e:
         raise e
     except Exception as e:
@@ -129,12 +130,11 @@ async def get_live_room_id(room_id: str, sec_user_id: str, proxy_addr: str | Non
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr,
-                                     timeout=15) as client:
-            response = await client.get(api, headers=headers)
-            response.raise_for_status()
-            json_data = response.json()
-            return json_data['data']['room']['owner']['web_rid']
+        client = get_async_client(proxy_addr, verify=True, http2=False)
+        response = await client.get(api, headers=headers, timeout=15)
+        response.raise_for_status()
+        json_data = response.json()
+        return json_data['data']['room']['owner']['web_rid']
     except httpx.HTTPStatusError as e:
         print(f"HTTP status error occurred: {e.response.status_code}")
         raise
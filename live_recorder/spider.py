@@ -28,7 +28,7 @@ from . import JS_SCRIPT_PATH, utils
 from .utils import trace_error_decorator, generate_random_string
 from .logger import script_path
 from .room import get_sec_user_id, get_unique_id, UnsupportedUrlError
-from .http_clients.async_http import async_req
+from .http_clients.async_http import async_req, get_async_client
 
 
 ssl_context = ssl.create_default_context()
@@ -1506,21 +1506,21 @@ async def login_popkontv(
 
     try:
         proxy_addr = utils.handle_proxy_addr(proxy_addr)
-        async with httpx.AsyncClient(proxy=proxy_addr, timeout=20, verify=False) as client:
-            response = await client.post(url, json=data, headers=headers)
-            response.raise_for_status()
-
-            json_data = response.json()
-            login_status_code = json_data.get("statusCd")
-
-            if login_status_code == 'E4010':
-                raise Exception("popkontv login failed, please reconfigure the correct login account or password!")
-            elif login_status_code == 'S2000':
-                token = json_data['data'].get("token")
-                partner_code = json_data['data'].get("partnerCode")
-                return token, partner_code
-            else:
-                raise Exception(f"popkontv login failed, {json_data.get('statusMsg', 'unknown error')}")
+        client = get_async_client(proxy_addr, verify=False, http2=False)
+        response = await client.post(url, json=data, headers=headers, timeout=20)
+        response.raise_for_status()
+
+        json_data = response.json()
+        login_status_code = json_data.get("statusCd")
+
+        if login_status_code == 'E4010':
+            raise Exception("popkontv login failed, please reconfigure the correct login account or password!")
+        elif login_status_code == 'S2000':
+            token = json_data['data'].get("token")
+            partner_code = json_data['data'].get("partnerCode")
+            return token, partner_code
+        else:
+            raise Exception(f"popkontv login failed, {json_data.get('statusMsg', 'unknown error')}")
     except httpx.HTTPStatusError as e:
         print(f"HTTP status error occurred during login: {e.response.status_code}")
         raise
@@ -3551,7 +3551,8 @@ class MainWindow(QMainWindow):
         # 视频格式
         format_label = QLabel("视频格式:")
         self.live_format_combo = QComboBox()
-        self.live_format_combo.addItems(["ts", "mp4", "flv"])
+        # 分段录制输出 TS；选择 mp4 时每段写完转封装
+        self.live_format_combo.addItems(["ts", "mp4"])
         self.live_format_combo.setCurrentText("ts")
         
         # 视频画质
@@ -4,6 +4,7 @@ VideoHub 核心模块包
 
 from .chinese_tts import ChineseTTS, text_to_speech, check_kokoro_available
 from .dubbing_engine import VideoDubbingEngine, DubbingTask, create_dubbed_video
+from .dubbing_queue import DubbingQueue, DubbingJob, create_dubbed_videos
 from .audio_utils import (
     extract_audio,
     combine_video_audio,
@@ -19,6 +20,9 @@ __all__ = [
     'VideoDubbingEngine',
     'DubbingTask',
     'create_dubbed_video',
+    'DubbingQueue',
+    'DubbingJob',
+    'create_dubbed_videos',
     'extract_audio',
     'combine_video_audio',
     'get_audio_duration',
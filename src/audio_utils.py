@@ -52,12 +52,73 @@ def extract_audio(
     return output_audio
 
 
+def escape_filter_path(path: str) -> str:
+    """
+    转义 ffmpeg 滤镜参数中的文件路径
+
+    外层单引号保护滤镜图分隔符（逗号、分号、方括号、空格），
+    内层 \\: 转义滤镜选项分隔符（Windows 盘符冒号）。路径中不应包含单引号。
+    """
+    normalized = os.path.abspath(path).replace('\\', '/').replace(':', '\\:')
+    return f"'{normalized}'"
+
+
+def build_combine_command(
+    video_path: str,
+    audio_path: str,
+    output_path: str,
+    keep_original_audio: bool = False,
+    original_audio_volume: float = 0.1,
+    subtitle_path: Optional[str] = None,
+    crf: int = 20,
+) -> list:
+    """
+    构建合并视频和配音的 ffmpeg 命令
+
+    不烧录字幕时直接复制视频流；烧录字幕时在同一个滤镜图里完成
+    混音和字幕渲染，只编码一次视频，避免先合成再重编码的二次读写。
+    """
+    filters = []
+    if keep_original_audio:
+        # 混音模式：新音频 + 降低音量的原音频
+        filters.append(f'[0:a]volume={original_audio_volume}[bg];[bg][1:a]amix=inputs=2:duration=first[aout]')
+        audio_map = '[aout]'
+    else:
+        audio_map = '1:a:0'
+
+    if subtitle_path:
+        subtitle_filter = 'ass' if Path(subtitle_path).suffix.lower() == '.ass' else 'subtitles'
+        filters.append(f'[0:v:0]{subtitle_filter}={escape_filter_path(subtitle_path)}[vout]')
+        video_map = '[vout]'
+    else:
+        video_map = '0:v:0'
+
+    cmd = ['ffmpeg', '-y', '-i', video_path, '-i', audio_path]
+    if filters:
+        cmd.extend(['-filter_complex', ';'.join(filters)])
+    cmd.extend(['-map', video_map, '-map', audio_map])
+
+    if subtitle_path:
+        cmd.extend(['-c:v', 'libx264', '-crf', str(crf), '-pix_fmt', 'yuv420p', '-vsync', 'cfr'])
+    else:
+        cmd.extend(['-c:v', 'copy'])  # 复制视频流
+
+    cmd.extend(['-c:a', 'aac', '-b:a', '192k'])
+    if not keep_original_audio:
+        cmd.append('-shortest')  # 以较短者为准
+    if Path(output_path).suffix.lower() in ('.mp4', '.mov', '.m4v'):
+        cmd.extend(['-movflags', '+faststart'])
+    cmd.append(output_path)
+    return cmd
+
+
 def combine_video_audio(
     video_path: str,
     audio_path: str,
     output_path: str,
     keep_original_audio: bool = False,
-    original_audio_volume: float = 0.1
+    original_audio_volume: float = 0.1,
+    subtitle_path: Optional[str] = None
 ) -> str:
     """
     合并视频和新的音频
@@ -68,6 +129,7 @@ def combine_video_audio(
         output_path: 输出视频路径
         keep_original_audio: 是否保留原音频作为背景音
         original_audio_volume: 原音频音量（0.0-1.0）
+        subtitle_path: 需要烧录的字幕（SRT/ASS），为空时复制视频流不重编码
 
     Returns:
         输出视频路径
@@ -77,35 +139,14 @@ def combine_video_audio(
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
-    if keep_original_audio:
-        # 混音模式：新音频 + 降低音量的原音频
-        cmd = [
-            'ffmpeg', '-y',
-            '-i', video_path,
-            '-i', audio_path,
-            '-filter_complex',
-            f'[0:a]volume={original_audio_volume}[bg];[bg][1:a]amix=inputs=2:duration=first[aout]',
-            '-map', '0:v:0',
-            '-map', '[aout]',
-            '-c:v', 'copy',
-            '-c:a', 'aac',
-            '-b:a', '192k',
-            output_path
-        ]
-    else:
-        # 替换音轨模式
-        cmd = [
-            'ffmpeg', '-y',
-            '-i', video_path,
-            '-i', audio_path,
-            '-c:v', 'copy',  # 复制视频流
-            '-map', '0:v:0',  # 使用第一个输入的视频
-            '-map', '1:a:0',  # 使用第二个输入的音频
-            '-c:a', 'aac',  # AAC 编码
-            '-b:a', '192k',
-            '-shortest',  # 以较短者为准
-            output_path
-        ]
+    cmd = build_combine_command(
+        video_path,
+        audio_path,
+        output_path,
+        keep_original_audio=keep_original_audio,
+        original_audio_volume=original_audio_volume,
+        subtitle_path=subtitle_path,
+    )
 
     try:
         result = subprocess.run(cmd, check=True, capture_output=True, text=True)
@@ -5,6 +5,7 @@
 
 import os
 import re
+import threading
 import time
 import numpy as np
 from pathlib import Path
@@ -60,6 +61,20 @@ class ChineseTTS:
         'yunyang': '云扬 (男声)',
     }
 
+    # 按语言共享的 KPipeline，多个配音任务复用同一份模型权重
+    _shared_pipelines: Dict[str, "KPipeline"] = {}
+    _pipeline_lock = threading.Lock()
+
+    @classmethod
+    def get_shared_pipeline(cls, lang_code: str = 'z'):
+        """获取进程内共享的 Kokoro 管线，首次调用时加载"""
+        with cls._pipeline_lock:
+            pipeline = cls._shared_pipelines.get(lang_code)
+            if pipeline is None:
+                pipeline = KPipeline(lang_code=lang_code)
+                cls._shared_pipelines[lang_code] = pipeline
+            return pipeline
+
     def __init__(self, voice: str = 'xiaobei', speed: float = 1.0):
         """
         初始化 TTS
@@ -73,7 +88,7 @@ class ChineseTTS:
 
         self.voice_name = self.VOICES.get(voice, 'zf_xiaobei')
         self.speed = speed
-        self.pipeline = KPipeline(lang_code='z')  # 'z' = 中文普通话
+        self.pipeline = self.get_shared_pipeline('z')  # 'z' = 中文普通话
 
     def _get_temp_audio_path(self) -> str:
         """获取临时音频文件路径，使用 workspace/dubbing_temp/"""
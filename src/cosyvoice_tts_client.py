@@ -4,16 +4,27 @@ from __future__ import annotations
 
 import os
 import re
+import struct
 import time
 from pathlib import Path
-from typing import Literal
+from typing import Iterator, Literal
 
+import numpy as np
 import requests
 
+try:
+    from .http_session import create_pooled_session
+except ImportError:
+    from http_session import create_pooled_session
+
 
 CosyVoiceMode = Literal["sft", "instruct"]
 
 
+class StreamingUnsupportedError(RuntimeError):
+    """Raised when the running tts_service predates the ``/stream`` endpoints."""
+
+
 class CosyVoiceTTSClient:
     def __init__(
         self,
@@ -22,6 +33,10 @@ class CosyVoiceTTSClient:
         speaker: str = "中文女",
         instruction: str = "",
         timeout: int = 600,
+        stream: bool = True,
+        persist: bool = False,
+        session: requests.Session | None = None,
+        pool_size: int | None = None,
     ) -> None:
         self.base_url = (base_url or os.getenv("COSYVOICE_TTS_URL") or "http://127.0.0.1:8877").rstrip("/")
         self.mode = mode if mode in {"sft", "instruct"} else "sft"
@@ -31,13 +46,19 @@ class CosyVoiceTTSClient:
             "用自然、清晰、适合视频讲解的语气朗读，句子之间保留适当停顿。",
         )
         self.timeout = timeout
+        # Streaming avoids the shared-filesystem round trip through outputs/;
+        # it is switched off automatically against older services.
+        self.stream = stream
+        self.persist = persist
+        # One keep-alive pool per client instead of a new TCP connection per segment.
+        self.session = session or create_pooled_session(pool_size)
 
     def check_health(self) -> dict:
-        response = requests.get(f"{self.base_url}/health", timeout=10)
+        response = self.session.get(f"{self.base_url}/health", timeout=10)
         response.raise_for_status()
         return response.json()
 
-    def synthesize(self, text: str) -> str:
+    def _build_request(self, text: str) -> tuple[str, dict]:
         text = self._clean_text(text)
         if not text:
             raise ValueError("CosyVoice TTS 文本为空")
@@ -55,8 +76,11 @@ class CosyVoiceTTSClient:
                 "text": text,
                 "speaker": self.speaker,
             }
+        return endpoint, payload
 
-        response = requests.post(endpoint, json=payload, timeout=self.timeout)
+    def synthesize(self, text: str) -> str:
+        endpoint, payload = self._build_request(text)
+        response = self.session.post(endpoint, json=payload, timeout=self.timeout)
         if not response.ok:
             raise RuntimeError(f"CosyVoice TTS 请求失败: {response.status_code} {response.text}")
 
@@ -66,6 +90,94 @@ class CosyVoiceTTSClient:
             raise RuntimeError(f"CosyVoice TTS 未返回有效音频文件: {data}")
         return file_path
 
+    def iter_audio_chunks(self, text: str) -> Iterator[tuple[np.ndarray, int]]:
+        """Yield ``(float32 mono samples, sample_rate)`` as the service streams segments back.
+
+        Raises ``RuntimeError`` when the stream is cut off, so a truncated dub
+        never passes for a complete one.
+        """
+        endpoint, payload = self._build_request(text)
+        params = {"audio_format": "pcm", "persist": "true" if self.persist else "false", "framed": "true"}
+        with self.session.post(
+            f"{endpoint}/stream",
+            json=payload,
+            params=params,
+            timeout=self.timeout,
+            stream=True,
+        ) as response:
+            if response.status_code in {404, 405}:
+                raise StreamingUnsupportedError(f"CosyVoice 服务不支持流式接口: {response.status_code}")
+            if not response.ok:
+                raise RuntimeError(f"CosyVoice TTS 请求失败: {response.status_code} {response.text}")
+
+            sample_rate = int(response.headers.get("X-Sample-Rate", "22050"))
+            try:
+                if response.headers.get("X-Framing") == "segments":
+                    yield from self._iter_framed(response, sample_rate)
+                else:
+                    # Services without segment framing: rely on the aborted connection.
+                    yield from self._iter_raw(response, sample_rate)
+            except requests.RequestException as exc:
+                raise RuntimeError(f"CosyVoice TTS 流式音频中断: {exc}") from exc
+
+    def _iter_raw(self, response, sample_rate: int) -> Iterator[tuple[np.ndarray, int]]:
+        pending = b""
+        for block in response.iter_content(chunk_size=64 * 1024):
+            if not block:
+                continue
+            pending += block
+            usable = len(pending) - len(pending) % 2
+            if usable:
+                yield self._pcm16_to_float(pending[:usable]), sample_rate
+                pending = pending[usable:]
+        if pending:
+            raise RuntimeError("CosyVoice TTS 流式音频中断: 末尾样本不完整")
+
+    def _iter_framed(self, response, sample_rate: int) -> Iterator[tuple[np.ndarray, int]]:
+        """Each segment arrives as a uint32 byte length followed by its PCM; count them against X-Segments."""
+        expected = int(response.headers.get("X-Segments", "0"))
+        received = 0
+        pending = b""
+        for block in response.iter_content(chunk_size=64 * 1024):
+            pending += block
+            while len(pending) >= 4:
+                (size,) = struct.unpack("<I", pending[:4])
+                if len(pending) < 4 + size:
+                    break
+                yield self._pcm16_to_float(pending[4 : 4 + size]), sample_rate
+                pending = pending[4 + size :]
+                received += 1
+        if pending or received != expected:
+            raise RuntimeError(f"CosyVoice TTS 流式音频中断: 收到 {received}/{expected} 段")
+
+    def synthesize_array(self, text: str) -> tuple[np.ndarray, int]:
+        """Return the synthesized audio in memory, without reading the service's output file."""
+        if self.stream:
+            try:
+                chunks = []
+                sample_rate = 0
+                for chunk, sample_rate in self.iter_audio_chunks(text):
+                    chunks.append(chunk)
+                if not chunks:
+                    raise RuntimeError("CosyVoice TTS 流式接口未返回音频")
+                return np.concatenate(chunks), sample_rate
+            except StreamingUnsupportedError:
+                self.stream = False
+
+        import soundfile as sf
+
+        audio, sample_rate = sf.read(self.synthesize(text), always_2d=False)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        return audio.astype(np.float32), sample_rate
+
+    def close(self) -> None:
+        self.session.close()
+
+    @staticmethod
+    def _pcm16_to_float(data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
     @staticmethod
     def _clean_text(text: str) -> str:
         text = re.sub(r"<[^>]+>", "", text or "")
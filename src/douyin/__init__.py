@@ -14,10 +14,16 @@ from .downloader import DouyinDownloader
 from .config import DouyinConfig
 from .utils import DouyinUtils
 from .douyinvd_extractor import DouyinVdExtractor
+from .ranged_downloader import RangedDownloader, RangedDownloadError
+from .batch import BatchDownloader, DownloadIndex
 
 __all__ = [
     'DouyinDownloader',
     'DouyinConfig',
     'DouyinUtils',
-    'DouyinVdExtractor'
+    'DouyinVdExtractor',
+    'RangedDownloader',
+    'RangedDownloadError',
+    'BatchDownloader',
+    'DownloadIndex'
 ]
\ No newline at end of file
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+抖音批量下载执行器
+有界并发 + 按主机限速 + 抖动退避重试，配合按 aweme_id 持久化的已下载索引，
+重复下载同一主页时已完成的作品直接跳过，无需重新解析。
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+INDEX_FILENAME = "download_index.json"
+
+_AWEME_ID_PATTERNS = (
+    re.compile(r"/(?:video|note)/(\d{8,})"),
+    re.compile(r"[?&](?:modal_id|aweme_id)=(\d{8,})"),
+)
+
+
+def aweme_id_from_url(url: str) -> Optional[str]:
+    """从长链接中直接提取 aweme_id（不展开短链，不发请求），提取不到返回 None"""
+    for pattern in _AWEME_ID_PATTERNS:
+        match = pattern.search(url or "")
+        if match:
+            return match.group(1)
+    return None
+
+
+class DownloadIndex:
+    """按 aweme_id 记录已下载作品的持久化索引"""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except (OSError, ValueError) as e:
+            print(f"读取下载索引失败，将重新建立: {e}")
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, aweme_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """返回已下载记录；文件已被删除的记录视为未下载"""
+        if not aweme_id:
+            return None
+        with self._lock:
+            entry = self._entries.get(str(aweme_id))
+        if entry and entry.get("path") and os.path.exists(entry["path"]):
+            return entry
+        return None
+
+    def __contains__(self, aweme_id: Optional[str]) -> bool:
+        return self.get(aweme_id) is not None
+
+    def add(self, aweme_id: str, path: str, **extra: Any) -> None:
+        with self._lock:
+            self._entries[str(aweme_id)] = {"path": path, "downloaded_at": time.time(), **extra}
+            self._save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class HostRateLimiter:
+    """同一主机的请求之间至少间隔 min_interval 秒"""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._next_allowed: Dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        if self.min_interval <= 0:
+            return
+        host = urlparse(url).netloc or url
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BatchDownloader:
+    """有界并发的批量下载执行器"""
+
+    def __init__(
+        self,
+        index: Optional[DownloadIndex] = None,
+        max_workers: int = 3,
+        host_interval: float = 1.0,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        """
+        :param index: 已下载索引（为空则不做跳过和记录）
+        :param max_workers: 同时下载的作品数
+        :param host_interval: 同一主机两次请求之间的最小间隔（秒）
+        :param max_retries: 失败后的重试次数
+        :param retry_delay: 退避基数（秒），按 2 的指数增长并加随机抖动
+        :param max_backoff: 单次退避上限（秒）
+        """
+        self.index = index
+        self.max_workers = max(1, int(max_workers))
+        self.rate_limiter = HostRateLimiter(host_interval)
+        self.max_retries = max(0, int(max_retries))
+        self.retry_delay = max(0.0, float(retry_delay))
+        self.max_backoff = max_backoff
+        self._callback_lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待时间（全抖动指数退避）"""
+        ceiling = min(self.max_backoff, self.retry_delay * (2 ** (attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def run(
+        self,
+        items: Sequence[Tuple[Optional[str], str]],
+        download_fn: Callable[[str, int], Dict[str, Any]],
+        on_done: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        并发执行下载
+        :param items: (aweme_id 或 None, url) 列表
+        :param download_fn: 实际下载函数(url, 序号)，返回带 success 的结果字典
+        :param on_done: 每个作品结束时的回调(已完成数, 总数, 结果)，回调之间互斥
+        :return: 与 items 顺序一致的结果列表；跳过的作品带 skipped=True
+        """
+        total = len(items)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        finished = [0]
+
+        def _job(position: int) -> None:
+            aweme_id, url = items[position]
+            result = self._download_one(aweme_id, url, position, download_fn)
+            results[position] = result
+            with self._callback_lock:
+                finished[0] += 1
+                if on_done:
+                    on_done(finished[0], total, result)
+
+        if total:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, total), thread_name_prefix="douyin-batch") as executor:
+                for future in [executor.submit(_job, i) for i in range(total)]:
+                    future.result()
+        return [result for result in results if result is not None]
+
+    def _download_one(
+        self,
+        aweme_id: Optional[str],
+        url: str,
+        position: int,
+        download_fn: Callable[[str, int], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        existing = self.index.get(aweme_id) if self.index is not None else None
+        if existing:
+            return {"success": True, "skipped": True, "aweme_id": aweme_id, "url": url, "path": existing["path"]}
+
+        result: Dict[str, Any] = {"success": False, "error": "未执行下载"}
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff(attempt))
+            self.rate_limiter.wait(url)
+            try:
+                result = download_fn(url, position)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            if result.get("success"):
+                break
+            print(f"下载失败 ({attempt + 1}/{self.max_retries + 1}) {aweme_id or url}: {result.get('error')}")
+
+        result.setdefault("url", url)
+        if result.get("success"):
+            self._record(aweme_id, result)
+        return result
+
+    def _record(self, aweme_id: Optional[str], result: Dict[str, Any]) -> None:
+        if self.index is None:
+            return
+        aweme_id = aweme_id or (result.get("video_info") or {}).get("aweme_id")
+        video_files = [item for item in result.get("downloaded_files", []) if item.get("type") == "video"]
+        if aweme_id and aweme_id != "unknown" and video_files:
+            self.index.add(aweme_id, video_files[0]["path"], url=result.get("url"))
@@ -45,6 +45,9 @@ class DouyinConfig:
         # 并发设置
         "max_workers": 4,
         "concurrent_downloads": 3,
+        "download_connections": 4,  # 单个文件的分段并发连接数
+        "min_split_size": 4 * 1024 * 1024,  # 小于该大小的文件不分段
+        "host_request_interval": 1.0,  # 同一主机两次请求的最小间隔(秒)
         
         # 代理设置
         "proxy": None,
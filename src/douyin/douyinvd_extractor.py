@@ -18,6 +18,8 @@ if str(_root_path) not in sys.path:
     sys.path.insert(0, str(_root_path))
 
 from paths_config import DOUYIN_DOWNLOADS_DIR
+
+from .ranged_downloader import RangedDownloader
 
 # 使用 importlib 避免循环导入
 import importlib.util
@@ -140,12 +142,14 @@ class DouyinVdExtractor:
             print(f"标准化视频信息失败: {e}")
             return video_info.to_dict() if hasattr(video_info, 'to_dict') else {}
     
-    def download_video(self, douyin_url: str, download_dir: str = DOUYIN_DOWNLOADS_DIR, save_metadata: bool = False) -> Dict[str, Any]:
+    def download_video(self, douyin_url: str, download_dir: str = DOUYIN_DOWNLOADS_DIR, save_metadata: bool = False,
+                       max_retries: Optional[int] = None) -> Dict[str, Any]:
         """
         下载抖音视频
         :param douyin_url: 抖音分享链接
         :param download_dir: 下载目录
         :param save_metadata: 是否保存 JSON 元数据
+        :param max_retries: 每个分段的重试次数，None 表示使用配置（外层已负责重试时传 0）
         :return: 下载结果
         """
         try:
@@ -154,8 +158,8 @@ class DouyinVdExtractor:
             if not video_info:
                 return {"success": False, "error": "无法获取视频信息"}
             
-            # 获取下载链接
-            video_url = self.get_video_url(douyin_url)
+            # 获取下载链接（信息里已带直链，避免重复请求解析接口）
+            video_url = (video_info.get("video") or {}).get("play_url_no_watermark") or self.get_video_url(douyin_url)
             if not video_url:
                 return {"success": False, "error": "无法获取视频下载链接"}
             
@@ -175,29 +179,28 @@ class DouyinVdExtractor:
             filename = f"{base_filename}_no_watermark.mp4"
             filepath = os.path.join(download_dir, filename)
             
-            # 下载视频文件
-            import requests
+            # 下载视频文件：多连接分段下载，中断后可续传
             print(f"开始下载视频: {filename}")
-            
+
             headers = {
                 "User-Agent": "Mozilla/5.0 (Linux; Android 11; SAMSUNG SM-G973U) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/14.2 Chrome/87.0.4280.141 Mobile Safari/537.36",
                 "Referer": "https://www.douyin.com/"
             }
-            response = requests.get(video_url, headers=headers, stream=True, timeout=60)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        if total_size > 0:
-                            progress = (downloaded_size / total_size) * 100
-                            print(f"\r下载进度: {progress:.1f}%", end="", flush=True)
-            
+            downloader = RangedDownloader(
+                headers=headers,
+                connections=config.get("download_connections", 4),
+                min_split_size=config.get("min_split_size", 4 * 1024 * 1024),
+                timeout=60,
+                max_retries=config.get("max_retries", 3) if max_retries is None else max_retries,
+                retry_delay=config.get("retry_delay", 1),
+            )
+
+            def _print_progress(downloaded: int, total: Optional[int]):
+                if total:
+                    print(f"\r下载进度: {downloaded / total * 100:.1f}%", end="", flush=True)
+
+            downloader.download(video_url, filepath, progress_callback=_print_progress)
+
             print(f"\n视频下载完成: {filepath}")
 
             downloaded_files = [
@@ -14,6 +14,7 @@ import requests
 from .config import DouyinConfig
 from .utils import DouyinUtils
 from .douyinvd_extractor import DouyinVdExtractor
+from .batch import BatchDownloader, DownloadIndex, INDEX_FILENAME, aweme_id_from_url
 
 class DouyinDownloader:
     """抖音视频下载器"""
@@ -40,11 +41,13 @@ class DouyinDownloader:
         # 初始化新的提取器（使用douyin.py）
         self.douyinvd_extractor = DouyinVdExtractor(port=port)
     
-    def download_video(self, url: str, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+    def download_video(self, url: str, progress_callback: Optional[Callable] = None,
+                       range_retries: Optional[int] = None) -> Dict[str, Any]:
         """
         下载单个视频
         :param url: 抖音视频链接
         :param progress_callback: 进度回调函数
+        :param range_retries: 分段下载的重试次数，None 表示使用配置
         :return: 下载结果
         """
         try:
@@ -53,7 +56,7 @@ class DouyinDownloader:
             if progress_callback:
                 progress_callback("正在下载抖音视频...", 5)
             
-            douyinvd_result = self._download_with_douyinvd(url, progress_callback)
+            douyinvd_result = self._download_with_douyinvd(url, progress_callback, range_retries)
             if douyinvd_result.get("success"):
                 print("下载成功")
                 return douyinvd_result
@@ -75,42 +78,41 @@ class DouyinDownloader:
         """
         try:
             total_count = len(urls)
-            results = []
-            successful_count = 0
-            failed_count = 0
-            
-            print(f"开始批量下载 {total_count} 个视频...")
-            
-            for i, url in enumerate(urls):
-                print(f"下载进度: {i+1}/{total_count}")
-                if progress_callback:
-                    overall_progress = int((i / total_count) * 100)
-                    progress_callback(f"正在下载第 {i+1}/{total_count} 个视频", overall_progress)
-                
-                # 单个视频下载进度回调
+            print(f"开始批量下载 {total_count} 个视频（并发 {self.config.get('concurrent_downloads', 3)}）...")
+
+            progress_state = {"overall": 0}
+
+            # 单个视频下载进度回调：并发时只转发消息，总进度由完成数决定
+            def single_progress_for(i: int):
                 def single_progress(msg, progress):
                     if progress_callback:
-                        # 将单个视频的进度映射到总进度
-                        base_progress = int((i / total_count) * 100)
-                        current_progress = base_progress + int((progress / 100) * (100 / total_count))
-                        progress_callback(f"第 {i+1}/{total_count} 个视频: {msg}", current_progress)
-                
-                result = self.download_video(url, single_progress)
-                results.append(result)
-                
-                if result["success"]:
-                    successful_count += 1
-                else:
-                    failed_count += 1
-                
-                # 添加延迟避免请求过快
-                time.sleep(self.config.get("retry_delay", 1))
-            
+                        progress_callback(f"第 {i+1}/{total_count} 个视频: {msg}", progress_state["overall"])
+                return single_progress
+
+            def on_done(done: int, total: int, result: Dict[str, Any]):
+                progress_state["overall"] = int(done / total * 100)
+                print(f"下载进度: {done}/{total}")
+                if progress_callback:
+                    progress_callback(f"已完成 {done}/{total} 个视频", progress_state["overall"])
+
+            items = [(aweme_id_from_url(url), url) for url in urls]
+            batch = self._build_batch_downloader()
+            # 批量层已带退避重试时分段不再各自重试，避免两层重试次数相乘；重试时从 .part 续传
+            range_retries = 0 if batch.max_retries else None
+            results = batch.run(
+                items,
+                lambda url, i: self.download_video(url, single_progress_for(i), range_retries),
+                on_done=on_done,
+            )
+
+            skipped_count = sum(1 for r in results if r.get("skipped"))
+            successful_count = sum(1 for r in results if r.get("success"))
             batch_result = {
                 "success": True,
                 "total_count": total_count,
                 "successful_count": successful_count,
-                "failed_count": failed_count,
+                "failed_count": total_count - successful_count,
+                "skipped_count": skipped_count,
                 "results": results
             }
             
@@ -122,63 +124,17 @@ class DouyinDownloader:
         except Exception as e:
             print(f"批量下载失败: {e}")
             return {"success": False, "error": str(e)}
-    
-    def _download_file(self, url: str, filename: str, progress_callback: Optional[Callable] = None, 
-                      progress_start: int = 0, progress_end: int = 100) -> Optional[str]:
-        """
-        下载文件
-        :param url: 文件URL
-        :param filename: 文件名
-        :param progress_callback: 进度回调
-        :param progress_start: 进度起始点
-        :param progress_end: 进度结束点
-        :return: 下载后的文件路径
-        """
-        try:
-            # 构建文件路径
-            file_path = os.path.join(self.config.get("download_dir"), filename)
-            
-            # 检查文件是否已存在
-            if os.path.exists(file_path):
-                print(f"文件已存在: {filename}")
-                return file_path
-            
-            # 发送请求
-            headers = self.config.get_headers()
-            headers.update({
-                'Referer': 'https://www.douyin.com/',
-                'Range': 'bytes=0-'  # 支持断点续传
-            })
-            
-            response = self.session.get(url, headers=headers, stream=True, timeout=self.config.get("timeout"))
-            response.raise_for_status()
-            
-            # 获取文件大小
-            total_size = int(response.headers.get('Content-Length', 0))
-            chunk_size = self.config.get("chunk_size", 1024 * 1024)
-            downloaded_size = 0
-            
-            print(f"开始下载: {filename} ({DouyinUtils.format_file_size(total_size)})")
-            
-            # 写入文件
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        
-                        # 更新进度
-                        if progress_callback and total_size > 0:
-                            file_progress = int((downloaded_size / total_size) * 100)
-                            overall_progress = progress_start + int((file_progress / 100) * (progress_end - progress_start))
-                            progress_callback(f"下载 {filename}: {file_progress}%", overall_progress)
-            
-            print(f"下载完成: {filename}")
-            return file_path
-            
-        except Exception as e:
-            print(f"下载文件失败 {filename}: {e}")
-            return None
+
+    def _build_batch_downloader(self) -> BatchDownloader:
+        """按配置创建批量下载执行器，已下载索引存放在下载目录下"""
+        index = DownloadIndex(os.path.join(self.config.get("download_dir"), INDEX_FILENAME))
+        return BatchDownloader(
+            index=index,
+            max_workers=self.config.get("concurrent_downloads", 3),
+            host_interval=self.config.get("host_request_interval", 1.0),
+            max_retries=self.config.get("max_retries", 3),
+            retry_delay=self.config.get("retry_delay", 1),
+        )
     
     def get_video_info(self, url: str) -> Optional[Dict[str, Any]]:
         """
@@ -299,32 +255,33 @@ class DouyinDownloader:
             if progress_callback:
                 progress_callback(f"共找到 {total} 个视频，开始下载...", 10)
 
-            success_count = 0
-            fail_count = 0
-
-            for i, aweme_id in enumerate(aweme_ids):
-                pct = 10 + int((i / total) * 88)
+            def on_done(done: int, total_done: int, result: Dict[str, Any]):
                 if progress_callback:
-                    progress_callback(f"[{i+1}/{total}] 正在下载 {aweme_id}...", pct)
+                    status = "已存在，跳过" if result.get("skipped") else ("完成" if result.get("success") else "失败")
+                    progress_callback(f"[{done}/{total_done}] {result.get('aweme_id') or ''} {status}", 10 + int(done / total_done * 88))
 
-                video_url = f"https://www.douyin.com/video/{aweme_id}"
-                result = self._download_with_douyinvd(video_url)
-                if result.get("success"):
-                    success_count += 1
-                else:
-                    fail_count += 1
-                    print(f"下载失败 {aweme_id}: {result.get('error')}")
+            items = [(aweme_id, f"https://www.douyin.com/video/{aweme_id}") for aweme_id in aweme_ids]
+            batch = self._build_batch_downloader()
+            range_retries = 0 if batch.max_retries else None
+            results = batch.run(
+                items,
+                lambda url, i: dict(self._download_with_douyinvd(url, range_retries=range_retries), aweme_id=aweme_ids[i]),
+                on_done=on_done,
+            )
 
-                time.sleep(self.config.get("retry_delay", 1))
+            success_count = sum(1 for r in results if r.get("success"))
+            fail_count = total - success_count
+            skipped_count = sum(1 for r in results if r.get("skipped"))
 
             if progress_callback:
-                progress_callback(f"批量下载完成：成功 {success_count} 个，失败 {fail_count} 个", 100)
+                progress_callback(f"批量下载完成：成功 {success_count} 个（跳过已下载 {skipped_count} 个），失败 {fail_count} 个", 100)
 
             return {
                 "success": True,
                 "total_count": total,
                 "successful_count": success_count,
                 "failed_count": fail_count,
+                "skipped_count": skipped_count,
             }
 
         except Exception as e:
@@ -346,7 +303,7 @@ class DouyinDownloader:
             cleaned_size = 0
             
             for file_path in download_dir.iterdir():
-                if file_path.is_file():
+                if file_path.is_file() and file_path.name != INDEX_FILENAME:
                     file_stat = file_path.stat()
                     if file_stat.st_mtime < cutoff_time:
                         file_size = file_stat.st_size
@@ -368,11 +325,13 @@ class DouyinDownloader:
             print(f"清理文件失败: {e}")
             return {"success": False, "error": str(e)}
     
-    def _download_with_douyinvd(self, url: str, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+    def _download_with_douyinvd(self, url: str, progress_callback: Optional[Callable] = None,
+                                range_retries: Optional[int] = None) -> Dict[str, Any]:
         """
         使用 douyinVd 下载视频
         :param url: 视频URL
         :param progress_callback: 进度回调函数
+        :param range_retries: 分段下载的重试次数，None 表示使用配置
         :return: 下载结果
         """
         try:
@@ -386,6 +345,7 @@ class DouyinDownloader:
                 url,
                 download_dir,
                 save_metadata=self.config.get("save_metadata", False),
+                max_retries=range_retries,
             )
             
             if result.get("success"):
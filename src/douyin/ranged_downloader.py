@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多连接分段下载器
+探测文件大小和 Range 支持，把大文件拆成多个字节区间并发写入预分配的 .part 文件，
+用 .part.json 记录每个区间的进度，中断后可以真正续传，完成后原子重命名为目标文件。
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+
+
+class RangedDownloadError(Exception):
+    """分段下载失败"""
+
+
+class RangedDownloader:
+    """支持多连接与断点续传的 HTTP 文件下载器"""
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        headers: Optional[Dict[str, str]] = None,
+        connections: int = 4,
+        min_split_size: int = 4 * 1024 * 1024,
+        chunk_size: int = 256 * 1024,
+        timeout: float = 30,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        """
+        :param session: 复用的 requests 会话（为空则新建）
+        :param headers: 每个请求附带的请求头
+        :param connections: 最大并发连接数
+        :param min_split_size: 小于该大小的文件只用一个连接
+        :param chunk_size: 每次读取的块大小
+        :param timeout: 单次请求超时（秒）
+        :param max_retries: 每个区间失败后的重试次数
+        :param retry_delay: 重试间隔基数（秒），按次数线性增加
+        """
+        self.session = session or requests.Session()
+        self.headers = dict(headers or {})
+        self.connections = max(1, int(connections))
+        self.min_split_size = max(1, int(min_split_size))
+        self.chunk_size = max(1024, int(chunk_size))
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.retry_delay = retry_delay
+        self._state_lock = threading.Lock()
+
+    def probe(self, url: str) -> Dict[str, Any]:
+        """
+        探测文件大小、是否支持 Range 以及校验标识
+        :return: {"size": int|None, "accept_ranges": bool, "etag": str, "last_modified": str, "url": 最终地址}
+        """
+        headers = dict(self.headers)
+        headers["Range"] = "bytes=0-0"
+        response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout, allow_redirects=True)
+        try:
+            response.raise_for_status()
+            size = None
+            accept_ranges = False
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 206 and "/" in content_range:
+                total = content_range.rsplit("/", 1)[1].strip()
+                if total.isdigit():
+                    size = int(total)
+                    accept_ranges = True
+            elif response.headers.get("Content-Length", "").isdigit():
+                size = int(response.headers["Content-Length"])
+            return {
+                "size": size,
+                "accept_ranges": accept_ranges,
+                "etag": response.headers.get("ETag", ""),
+                "last_modified": response.headers.get("Last-Modified", ""),
+                "url": response.url or url,
+            }
+        finally:
+            response.close()
+
+    def download(
+        self,
+        url: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> str:
+        """
+        下载到 file_path，已存在完整文件时直接返回
+        :param progress_callback: 进度回调(已下载字节, 总字节或 None)
+        :return: 文件路径
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        part_path = file_path + PART_SUFFIX
+        state_path = file_path + STATE_SUFFIX
+
+        info = self.probe(url)
+        url = info["url"]
+        size = info["size"]
+
+        if self._is_complete(file_path, part_path, state_path, size):
+            return file_path
+
+        if not info["accept_ranges"] or not size:
+            # 服务器不支持 Range：只能单连接从头下载
+            self._discard_partial(part_path, state_path)
+            self._download_stream(url, part_path, size, progress_callback)
+        else:
+            state = self._load_state(state_path, info)
+            if state is None or not os.path.exists(part_path):
+                state = self._new_state(info)
+                self._preallocate(part_path, size)
+                self._save_state(state_path, state)
+            self._download_ranges(url, part_path, state_path, state, progress_callback)
+
+        actual_size = os.path.getsize(part_path)
+        if size and actual_size != size:
+            raise RangedDownloadError(f"下载不完整: {actual_size}/{size} 字节")
+
+        os.replace(part_path, file_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return file_path
+
+    @staticmethod
+    def _is_complete(file_path: str, part_path: str, state_path: str, size: Optional[int]) -> bool:
+        """
+        已有文件可以直接使用：没有未完成的 .part/.part.json，且大小与服务器一致
+        （旧版非原子下载可能留下截断文件，不能只看文件是否存在）；服务器不报大小时无法校验，按完整处理
+        """
+        if not os.path.exists(file_path):
+            return False
+        if os.path.exists(part_path) or os.path.exists(state_path):
+            return False
+        return not size or os.path.getsize(file_path) == size
+
+    def _new_state(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        size = info["size"]
+        count = 1 if size < self.min_split_size else min(self.connections, max(1, size // self.min_split_size))
+        step = -(-size // count)
+        ranges = []
+        for index in range(count):
+            start = index * step
+            end = min(size, start + step) - 1
+            if start <= end:
+                ranges.append({"start": start, "end": end, "done": 0})
+        return {
+            "size": size,
+            "etag": info["etag"],
+            "last_modified": info["last_modified"],
+            "ranges": ranges,
+        }
+
+    def _load_state(self, state_path: str, info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """读取续传记录；文件大小或校验标识变化时作废（抖音直链会变，不比对 URL）"""
+        if not os.path.exists(state_path):
+            return None
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("size") != info["size"]:
+            return None
+        for key in ("etag", "last_modified"):
+            if state.get(key) and info[key] and state[key] != info[key]:
+                return None
+        return state
+
+    def _save_state(self, state_path: str, state: Dict[str, Any]) -> None:
+        with self._state_lock:
+            tmp_path = state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, state_path)
+
+    @staticmethod
+    def _sync_part(part_path: str) -> None:
+        """把各连接已写入的数据刷到磁盘，之后再保存进度，避免断电后进度记录超前于实际数据"""
+        with open(part_path, "r+b") as f:
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _preallocate(part_path: str, size: int) -> None:
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+
+    @staticmethod
+    def _discard_partial(part_path: str, state_path: str) -> None:
+        for path in (part_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _download_ranges(
+        self,
+        url: str,
+        part_path: str,
+        state_path: str,
+        state: Dict[str, Any],
+        progress_callback: Optional[Callable[[int, Optional[int]], None]],
+    ) -> None:
+        ranges: List[Dict[str, int]] = state["ranges"]
+        total = state["size"]
+        progress = {"bytes": sum(item["done"] for item in ranges), "saved_at": time.time()}
+        lock = threading.Lock()
+
+        def on_bytes(count: int) -> None:
+            with lock:
+                progress["bytes"] += count
+                downloaded = progress["bytes"]
+                # 进度记录最多每秒落盘一次
+                should_save = time.time() - progress["saved_at"] >= 1.0
+                if should_save:
+                    progress["saved_at"] = time.time()
+            if should_save:
+                self._sync_part(part_path)
+                self._save_state(state_path, state)
+            if progress_callback:
+                progress_callback(downloaded, total)
+
+        pending = [item for item in ranges if item["start"] + item["done"] <= item["end"]]
+        errors: List[Exception] = []
+        with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+            futures = [executor.submit(self._fetch_range, url, part_path, item, on_bytes) for item in pending]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as exc:
+                    errors.append(exc)
+
+        self._sync_part(part_path)
+        self._save_state(state_path, state)
+        if errors:
+            raise RangedDownloadError(f"分段下载失败（已保存进度，可续传）: {errors[0]}")
+
+    def _fetch_range(
+        self,
+        url: str,
+        part_path: str,
+        item: Dict[str, int],
+        on_bytes: Callable[[int], None],
+    ) -> None:
+        attempt = 0
+        while True:
+            offset = item["start"] + item["done"]
+            if offset > item["end"]:
+                return
+            headers = dict(self.headers)
+            headers["Range"] = f"bytes={offset}-{item['end']}"
+            try:
+                with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                    if response.status_code != 206:
+                        raise RangedDownloadError(f"服务器未返回分段内容: HTTP {response.status_code}")
+                    with open(part_path, "r+b") as f:
+                        f.seek(offset)
+                        remaining = item["end"] - offset + 1
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if not chunk:
+                                continue
+                            chunk = chunk[:remaining]
+                            f.write(chunk)
+                            # 先交给操作系统再计入进度，进度记录只包含已离开进程缓冲区的数据
+                            f.flush()
+                            item["done"] += len(chunk)
+                            remaining -= len(chunk)
+                            on_bytes(len(chunk))
+                            if remaining <= 0:
+                                break
+                if item["start"] + item["done"] <= item["end"]:
+                    raise RangedDownloadError("连接提前结束")
+                return
+            except (requests.RequestException, RangedDownloadError):
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                time.sleep(self.retry_delay * attempt)
+
+    def _download_stream(
+        self,
+        url: str,
+        part_path: str,
+        size: Optional[int],
+        progress_callback: Optional[Callable[[int, Optional[int]], None]],
+    ) -> None:
+        downloaded = 0
+        with self.session.get(url, headers=self.headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with open(part_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        if progress_callback:
+                            progress_callback(downloaded, size)
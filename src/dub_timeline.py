@@ -0,0 +1,238 @@
+"""
+配音时间轴规划与对齐
+
+在合成前一次性计算所有字幕段的句型、语速、停顿和可用时长，
+合成后按可用时长统一做变速压缩并把每段锁定到字幕起点，
+避免逐段累加 current_time 造成的长视频漂移。
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# 句型 -> 句前停顿倍数（相对于字幕间隙）
+PAUSE_MULTIPLIERS = {
+    'question': 1.5,     # 问句后停顿稍长
+    'ellipsis': 2.0,     # 省略号后停顿更长
+    'exclamation': 1.3,  # 感叹句后中等停顿
+}
+
+# 句型 -> 语速系数
+SPEED_FACTORS = {
+    'question': 0.95,     # 问句稍慢
+    'exclamation': 0.92,  # 感叹句稍慢，突出情感
+    'imperative': 0.95,
+}
+
+MIN_SEGMENT_SPEED = 0.8
+# 句前停顿的上限（秒），避免长间隙被放大成尴尬的空白
+MAX_LEAD_IN = 0.6
+# 超出可用时长时允许的最大加速倍数，再快会明显失真
+MAX_TEMPO = 1.35
+
+
+@dataclass
+class DubTimelinePlan:
+    """一次配音任务的全部字幕段规划，数组按字幕顺序一一对应。"""
+
+    texts: List[str]
+    sentence_types: List[str]
+    starts: np.ndarray
+    ends: np.ndarray
+    slot_ends: np.ndarray
+    lead_ins: np.ndarray
+    speeds: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def slot_durations(self) -> np.ndarray:
+        return self.slot_ends - self.starts
+
+
+@dataclass
+class AlignmentReport:
+    """对齐结果统计，用于日志输出。"""
+
+    placed: int = 0
+    stretched: int = 0
+    max_tempo: float = 1.0
+    overrun_segments: int = 0
+    max_overrun: float = 0.0
+    tempos: List[float] = field(default_factory=list)
+
+
+def plan_dub_timeline(
+    segments: Sequence[Dict],
+    speed: float = 1.0,
+    classify: Optional[Callable[[str], str]] = None,
+) -> DubTimelinePlan:
+    """
+    为所有字幕段一次性生成配音规划
+
+    Args:
+        segments: 解析后的字幕段（含 start/end/text）
+        speed: 基础语速
+        classify: 句型识别函数，为空时全部按陈述句处理（不做停顿和语速调整）
+
+    Returns:
+        DubTimelinePlan
+    """
+    texts = [str(seg.get('text', '') or '') for seg in segments]
+    sentence_types = [classify(text) if classify else 'statement' for text in texts]
+
+    starts = np.array([float(seg.get('start', 0) or 0) for seg in segments], dtype=np.float64)
+    ends = np.array([float(seg.get('end', 0) or 0) for seg in segments], dtype=np.float64)
+    ends = np.maximum(ends, starts)
+
+    # 每段可占用到下一段开始；最后一段后面没有约束
+    slot_ends = np.empty_like(starts)
+    if len(starts):
+        slot_ends[:-1] = np.maximum(starts[1:], starts[:-1])
+        slot_ends[-1] = np.inf
+
+    pause_multipliers = np.array([PAUSE_MULTIPLIERS.get(t, 1.0) for t in sentence_types], dtype=np.float64)
+    previous_ends = np.concatenate(([0.0], ends[:-1])) if len(ends) else ends
+    gaps = np.maximum(starts - previous_ends, 0.0)
+    lead_ins = np.minimum(gaps * (pause_multipliers - 1.0), MAX_LEAD_IN)
+
+    speed_factors = np.array([SPEED_FACTORS.get(t, 1.0) for t in sentence_types], dtype=np.float64)
+    speeds = np.where(speed_factors < 1.0, np.maximum(speed * speed_factors, MIN_SEGMENT_SPEED), speed)
+
+    return DubTimelinePlan(
+        texts=texts,
+        sentence_types=sentence_types,
+        starts=starts,
+        ends=ends,
+        slot_ends=slot_ends,
+        lead_ins=lead_ins,
+        speeds=speeds,
+    )
+
+
+def time_stretch(audio: np.ndarray, rate: float, sample_rate: int) -> np.ndarray:
+    """
+    WSOLA 变速不变调
+
+    Args:
+        audio: 单声道音频
+        rate: 播放速率，>1 加速（变短），<1 减速
+        sample_rate: 采样率
+
+    Returns:
+        长度约为 len(audio) / rate 的音频
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if abs(rate - 1.0) < 1e-3 or len(audio) == 0:
+        return audio
+
+    frame = max(int(sample_rate * 0.03), 64)
+    synthesis_hop = frame // 2
+    analysis_hop = synthesis_hop * rate
+    tolerance = max(int(sample_rate * 0.01), 1)
+    window = np.hanning(frame).astype(np.float32)
+
+    padded = np.concatenate([
+        np.zeros(tolerance, dtype=np.float32),
+        audio,
+        np.zeros(frame + tolerance, dtype=np.float32),
+    ])
+    target_length = int(round(len(audio) / rate))
+    frame_count = target_length // synthesis_hop + 1
+    output = np.zeros(frame_count * synthesis_hop + frame, dtype=np.float32)
+    norm = np.zeros_like(output)
+
+    previous = tolerance
+    for index in range(frame_count):
+        nominal = tolerance + int(round(index * analysis_hop))
+        if index == 0:
+            position = nominal
+        else:
+            # 找与上一帧自然延续最相似的位置，保持波形相位连续
+            natural = padded[previous + synthesis_hop:previous + synthesis_hop + frame]
+            low = max(nominal - tolerance, 0)
+            high = min(nominal + tolerance, len(padded) - frame)
+            if high <= low or len(natural) < frame:
+                position = min(nominal, len(padded) - frame)
+            else:
+                region = padded[low:high + frame]
+                scores = np.correlate(region, natural, mode='valid')
+                position = low + int(np.argmax(scores))
+
+        out_start = index * synthesis_hop
+        output[out_start:out_start + frame] += padded[position:position + frame] * window
+        norm[out_start:out_start + frame] += window
+        previous = position
+
+    norm[norm < 1e-6] = 1.0
+    return (output / norm)[:target_length]
+
+
+def align_dub_clips(
+    plan: DubTimelinePlan,
+    clips: Sequence[Optional[np.ndarray]],
+    sample_rate: int,
+    max_tempo: float = MAX_TEMPO,
+) -> tuple:
+    """
+    把合成好的音频段锁定到字幕时间轴
+
+    先按每段可用时长一次性算出所需加速倍数并压缩超长段，
+    再向量化计算每段的落点：优先落在 起点 + 句前停顿，
+    只有在加速到上限仍放不下时才顺延，且顺延在下一个间隙处自动归零，不会累积。
+
+    Args:
+        plan: plan_dub_timeline 的结果
+        clips: 与 plan 一一对应的音频段，合成失败或空文本为 None
+        sample_rate: 采样率
+        max_tempo: 最大加速倍数
+
+    Returns:
+        (最终音频, AlignmentReport)
+    """
+    report = AlignmentReport()
+    indices = np.array([i for i, clip in enumerate(clips) if clip is not None and len(clip) > 0], dtype=np.int64)
+    if len(indices) == 0:
+        return np.zeros(0, dtype=np.float32), report
+
+    durations = np.array([len(clips[i]) / sample_rate for i in indices], dtype=np.float64)
+    starts = plan.starts[indices]
+    available = plan.slot_ends[indices] - starts
+    tempos = np.clip(durations / np.maximum(available, 1e-3), 1.0, max_tempo)
+    tempos[~np.isfinite(available)] = 1.0
+
+    placed_clips = []
+    for i, tempo in zip(indices, tempos):
+        clip = np.asarray(clips[i], dtype=np.float32)
+        if tempo > 1.001:
+            clip = time_stretch(clip, float(tempo), sample_rate)
+        placed_clips.append(clip)
+    durations = np.array([len(clip) / sample_rate for clip in placed_clips], dtype=np.float64)
+
+    # 停顿只使用本段的富余时间，保证停顿不会把句子推出时间槽
+    slack = np.maximum(available - durations, 0.0)
+    desired = starts + np.minimum(plan.lead_ins[indices], slack)
+
+    # placed_i = max(desired_i, placed_{i-1} + dur_{i-1}) 的向量化解：
+    # 令 c 为时长前缀和，则 placed_i - c_{i-1} = max_{j<=i}(desired_j - c_{j-1})
+    previous_cumulative = np.concatenate(([0.0], np.cumsum(durations)[:-1]))
+    placed = np.maximum.accumulate(desired - previous_cumulative) + previous_cumulative
+
+    offsets = np.round(placed * sample_rate).astype(np.int64)
+    total = int(max(offset + len(clip) for offset, clip in zip(offsets, placed_clips)))
+    timeline = np.zeros(total, dtype=np.float32)
+    for offset, clip in zip(offsets, placed_clips):
+        timeline[offset:offset + len(clip)] = clip
+
+    overruns = placed + durations - plan.slot_ends[indices]
+    overruns = overruns[np.isfinite(overruns)]
+    report.placed = len(indices)
+    report.tempos = [float(t) for t in tempos]
+    report.stretched = int(np.count_nonzero(tempos > 1.001))
+    report.max_tempo = float(tempos.max())
+    report.overrun_segments = int(np.count_nonzero(overruns > 0.01))
+    report.max_overrun = float(max(overruns.max(), 0.0)) if len(overruns) else 0.0
+    return timeline, report
@@ -5,14 +5,17 @@
 
 import os
 import re
+import uuid
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, ContextManager, Dict, Any
 import shutil
 import time
 
 # 导入相关模块
 try:
     from src.chinese_tts import ChineseTTS, check_kokoro_available
+    from src.dub_timeline import align_dub_clips, plan_dub_timeline
     from src.audio_utils import (
         extract_audio,
         combine_video_audio,
@@ -22,6 +25,7 @@ try:
 except ImportError:
     # 相对导入备用
     from .chinese_tts import ChineseTTS, check_kokoro_available
+    from .dub_timeline import align_dub_clips, plan_dub_timeline
     from .audio_utils import (
         extract_audio,
         combine_video_audio,
@@ -141,14 +145,15 @@ class VideoDubbingEngine:
         return temp_dir
 
     def _get_timestamp(self) -> str:
-        """获取时间戳用于生成唯一文件名"""
-        return str(int(time.time() * 1000))
+        """获取时间戳用于生成唯一文件名（带随机后缀，多个任务并发时不会撞名）"""
+        return f"{int(time.time() * 1000)}_{uuid.uuid4().hex[:6]}"
 
     def __init__(
         self,
         progress_callback: Optional[Callable[[int, str], None]] = None,
         step_callback: Optional[Callable[[str, int], None]] = None,
-        log_callback: Optional[Callable[[str], None]] = None
+        log_callback: Optional[Callable[[str], None]] = None,
+        stage_gate: Optional[Callable[[str], ContextManager]] = None
     ):
         """
         初始化配音引擎
@@ -157,10 +162,12 @@ class VideoDubbingEngine:
             progress_callback: 进度回调(percent, message)
             step_callback: 步骤回调(step_name, step_index)
             log_callback: 日志回调(message)
+            stage_gate: 阶段门控(step_name) -> 上下文管理器，配音队列用它限制各阶段并发
         """
         self.progress_callback = progress_callback
         self.step_callback = step_callback
         self.log_callback = log_callback
+        self.stage_gate = stage_gate
 
         # 检查依赖
         self.kokoro_available = check_kokoro_available()
@@ -183,6 +190,11 @@ class VideoDubbingEngine:
             self.step_callback(step_name, step_index)
         self._log(f"步骤 {step_index + 1}/{len(self.STEPS)}: {step_name}")
 
+    def _stage(self, step_name: str) -> ContextManager:
+        """进入一个处理阶段；未配置门控时不做任何限制"""
+        gate = getattr(self, 'stage_gate', None)
+        return gate(step_name) if gate else nullcontext()
+
     def dub_video(self, task: DubbingTask) -> str:
         """
         执行完整配音流程
@@ -201,7 +213,8 @@ class VideoDubbingEngine:
             # 步骤 1: 获取视频
             if task.youtube_url:
                 self._report_step('download', 0)
-                task.video_path = self._download_video(task.youtube_url)
+                with self._stage('download'):
+                    task.video_path = self._download_video(task.youtube_url)
                 task.downloaded_video = task.video_path
 
             if not task.video_path or not os.path.exists(task.video_path):
@@ -210,7 +223,8 @@ class VideoDubbingEngine:
             # 步骤 2: 生成字幕（如果需要）
             if task.enable_transcription and not task.subtitle_path:
                 self._report_step('transcribe', 1)
-                task.generated_subtitle = self._transcribe_video(task.video_path)
+                with self._stage('transcribe'):
+                    task.generated_subtitle = self._transcribe_video(task.video_path)
                 task.subtitle_path = task.generated_subtitle
                 task.source_subtitle = task.generated_subtitle
 
@@ -221,10 +235,11 @@ class VideoDubbingEngine:
             if task.enable_translation and task.subtitle_path:
                 self._report_step('translate', 2)
                 task.source_subtitle = task.source_subtitle or task.subtitle_path
-                task.translated_subtitle = self._translate_subtitle(
-                    task.subtitle_path,
-                    task.enable_translation_polish,
-                )
+                with self._stage('translate'):
+                    task.translated_subtitle = self._translate_subtitle(
+                        task.subtitle_path,
+                        task.enable_translation_polish,
+                    )
                 task.subtitle_path = task.translated_subtitle
 
             # 检查字幕文件
@@ -233,36 +248,40 @@ class VideoDubbingEngine:
 
             # 步骤 4: 合成中文音频
             self._report_step('tts', 3)
-            task.dubbing_audio = self._synthesize_audio(
-                task.subtitle_path,
-                task.voice,
-                task.speed,
-                task.video_path,
-                task.tts_backend,
-                task.cosyvoice_url,
-                task.cosyvoice_mode,
-                task.cosyvoice_speaker,
-                task.cosyvoice_instruction,
-                task.minimax_api_key,
-                task.minimax_api_url,
-                task.minimax_model,
-                task.minimax_voice_id,
-                task.minimax_language_boost,
-            )
+            with self._stage('tts'):
+                task.dubbing_audio = self._synthesize_audio(
+                    task.subtitle_path,
+                    task.voice,
+                    task.speed,
+                    task.video_path,
+                    task.tts_backend,
+                    task.cosyvoice_url,
+                    task.cosyvoice_mode,
+                    task.cosyvoice_speaker,
+                    task.cosyvoice_instruction,
+                    task.minimax_api_key,
+                    task.minimax_api_url,
+                    task.minimax_model,
+                    task.minimax_voice_id,
+                    task.minimax_language_boost,
+                )
 
-            # 步骤 5: 合并最终视频
+            # 步骤 5: 合并最终视频（需要烧录字幕时混音、烧录在同一次编码中完成）
             self._report_step('combine', 4)
-            output_path = self._combine_video(
-                task.video_path,
-                task.dubbing_audio,
-                task.output_path,
-                task.keep_background_audio,
-                task.background_volume
-            )
-
-            if task.subtitle_burn_mode != 'none':
-                self._report_step('subtitle', 5)
-                output_path = self._burn_selected_subtitles(task, output_path)
+            with self._stage('combine'):
+                burn_subtitle = None
+                if task.subtitle_burn_mode != 'none':
+                    self._report_step('subtitle', 5)
+                    burn_subtitle = self._select_burn_subtitle(task)
+
+                output_path = self._combine_video(
+                    task.video_path,
+                    task.dubbing_audio,
+                    task.output_path,
+                    task.keep_background_audio,
+                    task.background_volume,
+                    burn_subtitle,
+                )
 
             # 清理临时文件
             self._cleanup_temp_files(task)
@@ -451,11 +470,9 @@ class VideoDubbingEngine:
         # 创建TTS实例
         tts_instance = CTTS(voice=voice, speed=speed)
 
-        # 解析字幕并合成
+        # 解析字幕并一次性规划句型、语速、停顿和时间槽
         segments = tts_instance._parse_srt(subtitle_path)
         sample_rate = 24000
-        all_audio = []
-        current_time = 0.0
 
         total_segments = len(segments)
         self._log(f"字幕解析完成，共 {total_segments} 段")
@@ -469,69 +486,41 @@ class VideoDubbingEngine:
             if idx < 3:  # 只显示前3段
                 self._log(f"  段落 {idx+1}: {seg['start']:.2f}s - {seg['end']:.2f}s | {seg['text'][:30]}...")
 
-        for idx, seg in enumerate(segments):
+        plan = plan_dub_timeline(segments, speed, classify=tts_instance._analyze_sentence_type)
+        clips = [None] * total_segments
+
+        for idx in range(total_segments):
             if self.progress_callback:
                 progress = int((idx / max(total_segments, 1)) * 100)
                 self._report_progress(progress, f"合成第 {idx + 1}/{total_segments} 句...")
 
-            # 添加静音填充（模拟自然停顿）
-            if current_time < seg['start']:
-                base_silence = seg['start'] - current_time
-                # 根据句子类型调整停顿时长
-                sent_type = tts_instance._analyze_sentence_type(seg['text'])
-                if sent_type == 'question':
-                    pause_multiplier = 1.5  # 问句后停顿稍长
-                elif sent_type == 'ellipsis':
-                    pause_multiplier = 2.0  # 省略号后停顿更长
-                elif sent_type == 'exclamation':
-                    pause_multiplier = 1.3  # 感叹句后中等停顿
-                else:
-                    pause_multiplier = 1.0
-                silence_duration = base_silence * pause_multiplier
-                silence_samples = int(silence_duration * sample_rate)
-                if silence_samples > 0:
-                    all_audio.append(np.zeros(silence_samples))
-                current_time = seg['start']
-
+            text = plan.texts[idx]
             # 跳过空文本
-            if not seg['text'].strip():
+            if not text.strip():
                 self._log(f"  跳过空文本段落 {idx+1}")
                 continue
 
             # 合成这段文本
             try:
-                # 语气优化：问句稍慢，感叹句正常，陈述句正常
-                sent_type = tts_instance._analyze_sentence_type(seg['text'])
-                enhanced_text = tts_instance._enhance_text_for_tts(seg['text'], sent_type)
-
-                if sent_type == 'question':
-                    seg_speed = max(speed * 0.95, 0.8)  # 问句稍慢
-                elif sent_type == 'statement':
-                    seg_speed = speed
-                elif sent_type == 'exclamation':
-                    seg_speed = max(speed * 0.92, 0.8)  # 感叹句稍慢，突出情感
-                elif sent_type == 'imperative':
-                    seg_speed = max(speed * 0.95, 0.8)
-                else:
-                    seg_speed = speed
-
-                generator = tts_instance.pipeline(enhanced_text, voice=tts_instance.voice_name, speed=seg_speed)
+                enhanced_text = tts_instance._enhance_text_for_tts(text, plan.sentence_types[idx])
+                generator = tts_instance.pipeline(
+                    enhanced_text,
+                    voice=tts_instance.voice_name,
+                    speed=float(plan.speeds[idx]),
+                )
                 seg_audios = []
                 for _, _, audio in generator:
                     seg_audios.append(audio)
 
                 if seg_audios:
-                    seg_audio = np.concatenate(seg_audios)
-                    all_audio.append(seg_audio)
-                    current_time = max(current_time, seg['start']) + len(seg_audio) / sample_rate
+                    clips[idx] = np.concatenate(seg_audios)
             except Exception as e:
                 self._log(f"  段落 {idx+1} 合成失败: {e}")
                 continue
 
         # 保存音频文件
-        self._log(f"合成完成，共 {len(all_audio)} 个音频片段")
-        if all_audio:
-            final_audio = np.concatenate(all_audio)
+        final_audio = self._align_to_timeline(plan, clips, sample_rate)
+        if len(final_audio):
             self._log(f"最终音频长度: {len(final_audio)/sample_rate:.2f}秒")
             sf.write(temp_audio_path, final_audio, sample_rate)
             self._log(f"音频已保存到: {temp_audio_path}")
@@ -593,8 +582,7 @@ class VideoDubbingEngine:
         segments = parser._parse_srt(subtitle_path)
         segments = self._prepare_tts_segments(segments)
         sample_rate = None
-        all_audio = []
-        current_time = 0.0
+        clips = [None] * len(segments)
 
         total_segments = len(segments)
         self._log(f"字幕解析完成，共 {total_segments} 段")
@@ -614,43 +602,25 @@ class VideoDubbingEngine:
                 self._log(f"  跳过空文本段落 {idx + 1}")
                 continue
 
-            if sample_rate is not None and current_time < seg['start']:
-                silence_duration = seg['start'] - current_time
-                silence_samples = int(silence_duration * sample_rate)
-                if silence_samples > 0:
-                    all_audio.append(np.zeros(silence_samples, dtype=np.float32))
-                current_time = seg['start']
-
             try:
-                audio_path = client.synthesize(text)
-                audio, sr = sf.read(audio_path, always_2d=False)
-                if audio.ndim > 1:
-                    audio = audio.mean(axis=1)
-                audio = audio.astype(np.float32)
+                audio, sr = client.synthesize_array(text)
                 if sample_rate is None:
                     sample_rate = sr
                 elif sr != sample_rate:
                     import librosa
                     audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate).astype(np.float32)
-
-                if current_time < seg['start']:
-                    silence_duration = seg['start'] - current_time
-                    silence_samples = int(silence_duration * sample_rate)
-                    if silence_samples > 0:
-                        all_audio.append(np.zeros(silence_samples, dtype=np.float32))
-                    current_time = seg['start']
-
-                segment_start = max(current_time, seg['start'])
-                all_audio.append(audio)
-                current_time = segment_start + len(audio) / sample_rate
+                clips[idx] = audio
             except Exception as exc:
                 self._log(f"  段落 {idx + 1} CosyVoice 合成失败: {exc}")
                 continue
 
-        if not all_audio or sample_rate is None:
+        if sample_rate is None:
+            raise RuntimeError("CosyVoice 没有生成任何音频数据")
+
+        final_audio = self._align_to_timeline(plan_dub_timeline(segments), clips, sample_rate)
+        if not len(final_audio):
             raise RuntimeError("CosyVoice 没有生成任何音频数据")
 
-        final_audio = np.concatenate(all_audio)
         sf.write(temp_audio_path, final_audio, sample_rate)
         self._log(f"CosyVoice 音频已保存到: {temp_audio_path}")
         self._log(f"最终音频长度: {len(final_audio) / sample_rate:.2f}秒")
@@ -701,8 +671,7 @@ class VideoDubbingEngine:
         parser = CTTS.__new__(CTTS)
         segments = self._prepare_tts_segments(parser._parse_srt(subtitle_path))
         sample_rate = None
-        all_audio = []
-        current_time = 0.0
+        clips = [None] * len(segments)
         total_segments = len(segments)
         failed_segments = []
         cache_hits = 0
@@ -745,15 +714,7 @@ class VideoDubbingEngine:
                         target_sr=sample_rate,
                     ).astype(np.float32)
 
-                if current_time < seg['start']:
-                    silence_samples = int((seg['start'] - current_time) * sample_rate)
-                    if silence_samples > 0:
-                        all_audio.append(np.zeros(silence_samples, dtype=np.float32))
-                    current_time = seg['start']
-
-                segment_start = max(current_time, seg['start'])
-                all_audio.append(audio)
-                current_time = segment_start + len(audio) / sample_rate
+                clips[idx] = audio
             except Exception as exc:
                 self._log(f"  段落 {idx + 1} MiniMax 合成失败: {exc}")
                 failed_segments.append(idx + 1)
@@ -770,16 +731,31 @@ class VideoDubbingEngine:
                 f"（段落: {preview}）。已成功分段保留在缓存中，重新执行会断点续传。"
             )
 
-        if not all_audio or sample_rate is None:
+        if sample_rate is None:
             raise RuntimeError("MiniMax 没有生成任何音频数据")
 
-        final_audio = np.concatenate(all_audio)
+        final_audio = self._align_to_timeline(plan_dub_timeline(segments), clips, sample_rate)
+        if not len(final_audio):
+            raise RuntimeError("MiniMax 没有生成任何音频数据")
         sf.write(temp_audio_path, final_audio, sample_rate)
         self._log(f"MiniMax 音频已保存到: {temp_audio_path}")
         self._log(f"最终音频长度: {len(final_audio) / sample_rate:.2f}秒")
         self._report_progress(100, "MiniMax 音频合成完成")
         return temp_audio_path
 
+    def _align_to_timeline(self, plan, clips: list, sample_rate: int):
+        """把各段音频锁定到字幕时间轴，超长段统一变速压缩。"""
+        final_audio, report = align_dub_clips(plan, clips, sample_rate)
+        self._log(f"合成完成，共 {report.placed} 个音频片段")
+        if report.stretched:
+            self._log(f"时间轴对齐: {report.stretched} 段超出字幕时长，已加速（最大 {report.max_tempo:.2f}x）")
+        if report.overrun_segments:
+            self._log(
+                f"时间轴对齐: {report.overrun_segments} 段加速到上限仍超时，"
+                f"最多顺延 {report.max_overrun:.2f}s，将在下一个字幕间隙处归位"
+            )
+        return final_audio
+
     def _prepare_tts_segments(self, segments: list) -> list:
         """整理字幕片段，让远程 TTS 更接近自然朗读。"""
         normalized = []
@@ -836,13 +812,8 @@ class VideoDubbingEngine:
             merged.append(pending)
         return merged
 
-    def _burn_selected_subtitles(self, task: DubbingTask, video_path: str) -> str:
-        """按用户选择把单语或双语字幕烧录到配音后的视频中。"""
-        try:
-            from .youtube_transcriber import embed_subtitles_to_video
-        except ImportError:
-            from src.youtube_transcriber import embed_subtitles_to_video
-
+    def _select_burn_subtitle(self, task: DubbingTask) -> Optional[str]:
+        """按用户选择确定要烧录的单语或双语字幕，并复制到简单路径以便放入 ffmpeg 滤镜。"""
         subtitle_path = None
         if task.subtitle_burn_mode == 'bilingual':
             subtitle_path = self._create_bilingual_ass(task)
@@ -851,18 +822,22 @@ class VideoDubbingEngine:
 
         if not subtitle_path:
             subtitle_path = task.subtitle_path or task.translated_subtitle or task.generated_subtitle or task.source_subtitle
+            # 与 embed_subtitles_to_video 一致：SRT 旁边有同名 ASS 时优先使用 ASS 样式
+            if subtitle_path and subtitle_path.endswith('.srt') and os.path.exists(subtitle_path[:-4] + '.ass'):
+                subtitle_path = subtitle_path[:-4] + '.ass'
 
         if not subtitle_path or not os.path.exists(subtitle_path):
             self._log("未找到可烧录的字幕文件，跳过字幕烧录")
-            return video_path
-
-        self._report_progress(80, f"烧录字幕: {subtitle_path}")
-        burned_path = embed_subtitles_to_video(video_path, subtitle_path)
-        if burned_path and os.path.exists(burned_path):
-            self._log(f"带字幕配音视频已生成: {burned_path}")
-            return burned_path
-        self._log("字幕烧录失败，保留无字幕配音视频")
-        return video_path
+            return None
+
+        burn_path = os.path.join(
+            self._get_temp_dir(),
+            f"burn_subtitle_{self._get_timestamp()}{Path(subtitle_path).suffix.lower()}",
+        )
+        shutil.copy2(subtitle_path, burn_path)
+        task.temp_files.append(burn_path)
+        self._log(f"烧录字幕: {subtitle_path}")
+        return burn_path
 
     def _create_bilingual_ass(self, task: DubbingTask) -> Optional[str]:
         """用原字幕和译文字幕生成双语 ASS 文件。"""
@@ -929,10 +904,11 @@ class VideoDubbingEngine:
         audio_path: str,
         output_path: Optional[str],
         keep_background: bool,
-        bg_volume: float
+        bg_volume: float,
+        subtitle_path: Optional[str] = None
     ) -> str:
-        """合并视频和音频"""
-        self._report_progress(50, "合成最终视频...")
+        """合并视频和音频；传入字幕时在同一次编码中烧录，否则复制视频流"""
+        self._report_progress(50, "合成最终视频..." if not subtitle_path else "混音并烧录字幕（单次编码）...")
 
         if output_path is None:
             # 自动生成输出路径
@@ -941,13 +917,29 @@ class VideoDubbingEngine:
             output_path = str(output_dir / f"{base}_中文配音.mp4")
 
         # 合并
-        combine_video_audio(
-            video_path=video_path,
-            audio_path=audio_path,
-            output_path=output_path,
-            keep_original_audio=keep_background,
-            original_audio_volume=bg_volume
-        )
+        try:
+            combine_video_audio(
+                video_path=video_path,
+                audio_path=audio_path,
+                output_path=output_path,
+                keep_original_audio=keep_background,
+                original_audio_volume=bg_volume,
+                subtitle_path=subtitle_path
+            )
+        except RuntimeError as exc:
+            if not subtitle_path:
+                raise
+            self._log(f"字幕烧录失败，保留无字幕配音视频: {exc}")
+            combine_video_audio(
+                video_path=video_path,
+                audio_path=audio_path,
+                output_path=output_path,
+                keep_original_audio=keep_background,
+                original_audio_volume=bg_volume
+            )
+        else:
+            if subtitle_path:
+                self._log(f"带字幕配音视频已生成: {output_path}")
 
         self._report_progress(100, "视频合成完成")
         return output_path
@@ -958,7 +950,16 @@ class VideoDubbingEngine:
 
         默认保留所有临时文件在 workspace/dubbing_temp/ 目录中，
         以便后续使用或调试。如果需要清理，可调用 purge_temp_files()。
+        仅供本次编码使用的中间文件（task.temp_files，如烧录字幕副本）在这里删除。
         """
+        for path in task.temp_files:
+            try:
+                if os.path.exists(path):
+                    os.unlink(path)
+            except OSError as e:
+                self._log(f"清理临时文件失败 {path}: {e}")
+        task.temp_files.clear()
+
         self._log("临时文件保留在 workspace/dubbing_temp/ 目录中")
         self._log(f"  - 配音音频: {task.dubbing_audio}")
         if task.generated_subtitle:
@@ -0,0 +1,215 @@
+"""
+多视频配音队列
+
+同时接收多个 DubbingTask，按阶段（下载/转录/翻译/TTS/合成）分别限制并发：
+一个任务在等 GPU 转录时，另一个任务可以下载或混流。
+Whisper 模型和 Kokoro 管线是进程内共享的，队列中的任务不会重复加载。
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from .audio_utils import get_video_duration
+    from .dubbing_engine import DubbingTask, VideoDubbingEngine
+    from .stage_limits import StageLimiter
+except ImportError:
+    from src.audio_utils import get_video_duration
+    from src.dubbing_engine import DubbingTask, VideoDubbingEngine
+    from src.stage_limits import StageLimiter
+
+
+# 默认阶段并发：转录和 TTS 共享同一个 GPU 模型，保持串行；网络和 ffmpeg 阶段可以并行
+DEFAULT_STAGE_LIMITS = {
+    'download': 2,
+    'transcribe': 1,
+    'translate': 2,
+    'tts': 1,
+    'combine': 2,
+}
+
+
+@dataclass
+class DubbingJob:
+    """队列中的一个配音任务及其运行统计"""
+
+    job_id: str
+    task: DubbingTask
+    status: str = 'queued'  # queued/running/completed/failed
+    stage: Optional[str] = None
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    stage_wait_seconds: Dict[str, float] = field(default_factory=dict)
+    video_minutes: float = 0.0
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def dubbed_minutes_per_hour(self) -> float:
+        """单任务吞吐：配音分钟数 / 实际耗时（小时）"""
+        if self.status != 'completed' or self.elapsed_seconds <= 0:
+            return 0.0
+        return self.video_minutes / (self.elapsed_seconds / 3600)
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'stage': self.stage,
+            'output_path': self.output_path,
+            'error': self.error,
+            'elapsed_seconds': round(self.elapsed_seconds, 2),
+            'stage_seconds': {k: round(v, 2) for k, v in self.stage_seconds.items()},
+            'stage_wait_seconds': {k: round(v, 2) for k, v in self.stage_wait_seconds.items()},
+            'video_minutes': round(self.video_minutes, 2),
+            'dubbed_minutes_per_hour': round(self.dubbed_minutes_per_hour, 2),
+        }
+
+
+class DubbingQueue:
+    """按阶段限流的并发配音队列"""
+
+    def __init__(
+        self,
+        max_workers: int = 3,
+        stage_limits: Optional[Dict[str, int]] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        engine_factory: Optional[Callable[..., VideoDubbingEngine]] = None,
+    ):
+        """
+        Args:
+            max_workers: 同时处于流水线中的任务数
+            stage_limits: 各阶段并发上限，未列出的阶段使用默认值
+            log_callback: 日志回调(message)，消息带任务 ID 前缀
+            engine_factory: 创建引擎的工厂，参数同 VideoDubbingEngine（测试时可替换）
+        """
+        self.stage_limiter = StageLimiter(DEFAULT_STAGE_LIMITS, stage_limits)
+        self.stage_limits = self.stage_limiter.limits
+        self.peak_active = self.stage_limiter.peak_active
+
+        self.log_callback = log_callback
+        self.engine_factory = engine_factory or VideoDubbingEngine
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='dubbing')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, DubbingJob] = {}
+        self._futures: Dict[str, Future] = {}
+
+    def _log(self, job: DubbingJob, message: str):
+        line = f"[{job.job_id}] {message}"
+        if self.log_callback:
+            self.log_callback(line)
+        print(f"[DubbingQueue] {line}")
+
+    def submit(self, task: DubbingTask) -> DubbingJob:
+        """提交一个配音任务，立即返回 DubbingJob"""
+        job = DubbingJob(job_id=uuid.uuid4().hex[:8], task=task)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._futures[job.job_id] = self._executor.submit(self._run, job)
+        return job
+
+    def submit_many(self, tasks: Iterable[DubbingTask]) -> List[DubbingJob]:
+        return [self.submit(task) for task in tasks]
+
+    def get(self, job_id: str) -> Optional[DubbingJob]:
+        return self._jobs.get(job_id)
+
+    @property
+    def jobs(self) -> List[DubbingJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def wait(self, timeout: Optional[float] = None) -> List[DubbingJob]:
+        """等待所有已提交任务结束（失败的任务不会抛出异常，见 job.error）"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            future.exception(timeout=remaining)
+        return self.jobs
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: DubbingJob):
+        job.status = 'running'
+        job.started_at = time.time()
+        engine = self.engine_factory(
+            log_callback=lambda message: self._log(job, message),
+            stage_gate=lambda stage: self.stage_limiter.gate(job, stage),
+        )
+        try:
+            job.output_path = engine.dub_video(job.task)
+            try:
+                job.video_minutes = float(get_video_duration(job.task.video_path) or 0) / 60
+            except Exception:
+                job.video_minutes = 0.0
+            job.status = 'completed'
+        except Exception as exc:
+            job.status = 'failed'
+            job.error = str(exc)
+        finally:
+            job.stage = None
+            job.finished_at = time.time()
+            self._log(job, f"{job.status}: {job.output_path or job.error} ({job.elapsed_seconds:.1f}s)")
+        return job
+
+    def stats(self) -> dict:
+        """汇总吞吐：已完成的配音分钟数 / 队列实际运行时长（小时）"""
+        jobs = self.jobs
+        started = [job.started_at for job in jobs if job.started_at is not None]
+        finished = [job.finished_at for job in jobs if job.finished_at is not None]
+        completed = [job for job in jobs if job.status == 'completed']
+        running = any(job.status in ('queued', 'running') for job in jobs)
+
+        wall_seconds = 0.0
+        if started:
+            end = time.time() if running or not finished else max(finished)
+            wall_seconds = max(0.0, end - min(started))
+        dubbed_minutes = sum(job.video_minutes for job in completed)
+
+        return {
+            'total': len(jobs),
+            'completed': len(completed),
+            'failed': sum(1 for job in jobs if job.status == 'failed'),
+            'running': sum(1 for job in jobs if job.status == 'running'),
+            'queued': sum(1 for job in jobs if job.status == 'queued'),
+            'wall_seconds': round(wall_seconds, 2),
+            'dubbed_minutes': round(dubbed_minutes, 2),
+            'dubbed_minutes_per_hour': round(dubbed_minutes / (wall_seconds / 3600), 2) if wall_seconds > 0 else 0.0,
+            **self.stage_limiter.stats(jobs, wall_seconds),
+        }
+
+
+def create_dubbed_videos(
+    tasks: Iterable[DubbingTask],
+    max_workers: int = 3,
+    stage_limits: Optional[Dict[str, int]] = None,
+    log_callback: Optional[Callable[[str], None]] = None,
+) -> DubbingQueue:
+    """
+    批量配音的便捷函数，阻塞到所有任务结束
+
+    Returns:
+        已结束的 DubbingQueue，可通过 queue.jobs / queue.stats() 查看结果
+    """
+    dubbing_queue = DubbingQueue(max_workers=max_workers, stage_limits=stage_limits, log_callback=log_callback)
+    try:
+        dubbing_queue.submit_many(tasks)
+        dubbing_queue.wait()
+    finally:
+        dubbing_queue.shutdown(wait=True)
+    return dubbing_queue
@@ -0,0 +1,44 @@
+"""Pooled ``requests`` sessions shared by the TTS HTTP clients."""
+
+from __future__ import annotations
+
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CONNECT_RETRIES = 2
+
+
+def create_pooled_session(
+    pool_size: int | None = None,
+    connect_retries: int = DEFAULT_CONNECT_RETRIES,
+) -> requests.Session:
+    """Return a keep-alive session whose connection pool fits ``pool_size`` worker threads.
+
+    Only connection setup is retried at the adapter level: synthesis requests are
+    POSTs, and the clients already decide themselves which HTTP statuses to retry.
+    The session holds no per-request state (cookies are not used by these APIs),
+    so one instance can be shared by concurrent worker threads.
+    """
+    size = pool_size if pool_size is not None else int(
+        os.getenv("TTS_HTTP_POOL_SIZE", str(DEFAULT_POOL_SIZE))
+    )
+    size = max(1, int(size))
+    retry = Retry(
+        total=connect_retries,
+        connect=connect_retries,
+        read=0,
+        status=0,
+        redirect=0,
+        backoff_factor=0.5,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
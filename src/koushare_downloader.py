@@ -12,7 +12,8 @@ import os
 import subprocess
 import shutil
 import logging
-from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, parse_qs, urljoin
 
 import requests
 
@@ -74,6 +75,7 @@ def generate_ks_sign(params: dict, method: str) -> tuple:
 API_BASE = "https://api-core.koushare.com"
 
 _SESSION = None
+_MEDIA_SESSION = None
 _ACCESS_TOKEN = ""
 
 
@@ -91,6 +93,22 @@ def _get_session() -> requests.Session:
     return _SESSION
 
 
+def _get_media_session() -> requests.Session:
+    """
+    播放列表、密钥和分片用的会话：只带 UA/Referer/Origin。
+    这些地址来自 m3u8，可能是 CDN 或第三方主机，不能带上登录后的 Authorization。
+    """
+    global _MEDIA_SESSION
+    if _MEDIA_SESSION is None:
+        _MEDIA_SESSION = requests.Session()
+        _MEDIA_SESSION.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Referer": "https://www.koushare.com/",
+            "Origin": "https://www.koushare.com",
+        })
+    return _MEDIA_SESSION
+
+
 def set_token(access_token: str):
     """直接设置 access token（从外部传入已有 token）"""
     global _ACCESS_TOKEN
@@ -388,40 +406,243 @@ def _get_ffmpeg_executable() -> str:
     return found if found else "ffmpeg"
 
 
-def _parse_m3u8(m3u8_url: str) -> tuple:
+HLS_SEGMENT_WORKERS = 8
+HLS_SEGMENT_RETRIES = 3
+
+
+class HlsUnsupportedError(RuntimeError):
+    """播放列表使用了原生分片下载不支持的特性，需要交给 ffmpeg 处理"""
+
+
+def _parse_attributes(text: str) -> dict:
+    """解析 #EXT-X-KEY 等标签的属性列表：METHOD=AES-128,URI="..."""
+    return {
+        key: value.strip('"')
+        for key, value in re.findall(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)', text)
+    }
+
+
+def _load_hls_playlist(m3u8_url: str) -> dict:
     """
-    下载并解析 m3u8 文件，返回 (total_segments, total_duration_seconds)
+    下载并解析 m3u8，返回分片列表
     遇到 master playlist 会自动跟进第一个 variant stream。
+    :return: {"url", "segments": [{"index", "uri", "duration", "key"}], "init_uri", "total_duration"}
     """
-    headers = {
-        "Referer": "https://www.koushare.com/",
-        "Origin": "https://www.koushare.com",
-    }
-    resp = requests.get(m3u8_url, headers=headers, timeout=15)
+    sess = _get_media_session()
+    resp = sess.get(m3u8_url, timeout=15)
     resp.raise_for_status()
     text = resp.text
 
     # master playlist：找第一个非注释、非空行的 URI
     if "#EXT-X-STREAM-INF" in text:
-        from urllib.parse import urljoin
         for line in text.splitlines():
             line = line.strip()
             if line and not line.startswith("#"):
-                text = requests.get(urljoin(m3u8_url, line), headers=headers, timeout=15).text
+                m3u8_url = urljoin(m3u8_url, line)
+                resp = sess.get(m3u8_url, timeout=15)
+                resp.raise_for_status()
+                text = resp.text
                 break
 
-    total_segments = 0
-    total_duration = 0.0
+    segments = []
+    media_sequence = 0
+    key = None
+    init_uri = None
+    duration = 0.0
     for line in text.splitlines():
         line = line.strip()
-        if line.startswith("#EXTINF:"):
+        if not line:
+            continue
+        if line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            media_sequence = int(line.split(":", 1)[1] or 0)
+        elif line.startswith("#EXT-X-KEY:"):
+            attrs = _parse_attributes(line.split(":", 1)[1])
+            method = attrs.get("METHOD", "NONE")
+            if method == "NONE":
+                key = None
+            elif method == "AES-128":
+                iv = attrs.get("IV")
+                key = {
+                    "method": method,
+                    "uri": urljoin(m3u8_url, attrs.get("URI", "")),
+                    "iv": bytes.fromhex(iv[2:]) if iv else None,
+                }
+            else:
+                raise HlsUnsupportedError(f"不支持的加密方式: {method}")
+        elif line.startswith("#EXT-X-MAP:"):
+            attrs = _parse_attributes(line.split(":", 1)[1])
+            if "BYTERANGE" in attrs:
+                raise HlsUnsupportedError("不支持带 BYTERANGE 的初始化分片")
+            init_uri = urljoin(m3u8_url, attrs.get("URI", ""))
+        elif line.startswith("#EXT-X-BYTERANGE"):
+            raise HlsUnsupportedError("不支持 BYTERANGE 分片")
+        elif line.startswith("#EXTINF:"):
             try:
-                total_duration += float(line.split(":")[1].rstrip(","))
+                duration = float(line.split(":", 1)[1].split(",")[0])
             except ValueError:
-                pass
-            total_segments += 1
+                duration = 0.0
+        elif not line.startswith("#"):
+            index = len(segments)
+            segments.append({
+                "index": index,
+                "sequence": media_sequence + index,
+                "uri": urljoin(m3u8_url, line),
+                "duration": duration,
+                "key": key,
+            })
+            duration = 0.0
+
+    return {
+        "url": m3u8_url,
+        "segments": segments,
+        "init_uri": init_uri,
+        "total_duration": sum(seg["duration"] for seg in segments),
+    }
+
+
+def _parse_m3u8(m3u8_url: str) -> tuple:
+    """
+    下载并解析 m3u8 文件，返回 (total_segments, total_duration_seconds)
+    遇到 master playlist 会自动跟进第一个 variant stream。
+    """
+    playlist = _load_hls_playlist(m3u8_url)
+    return len(playlist["segments"]), playlist["total_duration"]
+
 
-    return total_segments, total_duration
+def _decrypt_aes128(data: bytes, key: bytes, iv: bytes) -> bytes:
+    from Crypto.Cipher import AES
+
+    plain = AES.new(key, AES.MODE_CBC, iv).decrypt(data)
+    padding = plain[-1] if plain else 0
+    if 0 < padding <= 16 and plain.endswith(bytes([padding]) * padding):
+        plain = plain[:-padding]
+    return plain
+
+
+def _fetch_bytes(url: str) -> bytes:
+    """带重试地下载一个分片/密钥"""
+    sess = _get_media_session()
+    for attempt in range(HLS_SEGMENT_RETRIES + 1):
+        try:
+            resp = sess.get(url, timeout=30)
+            resp.raise_for_status()
+            return resp.content
+        except requests.RequestException:
+            if attempt >= HLS_SEGMENT_RETRIES:
+                raise
+            time.sleep(0.5 * (2 ** attempt))
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def download_hls(m3u8_url: str, output_path: str, progress_callback=None,
+                 max_workers: int = HLS_SEGMENT_WORKERS):
+    """
+    原生并发下载 HLS 分片，最后用 ffmpeg 一次性合并
+    分片保存在 <output_path>.segments/ 下，中断后重新调用只下载缺失的分片。
+    """
+    if progress_callback:
+        progress_callback("正在解析视频分片信息...", 28)
+    playlist = _load_hls_playlist(m3u8_url)
+    segments = playlist["segments"]
+    if not segments:
+        raise RuntimeError("m3u8 中没有可下载的分片")
+
+    if any(seg["key"] for seg in segments):
+        try:
+            import Crypto.Cipher.AES  # noqa: F401
+        except ImportError:
+            raise HlsUnsupportedError("视频使用 AES-128 加密，需要安装 pycryptodome")
+
+    total = len(segments)
+    total_duration = playlist["total_duration"]
+    if progress_callback:
+        progress_callback(
+            f"共 {total} 个分片，总时长 {int(total_duration//60)}m{int(total_duration%60)}s，开始下载...",
+            30,
+        )
+
+    work_dir = output_path + ".segments"
+    os.makedirs(work_dir, exist_ok=True)
+    is_fmp4 = bool(playlist["init_uri"])
+    ext = ".m4s" if is_fmp4 else ".ts"
+    paths = [os.path.join(work_dir, f"{seg['index']:05d}{ext}") for seg in segments]
+
+    keys = {}
+    for uri in {seg["key"]["uri"] for seg in segments if seg["key"]}:
+        keys[uri] = _fetch_bytes(uri)
+
+    def _fetch_segment(seg: dict, path: str):
+        data = _fetch_bytes(seg["uri"])
+        if seg["key"]:
+            iv = seg["key"]["iv"] or seg["sequence"].to_bytes(16, "big")
+            data = _decrypt_aes128(data, keys[seg["key"]["uri"]], iv)
+        _write_atomic(path, data)
+
+    pending = [(seg, path) for seg, path in zip(segments, paths) if not os.path.exists(path)]
+    done = total - len(pending)
+    if done:
+        logger.info(f"[续传] 已有 {done}/{total} 个分片")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(_fetch_segment, seg, path) for seg, path in pending]
+        for future in as_completed(futures):
+            future.result()
+            done += 1
+            if progress_callback:
+                pct = int(30 + done / total * 65)  # 30~95%
+                progress_callback(f"已下载分片 {done}/{total}（{pct}%）", pct)
+
+    if progress_callback:
+        progress_callback("正在合并分片...", 96)
+    _remux_segments(paths, output_path, work_dir, playlist["init_uri"])
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"[完成] 已保存到: {output_path}")
+    if progress_callback:
+        progress_callback("下载完成", 100)
+
+
+def _remux_segments(paths: list, output_path: str, work_dir: str, init_uri: str = None):
+    """TS 分片用 concat demuxer 合并；fMP4 分片先拼接初始化段再整体封装"""
+    ffmpeg_exe = _get_ffmpeg_executable()
+    if init_uri:
+        joined_path = os.path.join(work_dir, "joined.mp4")
+        with open(joined_path, "wb") as out:
+            out.write(_fetch_bytes(init_uri))
+            for path in paths:
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        inputs = ["-i", joined_path]
+    else:
+        list_path = os.path.join(work_dir, "concat.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("\\", "/").replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        inputs = ["-f", "concat", "-safe", "0", "-i", list_path]
+
+    cmd = [ffmpeg_exe, "-y", *inputs, "-c", "copy", "-bsf:a", "aac_adtstoasc", output_path]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True, encoding="utf-8", errors="replace")
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg 合并分片失败（returncode={proc.returncode}）: {proc.stderr[-500:]}")
+
+
+def download_stream(stream_url: str, output_path: str, progress_callback=None):
+    """HLS 优先使用原生并发分片下载，其他流或不支持的播放列表交给 ffmpeg"""
+    if ".m3u8" in stream_url:
+        try:
+            download_hls(stream_url, output_path, progress_callback)
+            return
+        except HlsUnsupportedError as e:
+            logger.info(f"[提示] {e}，改用 ffmpeg 直接下载")
+    download_with_ffmpeg(stream_url, output_path, progress_callback)
 
 
 def download_with_ffmpeg(m3u8_url: str, output_path: str, progress_callback=None):
@@ -593,7 +814,7 @@ def download(url: str, output_dir: str = ".", quality: str = "FHD",
         logger.info(f"      m3u8: {m3u8_url[:80]}...")
         if progress_callback:
             progress_callback(f"正在下载: {title}", 30)
-        download_with_ffmpeg(m3u8_url, output_path, progress_callback)
+        download_stream(m3u8_url, output_path, progress_callback)
 
         return {"success": True, "file_path": output_path, "title": title}
 
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+直播间自适应轮询计划
+
+每个直播间单独安排下次检查时间：
+- 记录每个直播间在一天中各小时开播的情况（按天衰减），常开播的时段算作热门时段，
+  热门时段及其开始前一小段时间按较短间隔检查；
+- 未开播或检查出错时按指数退避拉长间隔，上限 max_interval；
+- 每次间隔加随机抖动，避免所有直播间挤在同一时刻请求；
+- 计划保存在 JSON 文件中，重启后不会丢失已学到的规律。
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_MAX_INTERVAL = 1800.0
+DEFAULT_JITTER = 0.1
+# 每出现一个新的开播日，各小时权重乘以该系数，长期不在某时段开播会逐渐淡出
+DAILY_DECAY = 0.9
+# 某小时权重达到该值（大约两天在该时段开播过）即视为热门时段
+HOT_THRESHOLD = 1.5
+# 热门时段开始前多久进入密集检查（秒）
+HOT_LEAD_SECONDS = 15 * 60
+
+
+@dataclass
+class RoomSchedule:
+    next_check: float = 0.0
+    offline_streak: int = 0
+    error_streak: int = 0
+    last_live: float = 0.0
+    last_checked: float = 0.0
+    hour_weights: List[float] = field(default_factory=lambda: [0.0] * 24)
+    last_live_day: str = ''
+    last_live_hour: str = ''
+
+
+class PollSchedule:
+    """按直播间维护下次检查时间；时间均为 time.time() 的墙上时间，便于持久化"""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        base_interval: float,
+        hot_interval: Optional[float] = None,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        jitter: float = DEFAULT_JITTER,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        :param path: 计划保存路径（JSON），None 表示不持久化
+        :param base_interval: 基础检查间隔（秒），开播中和刚下播的直播间使用
+        :param hot_interval: 热门时段的检查间隔，默认基础间隔的一半（至少 10 秒）
+        :param max_interval: 退避后的最长间隔
+        :param jitter: 间隔的随机抖动比例
+        """
+        self.path = path
+        self.base_interval = max(1.0, float(base_interval))
+        self.hot_interval = float(hot_interval) if hot_interval else max(10.0, self.base_interval / 2)
+        self.max_interval = max(self.base_interval, float(max_interval))
+        self.jitter = max(0.0, min(0.5, float(jitter)))
+        self.rng = rng or random.Random()
+        self.rooms: Dict[str, RoomSchedule] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取轮询计划失败，重新开始学习: {e}")
+            return
+        fields = RoomSchedule.__dataclass_fields__
+        for url, state in data.get('rooms', {}).items():
+            room = RoomSchedule(**{key: value for key, value in state.items() if key in fields})
+            if len(room.hour_weights) != 24:
+                room.hour_weights = [0.0] * 24
+            self.rooms[url] = room
+
+    def save(self) -> None:
+        """原子写入：先写临时文件再替换"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {'rooms': {url: asdict(room) for url, room in self.rooms.items()}}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _room(self, url: str) -> RoomSchedule:
+        room = self.rooms.get(url)
+        if room is None:
+            room = self.rooms[url] = RoomSchedule()
+        return room
+
+    def due(self, urls: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """到了检查时间的直播间（新加入的直播间立即检查）"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [url for url in dict.fromkeys(urls) if self._room(url).next_check <= now]
+
+    def seconds_until_next(self, urls: Iterable[str], now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            next_checks = [self._room(url).next_check for url in urls]
+        return max(0.0, min(next_checks) - now) if next_checks else self.base_interval
+
+    def _seconds_until_hot(self, room: RoomSchedule, now: float) -> Optional[float]:
+        """距离下一个热门时段（含提前量）还有多少秒；当前就在热门时段返回 0，没有热门时段返回 None"""
+        local = time.localtime(now)
+        hour_start = now - local.tm_min * 60 - local.tm_sec
+        for offset in range(25):
+            hour = (local.tm_hour + offset) % 24
+            if room.hour_weights[hour] >= HOT_THRESHOLD:
+                return max(0.0, hour_start + offset * 3600 - HOT_LEAD_SECONDS - now)
+        return None
+
+    def is_hot(self, url: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._seconds_until_hot(self._room(url), now) == 0.0
+
+    def _learn_live(self, room: RoomSchedule, now: float) -> None:
+        """同一小时只计一次，检查得越频繁不会让权重越大"""
+        day = time.strftime('%Y-%m-%d', time.localtime(now))
+        hour_key = time.strftime('%Y-%m-%d %H', time.localtime(now))
+        if hour_key == room.last_live_hour:
+            return
+        if day != room.last_live_day:
+            room.hour_weights = [weight * DAILY_DECAY for weight in room.hour_weights]
+            room.last_live_day = day
+        room.hour_weights[time.localtime(now).tm_hour] += 1.0
+        room.last_live_hour = hour_key
+
+    def record(self, url: str, is_live: bool, error: bool = False, now: Optional[float] = None) -> float:
+        """登记一次检查结果并安排下次检查，返回距下次检查的秒数"""
+        now = time.time() if now is None else now
+        with self._lock:
+            room = self._room(url)
+            room.last_checked = now
+            if error:
+                room.error_streak += 1
+                delay = self.base_interval * 2 ** min(room.error_streak, 16)
+            elif is_live:
+                room.error_streak = 0
+                room.offline_streak = 0
+                room.last_live = now
+                self._learn_live(room, now)
+                delay = self.base_interval
+            else:
+                room.error_streak = 0
+                room.offline_streak += 1
+                delay = self.base_interval * 2 ** min(room.offline_streak - 1, 16)
+                until_hot = self._seconds_until_hot(room, now)
+                if until_hot is not None:
+                    delay = self.hot_interval if until_hot == 0 else min(delay, max(until_hot, self.hot_interval))
+            delay = min(delay, self.max_interval)
+            delay *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+            room.next_check = now + delay
+            return delay
@@ -10,18 +10,18 @@ import os
 import sys
 import asyncio
 import threading
-import time
 import configparser
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-import subprocess
 import signal
 from datetime import datetime
 import re
-import json
-import requests
 
 from paths_config import LIVE_DOWNLOADS_DIR
+from live_room_poller import LiveRoomPoller, DEFAULT_MAX_CONCURRENCY
+from live_poll_schedule import PollSchedule, DEFAULT_MAX_INTERVAL
+from live_stream_resolver import LiveStreamResolver, platform_for
+from live_segment_recorder import SegmentRecorder, DEFAULT_SEGMENT_SECONDS
 
 # 添加live_recorder到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'live_recorder'))
@@ -29,6 +29,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'live_recorder'))
 try:
     from live_recorder import spider, stream, utils, room
     from live_recorder.utils import logger
+    from live_recorder.http_clients.async_http import aclose_clients
     from ffmpeg_install import check_ffmpeg, ffmpeg_path, current_env_path
     import msg_push
     LIVE_RECORDER_AVAILABLE = True
@@ -36,6 +37,12 @@ except ImportError as e:
     print(f"⚠️ 直播录制模块导入失败: {e}")
     LIVE_RECORDER_AVAILABLE = False
 
+# 录制时 ffmpeg 使用的 User-Agent（部分平台拒绝 ffmpeg 默认 UA）
+RECORD_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
 
 class LiveRecorderConfig:
     """直播录制配置管理"""
@@ -52,12 +59,16 @@ class LiveRecorderConfig:
         self.default_config = {
             'Settings': {
                 'monitoring_time': '60',
+                'max_monitoring_time': str(int(DEFAULT_MAX_INTERVAL)),
                 'max_request': '10',
                 'video_format': 'ts',
                 'video_quality': '原画',
                 'save_path': LIVE_DOWNLOADS_DIR,
                 'show_ffmpeg_log': '0',
-                'save_log': '1'
+                'save_log': '1',
+                'segment_time': str(DEFAULT_SEGMENT_SECONDS),
+                'segment_size_mb': '0',
+                'convert_to_mp4': '1'
             },
             'Push': {
                 'enable_push': '0',
@@ -130,7 +141,8 @@ class LiveRecorderManager:
     
     def __init__(self):
         self.config = LiveRecorderConfig()
-        self.recording_processes = {}  # URL -> subprocess映射
+        self.recorders = {}  # URL -> SegmentRecorder
+        self.resolver = None  # 流地址解析器，房间信息缓存在 resolver.rooms
         self.monitoring = False
         self.log_callback = None
         
@@ -183,16 +195,18 @@ class LiveRecorderManager:
         """停止监控"""
         self.monitoring = False
         
-        # 停止所有录制进程
-        for url, process in self.recording_processes.items():
-            try:
-                if process.poll() is None:  # 进程还在运行
-                    process.terminate()
-                    self.log(f"🛑 停止录制: {url}")
-            except Exception as e:
-                self.log(f"❌ 停止录制失败 {url}: {str(e)}")
+        # 停止所有录制：先全部通知 ffmpeg 收尾当前分段，再等待
+        recorders = list(self.recorders.items())
+        for url, recorder in recorders:
+            if recorder.is_alive():
+                recorder.stop()
+                self.log(f"🛑 停止录制: {url}")
+        for url, recorder in recorders:
+            recorder.join(timeout=15)
+            if recorder.is_alive():
+                self.log(f"❌ 停止录制超时 {url}")
         
-        self.recording_processes.clear()
+        self.recorders.clear()
         self.log("🛑 已停止所有监控")
     
     def update_config(self, settings: Dict[str, Any]):
@@ -204,298 +218,170 @@ class LiveRecorderManager:
         self.config.set('Settings', 'save_path', settings.get('save_path', LIVE_DOWNLOADS_DIR))
         self.config.set('Settings', 'show_ffmpeg_log', '1' if settings.get('show_ffmpeg_log', False) else '0')
         self.config.set('Settings', 'save_log', '1' if settings.get('save_log', True) else '0')
+        for key in ('segment_time', 'segment_size_mb'):
+            if key in settings:
+                self.config.set('Settings', key, settings[key])
+        if 'convert_to_mp4' in settings:
+            self.config.set('Settings', 'convert_to_mp4', '1' if settings['convert_to_mp4'] else '0')
         
         self.config.save_config()
     
     def _monitoring_loop(self, urls: List[str], settings: Dict[str, Any]):
-        """监控循环（在后台线程运行）"""
-        interval = settings.get('interval', 60)
-        
-        while self.monitoring:
-            for url in urls:
-                if not self.monitoring:
-                    break
-                
-                try:
-                    self._check_and_record_stream(url, settings)
-                except Exception as e:
-                    self.log(f"❌ 检查直播失败 {url}: {str(e)}")
-                
-                # 短暂休息
-                time.sleep(2)
-            
-            if self.monitoring:
-                # 等待下次检查
-                for _ in range(interval):
-                    if not self.monitoring:
-                        break
-                    time.sleep(1)
+        """监控循环（在后台线程运行自己的事件循环）"""
+        asyncio.run(self._monitor_async(urls, settings))
     
-    def _check_and_record_stream(self, url: str, settings: Dict[str, Any]):
-        """检查并录制直播流"""
+    async def _monitor_async(self, urls: List[str], settings: Dict[str, Any]):
+        """所有直播间并发检查：全局并发上限取 max_concurrency（默认配置中的 max_request），并按平台限速"""
+        interval = settings.get('interval', 60)
+        self.resolver = self._create_resolver(settings)
+        max_concurrency = settings.get('max_concurrency') or self.config.get(
+            'Settings', 'max_request', fallback=str(DEFAULT_MAX_CONCURRENCY))
+        # 每个直播间按自己的开播规律和退避安排检查时间，interval 为基础间隔
+        schedule = PollSchedule(
+            os.path.join(self.config.config_dir, 'poll_schedule.json'),
+            base_interval=float(interval),
+            max_interval=float(settings.get('max_interval') or self.config.get(
+                'Settings', 'max_monitoring_time', fallback=str(DEFAULT_MAX_INTERVAL))),
+        )
+        poller = LiveRoomPoller(
+            check_room=lambda url: self._check_and_record_stream_async(url, settings),
+            platform_of=self._get_platform_from_url,
+            max_concurrency=int(max_concurrency),
+            platform_intervals=settings.get('platform_intervals'),
+            log=self.log,
+            schedule=schedule,
+        )
         try:
-            # 如果这个URL已经在录制，跳过
-            if url in self.recording_processes:
-                process = self.recording_processes[url]
-                if process.poll() is None:  # 进程还在运行
-                    return
-                else:
-                    # 进程已结束，清理
-                    del self.recording_processes[url]
-                    self.log(f"📹 录制进程已结束: {url}")
-            
-            # 检查直播状态（简化实现）
-            self.log(f"🔍 检查直播状态: {url}")
-            
-            # 这里应该调用DouyinLiveRecorder的实际检测逻辑
-            # 由于时间关系，这里使用简化的模拟实现
-            is_live = self._check_live_status(url)
-            
-            if is_live:
-                # 开始录制
-                self._start_recording(url, settings)
-            else:
-                self.log(f"📴 直播未开始: {url}")
-                
-        except Exception as e:
-            self.log(f"❌ 处理直播流错误 {url}: {str(e)}")
+            await poller.run(urls, interval, lambda: self.monitoring)
+        finally:
+            schedule.save()
+            # 关闭本事件循环上复用的 HTTP 连接
+            await aclose_clients()
     
-    def _check_live_status(self, url: str) -> bool:
-        """检查直播状态"""
-        # 优先使用改进的抖音检测逻辑
-        if 'douyin.com' in url:
-            return self._check_douyin_live_status(url)
-        
-        # 其他平台使用原有逻辑
-        try:
-            # 尝试使用原有的spider模块检测
-            if 'kuaishou.com' in url:
-                # 快手检测逻辑
-                pass
-            elif 'huya.com' in url:
-                # 虎牙检测逻辑
-                pass
-            # 其他平台...
-            
-        except Exception as e:
-            self.log(f"⚠️ 平台检测失败，使用备用检测: {str(e)}")
-        
-        return False
+    async def _check_and_record_stream_async(self, url: str, settings: Dict[str, Any]) -> Optional[bool]:
+        """检查并录制直播流（事件循环版本），返回是否开播；已停止监控时返回 None"""
+        if not self.monitoring:
+            return None
+        if self._is_recording(url):
+            return True
+        self.log(f"🔍 检查直播状态: {url}")
+        is_live = await self._check_live_status_async(url)
+        if not self.monitoring:
+            return None
+        if is_live:
+            self._start_recording(url, settings)
+        else:
+            self.log(f"📴 直播未开始: {url}")
+        return is_live
     
-    def _check_douyin_live_status(self, url: str) -> bool:
-        """改进的抖音直播状态检测"""
-        try:
-            
-            # 提取房间ID
-            room_id_match = re.search(r'live\.douyin\.com/(\d+)', url)
-            if not room_id_match:
-                self.log("❌ 无法从URL提取房间ID")
-                return False
-            
-            room_id = room_id_match.group(1)
-            clean_url = f"https://live.douyin.com/{room_id}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(clean_url, headers=headers, timeout=15)
-            
-            if response.status_code != 200:
-                self.log(f"❌ 页面访问失败: {response.status_code}")
-                return False
-            
-            content = response.text
-            
-            # 方法1: 查找JSON数据中的直播状态
-            json_data = self._extract_json_data(content)
-            if json_data:
-                live_info = self._parse_json_live_data(json_data)
-                if live_info.get('is_live'):
-                    self.log(f"✅ JSON检测到直播 (方法: {live_info.get('method', 'json')})")
-                    return True
-            
-            # 方法2: 正则表达式检测
-            if self._regex_live_check(content):
-                self.log("✅ 正则检测到直播")
-                return True
-            
-            # 方法3: 简单指示器检查
-            if self._simple_live_check(content):
-                self.log("✅ 简单检测到直播")
-                return True
-            
-            return False
-            
-        except Exception as e:
-            self.log(f"❌ 抖音直播检测失败: {str(e)}")
+    def _is_recording(self, url: str) -> bool:
+        """URL 是否正在录制；录制已结束（直播结束或重连失败）时清理记录"""
+        recorder = self.recorders.get(url)
+        if recorder is None:
             return False
-    
-    def _extract_json_data(self, content: str):
-        """提取页面中的JSON数据"""
-        json_patterns = [
-            r'window\.__INIT_DATA__\s*=\s*({.*?});',
-            r'window\.__SSR_RENDERED_DATA__\s*=\s*({.*?});',
-            r'self\.__pace_f\.push\(\[function\(\)\{.*?(\{.*?\}).*?\}\]\)',
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, content, re.DOTALL)
-            for match in matches:
-                try:
-                    if match.strip().startswith('{'):
-                        return json.loads(match)
-                except json.JSONDecodeError:
-                    continue
-        return None
-    
-    def _parse_json_live_data(self, data: dict) -> dict:
-        """解析JSON数据中的直播信息"""
-        result = {'is_live': False, 'method': 'json_parse'}
-        
-        def search_live_data(obj, path=""):
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    current_path = f"{path}.{key}" if path else key
-                    
-                    # 检查直播状态字段
-                    if key.lower() in ['islive', 'is_live', 'live_status', 'status']:
-                        if value in [1, '1', True, 'live', 'online']:
-                            result['is_live'] = True
-                            result['status_field'] = current_path
-                            result['status_value'] = value
-                    
-                    # 检查直播流URL
-                    elif key.lower() in ['stream_url', 'play_url', 'flv_url', 'm3u8_url']:
-                        if value and isinstance(value, str) and ('http' in value or 'rtmp' in value):
-                            result['is_live'] = True
-                            result['stream_url'] = value
-                            result['stream_field'] = current_path
-                    
-                    # 递归搜索
-                    if isinstance(value, (dict, list)):
-                        search_live_data(value, current_path)
-            
-            elif isinstance(obj, list):
-                for idx, item in enumerate(obj):
-                    search_live_data(item, f"{path}[{idx}]")
-        
-        search_live_data(data)
-        return result
-    
-    def _regex_live_check(self, content: str) -> bool:
-        """使用正则表达式检测直播状态"""
-        # 查找直播状态
-        status_patterns = [
-            r'"is_live"\s*:\s*(\d+)',
-            r'"live_status"\s*:\s*(\d+)',
-            r'"status"\s*:\s*"([^"]*)"',
-            r'islive["\']?\s*[:=]\s*(\w+)',
-        ]
-        
-        for pattern in status_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if match in ['1', 'true', 'live', 'online']:
-                    return True
-        
-        # 查找直播流URL
-        stream_patterns = [
-            r'"stream_url"\s*:\s*"([^"]+)"',
-            r'"play_url"\s*:\s*"([^"]+)"',
-            r'"flv_url"\s*:\s*"([^"]+)"',
-        ]
-        
-        for pattern in stream_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                if 'http' in match:
-                    return True
-        
-        return False
-    
-    def _simple_live_check(self, content: str) -> bool:
-        """简单的直播检查"""
-        # 检查是否包含直播相关关键词
-        live_keywords = ['stream_url', 'play_url', 'is_live', 'live_status']
-        keyword_count = sum(1 for keyword in live_keywords if keyword in content)
-        
-        # 检查是否包含视频播放器相关内容
-        player_keywords = ['video', 'player', 'stream', 'live']
-        player_count = sum(1 for keyword in player_keywords if keyword in content.lower())
-        
-        # 简单的启发式判断
-        if keyword_count >= 2 and player_count >= 3:
+        if recorder.is_alive():
             return True
-        
+        # 录制已结束，清理；下一轮检查会重新解析流地址
+        del self.recorders[url]
+        self.log(f"📹 录制进程已结束: {url}")
         return False
     
+    def _create_resolver(self, settings: Dict[str, Any]) -> LiveStreamResolver:
+        """按当前画质和代理配置创建解析器，沿用上一次监控缓存的房间信息"""
+        proxy_addr = None
+        proxy_platforms = []
+        if self.config.get('Proxy', 'enable_proxy', fallback='0') == '1':
+            proxy_addr = self.config.get('Proxy', 'proxy_addr', fallback='') or None
+            proxy_platforms = self.config.get('Proxy', 'proxy_platforms', fallback='').split(',')
+        resolver = LiveStreamResolver(
+            spider, stream,
+            quality=settings.get('quality', '原画'),
+            proxy_addr=proxy_addr,
+            proxy_platforms=proxy_platforms,
+        )
+        if self.resolver is not None:
+            resolver.rooms = self.resolver.rooms
+        return resolver
+    
+    async def _check_live_status_async(self, url: str) -> bool:
+        """检查直播状态：按 URL 调用对应平台的 spider 接口并解析流地址，结果缓存在 resolver.rooms"""
+        if platform_for(url) is None:
+            self.log(f"⚠️ 暂不支持该平台: {url}")
+            return False
+        room = await self.resolver.resolve(url)
+        return room.is_live
+    
     def _start_recording(self, url: str, settings: Dict[str, Any]):
-        """开始录制直播"""
+        """开始录制直播：ffmpeg 直接拉取解析出的流地址，按时长/大小分段，分段完成后转 MP4"""
+        room = self.resolver.cached(url) if self.resolver is not None else None
+        if room is None or not room.record_url:
+            self.log(f"❌ 未解析到直播流地址: {url}")
+            return
         try:
             save_path = settings.get('save_path', LIVE_DOWNLOADS_DIR)
-            video_format = settings.get('format', 'ts')
             
             # 确保保存目录存在
             os.makedirs(save_path, exist_ok=True)
             
-            # 生成输出文件名
+            # 生成分段文件名前缀：平台_主播名_时间
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            platform = self._get_platform_from_url(url)
-            filename = f"{platform}_{timestamp}.{video_format}"
-            output_path = os.path.join(save_path, filename)
+            anchor_name = re.sub(r'[\\/:*?"<>|\s]+', '_', room.anchor_name).strip('_')[:50]
+            base_name = f"{room.platform}_{anchor_name or 'live'}_{timestamp}"
+            convert_to_mp4 = self._convert_to_mp4(settings)
             
-            # 构建FFmpeg命令（简化实现）
-            cmd = [
-                'ffmpeg',
-                '-i', url,  # 这里应该是实际的直播流地址
-                '-c', 'copy',
-                '-f', video_format,
-                output_path
-            ]
-            
-            # 启动录制进程
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            recorder = SegmentRecorder(
+                room.record_url,
+                save_path,
+                base_name,
+                segment_seconds=int(settings.get('segment_time') or self.config.get(
+                    'Settings', 'segment_time', fallback=str(DEFAULT_SEGMENT_SECONDS))),
+                segment_size_mb=float(settings.get('segment_size_mb') or self.config.get(
+                    'Settings', 'segment_size_mb', fallback='0')),
+                convert_to_mp4=convert_to_mp4,
+                user_agent=RECORD_USER_AGENT,
+                log=self.log,
+                show_ffmpeg_log=settings.get('show_ffmpeg_log', False),
             )
-            
-            self.recording_processes[url] = process
-            self.log(f"🎬 开始录制: {url} -> {filename}")
+            self.recorders[url] = recorder.start()
+            self.log(f"🎬 开始录制: {room.anchor_name or url} ({room.quality}) -> "
+                     f"{base_name}_*.{'mp4' if convert_to_mp4 else 'ts'}")
             
         except Exception as e:
             self.log(f"❌ 启动录制失败 {url}: {str(e)}")
     
+    def _convert_to_mp4(self, settings: Dict[str, Any]) -> bool:
+        """分段录制写 TS；界面选择 mp4 时每段写完转封装为 MP4，选择 ts 时保留 TS"""
+        if 'convert_to_mp4' in settings:
+            return bool(settings['convert_to_mp4'])
+        video_format = str(settings.get('format') or '').lower()
+        if video_format in ('ts', 'mp4'):
+            return video_format == 'mp4'
+        if video_format:
+            self.log(f"⚠️ 分段录制只支持 ts/mp4 格式，{video_format} 按配置的 convert_to_mp4 保存")
+        return self.config.get('Settings', 'convert_to_mp4', fallback='1') == '1'
+
     def _get_platform_from_url(self, url: str) -> str:
         """从URL获取平台名称"""
-        if 'douyin.com' in url:
-            return 'douyin'
-        elif 'kuaishou.com' in url:
-            return 'kuaishou'
-        elif 'huya.com' in url:
-            return 'huya'
-        elif 'douyu.com' in url:
-            return 'douyu'
-        elif 'bilibili.com' in url:
-            return 'bilibili'
-        elif 'tiktok.com' in url:
-            return 'tiktok'
-        else:
-            return 'unknown'
+        spec = platform_for(url)
+        return spec.name if spec else 'unknown'
     
     def get_recording_status(self) -> Dict[str, Any]:
         """获取录制状态"""
         status = {
             'monitoring': self.monitoring,
-            'recording_count': len(self.recording_processes),
-            'recording_urls': list(self.recording_processes.keys())
+            'recording_count': len(self.recorders),
+            'recording_urls': list(self.recorders.keys()),
+            'recordings': {url: recorder.status() for url, recorder in self.recorders.items()},
+            'rooms': {
+                url: {
+                    'platform': room.platform,
+                    'anchor_name': room.anchor_name,
+                    'title': room.title,
+                    'is_live': room.is_live,
+                    'checked_at': room.checked_at,
+                }
+                for url, room in (self.resolver.rooms.items() if self.resolver is not None else [])
+            }
         }
         return status
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+直播间并发轮询
+
+一轮检查里所有直播间同时发起请求，由全局并发上限和按平台的请求间隔约束，
+一轮耗时取决于最慢的请求和平台限速，而不是直播间数量 × 单次耗时。
+传入 PollSchedule 时每个直播间按各自的计划检查，只有到期的直播间进入本轮。
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+try:
+    from .live_poll_schedule import PollSchedule
+except ImportError:
+    from live_poll_schedule import PollSchedule
+
+DEFAULT_MAX_CONCURRENCY = 10
+# 同一平台相邻两次请求的最小间隔（秒），未列出的平台使用 DEFAULT_PLATFORM_INTERVAL
+DEFAULT_PLATFORM_INTERVALS = {
+    'douyin': 0.2,
+    'tiktok': 0.5,
+}
+DEFAULT_PLATFORM_INTERVAL = 0.1
+
+
+class PlatformRateLimiter:
+    """按平台错开请求开始时间：每个请求在锁内预约自己的开始时刻"""
+
+    def __init__(self, intervals: Optional[Dict[str, float]] = None,
+                 default_interval: float = DEFAULT_PLATFORM_INTERVAL):
+        self.intervals = dict(DEFAULT_PLATFORM_INTERVALS if intervals is None else intervals)
+        self.default_interval = max(0.0, float(default_interval))
+        self._next_start: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def interval_for(self, platform: str) -> float:
+        return max(0.0, float(self.intervals.get(platform, self.default_interval)))
+
+    async def acquire(self, platform: str) -> None:
+        interval = self.interval_for(platform)
+        if interval <= 0:
+            return
+        lock = self._locks.setdefault(platform, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(platform, 0.0))
+            self._next_start[platform] = start + interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class LiveRoomPoller:
+    """并发检查一组直播间，可按固定间隔循环"""
+
+    def __init__(
+        self,
+        check_room: Callable[[str], Awaitable[Optional[bool]]],
+        platform_of: Callable[[str], str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        platform_intervals: Optional[Dict[str, float]] = None,
+        log: Optional[Callable[[str], None]] = None,
+        schedule: Optional[PollSchedule] = None,
+    ):
+        """
+        :param check_room: 检查单个直播间的协程函数（检测开播并按需启动录制），
+                           返回是否开播；返回 None 表示本次没有得出结果
+        :param platform_of: 从直播间 URL 得到平台名，用于按平台限速
+        :param max_concurrency: 同时进行的检查数上限
+        :param platform_intervals: 各平台相邻请求的最小间隔（秒）
+        :param schedule: 按直播间的检查计划；不传时每轮检查所有直播间
+        """
+        self.check_room = check_room
+        self.platform_of = platform_of
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.rate_limiter = PlatformRateLimiter(platform_intervals)
+        self.log = log or (lambda message: None)
+        self.schedule = schedule
+        self.last_sweep_seconds = 0.0
+
+    async def _check_one(self, url: str, semaphore: asyncio.Semaphore) -> None:
+        await self.rate_limiter.acquire(self.platform_of(url))
+        async with semaphore:
+            try:
+                is_live = await self.check_room(url)
+            except Exception as e:
+                self.log(f"❌ 检查直播失败 {url}: {str(e)}")
+                if self.schedule is not None:
+                    self.schedule.record(url, False, error=True)
+                return
+            if self.schedule is not None and is_live is not None:
+                self.schedule.record(url, bool(is_live))
+
+    async def sweep(self, urls: Iterable[str]) -> float:
+        """检查一轮所有直播间，返回本轮耗时（秒）"""
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        unique_urls: List[str] = list(dict.fromkeys(urls))
+        await asyncio.gather(*(self._check_one(url, semaphore) for url in unique_urls))
+        self.last_sweep_seconds = time.monotonic() - started
+        return self.last_sweep_seconds
+
+    async def run(self, urls: Iterable[str], interval: float, is_running: Callable[[], bool]) -> None:
+        """循环检查直到 is_running() 返回 False（每秒检查一次停止标志）：
+        有 schedule 时每轮只检查到期的直播间，睡到最近的下次检查时间；否则按 interval 秒检查全部"""
+        urls = list(urls)
+        while is_running():
+            due = self.schedule.due(urls) if self.schedule is not None else urls
+            if due:
+                elapsed = await self.sweep(due)
+                self.log(f"🔁 本轮检查 {len(due)} 个直播间，用时 {elapsed:.1f} 秒")
+            if self.schedule is not None:
+                if due:
+                    self.schedule.save()
+                wait = self.schedule.seconds_until_next(urls)
+            else:
+                wait = float(interval)
+            deadline = time.monotonic() + max(0.0, wait)
+            while is_running() and time.monotonic() < deadline:
+                await asyncio.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
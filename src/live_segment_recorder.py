@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+直播分段录制
+
+ffmpeg 用 segment 封装器把直播流切成一段段 mpegts（进程崩溃时已写入的内容仍可播放），
+stderr 由后台线程持续读取，避免管道写满后 ffmpeg 阻塞，同时从进度行解析码率、检测断流；
+断流或 ffmpeg 异常退出时自动重连，分段编号接着上一段继续。
+每段写完后交给后台线程转封装为 MP4，崩溃最多损失正在写的那一段。
+"""
+
+import os
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_SEGMENT_SECONDS = 1800
+DEFAULT_STALL_TIMEOUT = 30
+DEFAULT_MAX_RECONNECTS = 5
+
+_OPENING_RE = re.compile(r"Opening '(.+?)' for writing")
+_PROGRESS_RE = re.compile(r'(\w+)=\s*(\S+)')
+_LINE_SPLIT_RE = re.compile(rb'[\r\n]+')
+
+# 所有直播间共用一个转封装线程，多个直播同时结束时不会并发跑多个 ffmpeg 抢磁盘
+_remux_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='live-remux')
+
+
+def parse_progress(line: str) -> Optional[Dict[str, float]]:
+    """解析 ffmpeg 进度行（size=... time=... bitrate=...），返回 out_seconds / bitrate_kbps；不是进度行时返回 None"""
+    if 'time=' not in line or 'bitrate=' not in line:
+        return None
+    fields = dict(_PROGRESS_RE.findall(line))
+    progress = {}
+    try:
+        hours, minutes, seconds = fields['time'].split(':')
+        progress['out_seconds'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (KeyError, ValueError):
+        return None
+    bitrate = fields.get('bitrate', '')
+    if bitrate.endswith('kbits/s'):
+        try:
+            progress['bitrate_kbps'] = float(bitrate[:-len('kbits/s')])
+        except ValueError:
+            pass
+    return progress
+
+
+def remux_to_mp4(ffmpeg: str, segment_path: str, log: Callable[[str], None]) -> Optional[str]:
+    """把一段 .ts 转封装为 .mp4，成功后删除原文件；失败时保留 .ts"""
+    if not os.path.exists(segment_path) or os.path.getsize(segment_path) == 0:
+        if os.path.exists(segment_path):
+            os.remove(segment_path)
+        return None
+    mp4_path = os.path.splitext(segment_path)[0] + '.mp4'
+    cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y', '-i', segment_path,
+           '-c', 'copy', '-movflags', '+faststart', mp4_path]
+    result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0 or not os.path.exists(mp4_path) or os.path.getsize(mp4_path) == 0:
+        error = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        log(f"⚠️ 转封装 MP4 失败，保留 {os.path.basename(segment_path)}: {error[-1] if error else result.returncode}")
+        return None
+    os.remove(segment_path)
+    return mp4_path
+
+
+class SegmentRecorder:
+    """录制一个直播间：后台线程运行 ffmpeg，负责分段、断流重连和转封装"""
+
+    def __init__(
+        self,
+        record_url: str,
+        output_dir: str,
+        base_name: str,
+        segment_seconds: int = DEFAULT_SEGMENT_SECONDS,
+        segment_size_mb: float = 0,
+        convert_to_mp4: bool = True,
+        user_agent: Optional[str] = None,
+        stall_timeout: float = DEFAULT_STALL_TIMEOUT,
+        max_reconnects: int = DEFAULT_MAX_RECONNECTS,
+        ffmpeg: str = 'ffmpeg',
+        log: Optional[Callable[[str], None]] = None,
+        show_ffmpeg_log: bool = False,
+    ):
+        """
+        :param record_url: 直播流地址（m3u8/flv）
+        :param output_dir: 保存目录
+        :param base_name: 文件名前缀，分段文件为 <base_name>_000.ts、<base_name>_001.ts ...
+        :param segment_seconds: 每段时长（秒），<=0 表示只按大小分段
+        :param segment_size_mb: 每段大小上限（MB），0 表示不限；超出后结束当前 ffmpeg 并从下一段续录
+        :param convert_to_mp4: 每段写完后转封装为 MP4
+        :param stall_timeout: 这么多秒没有新的输出进度视为断流
+        :param max_reconnects: 连续重连都没有录到数据的次数上限，超过后放弃（由下一轮检查重新解析流地址）
+        """
+        self.record_url = record_url
+        self.output_dir = output_dir
+        self.base_name = base_name
+        self.segment_seconds = int(segment_seconds)
+        self.segment_size_bytes = int(float(segment_size_mb) * 1024 * 1024)
+        self.convert_to_mp4 = convert_to_mp4
+        self.user_agent = user_agent
+        self.stall_timeout = float(stall_timeout)
+        self.max_reconnects = int(max_reconnects)
+        self.ffmpeg = ffmpeg
+        self.log = log or (lambda message: None)
+        self.show_ffmpeg_log = show_ffmpeg_log
+
+        self.segments: List[str] = []  # 已打开过的分段文件，按顺序
+        self.outputs: List[str] = []  # 转封装（或无需转封装）完成的文件
+        self.bitrate_kbps = 0.0
+        self.reconnects = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_progress = 0.0
+        self._last_out_seconds = -1.0
+        self._run_segments: List[str] = []
+        self._pending_remux = []
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SegmentRecorder':
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name=f'live-record-{self.base_name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """请求停止：让 ffmpeg 正常收尾当前分段（不等待）"""
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_remux(self, timeout: Optional[float] = None) -> None:
+        """等待已提交的转封装全部完成"""
+        for future in list(self._pending_remux):
+            future.result(timeout)
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            current = self._run_segments[-1] if self._run_segments else ''
+            return {
+                'segments': len(self.segments),
+                'current_segment': current,
+                'bitrate_kbps': self.bitrate_kbps,
+                'reconnects': self.reconnects,
+            }
+
+    def _build_command(self, start_number: int) -> List[str]:
+        cmd = [self.ffmpeg, '-hide_banner', '-y']
+        if self.user_agent:
+            cmd += ['-user_agent', self.user_agent]
+        cmd += [
+            '-rw_timeout', str(int(self.stall_timeout * 1_000_000)),
+            '-i', self.record_url,
+            '-c', 'copy',
+            '-f', 'segment',
+            '-segment_time', str(self.segment_seconds if self.segment_seconds > 0 else 86400),
+            '-segment_format', 'mpegts',
+            '-segment_start_number', str(start_number),
+            '-reset_timestamps', '1',
+            os.path.join(self.output_dir, f'{self.base_name}_%03d.ts'),
+        ]
+        return cmd
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            got_data, rotated = self._record_once()
+            if self._stop.is_set():
+                break
+            if rotated:
+                failures = 0
+                continue
+            failures = 0 if got_data else failures + 1
+            if failures > self.max_reconnects:
+                self.log(f"📴 直播流连续 {failures} 次无数据，停止录制: {self.base_name}")
+                break
+            self.reconnects += 1
+            delay = min(30, 2 ** failures)
+            self.log(f"🔄 直播流中断，{delay} 秒后重连 ({self.reconnects}): {self.base_name}")
+            self._stop.wait(delay)
+
+    def _record_once(self):
+        """运行一次 ffmpeg，返回 (是否录到数据, 是否因分段大小上限主动轮换)"""
+        with self._lock:
+            self._run_segments = []
+        self._last_out_seconds = -1.0
+        self._last_progress = time.monotonic()
+        got_data = False
+        rotated = False
+        try:
+            process = subprocess.Popen(
+                self._build_command(len(self.segments)),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+        except OSError as e:
+            self.log(f"❌ 启动 ffmpeg 失败: {e}")
+            return False, False
+
+        reader = threading.Thread(target=self._drain_stderr, args=(process,), daemon=True)
+        reader.start()
+        while process.poll() is None:
+            if self._stop.wait(1.0):
+                self._terminate(process)
+                break
+            if time.monotonic() - self._last_progress > self.stall_timeout:
+                self.log(f"⚠️ {self.stall_timeout:.0f} 秒没有新数据，判定断流: {self.base_name}")
+                process.kill()
+                break
+            if self.segment_size_bytes and self._current_segment_size() >= self.segment_size_bytes:
+                rotated = True
+                self._terminate(process)
+                break
+        process.wait()
+        reader.join(timeout=5)
+
+        with self._lock:
+            got_data = self._last_out_seconds > 0
+            last = self._run_segments[-1] if self._run_segments else None
+        if last:
+            self._segment_finished(last)
+        return got_data, rotated
+
+    def _current_segment_size(self) -> int:
+        with self._lock:
+            current = self._run_segments[-1] if self._run_segments else None
+        try:
+            return os.path.getsize(current) if current else 0
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _terminate(process: subprocess.Popen) -> None:
+        """先发 q 让 ffmpeg 写完当前分段，超时再强制结束"""
+        try:
+            process.stdin.write(b'q')
+            process.stdin.flush()
+            process.wait(timeout=10)
+            return
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            pass
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def _drain_stderr(self, process: subprocess.Popen) -> None:
+        """持续读取 stderr：进度行用 \\r 分隔，需要按 \\r 和 \\n 一起切分"""
+        buffer = b''
+        while True:
+            chunk = process.stderr.read1(65536)
+            if not chunk:
+                break
+            parts = _LINE_SPLIT_RE.split(buffer + chunk)
+            buffer = parts.pop()
+            for part in parts:
+                self._handle_line(part.decode('utf-8', 'replace'))
+        if buffer:
+            self._handle_line(buffer.decode('utf-8', 'replace'))
+
+    def _handle_line(self, line: str) -> None:
+        progress = parse_progress(line)
+        if progress is not None:
+            with self._lock:
+                if progress['out_seconds'] > self._last_out_seconds:
+                    self._last_out_seconds = progress['out_seconds']
+                    self._last_progress = time.monotonic()
+                if progress.get('bitrate_kbps'):
+                    self.bitrate_kbps = progress['bitrate_kbps']
+            return
+
+        opening = _OPENING_RE.search(line)
+        if opening:
+            path = opening.group(1)
+            with self._lock:
+                previous = self._run_segments[-1] if self._run_segments else None
+                self._run_segments.append(path)
+                self.segments.append(path)
+            if previous:
+                self._segment_finished(previous)
+            return
+
+        if self.show_ffmpeg_log and line.strip():
+            self.log(f"[ffmpeg] {line.strip()}")
+
+    def _segment_finished(self, path: str) -> None:
+        self.log(f"✅ 分段完成: {os.path.basename(path)}")
+        if not self.convert_to_mp4:
+            self.outputs.append(path)
+            return
+
+        def remux():
+            output = remux_to_mp4(self.ffmpeg, path, self.log)
+            if output:
+                self.outputs.append(output)
+
+        self._pending_remux.append(_remux_executor.submit(remux))
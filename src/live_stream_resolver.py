@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+直播流地址解析
+
+按直播间 URL 选择 live_recorder.spider 中对应平台的抓取函数，再用
+live_recorder.stream 的同名函数按画质选出真正的 m3u8/flv 流地址（record_url），
+录制时交给 ffmpeg 的是流地址而不是直播间网页。
+主播名、标题等房间信息按 URL 缓存，在多轮检查之间保留。
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 界面上的中文画质 -> live_recorder.stream.get_quality_index 使用的代号
+QUALITY_ALIASES = {
+    '原画': 'OD',
+    '蓝光': 'BD',
+    '超清': 'UHD',
+    '高清': 'HD',
+    '标清': 'SD',
+    '流畅': 'LD',
+}
+
+Resolver = Callable[[Any, Any, str, str, Optional[str], Optional[str]], Awaitable[dict]]
+
+
+def _direct(fetch_name: str) -> Resolver:
+    """抓取函数直接返回带 record_url 的结果"""
+    async def resolve(spider, stream, url, quality, proxy_addr, cookies):
+        return await getattr(spider, fetch_name)(url, proxy_addr=proxy_addr, cookies=cookies)
+    return resolve
+
+
+def _via_stream(fetch_name: str, build: Callable[[Any, dict, str, Optional[str], Optional[str]], Awaitable[dict]]) -> Resolver:
+    """先抓取房间数据，再用 stream 模块按画质选出流地址"""
+    async def resolve(spider, stream, url, quality, proxy_addr, cookies):
+        json_data = await getattr(spider, fetch_name)(url, proxy_addr=proxy_addr, cookies=cookies)
+        if not json_data:
+            return {}
+        return await build(stream, json_data, quality, proxy_addr, cookies)
+    return resolve
+
+
+def _play_list(fetch_name: str, **stream_kwargs) -> Resolver:
+    """抓取结果带 play_url_list 的平台，用通用的 stream.get_stream_url 选画质"""
+    return _via_stream(
+        fetch_name,
+        lambda stream, data, quality, proxy, cookies: stream.get_stream_url(data, quality, **stream_kwargs),
+    )
+
+
+@dataclass(frozen=True)
+class PlatformSpec:
+    name: str
+    label: str
+    patterns: Tuple[str, ...]
+    resolve: Resolver
+
+
+PLATFORMS: List[PlatformSpec] = [
+    PlatformSpec('douyin', '抖音', (r'(live|v)\.douyin\.com/',), _via_stream(
+        'get_douyin_stream_data',
+        lambda stream, data, quality, proxy, cookies: stream.get_douyin_stream_url(data, quality, proxy))),
+    PlatformSpec('tiktok', 'TikTok', (r'tiktok\.com/',), _via_stream(
+        'get_tiktok_stream_data',
+        lambda stream, data, quality, proxy, cookies: stream.get_tiktok_stream_url(data, quality, proxy))),
+    PlatformSpec('kuaishou', '快手', (r'live\.kuaishou\.com/',), _via_stream(
+        'get_kuaishou_stream_data',
+        lambda stream, data, quality, proxy, cookies: stream.get_kuaishou_stream_url(data, quality))),
+    PlatformSpec('huya', '虎牙', (r'huya\.com/',), _via_stream(
+        'get_huya_stream_data',
+        lambda stream, data, quality, proxy, cookies: stream.get_huya_stream_url(data, quality))),
+    PlatformSpec('douyu', '斗鱼', (r'douyu\.com/',), _via_stream(
+        'get_douyu_info_data',
+        lambda stream, data, quality, proxy, cookies: stream.get_douyu_stream_url(
+            data, video_quality=quality, cookies=cookies, proxy_addr=proxy))),
+    PlatformSpec('yy', 'YY', (r'(www\.)?yy\.com/',), _via_stream(
+        'get_yy_stream_data',
+        lambda stream, data, quality, proxy, cookies: stream.get_yy_stream_url(data))),
+    PlatformSpec('bilibili', 'B站', (r'live\.bilibili\.com/',), _via_stream(
+        'get_bilibili_room_info',
+        lambda stream, data, quality, proxy, cookies: stream.get_bilibili_stream_url(
+            data, video_quality=quality, proxy_addr=proxy, cookies=cookies))),
+    PlatformSpec('netease', '网易CC', (r'cc\.163\.com/',), _via_stream(
+        'get_netease_stream_data',
+        lambda stream, data, quality, proxy, cookies: stream.get_netease_stream_url(data, quality))),
+    PlatformSpec('weibo', '微博', (r'weibo\.com/',), _play_list(
+        'get_weibo_stream_data', url_type='all', hls_extra_key='m3u8_url', flv_extra_key='flv_url')),
+    PlatformSpec('acfun', 'AcFun', (r'live\.acfun\.cn/',), _play_list(
+        'get_acfun_stream_data', url_type='flv', flv_extra_key='url')),
+    PlatformSpec('twitch', 'TwitchTV', (r'twitch\.tv/',), _play_list('get_twitchtv_stream_data')),
+    PlatformSpec('youtube', 'YouTube', (r'youtube\.com/',), _play_list('get_youtube_stream_url')),
+    PlatformSpec('chzzk', 'CHZZK', (r'chzzk\.naver\.com/',), _play_list('get_chzzk_stream_data')),
+    PlatformSpec('xiaohongshu', '小红书', (r'xiaohongshu\.com/', r'xhslink\.com/'), _direct('get_xhs_stream_url')),
+    PlatformSpec('bigo', 'Bigo', (r'bigo\.tv/',), _direct('get_bigo_stream_url')),
+    PlatformSpec('blued', 'Blued', (r'blued\.cn/',), _direct('get_blued_stream_url')),
+    PlatformSpec('kugou', '酷狗', (r'fanxing2?\.kugou\.com/',), _direct('get_kugou_stream_url')),
+    PlatformSpec('huajiao', '花椒', (r'huajiao\.com/',), _direct('get_huajiao_stream_url')),
+    PlatformSpec('6room', '六间房', (r'v\.6\.cn/',), _direct('get_6room_stream_url')),
+    PlatformSpec('zhihu', '知乎', (r'zhihu\.com/',), _direct('get_zhihu_stream_url')),
+    PlatformSpec('jd', '京东', (r'jd\.com/',), _direct('get_jd_stream_url')),
+    PlatformSpec('migu', '咪咕', (r'miguvideo\.com/',), _direct('get_migu_stream_url')),
+    PlatformSpec('maoerfm', '猫耳FM', (r'missevan\.com/',), _direct('get_maoerfm_stream_url')),
+    PlatformSpec('liveme', 'LiveMe', (r'liveme\.com/',), _direct('get_liveme_stream_url')),
+    PlatformSpec('17live', '17Live', (r'17\.live/',), _direct('get_17live_stream_url')),
+    PlatformSpec('picarto', 'Picarto', (r'picarto\.tv/',), _direct('get_picarto_stream_url')),
+]
+
+
+def platform_for(url: str) -> Optional[PlatformSpec]:
+    """按 URL 匹配平台，不支持时返回 None"""
+    for spec in PLATFORMS:
+        if any(re.search(pattern, url) for pattern in spec.patterns):
+            return spec
+    return None
+
+
+def normalize_quality(quality: Optional[str]) -> str:
+    quality = (quality or '').strip()
+    return QUALITY_ALIASES.get(quality, quality.upper() or 'OD')
+
+
+@dataclass
+class RoomInfo:
+    """一个直播间最近一次解析的结果"""
+
+    url: str
+    platform: str
+    anchor_name: str = ''
+    title: str = ''
+    is_live: bool = False
+    record_url: str = ''
+    quality: str = ''
+    checked_at: float = 0.0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class LiveStreamResolver:
+    """按平台分派到 live_recorder 的抓取函数，缓存房间信息"""
+
+    def __init__(self, spider, stream, quality: str = '原画',
+                 proxy_addr: Optional[str] = None, proxy_platforms: Optional[List[str]] = None,
+                 cookies: Optional[Dict[str, str]] = None):
+        """
+        :param spider: live_recorder.spider 模块
+        :param stream: live_recorder.stream 模块
+        :param quality: 录制画质（原画/蓝光/超清/高清/标清/流畅 或 OD/BD/UHD/HD/SD/LD）
+        :param proxy_addr: 代理地址，只用于 proxy_platforms 中列出的平台
+        :param proxy_platforms: 需要走代理的平台（按平台名或显示名匹配，不区分大小写）
+        :param cookies: 平台名 -> Cookie 字符串
+        """
+        self.spider = spider
+        self.stream = stream
+        self.quality = normalize_quality(quality)
+        self.proxy_addr = proxy_addr
+        self.proxy_platforms = {name.strip().lower() for name in proxy_platforms or [] if name.strip()}
+        self.cookies = cookies or {}
+        self.rooms: Dict[str, RoomInfo] = {}
+
+    def _proxy_for(self, spec: PlatformSpec) -> Optional[str]:
+        if not self.proxy_addr:
+            return None
+        if spec.name.lower() in self.proxy_platforms or spec.label.lower() in self.proxy_platforms:
+            return self.proxy_addr
+        return None
+
+    async def resolve(self, url: str) -> RoomInfo:
+        """检查直播间是否开播并解析流地址；不支持的平台抛出 ValueError"""
+        spec = platform_for(url)
+        if spec is None:
+            raise ValueError(f"不支持的直播平台: {url}")
+        data = await spec.resolve(
+            self.spider, self.stream, url, self.quality, self._proxy_for(spec), self.cookies.get(spec.name)
+        ) or {}
+
+        room = self.rooms.get(url) or RoomInfo(url=url, platform=spec.name)
+        # 未开播时部分平台不返回主播名/标题，沿用上一轮的值
+        room.anchor_name = data.get('anchor_name') or room.anchor_name
+        room.title = data.get('title') or room.title
+        room.record_url = data.get('record_url') or data.get('m3u8_url') or data.get('flv_url') or ''
+        room.is_live = bool(data.get('is_live')) and bool(room.record_url)
+        room.quality = data.get('quality') or self.quality
+        room.checked_at = time.time()
+        room.extra = {key: data[key] for key in ('m3u8_url', 'flv_url') if data.get(key)}
+        self.rooms[url] = room
+        return room
+
+    def cached(self, url: str) -> Optional[RoomInfo]:
+        return self.rooms.get(url)
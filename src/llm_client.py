@@ -0,0 +1,470 @@
+"""
+大模型调用统一入口
+
+翻译、字幕润色、文章生成和解说稿重写都通过 LLMClient 调用 OpenAI 兼容接口：
+- 本地响应缓存：键为 (接口地址, 模型, 规范化后的消息, 参数) 的 SHA-256，
+  任务重试或重跑时相同的请求直接复用结果，不再重复计费和等待；
+  缓存有 TTL 和总大小上限，LLM_CACHE=0 或调用时 use_cache=False 可绕过；
+- 调用统计：记录每次调用的耗时、token 用量和缓存命中情况；
+- 连接复用与限流：get_llm_client 按 (服务, 接口地址, 密钥) 在进程内共用 SDK 客户端及其连接池，
+  每个服务有并发上限和每分钟请求数上限（LLM_MAX_CONCURRENCY[_服务] / LLM_RPM[_服务]），
+  翻译、润色、摘要在多个线程或协程中同时调用也不会超出服务商限制。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .paths_config import LLM_CACHE_DIR
+except ImportError:
+    from paths_config import LLM_CACHE_DIR
+
+DEFAULT_CACHE_TTL_DAYS = 30
+DEFAULT_CACHE_MAX_MB = 200
+DEFAULT_TIMEOUT = 120
+DEFAULT_MAX_CONCURRENCY = 4
+# 0 表示不限制每分钟请求数
+DEFAULT_RPM = 0
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on", "enabled")
+
+
+def base_url_from_endpoint(url: str) -> str:
+    """https://api.deepseek.com/v1/chat/completions -> https://api.deepseek.com/v1"""
+    url = (url or "").strip().rstrip("/")
+    suffix = "/chat/completions"
+    return url[:-len(suffix)] if url.endswith(suffix) else url
+
+
+def normalize_prompt(text: str) -> str:
+    """统一换行、去掉行尾空白和首尾空行，格式上的细微差别不影响缓存命中"""
+    lines = (text or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def cache_key(base_url: str, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {
+            "base_url": base_url_from_endpoint(base_url),
+            "model": model,
+            "messages": [
+                {"role": message.get("role"), "content": normalize_prompt(str(message.get("content", "")))}
+                for message in messages
+            ],
+            "params": {key: params[key] for key in sorted(params) if params[key] is not None},
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """按内容寻址的磁盘缓存：<cache_dir>/<键前两位>/<键>.json，超出大小上限时删除最久未用的条目"""
+
+    def __init__(self, cache_dir: str, ttl: float = DEFAULT_CACHE_TTL_DAYS * 86400,
+                 max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        """
+        :param cache_dir: 缓存目录
+        :param ttl: 有效期（秒），<= 0 表示禁用缓存
+        :param max_bytes: 缓存总大小上限
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir) and self.ttl > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - float(entry.get("created", 0)) > self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # 记录最近使用时间，清理时按此排序
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(dict(entry, created=time.time()), ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._prune()
+
+    def _entries(self):
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat
+
+    def _scan_size(self) -> int:
+        return sum(stat.st_size for _path, stat in self._entries())
+
+    def _prune(self) -> None:
+        """删除过期条目，再按最近使用时间从旧到新删除，直到低于上限的 90%"""
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _path, stat in entries)
+        target = self.max_bytes * 0.9
+        for path, stat in entries:
+            if total <= target and now - stat.st_mtime <= self.ttl:
+                continue
+            self._remove(path)
+            total -= stat.st_size
+        self._total_bytes = total
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@dataclass
+class LLMStats:
+    """调用统计（进程内累计，线程安全）"""
+
+    calls: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0.0
+    by_purpose: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, purpose: str, latency: float, cached: bool = False, error: bool = False,
+               prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        with self._lock:
+            self.calls += 1
+            self.cache_hits += int(cached)
+            self.errors += int(error)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.latency_seconds += latency
+            item = self.by_purpose.setdefault(purpose or "other", {
+                "calls": 0, "cache_hits": 0, "errors": 0, "tokens": 0, "latency_seconds": 0.0,
+            })
+            item["calls"] += 1
+            item["cache_hits"] += int(cached)
+            item["errors"] += int(error)
+            item["tokens"] += prompt_tokens + completion_tokens
+            item["latency_seconds"] += latency
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.calls if self.calls else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "hit_rate": self.hit_rate,
+                "errors": self.errors,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "latency_seconds": self.latency_seconds,
+                "by_purpose": {key: dict(value) for key, value in self.by_purpose.items()},
+            }
+
+    def format_report(self) -> str:
+        data = self.snapshot()
+        model_calls = data["calls"] - data["cache_hits"]
+        average = data["latency_seconds"] / model_calls if model_calls else 0.0
+        return (
+            f"LLM 调用 {data['calls']} 次，缓存命中 {data['cache_hits']} 次（{data['hit_rate']:.0%}），"
+            f"失败 {data['errors']} 次，tokens {data['prompt_tokens']}+{data['completion_tokens']}，"
+            f"平均耗时 {average:.1f} 秒"
+        )
+
+
+@dataclass
+class LLMResult:
+    text: str
+    reasoning: str = ""
+    cached: bool = False
+    latency: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+_default_cache: Optional[LLMResponseCache] = None
+_default_cache_lock = threading.Lock()
+_stats = LLMStats()
+
+
+def default_cache() -> LLMResponseCache:
+    """进程共用的响应缓存，配置来自环境变量 LLM_CACHE_TTL_DAYS / LLM_CACHE_MAX_MB"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache(
+                LLM_CACHE_DIR,
+                ttl=float(os.getenv("LLM_CACHE_TTL_DAYS", str(DEFAULT_CACHE_TTL_DAYS))) * 86400,
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", str(DEFAULT_CACHE_MAX_MB))) * 1024 * 1024),
+            )
+        return _default_cache
+
+
+def llm_stats() -> LLMStats:
+    return _stats
+
+
+class ProviderLimiter:
+    """同一服务的并发上限 + 每分钟请求数上限（滑动窗口），线程安全"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, rpm: int = DEFAULT_RPM,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        :param max_concurrency: 同时进行的请求数上限，<= 0 表示不限制
+        :param rpm: 任意 60 秒内发出的请求数上限，<= 0 表示不限制
+        """
+        self.max_concurrency = int(max_concurrency)
+        self.rpm = int(rpm)
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency) if self.max_concurrency > 0 else None
+        self._started = deque()
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+
+    def _wait_for_rate(self) -> None:
+        if self.rpm <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                while self._started and now - self._started[0] >= 60:
+                    self._started.popleft()
+                if len(self._started) < self.rpm:
+                    self._started.append(now)
+                    return
+                wait = 60 - (now - self._started[0])
+            self._sleep(max(wait, 0.01))
+
+    @contextmanager
+    def slot(self):
+        """占用一个请求名额，名额不足时阻塞等待"""
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            self._wait_for_rate()
+            yield
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_sdk_clients: Dict[tuple, Any] = {}
+_llm_clients: Dict[tuple, "LLMClient"] = {}
+_registry_lock = threading.RLock()
+
+
+def _provider_env(name: str, provider: str, default: int) -> int:
+    suffix = re.sub(r"[^A-Z0-9]+", "_", provider.upper()).strip("_")
+    value = os.getenv(f"{name}_{suffix}") or os.getenv(name)
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+def provider_limiter(provider: str) -> ProviderLimiter:
+    """进程共用的服务限流器，例如 DeepSeek 读取 LLM_MAX_CONCURRENCY_DEEPSEEK、LLM_RPM_DEEPSEEK"""
+    with _registry_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = _limiters[provider] = ProviderLimiter(
+                _provider_env("LLM_MAX_CONCURRENCY", provider, DEFAULT_MAX_CONCURRENCY),
+                _provider_env("LLM_RPM", provider, DEFAULT_RPM),
+            )
+        return limiter
+
+
+def shared_sdk_client(api_key: str, base_url: Optional[str], timeout: float = DEFAULT_TIMEOUT):
+    """同一接口地址和密钥共用一个 OpenAI SDK 客户端（及其 HTTP 连接池）"""
+    key = (base_url, api_key, timeout)
+    with _registry_lock:
+        client = _sdk_clients.get(key)
+        if client is None:
+            from openai import OpenAI
+            client = _sdk_clients[key] = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
+        return client
+
+
+def get_llm_client(provider: str, api_key: str, base_url: Optional[str], model: str,
+                   timeout: float = DEFAULT_TIMEOUT) -> "LLMClient":
+    """按 (服务, 接口地址, 密钥, 模型) 返回进程内共用的 LLMClient"""
+    key = (provider, base_url_from_endpoint(base_url) if base_url else None, api_key, model, timeout)
+    with _registry_lock:
+        client = _llm_clients.get(key)
+        if client is None:
+            client = _llm_clients[key] = LLMClient(provider, api_key, base_url, model, timeout=timeout)
+        return client
+
+
+class LLMClient:
+    """一个 OpenAI 兼容接口（DeepSeek / OpenAI / 其他兼容服务）的调用封装"""
+
+    def __init__(self, provider: str, api_key: str, base_url: Optional[str], model: str,
+                 cache: Optional[LLMResponseCache] = None, stats: Optional[LLMStats] = None,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        :param provider: 服务名称，用于日志、统计，同名服务共用并发和频率限制
+        :param base_url: 接口地址，也接受以 /chat/completions 结尾的完整地址；None 表示 OpenAI 官方地址
+        :param cache: 响应缓存，默认使用进程共用缓存
+        :param stats: 调用统计，默认使用进程共用统计
+        """
+        self.provider = provider
+        self.api_key = api_key
+        self.base_url = base_url_from_endpoint(base_url) if base_url else None
+        self.model = model
+        self.cache = cache if cache is not None else default_cache()
+        self.stats = stats if stats is not None else llm_stats()
+        self.timeout = timeout
+        self.limiter = provider_limiter(provider)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = shared_sdk_client(self.api_key, self.base_url, self.timeout)
+        return self._client
+
+    def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        on_delta: Optional[Callable[[str], None]] = None,
+        use_cache: bool = True,
+        purpose: str = "",
+        **params: Any,
+    ) -> LLMResult:
+        """
+        发送一次对话请求，失败时抛出异常（失败不会写入缓存）
+        :param stream: 流式请求，每段增量交给 on_delta；命中缓存时 on_delta 收到完整文本
+        :param use_cache: False 时跳过缓存读取（结果仍会写入缓存）
+        :param purpose: 调用用途（translate / polish / summary / rewrite ...），用于分类统计
+        """
+        params = dict(params, temperature=temperature, max_tokens=max_tokens)
+        key = cache_key(self.base_url or "", self.model, messages, params)
+        started = time.time()
+        if use_cache and _env_flag("LLM_CACHE", True):
+            entry = self.cache.get(key)
+            if entry is not None:
+                result = LLMResult(entry.get("text", ""), entry.get("reasoning", ""), cached=True,
+                                   latency=time.time() - started)
+                self.stats.record(purpose, result.latency, cached=True)
+                if on_delta and result.text:
+                    on_delta(result.text)
+                return result
+
+        request = {key: value for key, value in params.items() if value is not None}
+        try:
+            with self.limiter.slot():
+                if stream:
+                    result = self._stream(messages, request, on_delta)
+                else:
+                    result = self._request(messages, request)
+        except Exception:
+            self.stats.record(purpose, time.time() - started, error=True)
+            raise
+
+        result.latency = time.time() - started
+        self.stats.record(purpose, result.latency, prompt_tokens=result.prompt_tokens,
+                          completion_tokens=result.completion_tokens)
+        if result.text:
+            self.cache.put(key, {"model": self.model, "text": result.text, "reasoning": result.reasoning})
+        return result
+
+    def _request(self, messages, request) -> LLMResult:
+        response = self.client.chat.completions.create(model=self.model, messages=messages, **request)
+        if not response.choices:
+            raise RuntimeError(f"无法从 {self.provider} 响应中提取内容")
+        message = response.choices[0].message
+        usage = getattr(response, "usage", None)
+        return LLMResult(
+            message.content or "",
+            getattr(message, "reasoning_content", None) or "",
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    def _stream(self, messages, request, on_delta) -> LLMResult:
+        response = self.client.chat.completions.create(model=self.model, messages=messages, stream=True, **request)
+        parts = []
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                if on_delta:
+                    on_delta(delta)
+        return LLMResult("".join(parts))
+
+    def complete(self, system_prompt: str, user_prompt: str, **kwargs: Any) -> str:
+        """单轮 system + user 对话，返回文本"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        return self.chat(messages, **kwargs).text
+
+    async def achat(self, messages: List[Dict[str, Any]], **kwargs: Any) -> LLMResult:
+        """供协程调用：在线程中执行 chat，与同步调用共用连接池和限流名额"""
+        return await asyncio.to_thread(self.chat, messages, **kwargs)
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, **kwargs: Any) -> str:
+        return await asyncio.to_thread(self.complete, system_prompt, user_prompt, **kwargs)
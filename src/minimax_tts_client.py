@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import os
 import re
+import threading
 import time
 import uuid
 import io
@@ -12,6 +13,11 @@ from pathlib import Path
 
 import requests
 
+try:
+    from .http_session import create_pooled_session
+except ImportError:
+    from http_session import create_pooled_session
+
 
 DEFAULT_API_URL = "https://api.minimaxi.com/v1/t2a_v2"
 DEFAULT_MODEL = "speech-2.8-turbo"
@@ -40,6 +46,8 @@ class MiniMaxTTSClient:
         timeout: int = 180,
         max_retries: int = 5,
         min_request_interval: float | None = None,
+        session: requests.Session | None = None,
+        pool_size: int | None = None,
     ) -> None:
         self.api_key = (api_key or os.getenv("MINIMAX_API_KEY") or "").strip()
         self.api_url = (
@@ -70,6 +78,9 @@ class MiniMaxTTSClient:
             float(os.getenv("MINIMAX_TTS_RATE_LIMIT_BACKOFF_SECONDS", "20")),
         )
         self._last_request_started = 0.0
+        self._rate_lock = threading.Lock()
+        # Keep-alive connections are reused across segments and worker threads.
+        self.session = session or create_pooled_session(pool_size)
 
         if not self.api_key:
             raise ValueError("未配置 MiniMax API Key")
@@ -182,13 +193,12 @@ class MiniMaxTTSClient:
         for attempt in range(self.max_retries + 1):
             try:
                 self._wait_for_rate_slot()
-                response = requests.post(
+                response = self.session.post(
                     self.api_url,
                     json=payload,
                     headers=headers,
                     timeout=self.timeout,
                 )
-                self._last_request_started = time.monotonic()
                 if response.status_code in retry_statuses and attempt < self.max_retries:
                     time.sleep(2 ** attempt)
                     continue
@@ -225,12 +235,20 @@ class MiniMaxTTSClient:
         raise RuntimeError(f"MiniMax TTS 网络请求失败: {last_error}") from last_error
 
     def _wait_for_rate_slot(self) -> None:
-        if self.min_request_interval <= 0 or self._last_request_started <= 0:
+        if self.min_request_interval <= 0:
             return
-        elapsed = time.monotonic() - self._last_request_started
-        remaining = self.min_request_interval - elapsed
-        if remaining > 0:
-            time.sleep(remaining)
+        # Concurrent workers take turns: each one reserves its start time before
+        # releasing the lock, so requests stay spaced by min_request_interval.
+        with self._rate_lock:
+            if self._last_request_started > 0:
+                elapsed = time.monotonic() - self._last_request_started
+                remaining = self.min_request_interval - elapsed
+                if remaining > 0:
+                    time.sleep(remaining)
+            self._last_request_started = time.monotonic()
+
+    def close(self) -> None:
+        self.session.close()
 
     @staticmethod
     def _clean_text(text: str) -> str:
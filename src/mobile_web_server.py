@@ -10,27 +10,40 @@ Then open the printed LAN URL on an iPhone connected to the same network.
 from __future__ import annotations
 
 import argparse
+import json
 import os
+import queue
 import re
 import socket
 import threading
 import time
 import uuid
 from pathlib import Path
-from typing import Any
-from urllib.parse import urlparse
+from typing import Any, Callable
+from urllib.parse import quote, urlparse
 
 import yt_dlp
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request
 
 from paths_config import MOBILE_DOWNLOADS_DIR
+from ytdlp_result import build_download_result
 
 
 DOWNLOAD_DIR = Path(MOBILE_DOWNLOADS_DIR)
 DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-JOBS: dict[str, dict[str, Any]] = {}
-JOBS_LOCK = threading.Lock()
+# 同时运行的 yt-dlp 进程数、排队上限和已结束任务的保留时间
+DEFAULT_DOWNLOAD_WORKERS = int(os.getenv("MOBILE_DOWNLOAD_WORKERS", "2"))
+DEFAULT_JOB_TTL_SECONDS = float(os.getenv("MOBILE_JOB_TTL_SECONDS", str(24 * 3600)))
+MAX_QUEUED_JOBS = 50
+JOB_STATE_FILE = DOWNLOAD_DIR / ".mobile_jobs.json"
+
+# 无法使用 sendfile 时（非 werkzeug 服务器）按块读取文件的大小
+FILE_CHUNK_SIZE = 1024 * 1024
+
+TERMINAL_STATUSES = {"finished", "failed"}
+# 只在内部使用、不通过任务状态接口返回的字段
+_PRIVATE_JOB_FIELDS = {"file", "temp_files"}
 
 
 INDEX_HTML = r"""<!doctype html>
@@ -308,8 +321,204 @@ INDEX_HTML = r"""<!doctype html>
 """
 
 
-def create_app() -> Flask:
+class QueueFullError(RuntimeError):
+    """排队任务已达上限"""
+
+
+class DownloadJobPool:
+    """固定数量的下载线程 + 先进先出队列
+
+    任务状态每次变化都写入 JOB_STATE_FILE，服务重启后未完成的任务重新排队；
+    已结束的任务超过 job_ttl 后从内存和状态文件中移除，并删除残留的临时文件。
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_DOWNLOAD_WORKERS,
+        job_ttl: float = DEFAULT_JOB_TTL_SECONDS,
+        state_file: Path | None = JOB_STATE_FILE,
+        max_queued: int = MAX_QUEUED_JOBS,
+        run_job: Callable[["DownloadJobPool", str, str], None] | None = None,
+    ):
+        self.workers = max(1, int(workers))
+        self.job_ttl = job_ttl
+        self.state_file = Path(state_file) if state_file else None
+        self.max_queued = max_queued
+        self.run_job = run_job or _download_job
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self._pending: list[str] = []
+        self._queue: queue.Queue[str | None] = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._load()
+
+    def start(self) -> "DownloadJobPool":
+        if self._threads:
+            return self
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"mobile-download-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        janitor = threading.Thread(target=self._janitor, name="mobile-download-janitor", daemon=True)
+        janitor.start()
+        self._threads.append(janitor)
+        return self
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, url: str) -> dict[str, Any]:
+        self.evict_expired()
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "url": url,
+            "status": "queued",
+            "progress": 0,
+            "message": "等待下载...",
+            "file": None,
+            "filename": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "temp_files": [],
+        }
+        with self.lock:
+            if len(self._pending) >= self.max_queued:
+                raise QueueFullError(f"排队任务过多（{len(self._pending)} 个），请稍后再试")
+            self.jobs[job_id] = job
+            self._pending.append(job_id)
+            self._persist_locked()
+        self._queue.put(job_id)
+        return dict(job)
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def public_job(self, job_id: str) -> dict[str, Any] | None:
+        """任务状态接口的返回内容：排队中的任务带 queue_position（从 1 开始）"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            public = {k: v for k, v in job.items() if k not in _PRIVATE_JOB_FIELDS}
+            position = self._pending.index(job_id) + 1 if job_id in self._pending else None
+            public["queue_position"] = position
+            public["queue_length"] = len(self._pending)
+        if position is not None:
+            public["message"] = f"排队中，前面还有 {position - 1} 个任务" if position > 1 else "排队中，即将开始..."
+        return public
+
+    def update(self, job_id: str, **changes: Any) -> None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            status_changed = "status" in changes and changes["status"] != job.get("status")
+            job.update(changes)
+            if status_changed:
+                if changes["status"] in TERMINAL_STATUSES:
+                    job["finished_at"] = time.time()
+                self._persist_locked()
+
+    def add_temp_files(self, job_id: str, *paths: str | None) -> None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            for path in paths:
+                if path and path not in job["temp_files"]:
+                    job["temp_files"].append(path)
+
+    def evict_expired(self, now: float | None = None) -> list[str]:
+        """移除超过保留时间的已结束任务，返回被移除的任务 ID"""
+        if self.job_ttl is None or self.job_ttl < 0:
+            return []
+        now = time.time() if now is None else now
+        with self.lock:
+            expired = [
+                job
+                for job in self.jobs.values()
+                if job.get("status") in TERMINAL_STATUSES and now - (job.get("finished_at") or now) >= self.job_ttl
+            ]
+            for job in expired:
+                del self.jobs[job["id"]]
+            if expired:
+                self._persist_locked()
+        for job in expired:
+            _remove_temp_files(job)
+        return [job["id"] for job in expired]
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self.lock:
+                if job_id in self._pending:
+                    self._pending.remove(job_id)
+                job = self.jobs.get(job_id)
+                if job:
+                    job["started_at"] = time.time()
+            if not job:
+                continue
+            try:
+                self.run_job(self, job_id, job["url"])
+            except Exception as exc:
+                self.update(job_id, status="failed", progress=0, message="下载失败", error=str(exc))
+
+    def _janitor(self) -> None:
+        interval = min(300.0, max(1.0, (self.job_ttl or 0) / 4))
+        while not self._stop.wait(interval):
+            self.evict_expired()
+
+    def _persist_locked(self) -> None:
+        if not self.state_file:
+            return
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_name(self.state_file.name + ".tmp")
+            tmp_path.write_text(json.dumps(self.jobs, ensure_ascii=False, indent=2), encoding="utf-8")
+            tmp_path.replace(self.state_file)
+        except OSError as exc:
+            print(f"保存任务状态失败: {exc}")
+
+    def _load(self) -> None:
+        if not self.state_file or not self.state_file.exists():
+            return
+        try:
+            saved = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            print(f"读取任务状态失败，忽略: {exc}")
+            return
+        if not isinstance(saved, dict):
+            return
+        for job in sorted(saved.values(), key=lambda item: item.get("created_at") or 0):
+            if not isinstance(job, dict) or not job.get("id") or not job.get("url"):
+                continue
+            job.setdefault("temp_files", [])
+            if job.get("status") not in TERMINAL_STATUSES:
+                # 上次退出时还没下载完的任务重新排队
+                job.update(status="queued", progress=0, message="服务重启后重新排队", started_at=None)
+                self._pending.append(job["id"])
+                self._queue.put(job["id"])
+            self.jobs[job["id"]] = job
+        self.evict_expired()
+
+
+def create_app(pool: DownloadJobPool | None = None) -> Flask:
     app = Flask(__name__)
+    job_pool = (pool or DownloadJobPool()).start()
+    app.config["JOB_POOL"] = job_pool
 
     @app.get("/")
     def index():
@@ -323,41 +532,26 @@ def create_app() -> Flask:
         if not _is_allowed_url(url):
             return jsonify({"success": False, "error": "未从粘贴内容中识别到 http 或 https 视频链接"}), 400
 
-        job_id = uuid.uuid4().hex
-        job = {
-            "id": job_id,
-            "url": url,
-            "status": "queued",
-            "progress": 0,
-            "message": "等待下载...",
-            "file": None,
-            "filename": None,
-            "error": None,
-            "created_at": time.time(),
-        }
-        with JOBS_LOCK:
-            JOBS[job_id] = job
-
-        thread = threading.Thread(target=_download_job, args=(job_id, url), daemon=True)
-        thread.start()
-        return jsonify({"success": True, "id": job_id})
+        try:
+            job = job_pool.submit(url)
+        except QueueFullError as exc:
+            return jsonify({"success": False, "error": str(exc)}), 429
+        public_job = job_pool.public_job(job["id"]) or {}
+        return jsonify({"success": True, "id": job["id"], "queue_position": public_job.get("queue_position")})
 
     @app.get("/api/jobs/<job_id>")
     def get_job(job_id: str):
-        with JOBS_LOCK:
-            job = JOBS.get(job_id)
-            if not job:
-                return jsonify({"error": "任务不存在"}), 404
-            public_job = {k: v for k, v in job.items() if k != "file"}
+        public_job = job_pool.public_job(job_id)
+        if not public_job:
+            return jsonify({"error": "任务不存在"}), 404
         return jsonify(public_job)
 
     @app.get("/files/<job_id>")
     def get_file(job_id: str):
-        with JOBS_LOCK:
-            job = JOBS.get(job_id)
-            if not job or job.get("status") != "finished":
-                return jsonify({"error": "文件未就绪"}), 404
-            file_path = Path(job["file"]).resolve()
+        job = job_pool.get(job_id)
+        if not job or job.get("status") != "finished":
+            return jsonify({"error": "文件未就绪"}), 404
+        file_path = Path(job["file"]).resolve()
 
         if not _is_safe_output_file(file_path):
             return jsonify({"error": "文件路径无效"}), 403
@@ -365,13 +559,21 @@ def create_app() -> Flask:
             return jsonify({"error": "文件不存在"}), 404
 
         as_attachment = request.args.get("download") == "1"
-        return send_file(
-            file_path,
+        stat = file_path.stat()
+        response = _FileResponse(
+            _FileSlice(file_path, request.environ, 0, stat.st_size),
             mimetype=_guess_video_mimetype(file_path),
-            as_attachment=as_attachment,
-            download_name=file_path.name,
-            conditional=True,
+            direct_passthrough=True,
         )
+        response.content_length = stat.st_size
+        response.headers["Content-Disposition"] = _content_disposition(file_path.name, as_attachment)
+        response.set_etag(_file_etag(stat))
+        response.last_modified = int(stat.st_mtime)
+        # 允许手机缓存，但每次使用前用 ETag/Last-Modified 重新验证
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        # 处理 If-None-Match/If-Modified-Since（304）、If-Match（412）和 Range/If-Range（206/416）
+        return response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
 
     return app
 
@@ -445,36 +647,112 @@ def _guess_video_mimetype(file_path: Path) -> str:
     return "application/octet-stream"
 
 
-def _update_job(job_id: str, **changes: Any) -> None:
-    with JOBS_LOCK:
-        job = JOBS.get(job_id)
-        if job:
-            job.update(changes)
-
+class _FileSlice:
+    """文件中的一段字节区间，作为 WSGI 响应体
+
+    在 werkzeug 内置服务器上先让服务器写出响应头，再用 socket.sendfile
+    把区间直接从页缓存写入连接（零拷贝）；其他服务器上按块读取。
+    """
+
+    def __init__(self, path: Path, environ: dict[str, Any], offset: int, length: int):
+        self.path = path
+        self.environ = environ
+        self.offset = offset
+        self.length = length
+        self._file = None
+
+    def narrow(self, start: int, length: int) -> None:
+        """收窄到 Range 请求的区间（start 相对于当前区间起点）"""
+        self.offset += start
+        self.length = length
+
+    def __iter__(self):
+        if self.length <= 0:
+            return
+        self._file = open(self.path, "rb")
+        sock = self.environ.get("werkzeug.socket")
+        if sock is not None:
+            # 空块会让 werkzeug 发送状态行和响应头，之后的字节直接走 sendfile
+            yield b""
+            sock.sendfile(self._file, self.offset, self.length)
+            return
+        self._file.seek(self.offset)
+        remaining = self.length
+        while remaining > 0:
+            chunk = self._file.read(min(FILE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _FileResponse(Response):
+    """Range 请求只调整 _FileSlice 的区间，不套 werkzeug 的逐块切片包装，保留 sendfile"""
+
+    def _wrap_range_response(self, start: int, length: int) -> None:
+        if self.status_code == 206:
+            self.response.narrow(start, length)  # type: ignore[union-attr]
+
+
+def _file_etag(stat: os.stat_result) -> str:
+    # 强 ETag：同名文件被重新下载覆盖后 mtime/大小变化，断点续传会从头开始
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _content_disposition(filename: str, as_attachment: bool) -> str:
+    disposition = "attachment" if as_attachment else "inline"
+    ascii_name = filename.encode("ascii", "ignore").decode("ascii").replace('"', "")
+    if ascii_name == filename:
+        return f'{disposition}; filename="{ascii_name}"'
+    # 中文标题用 RFC 5987 编码，旧客户端退回到 ASCII 近似名
+    return f"{disposition}; filename=\"{ascii_name or 'video'}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _remove_temp_files(job: dict[str, Any]) -> None:
+    """删除任务残留的 yt-dlp 临时文件（.part/.ytdl/分片/合并前的单轨文件），不动最终输出"""
+    final_file = job.get("file")
+    for recorded in job.get("temp_files") or []:
+        path = Path(recorded)
+        if not _is_safe_output_file(path.resolve()):
+            continue
+        candidates = [path, path.with_name(path.name + ".ytdl")]
+        candidates.extend(path.parent.glob(path.name + ".part*"))
+        candidates.extend(path.parent.glob(path.name + "-Frag*"))
+        for candidate in candidates:
+            if final_file and str(candidate.resolve()) == str(Path(final_file).resolve()):
+                continue
+            try:
+                candidate.unlink()
+            except OSError:
+                pass
 
-def _download_job(job_id: str, url: str) -> None:
-    started_at = time.time()
-    before = {p.resolve() for p in DOWNLOAD_DIR.glob("*") if p.is_file()}
 
+def _download_job(pool: DownloadJobPool, job_id: str, url: str) -> None:
     def progress_hook(event: dict[str, Any]) -> None:
         status = event.get("status")
+        pool.add_temp_files(job_id, event.get("tmpfilename"), event.get("filename"))
         if status == "downloading":
             total = event.get("total_bytes") or event.get("total_bytes_estimate") or 0
             downloaded = event.get("downloaded_bytes") or 0
             percent = int(downloaded * 100 / total) if total else 0
             speed = event.get("_speed_str") or ""
             eta = event.get("_eta_str") or ""
-            _update_job(
+            pool.update(
                 job_id,
                 status="downloading",
                 progress=max(1, min(percent, 99)),
                 message=f"正在下载：{percent}%  {speed}  ETA {eta}".strip(),
             )
         elif status == "finished":
-            _update_job(job_id, progress=99, message="下载完成，正在整理文件...")
+            pool.update(job_id, progress=99, message="下载完成，正在整理文件...")
 
     try:
-        _update_job(job_id, status="starting", progress=1, message="正在解析链接...")
+        pool.update(job_id, status="starting", progress=1, message="正在解析链接...")
         ydl_opts = {
             "format": (
                 "bestvideo[vcodec^=avc1][ext=mp4]+bestaudio[ext=m4a]/"
@@ -491,17 +769,12 @@ def _download_job(job_id: str, url: str) -> None:
 
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=True)
-            candidates = []
-            for item in info.get("requested_downloads") or []:
-                if item.get("filepath"):
-                    candidates.append(Path(item["filepath"]))
-            candidates.append(Path(ydl.prepare_filename(info)))
 
-        file_path = _resolve_downloaded_file(candidates, before, started_at)
+        file_path = _resolve_downloaded_file(info)
         if not file_path:
             raise RuntimeError("下载结束，但没有找到本次输出的视频文件")
 
-        _update_job(
+        pool.update(
             job_id,
             status="finished",
             progress=100,
@@ -510,7 +783,7 @@ def _download_job(job_id: str, url: str) -> None:
             filename=file_path.name,
         )
     except Exception as exc:
-        _update_job(
+        pool.update(
             job_id,
             status="failed",
             progress=0,
@@ -519,25 +792,15 @@ def _download_job(job_id: str, url: str) -> None:
         )
 
 
-def _resolve_downloaded_file(candidates: list[Path], before: set[Path], started_at: float) -> Path | None:
-    valid_suffixes = {".mp4", ".m4v", ".mov", ".webm", ".mkv"}
-    existing = [
-        path.resolve()
-        for path in candidates
-        if path.exists() and path.is_file() and path.suffix.lower() in valid_suffixes
-    ]
-
-    if not existing:
-        for path in DOWNLOAD_DIR.glob("*"):
-            if not path.is_file() or path.suffix.lower() not in valid_suffixes:
-                continue
-            resolved = path.resolve()
-            if resolved not in before and path.stat().st_mtime >= started_at - 2:
-                existing.append(resolved)
-
-    if not existing:
+def _resolve_downloaded_file(info: dict[str, Any] | None) -> Path | None:
+    """取 yt-dlp 报告的最终输出文件（合并之后），不扫描下载目录"""
+    downloaded = build_download_result(info)
+    if not downloaded:
+        return None
+    path = Path(downloaded["path"]).resolve()
+    if not path.is_file() or path.suffix.lower() not in {".mp4", ".m4v", ".mov", ".webm", ".mkv"}:
         return None
-    return max(existing, key=lambda p: p.stat().st_mtime)
+    return path
 
 
 def get_lan_ip() -> str:
@@ -556,6 +819,18 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--host", default="0.0.0.0", help="Bind host, default: 0.0.0.0")
     parser.add_argument("--port", type=int, default=8787, help="Bind port, default: 8787")
     parser.add_argument("--debug", action="store_true", help="Enable Flask debug mode")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        help=f"Concurrent downloads, default: {DEFAULT_DOWNLOAD_WORKERS}",
+    )
+    parser.add_argument(
+        "--job-ttl",
+        type=float,
+        default=DEFAULT_JOB_TTL_SECONDS,
+        help=f"Seconds to keep finished jobs before eviction, default: {DEFAULT_JOB_TTL_SECONDS:.0f}",
+    )
     return parser.parse_args()
 
 
@@ -566,7 +841,9 @@ def main() -> None:
     print(f"电脑本机访问: http://127.0.0.1:{args.port}")
     print(f"手机局域网访问: http://{lan_ip}:{args.port}")
     print(f"下载目录: {DOWNLOAD_DIR}")
-    create_app().run(host=args.host, port=args.port, debug=args.debug, threaded=True)
+    print(f"同时下载: {args.workers} 个，已结束任务保留 {args.job_ttl:.0f} 秒")
+    pool = DownloadJobPool(workers=args.workers, job_ttl=args.job_ttl)
+    create_app(pool).run(host=args.host, port=args.port, debug=args.debug, threaded=True)
 
 
 if __name__ == "__main__":
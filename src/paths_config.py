@@ -63,6 +63,11 @@ QA_REPORTS_DIR = _ensure_workspace_subdir("qa_reports")
 REVIEW_PACKS_DIR = _ensure_workspace_subdir("review_packs")
 PUBLISH_PACKAGES_DIR = _ensure_workspace_subdir("publish_packages")
 DOUYIN_PUBLISH_PACKAGES_DIR = _ensure_dir(Path(PUBLISH_PACKAGES_DIR) / "douyin")
+YTDLP_METADATA_CACHE_DIR = _ensure_dir(WORKSPACE_PATH / "cache" / "ytdlp_metadata")
+SUMMARY_CHUNK_CACHE_DIR = _ensure_dir(WORKSPACE_PATH / "cache" / "summary_chunks")
+LLM_CACHE_DIR = _ensure_dir(WORKSPACE_PATH / "cache" / "llm_responses")
+# 批量处理后台文章生成的任务记录，中断后重新运行同一批次时据此续跑
+SUMMARY_QUEUE_FILE = str(WORKSPACE_PATH / "cache" / "summary_queue.json")
 
 
 DIRECTORY_MAP = {
@@ -103,6 +108,9 @@ DIRECTORY_MAP = {
     "review_packs": REVIEW_PACKS_DIR,
     "publish_packages": PUBLISH_PACKAGES_DIR,
     "douyin_publish_packages": DOUYIN_PUBLISH_PACKAGES_DIR,
+    "ytdlp_metadata_cache": YTDLP_METADATA_CACHE_DIR,
+    "summary_chunk_cache": SUMMARY_CHUNK_CACHE_DIR,
+    "llm_cache": LLM_CACHE_DIR,
 }
 
 
@@ -0,0 +1,81 @@
+"""
+按阶段限流的并发控制
+
+配音队列和 YouTube 批量流水线都把一个任务拆成若干阶段（下载/转录/翻译/...），
+每个阶段单独限制并发，并统计各阶段的忙碌时间、排队时间和峰值并发。
+任务记录只需带 stage、stage_seconds、stage_wait_seconds 三个属性。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+
+class StageLimiter:
+    """各阶段一个信号量；未配置上限的阶段不限流，只记录耗时"""
+
+    def __init__(self, defaults: Dict[str, int], overrides: Optional[Dict[str, int]] = None):
+        """
+        :param defaults: 默认阶段并发上限
+        :param overrides: 覆盖的阶段上限，未列出的阶段使用默认值
+        """
+        limits = dict(defaults)
+        limits.update(overrides or {})
+        self.limits = limits
+        self._semaphores = {
+            stage: threading.BoundedSemaphore(max(1, int(limit))) for stage, limit in limits.items()
+        }
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {stage: 0 for stage in limits}
+        self.peak_active: Dict[str, int] = {stage: 0 for stage in limits}
+
+    @contextmanager
+    def gate(self, record, stage: str) -> Iterator[None]:
+        """占用 stage 的一个并发名额，排队和运行时间累加到 record 上"""
+        semaphore = self._semaphores.get(stage)
+        wait_started = time.time()
+        if semaphore is not None:
+            semaphore.acquire()
+        started = time.time()
+        record.stage = stage
+        record.stage_wait_seconds[stage] = record.stage_wait_seconds.get(stage, 0.0) + (started - wait_started)
+        with self._lock:
+            self._active[stage] = self._active.get(stage, 0) + 1
+            self.peak_active[stage] = max(self.peak_active.get(stage, 0), self._active[stage])
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[stage] -= 1
+            if semaphore is not None:
+                semaphore.release()
+            record.stage_seconds[stage] = record.stage_seconds.get(stage, 0.0) + (time.time() - started)
+
+    def stats(self, records: Iterable, wall_seconds: float) -> dict:
+        """
+        各阶段忙碌/排队时间、利用率（忙碌时间 / (总耗时 × 阶段并发上限)）和峰值并发
+        等待时间高说明该阶段是瓶颈，利用率低说明并发上限可以调小
+        """
+        stage_busy: Dict[str, float] = {}
+        stage_wait: Dict[str, float] = {}
+        for record in records:
+            for stage, seconds in record.stage_seconds.items():
+                stage_busy[stage] = stage_busy.get(stage, 0.0) + seconds
+            for stage, seconds in record.stage_wait_seconds.items():
+                stage_wait[stage] = stage_wait.get(stage, 0.0) + seconds
+
+        utilization = {}
+        for stage, busy in stage_busy.items():
+            capacity = wall_seconds * self.limits.get(stage, 1)
+            utilization[stage] = round(busy / capacity, 3) if capacity > 0 else 0.0
+
+        with self._lock:
+            peak = dict(self.peak_active)
+        return {
+            'stage_busy_seconds': {k: round(v, 2) for k, v in stage_busy.items()},
+            'stage_wait_seconds': {k: round(v, 2) for k, v in stage_wait.items()},
+            'stage_utilization': utilization,
+            'stage_peak_concurrency': peak,
+            'stage_limits': dict(self.limits),
+        }
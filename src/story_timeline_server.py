@@ -1318,11 +1318,16 @@ class StoryTimelineService:
         api_key = os.getenv("DEEPSEEK_API_KEY", "").strip()
         if not api_key:
             raise ValueError("未配置 DEEPSEEK_API_KEY，原文本保持不变")
-        from openai import OpenAI
+        try:
+            from .llm_client import get_llm_client
+        except ImportError:
+            from llm_client import get_llm_client
 
-        client = OpenAI(
-            api_key=api_key,
-            base_url=os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com").strip(),
+        client = get_llm_client(
+            "DeepSeek",
+            api_key,
+            os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com").strip(),
+            os.getenv("DEEPSEEK_MODEL", "deepseek-chat").strip() or "deepseek-chat",
         )
         prompt = (
             "你是影视解说稿编辑。只重写用户提供的局部文本，不补写未经证据支持的剧情。"
@@ -1332,16 +1337,15 @@ class StoryTimelineService:
         if context.strip():
             user_content += f"相邻上下文（仅用于衔接）：{context.strip()}\n"
         user_content += f"待重写文本：{clean_text}"
-        response = client.chat.completions.create(
-            model=os.getenv("DEEPSEEK_MODEL", "deepseek-chat").strip() or "deepseek-chat",
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": user_content},
-            ],
+        rewritten = client.complete(
+            prompt,
+            user_content,
             temperature=0.35,
             max_tokens=800,
-        )
-        rewritten = str(response.choices[0].message.content or "").strip()
+            # 重复点击重写是想要一个新版本，不读缓存
+            use_cache=False,
+            purpose="rewrite",
+        ).strip()
         if not rewritten:
             raise RuntimeError("DeepSeek 没有返回重写结果")
         return {"text": rewritten, "provider": "deepseek"}
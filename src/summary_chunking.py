@@ -0,0 +1,227 @@
+"""
+长文本分段摘要（map-reduce）
+
+几个小时的视频转录一次性塞进提示词会超出上下文，或者变成一次又慢又贵的调用。
+这里先按字幕时间边界（纯文本则按句子）切成不超过 token 预算的片段，
+并发地为每段提炼要点（map），再把按时间排列的要点交给最终的文章生成（reduce）。
+每段的提炼结果按内容哈希缓存，换一种文章风格重新生成时只需重跑 reduce。
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_CHUNK_TOKENS = 6000
+DEFAULT_SINGLE_PASS_TOKENS = 12000
+DEFAULT_MAP_WORKERS = 4
+
+# 修改提炼提示词时递增，旧缓存自动失效
+MAP_PROMPT_VERSION = 1
+MAP_SYSTEM_PROMPT = "你是一个严谨的内容整理助手，负责从长视频转录的片段中提炼信息。"
+MAP_USER_PROMPT = """下面是一段长视频转录的第 {index}/{total} 个片段{time_range}。
+请用中文按原文顺序提炼这一段的要点：主要观点、关键事实与数据、重要的例子和原话。
+只输出要点列表，不要写开头结尾，不要加入原文没有的信息。
+
+{content}
+"""
+REDUCE_PREFIX = "（原文较长，以下是按时间顺序逐段提炼的要点）\n\n"
+
+_CJK_RE = re.compile(r'[\u3000-\u30ff\u3400-\u9fff\uac00-\ud7af\uff00-\uffef]')
+_CUE_TIME_RE = re.compile(
+    r'(\d{1,2}:)?(\d{1,2}):(\d{2})[,.](\d{1,3})\s*-->\s*(\d{1,2}:)?(\d{1,2}):(\d{2})[,.](\d{1,3})'
+)
+_SENTENCE_END_RE = re.compile(r'[。！？!?…]+|\.(?=\s)|\n')
+
+
+@dataclass
+class TranscriptChunk:
+    index: int
+    text: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+    @property
+    def time_range(self) -> str:
+        if self.start is None or self.end is None:
+            return ''
+        return f"{_format_time(self.start)}-{_format_time(self.end)}"
+
+
+def _format_time(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符约 1 字 1 token，其他字符约 4 个 1 token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _cue_seconds(hours: Optional[str], minutes: str, seconds: str, millis: str) -> float:
+    return int((hours or '0:')[:-1]) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, '0')) / 1000
+
+
+def parse_subtitle_cues(content: str) -> List[Tuple[float, float, str]]:
+    """解析 SRT/VTT 字幕为 (开始秒, 结束秒, 文本)；不是字幕格式时返回空列表"""
+    cues = []
+    for block in re.split(r'\r?\n\s*\r?\n', content):
+        lines = [line.strip() for line in block.strip().splitlines()]
+        for position, line in enumerate(lines):
+            match = _CUE_TIME_RE.search(line)
+            if match:
+                text = ' '.join(part for part in lines[position + 1:] if part)
+                if text:
+                    groups = match.groups()
+                    cues.append((_cue_seconds(*groups[:4]), _cue_seconds(*groups[4:]), text))
+                break
+    return cues
+
+
+def _split_sentences(text: str) -> List[str]:
+    """在句末标点和换行后切分，各段拼接起来等于原文"""
+    pieces = []
+    position = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        pieces.append(text[position:match.end()])
+        position = match.end()
+    if position < len(text):
+        pieces.append(text[position:])
+    return [piece for piece in pieces if piece.strip()]
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    """没有句子边界的超长文本按字符数切开"""
+    size = max(1, int(len(text) * max_tokens / max(estimate_tokens(text), 1)))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def split_transcript(content: str, max_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[TranscriptChunk]:
+    """
+    把转录内容切成不超过 max_tokens 的片段。
+    字幕格式（SRT/VTT）在字幕条之间切分并记录每段的时间范围；纯文本在句子之间切分。
+    """
+    max_tokens = max(1, int(max_tokens))
+    cues = parse_subtitle_cues(content)
+    if cues:
+        units = [(text + '\n', start, end) for start, end, text in cues]
+    else:
+        units = [(piece, None, None) for piece in _split_sentences(content)]
+
+    chunks: List[TranscriptChunk] = []
+    parts: List[str] = []
+    tokens = 0
+    start = end = None
+
+    def flush():
+        nonlocal parts, tokens, start, end
+        text = ''.join(parts).strip()
+        if text:
+            chunks.append(TranscriptChunk(len(chunks) + 1, text, start, end))
+        parts, tokens, start, end = [], 0, None, None
+
+    for text, unit_start, unit_end in units:
+        unit_tokens = estimate_tokens(text)
+        if unit_tokens > max_tokens:
+            flush()
+            for piece in _hard_split(text, max_tokens):
+                parts, start, end = [piece], unit_start, unit_end
+                flush()
+            continue
+        if parts and tokens + unit_tokens > max_tokens:
+            flush()
+        if not parts:
+            start = unit_start
+        parts.append(text)
+        tokens += unit_tokens
+        end = unit_end if unit_end is not None else end
+    flush()
+    return chunks
+
+
+class ChunkSummaryCache:
+    """片段提炼结果的磁盘缓存，键为 (提示词版本, 模型, 片段内容) 的 SHA-256"""
+
+    def __init__(self, cache_dir: Optional[str]):
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(model_id: str, chunk: TranscriptChunk) -> str:
+        payload = json.dumps([MAP_PROMPT_VERSION, model_id, chunk.time_range, chunk.text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f).get('summary')
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, model_id: str, summary: str) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': model_id, 'summary': summary, 'created': time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def summarize_chunks(
+    chunks: List[TranscriptChunk],
+    complete: Callable[[str, str], str],
+    model_id: str,
+    cache: Optional[ChunkSummaryCache] = None,
+    max_workers: int = DEFAULT_MAP_WORKERS,
+    log: Callable[[str], None] = print,
+) -> List[str]:
+    """
+    并发提炼各片段要点（map），结果按片段顺序返回
+    :param complete: (system_prompt, user_prompt) -> 模型输出，失败时抛出异常（失败结果不会写入缓存）
+    :param model_id: 模型标识，参与缓存键
+    """
+    cache = cache or ChunkSummaryCache(None)
+    total = len(chunks)
+
+    def summarize(chunk: TranscriptChunk) -> str:
+        key = cache.key(model_id, chunk)
+        cached = cache.get(key)
+        if cached is not None:
+            log(f"♻️ 片段 {chunk.index}/{total} 使用缓存")
+            return cached
+        started = time.time()
+        time_range = f"（{chunk.time_range}）" if chunk.time_range else ''
+        user_prompt = MAP_USER_PROMPT.format(index=chunk.index, total=total, time_range=time_range, content=chunk.text)
+        summary = complete(MAP_SYSTEM_PROMPT, user_prompt).strip()
+        if not summary:
+            raise ValueError(f"片段 {chunk.index} 的要点为空")
+        cache.put(key, model_id, summary)
+        log(f"✅ 片段 {chunk.index}/{total} 提炼完成，耗时 {time.time() - started:.1f} 秒")
+        return summary
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix='summary-map') as executor:
+        return list(executor.map(summarize, chunks))
+
+
+def combine_chunk_summaries(chunks: List[TranscriptChunk], summaries: List[str]) -> str:
+    """把各段要点按时间顺序拼成 reduce 阶段的输入"""
+    sections = []
+    for chunk, summary in zip(chunks, summaries):
+        title = f"【第 {chunk.index} 段{' ' + chunk.time_range if chunk.time_range else ''}】"
+        sections.append(f"{title}\n{summary}")
+    return REDUCE_PREFIX + '\n\n'.join(sections)
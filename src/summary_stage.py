@@ -0,0 +1,240 @@
+"""
+批量处理的后台文章生成阶段
+
+批量处理时，每个视频转录完成后把文章生成任务交给这里，立即继续处理下一个视频；
+文章生成在独立的线程池中按并发上限执行，整批在最后一篇文章完成时结束，
+而不是每个视频都排队等一次大模型调用。
+
+任务记录保存在 JSON 文件中：程序中断后重新运行同一批次，
+resume() 会重新提交上次未完成的任务（对应的转录文件仍在时），
+已完成的任务直接返回已有文章，不再重复转录和调用模型。
+多个阶段实例（如 GUI 中同时运行的本地批量和 YouTube 批量）共用同一个记录文件时，
+每个实例只写回自己提交的任务，在文件锁内与磁盘上的记录合并。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+DEFAULT_SUMMARY_WORKERS = 2
+# 已结束的任务记录保留时间，超过后加载时丢弃
+FINISHED_JOB_RETENTION_SECONDS = 30 * 86400
+# 记录文件锁：超过该时间仍未释放的锁文件视为进程崩溃遗留
+STATE_LOCK_STALE_SECONDS = 30
+
+# 同一进程内按记录文件路径共享的线程锁
+_state_thread_locks: Dict[str, threading.Lock] = {}
+_state_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _state_file_lock(state_path: str) -> Iterator[None]:
+    """进程内线程锁 + 独占创建的 .lock 文件，串行化对同一记录文件的读-合并-写"""
+    path = os.path.abspath(state_path)
+    with _state_thread_locks_guard:
+        thread_lock = _state_thread_locks.setdefault(path, threading.Lock())
+    lock_path = f"{path}.lock"
+    with thread_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > STATE_LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+
+@dataclass
+class SummaryJob:
+    key: str
+    source: str
+    text_path: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    status: str = 'pending'  # pending/running/done/failed
+    summary_path: Optional[str] = None
+    error: Optional[str] = None
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+def job_key(source: str, options: Dict[str, Any]) -> str:
+    """同一来源在相同文章选项（输出目录、提示词、模板）下视为同一任务"""
+    payload = json.dumps([os.path.abspath(source) if os.path.exists(source) else source, options],
+                         ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class BackgroundSummaryStage:
+    """有并发上限、可断点续跑的后台文章生成阶段"""
+
+    def __init__(
+        self,
+        summarize_fn: Callable[..., Optional[str]],
+        max_workers: int = DEFAULT_SUMMARY_WORKERS,
+        state_path: Optional[str] = None,
+        log: Callable[[str], None] = print,
+    ):
+        """
+        :param summarize_fn: (text_path, **options) -> 文章路径，失败时抛出异常或返回 None
+        :param max_workers: 同时生成的文章数
+        :param state_path: 任务记录保存路径（JSON），None 表示不持久化
+        """
+        self.summarize_fn = summarize_fn
+        self.max_workers = max(1, int(max_workers))
+        self.state_path = state_path
+        self.log = log
+        self.jobs: Dict[str, SummaryJob] = {}
+        # 本实例提交过的任务，保存时只写回这些记录
+        self._owned: Set[str] = set()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='summary-stage')
+        self._load()
+
+    def _read_state(self) -> Dict[str, Dict[str, Any]]:
+        """磁盘上未过期的任务记录"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"⚠️ 读取文章任务记录失败，忽略: {e}")
+            return {}
+        expire_before = time.time() - FINISHED_JOB_RETENTION_SECONDS
+        return {
+            key: state for key, state in data.get('jobs', {}).items()
+            if not (state.get('finished_at') and state['finished_at'] < expire_before)
+        }
+
+    def _load(self) -> None:
+        fields = SummaryJob.__dataclass_fields__
+        for key, state in self._read_state().items():
+            job = SummaryJob(**{name: value for name, value in state.items() if name in fields})
+            if job.status == 'running':
+                job.status = 'pending'
+            self.jobs[key] = job
+
+    def _save(self) -> None:
+        """
+        在记录文件锁内读取磁盘记录，写回本实例的任务后原子替换；
+        其他实例的任务保持磁盘上的版本。保存失败只记日志，不影响文章生成结果。
+        """
+        if not self.state_path:
+            return
+        try:
+            with _state_file_lock(self.state_path):
+                jobs = self._read_state()
+                with self._lock:
+                    jobs.update({key: asdict(self.jobs[key]) for key in self._owned})
+                tmp_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'jobs': jobs}, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            self.log(f"⚠️ 保存文章任务记录失败: {e}")
+
+    def lookup(self, source: str, **options: Any) -> Optional[SummaryJob]:
+        """
+        已登记过、可以直接续上的任务：已完成且文章仍在，或未完成但转录文件仍在。
+        调用方据此跳过重新下载和转录，直接 submit(source, job.text_path, **options)。
+        """
+        with self._lock:
+            job = self.jobs.get(job_key(source, options))
+        if job is None:
+            return None
+        if job.status == 'done' and job.summary_path and os.path.exists(job.summary_path):
+            return job
+        if job.status in ('pending', 'running') and os.path.exists(job.text_path):
+            return job
+        return None
+
+    def submit(self, source: str, text_path: str, **options: Any) -> Future:
+        """
+        登记并提交一个文章生成任务，立即返回 Future（结果为 SummaryJob）。
+        同一任务进行中时返回同一个 Future；已完成且文章仍在时直接返回完成的 Future。
+        """
+        key = job_key(source, options)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and (not future.done() or future.result().status == 'done'):
+                return future
+            job = self.jobs.get(key)
+            if job and job.status == 'done' and job.summary_path and os.path.exists(job.summary_path):
+                future = Future()
+                future.set_result(job)
+                self._futures[key] = future
+                return future
+            job = SummaryJob(key, source, text_path, dict(options), submitted_at=time.time())
+            self.jobs[key] = job
+            self._owned.add(key)
+            future = self._futures[key] = self._executor.submit(self._run, job)
+        self._save()
+        return future
+
+    def resume(self) -> int:
+        """重新提交上次中断时未完成的任务，返回提交数"""
+        with self._lock:
+            pending = [job for job in self.jobs.values()
+                       if job.status == 'pending' and job.key not in self._futures]
+        resumed = 0
+        for job in pending:
+            if not os.path.exists(job.text_path):
+                continue
+            self.log(f"♻️ 继续上次未完成的文章生成: {os.path.basename(job.source)}")
+            self.submit(job.source, job.text_path, **job.options)
+            resumed += 1
+        return resumed
+
+    def _run(self, job: SummaryJob) -> SummaryJob:
+        job.status = 'running'
+        job.started_at = time.time()
+        self._save()
+        try:
+            summary_path = self.summarize_fn(job.text_path, **job.options)
+            if not summary_path:
+                raise RuntimeError("文章生成没有返回结果")
+            job.status, job.summary_path, job.error = 'done', summary_path, None
+            self.log(f"✅ 文章已生成: {os.path.basename(job.source)} -> {summary_path}"
+                     f"（{time.time() - job.started_at:.1f} 秒）")
+        except Exception as e:
+            job.status, job.error = 'failed', str(e)
+            self.log(f"❌ 文章生成失败: {os.path.basename(job.source)}: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._save()
+        return job
+
+    def wait(self) -> List[SummaryJob]:
+        """等待所有已提交的任务结束并关闭线程池，返回本次提交的任务"""
+        with self._lock:
+            futures = list(self._futures.values())
+        jobs = [future.result() for future in futures]
+        self._executor.shutdown(wait=True)
+        return jobs
+
+    def __enter__(self) -> 'BackgroundSummaryStage':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.wait()
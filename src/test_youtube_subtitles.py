@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 
 from youtube_transcriber import download_youtube_subtitles
+from ytdlp_metadata_cache import MetadataCache
 
 
 class DummyYoutubeDL:
@@ -36,12 +37,18 @@ class DummyYoutubeDL:
         output_path = output_template.replace('%(title)s', 'Test_Video').replace('%(ext)s', f'{lang}.vtt')
         Path(output_path).write_text('WEBVTT\n\n00:00.000 --> 00:01.000\nhello\n', encoding='utf-8')
 
+    def process_ie_result(self, info, download=True):
+        # 字幕检查时缓存的提取结果会直接用于下载
+        self.download([info])
+        return info
+
 
 def test_download_youtube_subtitles_falls_back_to_next_language(tmp_path, monkeypatch):
     import youtube_transcriber
 
     DummyYoutubeDL.attempts = []
     monkeypatch.setattr(youtube_transcriber.yt_dlp, 'YoutubeDL', DummyYoutubeDL)
+    monkeypatch.setattr(youtube_transcriber, 'YTDLP_METADATA_CACHE', MetadataCache(str(tmp_path / 'cache')))
     monkeypatch.delenv('PROXY', raising=False)
     monkeypatch.delenv('HTTP_PROXY', raising=False)
     monkeypatch.delenv('HTTPS_PROXY', raising=False)
@@ -73,6 +80,7 @@ def test_download_youtube_subtitles_ignores_stale_existing_files(tmp_path, monke
 
     FailingYoutubeDL.attempts = []
     monkeypatch.setattr(youtube_transcriber.yt_dlp, 'YoutubeDL', FailingYoutubeDL)
+    monkeypatch.setattr(youtube_transcriber, 'YTDLP_METADATA_CACHE', MetadataCache(str(tmp_path / 'cache')))
     monkeypatch.delenv('PROXY', raising=False)
     monkeypatch.delenv('HTTP_PROXY', raising=False)
     monkeypatch.delenv('HTTPS_PROXY', raising=False)
@@ -0,0 +1,245 @@
+"""
+下载历史记录（SQLite）
+
+downloaded_videos.json 每次下载都要整体读入、线性查找、整体重写，
+记录越多越慢，多个进程同时写还可能把文件写坏。这里改用 SQLite（WAL 模式）：
+按规范化键（YouTube 视频 ID，非 YouTube 链接为链接本身）建唯一索引，
+查重是一次索引查询，写入是单行 upsert；首次打开时把旧 JSON 一次性迁移进来，
+原 JSON 文件保留不动，方便回退。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    video_id TEXT,
+    title TEXT,
+    duration REAL,
+    upload_date TEXT,
+    file_path TEXT,
+    first_download_time TEXT,
+    last_download_time TEXT,
+    processed TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_videos_url ON videos(url);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT = """
+INSERT INTO videos (key, url, video_id, title, duration, upload_date, file_path,
+                    first_download_time, last_download_time, processed)
+VALUES (:key, :url, :video_id, :title, :duration, :upload_date, :file_path,
+        :first_download_time, :last_download_time, :processed)
+ON CONFLICT(key) DO UPDATE SET
+    video_id = COALESCE(excluded.video_id, videos.video_id),
+    title = COALESCE(excluded.title, videos.title),
+    duration = COALESCE(excluded.duration, videos.duration),
+    upload_date = COALESCE(excluded.upload_date, videos.upload_date),
+    file_path = COALESCE(excluded.file_path, videos.file_path),
+    first_download_time = COALESCE(videos.first_download_time, excluded.first_download_time),
+    last_download_time = COALESCE(excluded.last_download_time, videos.last_download_time),
+    processed = COALESCE(excluded.processed, videos.processed)
+"""
+
+_COLUMNS = ("url", "video_id", "title", "duration", "upload_date", "file_path",
+            "first_download_time", "last_download_time", "processed")
+
+_MIGRATED_FLAG = "migrated_json"
+
+
+def canonical_key(url: str, video_id: Optional[str] = None) -> str:
+    """同一视频的不同链接形式（watch?v= / youtu.be / shorts）归并到同一个键"""
+    if video_id:
+        return f"youtube:{video_id}"
+    return (url or "").strip()
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+    """转换成与旧 JSON 记录相同的字段"""
+    entry: Dict[str, Any] = {"url": row["url"]}
+    if row["file_path"] is not None:
+        entry["file_path"] = row["file_path"]
+    for column in ("first_download_time", "last_download_time"):
+        if row[column] is not None:
+            entry[column] = row[column]
+    if row["video_id"] is not None:
+        entry["id"] = row["video_id"]
+    for column in ("title", "duration", "upload_date"):
+        if row[column] is not None:
+            entry[column] = row[column]
+    if row["processed"]:
+        entry["processed"] = json.loads(row["processed"])
+    return entry
+
+
+class VideoHistoryStore:
+    """下载历史记录存储，线程安全；多进程之间依靠 SQLite 的文件锁"""
+
+    def __init__(
+        self,
+        db_path: str,
+        legacy_json_path: Optional[str] = None,
+        video_id_fn: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        :param db_path: SQLite 数据库文件路径
+        :param legacy_json_path: 旧版 downloaded_videos.json，首次打开时迁移
+        :param video_id_fn: 从链接提取视频 ID 的函数，用于生成规范化键；不识别时返回空字符串
+        """
+        self.db_path = db_path
+        self.video_id_fn = video_id_fn or (lambda url: "")
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # isolation_level=None：事务由 _transaction 显式控制
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if legacy_json_path:
+            self._migrate_json(legacy_json_path)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _migrate_json(self, json_path: str) -> None:
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE name = ?", (_MIGRATED_FLAG,)).fetchone():
+                return
+            entries = []
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, "r", encoding="utf-8") as f:
+                        entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"读取旧下载记录失败，跳过迁移: {e}")
+                    entries = []
+            rows = self._merge_legacy_entries(entries if isinstance(entries, list) else [])
+            conn.executemany(_UPSERT, rows)
+            conn.execute(
+                "INSERT INTO meta (name, value) VALUES (?, ?)",
+                (_MIGRATED_FLAG, f"{json_path}|{len(rows)}|{_now()}"),
+            )
+        if rows:
+            print(f"已将 {len(rows)} 条下载记录从 {json_path} 迁移到 {self.db_path}")
+
+    def _merge_legacy_entries(self, entries: Iterable[Any]) -> List[Dict[str, Any]]:
+        """旧 JSON 里同一视频可能有多条（不同链接形式），按规范化键合并"""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not entry.get("url"):
+                continue
+            key = canonical_key(entry["url"], self.video_id_fn(entry["url"]))
+            row = merged.setdefault(key, {"key": key, **{column: None for column in _COLUMNS}})
+            row["url"] = row["url"] or entry["url"]
+            row["video_id"] = entry.get("id") or row["video_id"]
+            for column in ("title", "duration", "upload_date", "file_path"):
+                if entry.get(column) not in (None, ""):
+                    row[column] = entry[column]
+            first, last = entry.get("first_download_time"), entry.get("last_download_time")
+            if first and (row["first_download_time"] is None or first < row["first_download_time"]):
+                row["first_download_time"] = first
+            if last and (row["last_download_time"] is None or last > row["last_download_time"]):
+                row["last_download_time"] = last
+            if entry.get("processed"):
+                processed = json.loads(row["processed"]) if row["processed"] else {}
+                processed.update(entry["processed"])
+                row["processed"] = json.dumps(processed, ensure_ascii=False)
+        return list(merged.values())
+
+    def record_download(self, url: str, file_path: str, video_info: Optional[Dict[str, Any]] = None) -> None:
+        """记录（或更新）一次下载；同一视频已有记录时只更新路径、时间和元数据"""
+        self.record_downloads([(url, file_path, video_info)])
+
+    def record_downloads(self, records: Iterable[tuple]) -> None:
+        """批量记录下载，一个事务写入：records 为 (url, file_path, video_info) 元组"""
+        now = _now()
+        rows = []
+        for url, file_path, video_info in records:
+            youtube_id = self.video_id_fn(url)
+            row = {
+                "key": canonical_key(url, youtube_id),
+                "url": url,
+                "video_id": youtube_id or None,
+                "title": None,
+                "duration": None,
+                "upload_date": None,
+                "file_path": file_path,
+                "first_download_time": now,
+                "last_download_time": now,
+                "processed": None,
+            }
+            if video_info:
+                row["video_id"] = video_info.get("id") or video_info.get("display_id") or row["video_id"]
+                row["title"] = video_info.get("title", "")
+                row["duration"] = video_info.get("duration", 0)
+                row["upload_date"] = video_info.get("upload_date", "")
+            rows.append(row)
+        if not rows:
+            return
+        with self._transaction() as conn:
+            conn.executemany(_UPSERT, rows)
+
+    def find(self, url: str) -> Optional[Dict[str, Any]]:
+        """按规范化键查找，找不到再按原始链接查找"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM videos WHERE key = ?", (canonical_key(url, self.video_id_fn(url)),)
+            ).fetchone()
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT * FROM videos WHERE url = ? ORDER BY rowid LIMIT 1", (url,)
+                ).fetchone()
+        return _row_to_entry(row) if row is not None else None
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        """全部记录，按首次写入顺序"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM videos ORDER BY rowid").fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def mark_processed(self, url: str, processing_key: str, output_path: str) -> None:
+        """登记某种处理选项下的产物（没有下载记录时新建一条）"""
+        youtube_id = self.video_id_fn(url)
+        key = canonical_key(url, youtube_id)
+        with self._transaction() as conn:
+            row = conn.execute("SELECT processed FROM videos WHERE key = ?", (key,)).fetchone()
+            processed = json.loads(row["processed"]) if row is not None and row["processed"] else {}
+            processed[processing_key] = {"path": output_path, "time": _now()}
+            conn.execute(
+                _UPSERT,
+                {
+                    "key": key,
+                    **{column: None for column in _COLUMNS},
+                    "url": url,
+                    "video_id": youtube_id or None,
+                    "processed": json.dumps(processed, ensure_ascii=False),
+                },
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
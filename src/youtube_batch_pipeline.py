@@ -0,0 +1,297 @@
+"""
+YouTube 批量/播放列表流水线
+
+多个视频同时处于流水线中，按阶段（下载/转录/翻译/摘要）分别限制并发：
+一个视频占用 GPU 转录时，其他视频可以继续下载字幕、音频或调用翻译接口。
+提供后台文章生成阶段时，视频转录完成后文章交给该阶段生成，流水线名额立即让给下一个视频。
+已处理过的视频（下载历史中有当前处理选项的产物记录，
+或系列项目清单中已有对应输出）直接跳过，过夜跑播放列表中断后可以接着跑。
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+try:
+    from .series_project import MANIFEST_NAME
+    from .stage_limits import StageLimiter
+except ImportError:
+    from series_project import MANIFEST_NAME
+    from stage_limits import StageLimiter
+
+
+# 默认阶段并发：Whisper 模型进程内共享且不可并发调用，转录保持串行；下载和 LLM 调用以网络为主，可以并行
+DEFAULT_STAGE_LIMITS = {
+    'download': 3,
+    'transcribe': 1,
+    'translate': 2,
+    'summarize': 2,
+}
+
+
+def processing_key(
+    download_video: bool = False,
+    enable_transcription: bool = True,
+    generate_article: bool = True,
+    generate_subtitles: bool = False,
+    embed_subtitles: bool = False,
+    translate_to_chinese: bool = True,
+    target_language: str = "zh-CN",
+) -> str:
+    """同一视频在不同处理选项下产物不同，已处理记录按该键分别保存"""
+    if generate_article:
+        return "article"
+    if generate_subtitles or embed_subtitles:
+        key = f"subtitles:{target_language}" if translate_to_chinese else "subtitles"
+        return key + "+embed" if embed_subtitles else key
+    if enable_transcription:
+        return "transcript"
+    return "video" if download_video else "audio"
+
+
+def series_processed_lookup(series_dir: str, key: str) -> Callable[[str, Optional[str]], Optional[str]]:
+    """
+    基于系列项目清单（videohub_project.json）的跳过判断
+
+    剧集 id 为下载文件名（标题_视频ID），按视频 ID 后缀匹配；
+    清单中对应输出存在且文件仍在时视为已处理。
+    """
+    manifest_path = os.path.join(series_dir, MANIFEST_NAME)
+
+    def lookup(url: str, video_id: Optional[str]) -> Optional[str]:
+        if not video_id or not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for episode in manifest.get("episodes", []):
+            if not str(episode.get("id", "")).endswith(f"_{video_id}"):
+                continue
+            if key == "article":
+                outputs = episode.get("summaries") or []
+            elif key.startswith("subtitles"):
+                subtitles = episode.get("subtitles") or {}
+                outputs = (subtitles.get("polished") or []) + (subtitles.get("translated") or [])
+                if key == "subtitles":
+                    outputs += subtitles.get("source") or []
+                if key.endswith("+embed"):
+                    outputs = episode.get("rendered_videos") or []
+            elif key == "transcript":
+                outputs = episode.get("transcripts") or []
+            else:
+                outputs = [episode.get("video")] if episode.get("video") else []
+            for relative_path in outputs:
+                path = os.path.join(series_dir, relative_path)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    return lookup
+
+
+@dataclass
+class PipelineItem:
+    """流水线中的一个视频及其运行统计"""
+
+    url: str
+    index: int
+    video_id: Optional[str] = None
+    status: str = 'queued'  # queued/running/summarizing/success/failed/skipped
+    stage: Optional[str] = None
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    stage_wait_seconds: Dict[str, float] = field(default_factory=dict)
+
+    def to_result(self) -> dict:
+        """与 process_youtube_videos_batch 原有返回结构一致，跳过的视频额外带 skipped=True"""
+        if self.status in ('success', 'skipped'):
+            result = {"status": "success", "summary_path": self.output_path}
+            if self.status == 'skipped':
+                result["skipped"] = True
+            return result
+        return {"status": "failed", "error": self.error or "处理过程中出现错误，请查看日志获取详细信息"}
+
+
+class YouTubeBatchPipeline:
+    """按阶段限流的 YouTube 批量处理流水线"""
+
+    def __init__(
+        self,
+        process_fn: Callable[..., Optional[str]],
+        max_workers: int = 3,
+        stage_limits: Optional[Dict[str, int]] = None,
+        processed_lookups: Optional[List[Callable[[str, Optional[str]], Optional[str]]]] = None,
+        on_processed: Optional[Callable[[str, str], None]] = None,
+        video_id_fn: Optional[Callable[[str], Optional[str]]] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        summary_stage=None,
+    ):
+        """
+        Args:
+            process_fn: 单个视频的处理函数(url, stage_gate=..., **kwargs)，返回产物路径，失败返回 None；
+                提供 summary_stage 时以 summary_stage=... 传入，可以返回后台文章任务的 Future
+            max_workers: 同时处于流水线中的视频数
+            stage_limits: 各阶段并发上限，未列出的阶段使用默认值
+            processed_lookups: 跳过判断(url, video_id) -> 已有产物路径，依次尝试
+            on_processed: 处理成功后的回调(url, 产物路径)，用于记录已处理
+            video_id_fn: 从链接中提取视频 ID
+            log_callback: 日志回调(message)
+            summary_stage: 后台文章生成阶段（BackgroundSummaryStage），整批在最后一篇文章完成时结束
+        """
+        self.stage_limiter = StageLimiter(DEFAULT_STAGE_LIMITS, stage_limits)
+        self.stage_limits = self.stage_limiter.limits
+        self.peak_active = self.stage_limiter.peak_active
+
+        self.process_fn = process_fn
+        self.max_workers = max(1, int(max_workers))
+        self.processed_lookups = list(processed_lookups or [])
+        self.on_processed = on_processed
+        self.video_id_fn = video_id_fn
+        self.log_callback = log_callback
+        self.summary_stage = summary_stage
+        self._summary_futures: List[tuple] = []
+        self._lock = threading.Lock()
+        self.items: List[PipelineItem] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def _log(self, item: PipelineItem, message: str):
+        line = f"[{item.index + 1}/{len(self.items)}] {message}"
+        if self.log_callback:
+            self.log_callback(line)
+        print(f"[YouTubePipeline] {line}")
+
+    def _find_processed(self, item: PipelineItem) -> Optional[str]:
+        for lookup in self.processed_lookups:
+            try:
+                path = lookup(item.url, item.video_id)
+            except Exception as exc:
+                self._log(item, f"检查已处理记录失败: {exc}")
+                continue
+            if path:
+                return path
+        return None
+
+    def _run_item(self, item: PipelineItem, process_kwargs: dict) -> PipelineItem:
+        existing = self._find_processed(item)
+        if existing:
+            item.status = 'skipped'
+            item.output_path = existing
+            self._log(item, f"已处理过，跳过: {item.url} -> {existing}")
+            return item
+
+        item.status = 'running'
+        item.started_at = time.time()
+        self._log(item, f"开始处理: {item.url}")
+        if self.summary_stage is not None:
+            process_kwargs = dict(process_kwargs, summary_stage=self.summary_stage)
+        try:
+            output_path = self.process_fn(
+                item.url,
+                stage_gate=lambda stage: self.stage_limiter.gate(item, stage),
+                **process_kwargs,
+            )
+            if isinstance(output_path, Future):
+                item.status = 'summarizing'
+                with self._lock:
+                    self._summary_futures.append((item, output_path))
+            elif output_path:
+                self._mark_success(item, output_path)
+            else:
+                item.status = 'failed'
+        except Exception as exc:
+            item.status = 'failed'
+            item.error = str(exc)
+        finally:
+            item.stage = None
+            item.finished_at = time.time()
+            elapsed = item.finished_at - item.started_at
+            if item.status == 'summarizing':
+                self._log(item, f"转录完成，文章交给后台生成 ({elapsed:.1f}s)")
+            else:
+                self._log(item, f"{item.status}: {item.output_path or item.error or item.url} ({elapsed:.1f}s)")
+        return item
+
+    def _mark_success(self, item: PipelineItem, output_path: str):
+        item.status = 'success'
+        item.output_path = output_path
+        if self.on_processed:
+            self.on_processed(item.url, output_path)
+
+    def _finish_summary(self, item: PipelineItem, future: Future):
+        """后台文章结束后补全视频状态；文章阶段的排队和生成时间计入 summarize 阶段统计"""
+        try:
+            job = future.result()
+        except Exception as exc:
+            item.status, item.error = 'failed', str(exc)
+            return
+        if job.started_at and job.finished_at:
+            item.stage_wait_seconds['summarize'] = max(0.0, job.started_at - job.submitted_at)
+            item.stage_seconds['summarize'] = job.finished_at - job.started_at
+            item.finished_at = max(item.finished_at or 0.0, job.finished_at)
+        if job.status == 'done':
+            self._mark_success(item, job.summary_path)
+        else:
+            item.status, item.error = 'failed', job.error
+
+    def run(self, urls: List[str], **process_kwargs) -> Dict[str, dict]:
+        """
+        处理一批视频，阻塞到全部结束
+
+        Returns:
+            {url: 结果}，键顺序与输入一致，重复链接只处理一次
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        self.items = [
+            PipelineItem(url=url, index=i, video_id=self.video_id_fn(url) if self.video_id_fn else None)
+            for i, url in enumerate(unique_urls)
+        ]
+        self.started_at = time.time()
+        if self.items:
+            workers = min(self.max_workers, len(self.items))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='youtube-batch') as executor:
+                for future in [executor.submit(self._run_item, item, process_kwargs) for item in self.items]:
+                    future.result()
+        for item, future in self._summary_futures:
+            self._finish_summary(item, future)
+        self._summary_futures = []
+        self.finished_at = time.time()
+        return {item.url: item.to_result() for item in self.items}
+
+    def stats(self) -> dict:
+        """各阶段利用率和排队时间见 StageLimiter.stats"""
+        end = self.finished_at or time.time()
+        wall_seconds = max(0.0, end - self.started_at) if self.started_at else 0.0
+
+        return {
+            'total': len(self.items),
+            'success': sum(1 for item in self.items if item.status == 'success'),
+            'skipped': sum(1 for item in self.items if item.status == 'skipped'),
+            'failed': sum(1 for item in self.items if item.status == 'failed'),
+            'wall_seconds': round(wall_seconds, 2),
+            **self.stage_limiter.stats(self.items, wall_seconds),
+        }
+
+
+def format_stage_report(stats: dict) -> List[str]:
+    """把 stats() 转成便于打印的逐阶段利用率报告"""
+    lines = [f"总耗时: {stats['wall_seconds']:.1f}秒"]
+    for stage, limit in stats['stage_limits'].items():
+        if stage not in stats['stage_busy_seconds']:
+            continue
+        lines.append(
+            f"  {stage}: 利用率 {stats['stage_utilization'].get(stage, 0.0):.0%}"
+            f"（忙碌 {stats['stage_busy_seconds'][stage]:.1f}秒，"
+            f"排队 {stats['stage_wait_seconds'].get(stage, 0.0):.1f}秒，"
+            f"峰值并发 {stats['stage_peak_concurrency'].get(stage, 0)}/{limit}）"
+        )
+    return lines
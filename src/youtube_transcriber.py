@@ -6,15 +6,17 @@ import openai
 import os
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from openai import OpenAI
 import shutil
 import requests
 import html
 import subprocess
 import json
 import re
+import threading
 import time
 from urllib.parse import urlparse, parse_qs
+from concurrent.futures import Future
+from contextlib import nullcontext
 
 try:
     from .subtitle_utils import (
@@ -48,6 +50,74 @@ except ImportError:
         refresh_series_project_manifest,
     )
 
+try:
+    from .ytdlp_result import build_download_result, parse_printed_results, result_print_args
+except ImportError:
+    from ytdlp_result import build_download_result, parse_printed_results, result_print_args
+
+try:
+    from .ytdlp_metadata_cache import DEFAULT_TTL_SECONDS as YTDLP_METADATA_TTL_DEFAULT, MetadataCache, extraction_profile
+except ImportError:
+    from ytdlp_metadata_cache import DEFAULT_TTL_SECONDS as YTDLP_METADATA_TTL_DEFAULT, MetadataCache, extraction_profile
+
+try:
+    from .video_history_store import VideoHistoryStore
+except ImportError:
+    from video_history_store import VideoHistoryStore
+
+try:
+    from .summary_chunking import (
+        DEFAULT_CHUNK_TOKENS,
+        DEFAULT_MAP_WORKERS,
+        DEFAULT_SINGLE_PASS_TOKENS,
+        ChunkSummaryCache,
+        combine_chunk_summaries,
+        estimate_tokens,
+        split_transcript,
+        summarize_chunks,
+    )
+except ImportError:
+    from summary_chunking import (
+        DEFAULT_CHUNK_TOKENS,
+        DEFAULT_MAP_WORKERS,
+        DEFAULT_SINGLE_PASS_TOKENS,
+        ChunkSummaryCache,
+        combine_chunk_summaries,
+        estimate_tokens,
+        split_transcript,
+        summarize_chunks,
+    )
+
+try:
+    from .llm_client import get_llm_client, llm_stats
+except ImportError:
+    from llm_client import get_llm_client, llm_stats
+
+try:
+    from .summary_stage import DEFAULT_SUMMARY_WORKERS, BackgroundSummaryStage
+except ImportError:
+    from summary_stage import DEFAULT_SUMMARY_WORKERS, BackgroundSummaryStage
+
+try:
+    from .speech_vad import prepare_speech_audio, remap_transcription
+except ImportError:
+    from speech_vad import prepare_speech_audio, remap_transcription
+
+try:
+    from .youtube_batch_pipeline import (
+        YouTubeBatchPipeline,
+        format_stage_report,
+        processing_key,
+        series_processed_lookup,
+    )
+except ImportError:
+    from youtube_batch_pipeline import (
+        YouTubeBatchPipeline,
+        format_stage_report,
+        processing_key,
+        series_processed_lookup,
+    )
+
 # 导入 yt-dlp 管理器
 try:
     from .ytdlp_manager import get_ytdlp_manager, get_ytdlp_options
@@ -75,6 +145,9 @@ try:
         DEFAULT_SUMMARY_DIR,
         LOGS_DIR,
         TEMPLATES_DIR,
+        YTDLP_METADATA_CACHE_DIR,
+        SUMMARY_CHUNK_CACHE_DIR,
+        SUMMARY_QUEUE_FILE,
     )
 except ImportError:
     from paths_config import (
@@ -91,6 +164,9 @@ except ImportError:
         DEFAULT_SUMMARY_DIR,
         LOGS_DIR,
         TEMPLATES_DIR,
+        YTDLP_METADATA_CACHE_DIR,
+        SUMMARY_CHUNK_CACHE_DIR,
+        SUMMARY_QUEUE_FILE,
     )
 
 # Load environment variables from .env file
@@ -104,7 +180,10 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 
 # 日志文件路径
 COMMAND_LOG_FILE = os.path.join(LOGS_DIR, "command_history.log")
+# 旧版下载记录（JSON），现在只用于首次迁移；实际记录在同名 .sqlite3 中
 VIDEO_LIST_FILE = os.path.join(LOGS_DIR, "downloaded_videos.json")
+_VIDEO_HISTORY_LOCK = threading.Lock()
+_VIDEO_HISTORY_STORES = {}
 
 # 翻译日志开关：默认开启详细日志，GUI 可通过 set_translation_verbose 控制
 TRANSLATION_VERBOSE = True
@@ -287,12 +366,6 @@ def download_with_exe(
     import re
 
     Path(output_dir).mkdir(parents=True, exist_ok=True)
-    started_at = time.time()
-    existing_files = {
-        str(path): path.stat().st_mtime
-        for path in Path(output_dir).glob("*")
-        if path.is_file()
-    }
     video_id = extract_youtube_video_id(youtube_url)
 
     # 构建命令
@@ -318,14 +391,19 @@ def download_with_exe(
     # 详细输出模式
     cmd.append('-v')
     cmd.append('--newline')
+    # 文件移动到最终位置后打印实际路径，无需扫描输出目录
+    cmd.extend(result_print_args())
 
-    # Cookies
+    # Cookies（profile_opts 是等价的 Python 库选项，用于匹配同一组选项下缓存的提取结果）
+    profile_opts = {}
     if cookies_file and cookies_file.startswith("browser:"):
         browser_name = cookies_file.split(":", 1)[1].strip()
         cmd.extend(['--cookies-from-browser', browser_name])
+        profile_opts['cookiesfrombrowser'] = (browser_name, None, None, None)
         print(f"使用 {browser_name.title()} 浏览器 cookies")
     elif cookies_file and os.path.exists(cookies_file):
         cmd.extend(['--cookies', cookies_file])
+        profile_opts['cookiefile'] = cookies_file
         print(f"使用 cookies 文件: {cookies_file}")
     else:
         print("警告: 未提供 cookies 文件")
@@ -333,6 +411,7 @@ def download_with_exe(
     # 代理
     if proxy:
         cmd.extend(['--proxy', proxy])
+        profile_opts['proxy'] = proxy
         print(f"使用代理: {proxy}")
 
     # 添加 --no-check-certificate 避免证书问题
@@ -346,8 +425,14 @@ def download_with_exe(
     if not audio_only:
         cmd.extend(['--merge-output-format', 'mp4'])
 
-    # 添加视频URL
-    cmd.append(youtube_url)
+    # 添加视频URL；有未过期的缓存时直接加载提取结果，省掉一次提取
+    cached_info_path = YTDLP_METADATA_CACHE.fresh_path(
+        video_id, need_urls=True, profile=extraction_profile(profile_opts)
+    )
+    if cached_info_path:
+        cmd.extend(['--load-info-json', cached_info_path])
+    else:
+        cmd.append(youtube_url)
 
     print(f"执行命令: {' '.join(cmd)}")
 
@@ -377,38 +462,13 @@ def download_with_exe(
 
         raise Exception(f"yt-dlp.exe 下载失败: {error_msg}")
 
-    def _is_final_media_file(path: Path) -> bool:
-        name = path.name
-        if name.startswith('.') or name.endswith(('.part', '.temp', '.ytdl')):
-            return False
-        suffix = path.suffix.lower()
-        if ".f" in name and suffix in [".mp4", ".m4a", ".webm"]:
-            return False
-        if audio_only:
-            return suffix in [".mp3", ".m4a", ".aac", ".wav", ".ogg", ".flac", ".webm"]
-        return suffix in [".mp4", ".mkv", ".webm", ".avi", ".mov", ".flv"]
-
-    candidates = []
-    output_path = Path(output_dir)
-    if video_id:
-        candidates.extend(
-            path for path in output_path.glob(f"*_{video_id}.*")
-            if path.is_file() and _is_final_media_file(path)
-        )
-    for path in output_path.glob("*"):
-        if not path.is_file() or not _is_final_media_file(path):
-            continue
-        previous_mtime = existing_files.get(str(path))
-        current_mtime = path.stat().st_mtime
-        if previous_mtime is None or current_mtime > previous_mtime or current_mtime >= started_at - 2:
-            candidates.append(path)
-
-    unique_candidates = list({str(path): path for path in candidates}.values())
-    downloaded_file = str(max(unique_candidates, key=lambda p: p.stat().st_mtime)) if unique_candidates else None
+    printed = parse_printed_results(result.stdout)
+    downloaded = printed[-1] if printed else None
+    downloaded_file = downloaded["path"] if downloaded else None
 
     if not downloaded_file or not os.path.exists(downloaded_file):
         raise Exception(
-            f"下载完成但无法确认本次输出文件，已拒绝使用目录中的历史文件\n"
+            f"下载完成但 yt-dlp 未报告输出文件（请更新 yt-dlp 以支持 --print after_move）\n"
             f"输出目录: {output_dir}\n命令输出:\n{result.stdout}\n错误输出:\n{result.stderr}"
         )
 
@@ -416,9 +476,12 @@ def download_with_exe(
 
     # 构建视频信息
     info = {
-        'id': video_id,
-        'title': Path(downloaded_file).stem,
-        'ext': Path(downloaded_file).suffix.lstrip('.'),
+        'id': downloaded.get('id') or video_id,
+        'title': downloaded.get('title') or Path(downloaded_file).stem,
+        'ext': downloaded.get('ext') or Path(downloaded_file).suffix.lstrip('.'),
+        'duration': downloaded.get('duration'),
+        'format': downloaded.get('format'),
+        'format_id': downloaded.get('format_id'),
         'filepath': downloaded_file,
     }
 
@@ -614,6 +677,34 @@ def configure_cuda_for_whisper():
         print(f"配置CUDA环境时出错: {str(e)}")
         return "cpu"
 
+# 只保留最近使用的一个模型：GUI 中切换模型大小时不会让多个模型同时占用显存
+_WHISPER_MODELS = {}
+_WHISPER_MODELS_LOCK = threading.Lock()
+
+
+def load_whisper_model(model_size, device):
+    """
+    加载 Whisper 模型并在进程内复用
+    批量任务和配音队列中的每个视频不再重复从磁盘加载模型；换用其他大小或设备时先释放旧模型
+    :param model_size: 模型大小
+    :param device: 设备名称 ("cuda" 或 "cpu")
+    :return: Whisper 模型实例
+    """
+    key = (model_size, device)
+    with _WHISPER_MODELS_LOCK:
+        model = _WHISPER_MODELS.get(key)
+        if model is None:
+            if _WHISPER_MODELS:
+                _WHISPER_MODELS.clear()
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            model = whisper.load_model(model_size, device=device)
+            _WHISPER_MODELS[key] = model
+        else:
+            print(f"复用已加载的 {model_size} 模型")
+    return model
+
+
 def get_optimal_whisper_params(device="cpu"):
     """
     获取针对不同设备优化的Whisper参数
@@ -697,150 +788,6 @@ def sanitize_filename(filename):
     
     return filename
 
-def translate_with_llm(text, target_language='zh-CN', source_language='auto'):
-    """
-    使用大模型API翻译文本
-    :param text: 要翻译的文本
-    :param target_language: 目标语言代码，默认为中文
-    :param source_language: 源语言代码，默认为自动检测
-    :return: 翻译后的文本
-    """
-    try:
-        # 语言代码映射
-        language_map = {
-            'zh-CN': '简体中文',
-            'zh-TW': '繁体中文',
-            'en': '英语',
-            'ja': '日语',
-            'ko': '韩语',
-            'fr': '法语',
-            'de': '德语',
-            'es': '西班牙语',
-            'it': '意大利语',
-            'ru': '俄语'
-        }
-
-        target_lang_name = language_map.get(target_language, '简体中文')
-
-        # 优先使用DeepSeek API（更便宜），如果没有则使用OpenAI
-        deepseek_api_key = os.getenv("DEEPSEEK_API_KEY", "")
-        openai_api_key = os.getenv("OPENAI_API_KEY", "")
-        proxy = os.getenv("PROXY", "")
-
-        if not deepseek_api_key and not openai_api_key:
-            if TRANSLATION_VERBOSE:
-                print("警告: 未配置大模型API密钥，使用谷歌翻译作为后备")
-            return translate_with_google(text, target_language, source_language)
-
-        # 配置代理
-        proxies = None
-        if proxy:
-            proxies = {
-                "http": proxy,
-                "https": proxy
-            }
-
-        # 使用DeepSeek或OpenAI
-        if deepseek_api_key:
-            client = OpenAI(
-                api_key=deepseek_api_key,
-                base_url="https://api.deepseek.com",
-                http_client=None if not proxies else None  # DeepSeek通常不需要代理
-            )
-            model = "deepseek-chat"
-        else:
-            client = OpenAI(
-                api_key=openai_api_key,
-                http_client=None if not proxies else None
-            )
-            model = "gpt-3.5-turbo"
-
-        # 构建提示词
-        prompt = f"请将以下文本翻译成{target_lang_name}，只返回翻译结果，不要添加任何解释或额外内容：\n\n{text}"
-
-        # 调用API
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": f"你是一个专业的翻译助手，专门将文本翻译成{target_lang_name}。你只返回翻译结果，不添加任何解释。"},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=2000
-        )
-
-        translated_text = response.choices[0].message.content.strip()
-        return translated_text
-
-    except Exception as e:
-        print(f"大模型翻译过程中出错: {str(e)}")
-        print("尝试使用谷歌翻译作为后备...")
-        return translate_with_google(text, target_language, source_language)
-
-
-def translate_with_google(text, target_language='zh-CN', source_language='auto'):
-    """
-    使用Google翻译API翻译文本
-    :param text: 要翻译的文本
-    :param target_language: 目标语言代码，默认为中文
-    :param source_language: 源语言代码，默认为自动检测
-    :return: 翻译后的文本
-    """
-    try:
-        # Google翻译API的URL
-        url = "https://translate.googleapis.com/translate_a/single"
-
-        # 请求参数
-        params = {
-            "client": "gtx",
-            "sl": source_language,
-            "tl": target_language,
-            "dt": "t",
-            "q": text
-        }
-
-        # 发送请求
-        response = requests.get(url, params=params)
-
-        if response.status_code == 200:
-            # 解析响应
-            result = response.json()
-
-            # 提取翻译文本
-            translated_text = ""
-            for sentence in result[0]:
-                if sentence[0]:
-                    translated_text += sentence[0]
-
-            return html.unescape(translated_text)
-        else:
-            print(f"翻译请求失败: {response.status_code}")
-            return text
-    except Exception as e:
-        print(f"翻译过程中出错: {str(e)}")
-        return text
-
-
-def translate_text(text, target_language='zh-CN', source_language='auto'):
-    """
-    翻译文本，根据配置选择使用Google翻译或大模型翻译
-    :param text: 要翻译的文本
-    :param target_language: 目标语言代码，默认为中文
-    :param source_language: 源语言代码，默认为自动检测
-    :return: 翻译后的文本
-    """
-    # 从环境变量读取翻译方式配置
-    translation_method = os.getenv("TRANSLATION_METHOD", "google")
-
-    if translation_method == "llm":
-        if TRANSLATION_VERBOSE:
-            print(f"使用大模型翻译: {text[:50]}...")
-        return translate_with_llm(text, target_language, source_language)
-    else:
-        if TRANSLATION_VERBOSE:
-            print(f"使用谷歌翻译: {text[:50]}...")
-        return translate_with_google(text, target_language, source_language)
-
 def translate_with_llm(text, target_language='zh-CN', source_language='auto', fallback_to_google=True):
     """Translate text with DeepSeek first, then OpenAI. Google fallback is optional."""
     target_language = normalize_target_language(target_language)
@@ -858,13 +805,10 @@ def translate_with_llm(text, target_language='zh-CN', source_language='auto', fa
             return text
 
         if deepseek_api_key:
-            client = OpenAI(api_key=deepseek_api_key, base_url="https://api.deepseek.com")
-            model = "deepseek-chat"
-            provider = "DeepSeek"
+            client = get_llm_client("DeepSeek", deepseek_api_key, "https://api.deepseek.com", "deepseek-chat")
         else:
-            client = OpenAI(api_key=openai_api_key)
-            model = "gpt-3.5-turbo"
-            provider = "OpenAI"
+            client = get_llm_client("OpenAI", openai_api_key, None, "gpt-3.5-turbo")
+        provider = client.provider
 
         if TRANSLATION_VERBOSE:
             print(f"使用 {provider} 备用翻译: {text[:50]}...")
@@ -874,22 +818,16 @@ def translate_with_llm(text, target_language='zh-CN', source_language='auto', fa
             "Return only the translated text, with no explanation or extra content.\n\n"
             f"{text}"
         )
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        f"You are a professional translator. Translate text into {target_lang_name}. "
-                        "Return only the translation."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
+        translated = client.complete(
+            (
+                f"You are a professional translator. Translate text into {target_lang_name}. "
+                "Return only the translation."
+            ),
+            prompt,
             temperature=0.3,
             max_tokens=2000,
-        )
-        translated = response.choices[0].message.content.strip()
+            purpose="translate",
+        ).strip()
         if TRANSLATION_VERBOSE:
             print(f"{provider} 备用翻译成功: {translated[:50]}...")
         return translated
@@ -1020,11 +958,7 @@ def polish_subtitle_translations_with_deepseek(segments, chunk_size=50, progress
     base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com").strip() or "https://api.deepseek.com"
     model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat").strip() or "deepseek-chat"
 
-    try:
-        client = OpenAI(api_key=api_key, base_url=base_url)
-    except Exception as e:
-        print(f"初始化 DeepSeek 客户端失败，跳过字幕润色: {e}")
-        return segments
+    client = get_llm_client("DeepSeek", api_key, base_url, model)
 
     polished_segments = [dict(item) for item in segments]
     total = len(polished_segments)
@@ -1058,16 +992,7 @@ def polish_subtitle_translations_with_deepseek(segments, chunk_size=50, progress
         )
 
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.2,
-                max_tokens=4000,
-            )
-            content = response.choices[0].message.content
+            content = client.complete(system_prompt, prompt, temperature=0.2, max_tokens=4000, purpose="polish")
             result = _extract_json_array(content)
 
             if not isinstance(result, list) or len(result) != len(chunk):
@@ -1110,7 +1035,7 @@ def polish_subtitle_translations_with_deepseek(segments, chunk_size=50, progress
             )
             continue
 
-    print("DeepSeek 字幕润色完成")
+    print(f"DeepSeek 字幕润色完成（{llm_stats().format_report()}）")
     return polished_segments
 
 
@@ -1259,60 +1184,25 @@ def log_command(command_args):
     except Exception as e:
         print(f"记录命令日志时出错: {str(e)}")
 
+def _video_history():
+    """按 VIDEO_LIST_FILE 打开（并在首次打开时迁移）下载历史数据库"""
+    with _VIDEO_HISTORY_LOCK:
+        store = _VIDEO_HISTORY_STORES.get(VIDEO_LIST_FILE)
+        if store is None:
+            db_path = os.path.splitext(VIDEO_LIST_FILE)[0] + ".sqlite3"
+            store = VideoHistoryStore(db_path, legacy_json_path=VIDEO_LIST_FILE, video_id_fn=extract_youtube_video_id)
+            _VIDEO_HISTORY_STORES[VIDEO_LIST_FILE] = store
+        return store
+
 def log_downloaded_video(youtube_url, file_path, video_info=None):
     """
-    记录下载的视频信息到JSON文件
+    记录下载的视频信息（同一视频的不同链接形式合并为一条）
     :param youtube_url: YouTube视频链接
     :param file_path: 下载文件的路径
     :param video_info: 视频信息字典
     """
     try:
-        # 读取现有记录
-        video_list = []
-        if os.path.exists(VIDEO_LIST_FILE):
-            try:
-                with open(VIDEO_LIST_FILE, "r", encoding="utf-8") as f:
-                    video_list = json.load(f)
-            except json.JSONDecodeError:
-                # 如果文件格式不正确，创建新的列表
-                video_list = []
-        
-        requested_video_id = extract_youtube_video_id(youtube_url)
-
-        # 检查URL是否已存在
-        for video in video_list:
-            if video.get("url") == youtube_url:
-                # 更新现有记录
-                video["last_download_time"] = time.strftime("%Y-%m-%d %H:%M:%S")
-                video["file_path"] = file_path
-                if requested_video_id:
-                    video["id"] = requested_video_id
-                if video_info:
-                    video["id"] = video_info.get("id") or video_info.get("display_id") or video.get("id", "")
-                    video["title"] = video_info.get("title", "")
-                    video["duration"] = video_info.get("duration", 0)
-                    video["upload_date"] = video_info.get("upload_date", "")
-                break
-        else:
-            # 添加新记录
-            new_entry = {
-                "url": youtube_url,
-                "file_path": file_path,
-                "first_download_time": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "last_download_time": time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            if requested_video_id:
-                new_entry["id"] = requested_video_id
-            if video_info:
-                new_entry["id"] = video_info.get("id") or video_info.get("display_id") or new_entry.get("id", "")
-                new_entry["title"] = video_info.get("title", "")
-                new_entry["duration"] = video_info.get("duration", 0)
-                new_entry["upload_date"] = video_info.get("upload_date", "")
-            video_list.append(new_entry)
-        
-        # 保存更新后的列表
-        with open(VIDEO_LIST_FILE, "w", encoding="utf-8") as f:
-            json.dump(video_list, f, ensure_ascii=False, indent=4)
+        _video_history().record_download(youtube_url, file_path, video_info)
     except Exception as e:
         print(f"记录下载视频信息时出错: {str(e)}")
 
@@ -1322,15 +1212,94 @@ def list_downloaded_videos():
     :return: 视频列表
     """
     try:
-        if os.path.exists(VIDEO_LIST_FILE):
-            with open(VIDEO_LIST_FILE, "r", encoding="utf-8") as f:
-                video_list = json.load(f)
-            return video_list
-        return []
+        return _video_history().list_all()
     except Exception as e:
         print(f"读取下载视频列表时出错: {str(e)}")
         return []
 
+def find_downloaded_video(youtube_url):
+    """
+    按链接查找下载记录（索引查询，同一视频的不同链接形式视为同一条）
+    :return: 记录字典，没有记录时返回None
+    """
+    try:
+        return _video_history().find(youtube_url)
+    except Exception as e:
+        print(f"读取下载视频记录时出错: {str(e)}")
+        return None
+
+def mark_video_processed(youtube_url, processing_key, output_path):
+    """
+    在下载记录中登记视频在某种处理选项下的最终产物，批量处理时据此跳过
+    :param youtube_url: YouTube视频链接
+    :param processing_key: 处理选项键（文章/字幕/转录等，见 youtube_batch_pipeline.processing_key）
+    :param output_path: 产物路径
+    """
+    try:
+        _video_history().mark_processed(youtube_url, processing_key, output_path)
+    except Exception as e:
+        print(f"记录视频处理结果时出错: {str(e)}")
+
+def get_processed_output(youtube_url, processing_key):
+    """
+    查询视频在某种处理选项下的已有产物
+    :return: 产物路径；未处理过或产物已被删除时返回None
+    """
+    video = find_downloaded_video(youtube_url)
+    record = ((video or {}).get("processed") or {}).get(processing_key) or {}
+    path = record.get("path")
+    if path and os.path.exists(path):
+        return path
+    return None
+
+# 字幕检查、标题查询和下载共用的提取结果缓存，按视频ID保存，TTL 可通过 YTDLP_METADATA_TTL_SECONDS 调整（0 表示禁用）
+YTDLP_METADATA_CACHE = MetadataCache(
+    YTDLP_METADATA_CACHE_DIR,
+    ttl=_safe_int(os.getenv("YTDLP_METADATA_TTL_SECONDS", str(YTDLP_METADATA_TTL_DEFAULT)), YTDLP_METADATA_TTL_DEFAULT),
+)
+
+def extract_youtube_info(youtube_url, ydl_opts):
+    """
+    获取视频信息（extract_info(download=False)），优先使用本地元数据缓存
+    （只复用 cookies、代理等提取选项相同的缓存结果）
+    :param youtube_url: YouTube视频链接
+    :param ydl_opts: 缓存未命中时使用的 yt-dlp 选项
+    :return: 提取结果字典，失败时返回None或抛出 yt-dlp 异常
+    """
+    video_id = extract_youtube_video_id(youtube_url)
+    profile = extraction_profile(ydl_opts)
+    info = YTDLP_METADATA_CACHE.get(video_id, profile=profile)
+    if info:
+        return info
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(youtube_url, download=False)
+    YTDLP_METADATA_CACHE.put(video_id or (info or {}).get('id'), info, profile=profile)
+    return info
+
+def _process_cached_info(ydl, youtube_url, ydl_opts):
+    """
+    用缓存的提取结果直接下载（等同 --load-info-json），省掉一次提取
+    :param ydl_opts: 创建 ydl 时使用的选项，决定缓存条目的提取配置
+    :return: 下载结果；缓存缺失、直链将过期或下载失败时返回None，由调用方回退为正常下载
+    """
+    video_id = extract_youtube_video_id(youtube_url)
+    profile = extraction_profile(ydl_opts)
+    info = YTDLP_METADATA_CACHE.get(video_id, need_urls=True, profile=profile)
+    if not info:
+        return None
+    try:
+        result = ydl.process_ie_result(info, download=True)
+    except yt_dlp.utils.DownloadError as e:
+        print(f"缓存的视频信息已失效，重新提取: {str(e)}")
+        result = None
+    if result and not ydl_opts.get('skip_download'):
+        downloaded = build_download_result(result)
+        if not downloaded or not os.path.exists(downloaded["path"]):
+            result = None
+    if result is None:
+        YTDLP_METADATA_CACHE.invalidate(video_id, profile=profile)
+    return result
+
 def check_youtube_subtitles(youtube_url, cookies_file=None):
     """
     检查YouTube视频是否有原生字幕
@@ -1356,117 +1325,116 @@ def check_youtube_subtitles(youtube_url, cookies_file=None):
         ydl_opts['proxy'] = proxy
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(youtube_url, download=False)
-            
-            # 检查是否成功获取视频信息
-            if not info:
-                return {'error': 'unable_to_access'}
-            
-            subtitles = info.get('subtitles', {})
-            auto_subtitles = info.get('automatic_captions', {})
-            
-            manual_languages = list(subtitles.keys())
-            auto_languages = list(auto_subtitles.keys())
-            all_languages = list(set(manual_languages + auto_languages))
-
-            result = {
-                'title': info.get('title', 'Unknown'),
-                'has_manual_subtitles': bool(subtitles),
-                'has_auto_subtitles': bool(auto_subtitles),
-                'manual_languages': manual_languages,
-                'auto_languages': auto_languages,
-                'all_languages': all_languages,
-                'preferred_languages': [],
-                # 下面几个字段用于在上层快速选择“最佳”字幕语言
-                'best_manual_language': None,
-                'best_auto_language': None,
-                'best_overall_language': None,
-                'best_is_auto': False,
-            }
-            
-            # 通用语言优先级（越靠前优先级越高）
-            # 主要用于手动字幕，自动字幕会单独再做一层优先级处理
-            priority_groups = [
-                ['zh-CN', 'zh-Hans', 'zh'],
-                ['zh-TW', 'zh-Hant'],
-                ['en-US', 'en-GB', 'en'],
-            ]
+        info = extract_youtube_info(youtube_url, ydl_opts)
+        
+        # 检查是否成功获取视频信息
+        if not info:
+            return {'error': 'unable_to_access'}
+        
+        subtitles = info.get('subtitles', {})
+        auto_subtitles = info.get('automatic_captions', {})
+        
+        manual_languages = list(subtitles.keys())
+        auto_languages = list(auto_subtitles.keys())
+        all_languages = list(set(manual_languages + auto_languages))
+
+        result = {
+            'title': info.get('title', 'Unknown'),
+            'has_manual_subtitles': bool(subtitles),
+            'has_auto_subtitles': bool(auto_subtitles),
+            'manual_languages': manual_languages,
+            'auto_languages': auto_languages,
+            'all_languages': all_languages,
+            'preferred_languages': [],
+            # 下面几个字段用于在上层快速选择“最佳”字幕语言
+            'best_manual_language': None,
+            'best_auto_language': None,
+            'best_overall_language': None,
+            'best_is_auto': False,
+        }
+        
+        # 通用语言优先级（越靠前优先级越高）
+        # 主要用于手动字幕，自动字幕会单独再做一层优先级处理
+        priority_groups = [
+            ['zh-CN', 'zh-Hans', 'zh'],
+            ['zh-TW', 'zh-Hant'],
+            ['en-US', 'en-GB', 'en'],
+        ]
 
-            def pick_best_manual(langs):
-                """从手动字幕语言列表中挑选最合适的语言"""
-                if not langs:
-                    return None
-                # 先按通用优先组匹配（支持前缀/包含匹配）
-                for group in priority_groups:
-                    for target in group:
-                        for lang in langs:
-                            if lang == target:
-                                return lang
-                            # 处理类似 zh-Hans, en-US 这种前缀/后缀情况
-                            if lang.startswith(target) or target.startswith(lang.split('-')[0]):
-                                return lang
-                # 如果没有命中优先组，就返回列表中的第一个
-                return langs[0]
-
-            def pick_best_auto(langs):
-                """
-                从自动字幕语言列表中挑选最合适的语言
-                为了避免 YouTube 对机器翻译字幕(如 zh-Hans) 的 429 限流，
-                这里优先选择英文原始轨道(en-orig/en)，再考虑中文等其他语言。
-                """
-                if not langs:
-                    return None
-
-                # 1) 优先使用英文原始/英文自动字幕
-                for key in ['en-orig', 'en', 'en-US', 'en-GB']:
-                    if key in langs:
-                        return key
-
-                # 2) 其次考虑中文自动字幕（如果真的没有英文轨道）
-                for key in ['zh-CN', 'zh-Hans', 'zh', 'zh-TW', 'zh-Hant']:
-                    if key in langs:
-                        return key
-
-                # 3) 其他语言按原有优先规则挑选
-                for group in priority_groups:
-                    for target in group:
-                        for lang in langs:
-                            if lang == target:
-                                return lang
-                            if lang.startswith(target) or target.startswith(lang.split('-')[0]):
-                                return lang
-
-                # 4) 仍然没命中就返回第一个
-                return langs[0]
-
-            best_manual = pick_best_manual(manual_languages)
-            best_auto = pick_best_auto(auto_languages)
-
-            # 组装 preferred_languages（旧字段，保持兼容）
-            # 先按优先级放入中文/英文，再放入其他语言
-            priority_langs = ['zh', 'zh-Hans', 'zh-CN', 'zh-TW', 'zh-Hant', 'en', 'en-US', 'en-GB']
-            for lang in priority_langs:
-                if lang in all_languages and lang not in result['preferred_languages']:
-                    result['preferred_languages'].append(lang)
-            for lang in all_languages:
-                if lang not in result['preferred_languages']:
-                    result['preferred_languages'].append(lang)
-
-            # 记录最佳语言信息，供上层逻辑直接使用
-            result['best_manual_language'] = best_manual
-            result['best_auto_language'] = best_auto
-
-            # 整体最佳：优先手动字幕，如果没有再用自动字幕
-            if best_manual:
-                result['best_overall_language'] = best_manual
-                result['best_is_auto'] = False
-            elif best_auto:
-                result['best_overall_language'] = best_auto
-                result['best_is_auto'] = True
-
-            return result
-            
+        def pick_best_manual(langs):
+            """从手动字幕语言列表中挑选最合适的语言"""
+            if not langs:
+                return None
+            # 先按通用优先组匹配（支持前缀/包含匹配）
+            for group in priority_groups:
+                for target in group:
+                    for lang in langs:
+                        if lang == target:
+                            return lang
+                        # 处理类似 zh-Hans, en-US 这种前缀/后缀情况
+                        if lang.startswith(target) or target.startswith(lang.split('-')[0]):
+                            return lang
+            # 如果没有命中优先组，就返回列表中的第一个
+            return langs[0]
+
+        def pick_best_auto(langs):
+            """
+            从自动字幕语言列表中挑选最合适的语言
+            为了避免 YouTube 对机器翻译字幕(如 zh-Hans) 的 429 限流，
+            这里优先选择英文原始轨道(en-orig/en)，再考虑中文等其他语言。
+            """
+            if not langs:
+                return None
+
+            # 1) 优先使用英文原始/英文自动字幕
+            for key in ['en-orig', 'en', 'en-US', 'en-GB']:
+                if key in langs:
+                    return key
+
+            # 2) 其次考虑中文自动字幕（如果真的没有英文轨道）
+            for key in ['zh-CN', 'zh-Hans', 'zh', 'zh-TW', 'zh-Hant']:
+                if key in langs:
+                    return key
+
+            # 3) 其他语言按原有优先规则挑选
+            for group in priority_groups:
+                for target in group:
+                    for lang in langs:
+                        if lang == target:
+                            return lang
+                        if lang.startswith(target) or target.startswith(lang.split('-')[0]):
+                            return lang
+
+            # 4) 仍然没命中就返回第一个
+            return langs[0]
+
+        best_manual = pick_best_manual(manual_languages)
+        best_auto = pick_best_auto(auto_languages)
+
+        # 组装 preferred_languages（旧字段，保持兼容）
+        # 先按优先级放入中文/英文，再放入其他语言
+        priority_langs = ['zh', 'zh-Hans', 'zh-CN', 'zh-TW', 'zh-Hant', 'en', 'en-US', 'en-GB']
+        for lang in priority_langs:
+            if lang in all_languages and lang not in result['preferred_languages']:
+                result['preferred_languages'].append(lang)
+        for lang in all_languages:
+            if lang not in result['preferred_languages']:
+                result['preferred_languages'].append(lang)
+
+        # 记录最佳语言信息，供上层逻辑直接使用
+        result['best_manual_language'] = best_manual
+        result['best_auto_language'] = best_auto
+
+        # 整体最佳：优先手动字幕，如果没有再用自动字幕
+        if best_manual:
+            result['best_overall_language'] = best_manual
+            result['best_is_auto'] = False
+        elif best_auto:
+            result['best_overall_language'] = best_auto
+            result['best_is_auto'] = True
+
+        return result
+        
     except Exception as e:
         return {'error': str(e)}
 
@@ -1540,10 +1508,9 @@ def download_youtube_subtitles(youtube_url, output_dir=NATIVE_SUBTITLES_DIR,
         successful_config = None
         for config in proxy_configs:
             try:
-                with yt_dlp.YoutubeDL(config) as ydl:
-                    info = ydl.extract_info(youtube_url, download=False)
-                    successful_config = config
-                    break  # 成功则退出循环
+                info = extract_youtube_info(youtube_url, config)
+                successful_config = config
+                break  # 成功则退出循环
             except Exception as e:
                 if "proxy" in config:
                     print(f"使用代理失败，尝试直连: {str(e)}")
@@ -1583,7 +1550,8 @@ def download_youtube_subtitles(youtube_url, output_dir=NATIVE_SUBTITLES_DIR,
                 print(f"尝试下载字幕语言: {lang}")
                 try:
                     with yt_dlp.YoutubeDL(lang_config) as ydl:
-                        ydl.download([youtube_url])
+                        if not _process_cached_info(ydl, youtube_url, lang_config):
+                            ydl.download([youtube_url])
                 except Exception as e:
                     error_message = str(e)
                     download_errors.append((lang, error_message))
@@ -2094,58 +2062,57 @@ def get_youtube_video_title(youtube_url, cookies_file=None):
         ydl_opts['proxy'] = proxy
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(youtube_url, download=False)
-            
-            if not info:
-                return None
-            
-            # 格式化时长
-            duration = info.get('duration', 0)
-            if duration:
-                hours = duration // 3600
-                minutes = (duration % 3600) // 60
-                seconds = duration % 60
-                if hours > 0:
-                    duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                else:
-                    duration_str = f"{minutes:02d}:{seconds:02d}"
-            else:
-                duration_str = "未知时长"
-            
-            # 格式化上传日期
-            upload_date = info.get('upload_date', '')
-            if upload_date and len(upload_date) == 8:
-                formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:]}"
+        info = extract_youtube_info(youtube_url, ydl_opts)
+        
+        if not info:
+            return None
+        
+        # 格式化时长
+        duration = info.get('duration', 0)
+        if duration:
+            hours = duration // 3600
+            minutes = (duration % 3600) // 60
+            seconds = duration % 60
+            if hours > 0:
+                duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
             else:
-                formatted_date = "未知日期"
-            
-            # 格式化观看次数
-            view_count = info.get('view_count', 0)
-            if view_count:
-                if view_count >= 1000000:
-                    view_str = f"{view_count/1000000:.1f}M"
-                elif view_count >= 1000:
-                    view_str = f"{view_count/1000:.1f}K"
-                else:
-                    view_str = str(view_count)
-                view_str += " 次观看"
+                duration_str = f"{minutes:02d}:{seconds:02d}"
+        else:
+            duration_str = "未知时长"
+        
+        # 格式化上传日期
+        upload_date = info.get('upload_date', '')
+        if upload_date and len(upload_date) == 8:
+            formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:]}"
+        else:
+            formatted_date = "未知日期"
+        
+        # 格式化观看次数
+        view_count = info.get('view_count', 0)
+        if view_count:
+            if view_count >= 1000000:
+                view_str = f"{view_count/1000000:.1f}M"
+            elif view_count >= 1000:
+                view_str = f"{view_count/1000:.1f}K"
             else:
-                view_str = "未知观看数"
-            
-            result = {
-                'title': info.get('title', '未知标题'),
-                'uploader': info.get('uploader', '未知UP主'),
-                'duration': duration_str,
-                'upload_date': formatted_date,
-                'view_count': view_str,
-                'description': info.get('description', '')[:200] + "..." if info.get('description', '') else "无描述",
-                'has_subtitles': bool(info.get('subtitles', {})),
-                'has_auto_subtitles': bool(info.get('automatic_captions', {}))
-            }
-            
-            return result
-            
+                view_str = str(view_count)
+            view_str += " 次观看"
+        else:
+            view_str = "未知观看数"
+        
+        result = {
+            'title': info.get('title', '未知标题'),
+            'uploader': info.get('uploader', '未知UP主'),
+            'duration': duration_str,
+            'upload_date': formatted_date,
+            'view_count': view_str,
+            'description': info.get('description', '')[:200] + "..." if info.get('description', '') else "无描述",
+            'has_subtitles': bool(info.get('subtitles', {})),
+            'has_auto_subtitles': bool(info.get('automatic_captions', {}))
+        }
+        
+        return result
+        
     except Exception as e:
         error_msg = str(e).lower()
         
@@ -2310,11 +2277,9 @@ def download_youtube_video(
     if output_dir is None:
         output_dir = DOWNLOADS_DIR if audio_only else VIDEOS_DIR
 
-    # 在尝试下载前，先检查是否已经下载过同一URL对应的本地文件
-    try:
-        existing_list = list_downloaded_videos()
-    except Exception:
-        existing_list = []
+    # 在尝试下载前，先检查是否已经下载过同一视频对应的本地文件
+    existing_video = find_downloaded_video(youtube_url)
+    existing_list = [existing_video] if existing_video else []
 
     requested_video_id = extract_youtube_video_id(youtube_url)
 
@@ -2327,8 +2292,6 @@ def download_youtube_video(
             return ext in [".mp4", ".mkv", ".webm", ".mov", ".flv", ".avi"]
 
     for item in existing_list:
-        if item.get("url") != youtube_url:
-            continue
         recorded_path = item.get("file_path")
         if not recorded_path:
             continue
@@ -2393,9 +2356,6 @@ def download_youtube_video(
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     print(f"输出目录: {os.path.abspath(output_dir)}")
 
-    # 记录下载前目录中已有的文件，后面回退时只在“新增文件”里查找，避免误把旧文件当成结果
-    existing_files = {str(p) for p in Path(output_dir).glob("*.*")}
-
     # 设置yt-dlp的选项
     if audio_only:
         # 音频下载选项
@@ -2411,7 +2371,6 @@ def download_youtube_video(
             'ignoreerrors': True,  # 忽略部分错误，尝试继续下载
             'noplaylist': True  # 确保只下载单个视频的音频而不是整个播放列表
         }
-        expected_ext = "mp3"
     else:
         # 视频下载选项（最佳画质）
         if max_height:
@@ -2429,7 +2388,6 @@ def download_youtube_video(
             'ignoreerrors': True,  # 忽略部分错误，尝试继续下载
             'noplaylist': True  # 确保只下载单个视频而不是整个播放列表
         }
-        expected_ext = "mp4"
     
     # 如果提供了cookies，添加到选项中
     if cookies_file:
@@ -2506,16 +2464,10 @@ def download_youtube_video(
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 # 获取视频信息
                 print(f"正在获取视频信息...")
-                info = ydl.extract_info(youtube_url, download=True)
-
-                # 尝试从info中获取实际导出的文件扩展名，避免与预期扩展名不一致导致找不到文件
-                try:
-                    info_ext = info.get("ext")
-                    if isinstance(info_ext, str) and info_ext:
-                        expected_ext = info_ext.lower()
-                        print(f"检测到实际文件扩展名: .{expected_ext}")
-                except Exception:
-                    pass
+                info = _process_cached_info(ydl, youtube_url, ydl_opts)
+                if info is None:
+                    info = ydl.extract_info(youtube_url, download=True)
+                    YTDLP_METADATA_CACHE.put(requested_video_id, info, profile=extraction_profile(ydl_opts))
 
                 # 检查是否成功获取视频信息
                 if not info:
@@ -2529,84 +2481,28 @@ def download_youtube_video(
                     print(error_msg)
                     raise Exception(error_msg)
             
-            # 记录下载的视频信息
+            # yt-dlp 在合并/后处理之后报告的最终文件路径
+            downloaded = build_download_result(info)
+            if not downloaded or not os.path.exists(downloaded["path"]):
+                raise Exception(f"下载结束但 yt-dlp 未返回输出文件，请检查 {output_dir} 目录")
+            final_path = downloaded["path"]
+
+            # 清理文件名中的空格和不安全字符
             try:
-                log_downloaded_video(youtube_url, "未知路径", info)
+                stem = Path(final_path).stem
+                ext = Path(final_path).suffix
+                sanitized_stem = sanitize_filename(stem)
+                sanitized_path = os.path.join(os.path.dirname(final_path), f"{sanitized_stem}{ext}")
+                if sanitized_path != final_path:
+                    os.rename(final_path, sanitized_path)
+                    print(f"文件已重命名: {final_path} -> {sanitized_path}")
+                    final_path = sanitized_path
             except Exception as e:
-                print(f"记录视频信息时出错: {str(e)}")
-            
-            # 获取原始文件名并清理
-            original_title = info.get('title', '未知视频')
-            print(f"原始视频标题: {original_title}")
-            video_id_for_name = info.get('id') or requested_video_id
-            original_stem = f"{original_title}_{video_id_for_name}" if video_id_for_name else original_title
-            sanitized_title = sanitize_filename(original_stem)
-            print(f"清理后的标题: {sanitized_title}")
-            
-            # 构建文件路径
-            original_path = os.path.join(output_dir, f"{original_stem}.{expected_ext}")
-            sanitized_path = os.path.join(output_dir, f"{sanitized_title}.{expected_ext}")
-            
-            print(f"原始文件路径: {original_path}")
-            print(f"清理后的文件路径: {sanitized_path}")
-            
-            # 如果文件名被清理了，需要重命名文件
-            if original_path != sanitized_path and os.path.exists(original_path):
-                try:
-                    os.rename(original_path, sanitized_path)
-                    print(f"文件已重命名: {original_title} -> {sanitized_title}")
-                except Exception as e:
-                    print(f"重命名文件失败: {str(e)}")
-            
-            # 检查文件是否存在
-            if os.path.exists(sanitized_path):
-                print(f"文件下载成功: {sanitized_path}")
-                # 更新下载记录中的文件路径
-                log_downloaded_video(youtube_url, sanitized_path, info)
-                return sanitized_path
-            elif os.path.exists(original_path):
-                print(f"文件下载成功但未重命名: {original_path}")
-                # 更新下载记录中的文件路径
-                log_downloaded_video(youtube_url, original_path, info)
-                return original_path
-            else:
-                # 回退：只在“本次下载新增”的文件中查找，避免误把旧文件当成下载结果
-                all_files_after = list(Path(output_dir).glob("*.*"))
-                new_files = [p for p in all_files_after if str(p) not in existing_files]
-
-                newest_file = None
-                if new_files:
-                    # 优先选择与期望扩展名一致的新增文件
-                    expected_files = [
-                        p for p in new_files
-                        if p.suffix.lower().lstrip(".") == expected_ext.lower()
-                    ]
-                    candidate_files = expected_files or new_files
-                    newest_file = max(candidate_files, key=os.path.getctime)
-                    print(f"找到可能的本次下载文件: {newest_file}")
-                else:
-                    print("未检测到本次下载产生的新文件，可能下载失败或输出目录被其他程序修改")
-
-                if newest_file:
-                    final_path = str(newest_file)
-                    # 尝试将该文件重命名为清理后的标题，确保没有空格和不安全字符
-                    try:
-                        stem = Path(final_path).stem
-                        ext = Path(final_path).suffix
-                        sanitized_stem = sanitize_filename(stem)
-                        sanitized_candidate = os.path.join(output_dir, f"{sanitized_stem}{ext}")
-                        if sanitized_candidate != final_path:
-                            os.rename(final_path, sanitized_candidate)
-                            print(f"已重命名下载文件: {final_path} -> {sanitized_candidate}")
-                            final_path = sanitized_candidate
-                    except Exception as e:
-                        print(f"重命名下载文件失败: {str(e)}")
+                print(f"重命名文件失败: {str(e)}")
 
-                    # 更新下载记录中的文件路径
-                    log_downloaded_video(youtube_url, final_path, info)
-                    return final_path
-
-                raise Exception(f"下载成功但找不到文件，请检查 {output_dir} 目录")
+            print(f"文件下载成功: {final_path}")
+            log_downloaded_video(youtube_url, final_path, info)
+            return final_path
     except yt_dlp.utils.DownloadError as e:
         print(f"下载失败详细信息: {str(e)}")
         error_msg = str(e)
@@ -2652,25 +2548,31 @@ def download_youtube_audio(youtube_url, output_dir=DOWNLOADS_DIR, cookies_file=N
     
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # 获取视频信息
-            info = ydl.extract_info(youtube_url, download=True)
-            
-            # 获取原始文件名并清理
-            original_title = info['title']
-            video_id_for_name = info.get('id') or extract_youtube_video_id(youtube_url)
-            original_stem = f"{original_title}_{video_id_for_name}" if video_id_for_name else original_title
-            sanitized_title = sanitize_filename(original_stem)
+            # 获取视频信息（缓存有效时直接按缓存的格式列表下载）
+            info = _process_cached_info(ydl, youtube_url, ydl_opts)
+            if info is None:
+                info = ydl.extract_info(youtube_url, download=True)
+                YTDLP_METADATA_CACHE.put(
+                    extract_youtube_video_id(youtube_url), info, profile=extraction_profile(ydl_opts)
+                )
             
+            downloaded = build_download_result(info)
+            if not downloaded:
+                raise Exception("yt-dlp 未返回输出文件路径")
+            original_path = downloaded["path"]
+
             # 如果文件名被清理了，需要重命名文件
-            original_path = os.path.join(output_dir, f"{original_stem}.mp3")
-            sanitized_path = os.path.join(output_dir, f"{sanitized_title}.mp3")
-            
+            sanitized_path = os.path.join(
+                os.path.dirname(original_path),
+                sanitize_filename(Path(original_path).stem) + Path(original_path).suffix,
+            )
             if original_path != sanitized_path and os.path.exists(original_path):
                 try:
                     os.rename(original_path, sanitized_path)
-                    print(f"文件已重命名: {original_title} -> {sanitized_title}")
+                    print(f"文件已重命名: {original_path} -> {sanitized_path}")
                 except Exception as e:
                     print(f"重命名文件失败: {str(e)}")
+                    return original_path
             
             # 返回清理后的文件路径
             return sanitized_path
@@ -2795,6 +2697,77 @@ def extract_audio_from_video(video_path, output_dir=DOWNLOADS_DIR, output_stem=N
         print(error_msg)
         raise Exception(error_msg)
 
+def _stage(stage_gate, stage):
+    """进入一个处理阶段；未配置门控（单视频处理）时不做任何限制"""
+    return stage_gate(stage) if stage_gate else nullcontext()
+
+
+def create_summary_stage(model=None, api_key=None, base_url=None, max_workers=None):
+    """
+    批量处理用的后台文章生成阶段，任务记录保存在 SUMMARY_QUEUE_FILE，中断后可续跑
+    :param max_workers: 同时生成的文章数，默认读取环境变量 SUMMARY_STAGE_WORKERS（默认2）
+    """
+    if max_workers is None:
+        max_workers = _safe_int(os.getenv("SUMMARY_STAGE_WORKERS", str(DEFAULT_SUMMARY_WORKERS)), DEFAULT_SUMMARY_WORKERS)
+
+    def summarize(text_path, **options):
+        # 多篇文章同时生成，流式输出会互相穿插，后台阶段一律非流式
+        return summarize_text(text_path, model=model, api_key=api_key, base_url=base_url, stream=False, **options)
+
+    return BackgroundSummaryStage(summarize, max_workers=max_workers, state_path=SUMMARY_QUEUE_FILE)
+
+
+def _summary_options(summary_dir, custom_prompt, template_path):
+    return {"output_dir": summary_dir, "custom_prompt": custom_prompt, "template_path": template_path}
+
+
+def _summarize_transcript(source, text_path, summary_stage=None, stage_gate=None, model=None, api_key=None, base_url=None, stream=True, summary_dir=DEFAULT_SUMMARY_DIR, custom_prompt=None, template_path=None):
+    """
+    生成文章：提供 summary_stage 时交给后台阶段并返回 Future，否则在当前线程生成并返回文章路径
+    """
+    if summary_stage is not None:
+        return summary_stage.submit(source, text_path, **_summary_options(summary_dir, custom_prompt, template_path))
+    with _stage(stage_gate, 'summarize'):
+        return summarize_text(
+            text_path,
+            model=model,
+            api_key=api_key,
+            base_url=base_url,
+            stream=stream,
+            output_dir=summary_dir,
+            custom_prompt=custom_prompt,
+            template_path=template_path
+        )
+
+
+def _save_native_subtitle_transcript(subtitle_file, text):
+    """原生字幕转出的文本保存为转录文件，文章生成统一从转录文件读取"""
+    base_name = os.path.splitext(os.path.basename(subtitle_file))[0]
+    text_path = os.path.join(TRANSCRIPTS_DIR, f"{base_name}_transcript.txt")
+    os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return text_path
+
+
+def _prepare_vad_audio(audio_path):
+    """
+    VAD 预处理：返回 (交给 Whisper 的输入, 时间轴映射)。
+    只转录有声区间；检测失败或几乎没有可跳过的静音时返回整段音频和 None
+    """
+    try:
+        samples = whisper.load_audio(audio_path)
+        speech, timeline = prepare_speech_audio(samples)
+    except Exception as e:
+        print(f"VAD 预处理失败，转录整段音频: {str(e)}")
+        return audio_path, None
+    if timeline is None:
+        print("VAD: 没有可跳过的静音，转录整段音频")
+        return audio_path, None
+    print(f"VAD: 只转录 {len(timeline.pieces)} 段有声音频，共 {timeline.speech_seconds:.1f}/{timeline.total_seconds:.1f} 秒")
+    return speech, timeline
+
+
 def transcribe_audio_unified(
     audio_path,
     output_dir=TRANSCRIPTS_DIR,
@@ -2806,6 +2779,8 @@ def transcribe_audio_unified(
     output_basename=None,
     enable_translation_polish=None,
     target_language="zh-CN",
+    stage_gate=None,
+    enable_vad=None,
 ):
     """
     统一的音频转录函数：一次转录，同时生成文本和字幕文件
@@ -2817,6 +2792,8 @@ def transcribe_audio_unified(
     :param translate_to_chinese: 是否翻译成中文
     :param source_language: 源语言
     :param output_basename: 输出文件基础名（可选，一般传入视频文件路径以保证字幕名与视频名一致）
+    :param stage_gate: 阶段门控(stage) -> 上下文管理器，Whisper 转录在 transcribe 阶段，逐段翻译和润色在 translate 阶段
+    :param enable_vad: 是否先做语音活动检测、跳过静音只转录有声区间，默认读取环境变量 WHISPER_VAD（默认关闭）
     :return: (text_path, subtitle_path) 元组，如果不生成字幕则 subtitle_path 为 None
     """
     # 创建输出目录
@@ -2837,19 +2814,25 @@ def transcribe_audio_unified(
             whisper_params["language"] = source_language
             print(f"使用指定的源语言: {source_language}")
         
-        # 加载模型
-        print(f"加载 {model_size} 模型...")
-        start_time = time.time()
-        model = whisper.load_model(model_size, device=device)
-        load_time = time.time() - start_time
-        print(f"模型加载完成，耗时: {load_time:.2f}秒")
-        
-        # 转录音频（一次性完成）
-        print("开始转录音频...")
-        transcribe_start = time.time()
-        result = model.transcribe(audio_path, **whisper_params)
-        transcribe_time = time.time() - transcribe_start
-        print(f"转录完成，耗时: {transcribe_time:.2f}秒")
+        with _stage(stage_gate, 'transcribe'):
+            # 加载模型
+            print(f"加载 {model_size} 模型...")
+            start_time = time.time()
+            model = load_whisper_model(model_size, device)
+            load_time = time.time() - start_time
+            print(f"模型加载完成，耗时: {load_time:.2f}秒")
+        
+            # 转录音频（一次性完成）
+            print("开始转录音频...")
+            transcribe_start = time.time()
+            audio_input, vad_timeline = audio_path, None
+            if _env_bool("WHISPER_VAD", False) if enable_vad is None else enable_vad:
+                audio_input, vad_timeline = _prepare_vad_audio(audio_path)
+            result = model.transcribe(audio_input, **whisper_params)
+            if vad_timeline is not None:
+                remap_transcription(result, vad_timeline)
+            transcribe_time = time.time() - transcribe_start
+            print(f"转录完成，耗时: {transcribe_time:.2f}秒")
         
         # 显示性能信息
         if 'segments' in result:
@@ -2905,32 +2888,33 @@ def transcribe_audio_unified(
                     force=True,
                 )
 
-            for i, segment in enumerate(segments):
-                original_text = segment["text"].strip()
-                translated_text = ""
-                if should_translate_segments:
-                    try:
-                        translated_text = translate_text(original_text, target_language=target_language, source_language=final_source_language)
-                        if i < 3:
-                            print(f"翻译示例: {original_text} -> {translated_text}")
-                    except Exception as e:
-                        print(f"翻译失败: {str(e)}")
-                    emit_translation_progress(
-                        None,
-                        "字幕翻译进度",
-                        i + 1,
-                        total_segments,
-                        current_time=segment.get("end"),
-                        total_time=total_duration,
-                    )
+            with _stage(stage_gate, 'translate'):
+                for i, segment in enumerate(segments):
+                    original_text = segment["text"].strip()
+                    translated_text = ""
+                    if should_translate_segments:
+                        try:
+                            translated_text = translate_text(original_text, target_language=target_language, source_language=final_source_language)
+                            if i < 3:
+                                print(f"翻译示例: {original_text} -> {translated_text}")
+                        except Exception as e:
+                            print(f"翻译失败: {str(e)}")
+                        emit_translation_progress(
+                            None,
+                            "字幕翻译进度",
+                            i + 1,
+                            total_segments,
+                            current_time=segment.get("end"),
+                            total_time=total_duration,
+                        )
 
-                subtitle_rows.append({
-                    "index": i + 1,
-                    "start": segment["start"],
-                    "end": segment["end"],
-                    "source": original_text,
-                    "translation": translated_text,
-                })
+                    subtitle_rows.append({
+                        "index": i + 1,
+                        "start": segment["start"],
+                        "end": segment["end"],
+                        "source": original_text,
+                        "translation": translated_text,
+                    })
 
             polish_enabled = translate_to_chinese and should_polish_translation(enable_translation_polish, target_language)
             if polish_enabled:
@@ -2954,7 +2938,8 @@ def transcribe_audio_unified(
                     for item in subtitle_rows
                     if item["translation"]
                 ]
-                polished_payload = polish_subtitle_translations_with_deepseek(polish_payload)
+                with _stage(stage_gate, 'translate'):
+                    polished_payload = polish_subtitle_translations_with_deepseek(polish_payload)
                 polished_by_index = {int(item["index"]): item.get("translation", "") for item in polished_payload}
                 for item in subtitle_rows:
                     polished = polished_by_index.get(item["index"], "")
@@ -3078,7 +3063,7 @@ def transcribe_audio_to_text(audio_path, output_dir=TRANSCRIPTS_DIR, model_size=
         # 加载模型
         print(f"加载 {model_size} 模型...")
         start_time = time.time()
-        model = whisper.load_model(model_size, device=device)
+        model = load_whisper_model(model_size, device)
         load_time = time.time() - start_time
         print(f"模型加载完成，耗时: {load_time:.2f}秒")
         
@@ -3177,7 +3162,7 @@ def create_bilingual_subtitles(audio_path, output_dir=SUBTITLES_DIR, model_size=
         print(f"加载 {model_size} 模型...")
         start_time = time.time()
         try:
-            model = whisper.load_model(model_size, device=device)
+            model = load_whisper_model(model_size, device)
             load_time = time.time() - start_time
             print(f"模型加载成功，耗时: {load_time:.2f}秒")
         except Exception as e:
@@ -3820,7 +3805,7 @@ def process_local_audio(audio_path, model=None, api_key=None, base_url=None, whi
         print(f"处理过程中出现错误: {str(e)}")
         return None
 
-def process_local_video(video_path, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir=DEFAULT_SUMMARY_DIR, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, enable_transcription=True, generate_article=True, source_language=None, enable_translation_polish=None, target_language="zh-CN", project_root=None):
+def process_local_video(video_path, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir=DEFAULT_SUMMARY_DIR, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, enable_transcription=True, generate_article=True, source_language=None, enable_translation_polish=None, target_language="zh-CN", project_root=None, summary_stage=None):
     """
     处理本地视频文件的主函数
     :param video_path: 本地视频文件路径
@@ -3839,6 +3824,7 @@ def process_local_video(video_path, model=None, api_key=None, base_url=None, whi
     :param generate_article: 是否生成文章，默认为True
     :param source_language: 指定源语言（可选），如果为None则自动检测
     :param project_root: 剧集项目目录；提供后所有生成文件写入该目录下的分类子目录
+    :param summary_stage: 后台文章生成阶段（批量处理使用）；提供时文章交给该阶段生成，返回其 Future
     :return: 总结文件的路径或字幕文件路径（如果不生成摘要）
     """
     project_layout = None
@@ -3862,6 +3848,12 @@ def process_local_video(video_path, model=None, api_key=None, base_url=None, whi
         if not enable_transcription:
             print("跳过转录步骤（用户未勾选执行转录）")
             return "SKIPPED"
+
+        if summary_stage is not None and generate_article:
+            resumable = summary_stage.lookup(video_path, **_summary_options(summary_dir, custom_prompt, template_path))
+            if resumable:
+                print(f"上次已完成转录，跳过转录直接续上文章生成: {resumable.text_path}")
+                return summary_stage.submit(video_path, resumable.text_path, **resumable.options)
             
         print("1. 从视频中提取音频...")
         audio_path = extract_audio_from_video(video_path, output_dir=audio_output_dir)
@@ -3908,17 +3900,22 @@ def process_local_video(video_path, model=None, api_key=None, base_url=None, whi
             return subtitle_path if subtitle_path else text_path
             
         print("\n5. 开始生成文章...")
-        summary_path = summarize_text(
-            text_path, 
-            model=model, 
-            api_key=api_key, 
-            base_url=base_url, 
+        summary_path = _summarize_transcript(
+            video_path,
+            text_path,
+            summary_stage=summary_stage,
+            model=model,
+            api_key=api_key,
+            base_url=base_url,
             stream=stream,
-            output_dir=summary_dir,
+            summary_dir=summary_dir,
             custom_prompt=custom_prompt,
             template_path=template_path
         )
-        print(f"文章已保存到: {summary_path}")
+        if summary_stage is not None:
+            print("文章已交给后台生成，继续处理下一个视频")
+        else:
+            print(f"文章已保存到: {summary_path}")
         
         return summary_path
     except Exception as e:
@@ -4014,6 +4011,15 @@ def process_local_videos_batch(input_path, model=None, api_key=None, base_url=No
     results = []
     successful_count = 0
     failed_count = 0
+
+    # 文章生成交给后台阶段：转录完一个视频就继续下一个，文章按并发上限同时生成
+    summary_stage = None
+    if enable_transcription and generate_article:
+        summary_stage = create_summary_stage(model=model, api_key=api_key, base_url=base_url)
+        resumed = summary_stage.resume()
+        if resumed:
+            print(f"已续上 {resumed} 个上次未完成的文章生成任务")
+    summary_futures = []
     
     for i, video_file in enumerate(video_files, 1):
         try:
@@ -4041,9 +4047,18 @@ def process_local_videos_batch(input_path, model=None, api_key=None, base_url=No
                 enable_translation_polish=enable_translation_polish,
                 target_language=target_language,
                 project_root=project_root,
+                summary_stage=summary_stage,
             )
             
-            if result and result != "SKIPPED":
+            if isinstance(result, Future):
+                results.append({
+                    'video_file': video_file,
+                    'result_path': None,
+                    'status': 'summarizing'
+                })
+                summary_futures.append((results[-1], result))
+                print(f"\n✓ 视频 {os.path.basename(video_file)} 转录完成，文章后台生成中")
+            elif result and result != "SKIPPED":
                 results.append({
                     'video_file': video_file,
                     'result_path': result,
@@ -4077,6 +4092,20 @@ def process_local_videos_batch(input_path, model=None, api_key=None, base_url=No
             })
             failed_count += 1
             continue
+
+    if summary_stage is not None:
+        if summary_futures:
+            print(f"\n等待后台文章生成完成（{len(summary_futures)} 篇）...")
+        summary_stage.wait()
+        for entry, future in summary_futures:
+            job = future.result()
+            if job.status == 'done':
+                entry.update(result_path=job.summary_path, status='success')
+                successful_count += 1
+            else:
+                entry.update(status='error', error=job.error)
+                failed_count += 1
+        print(llm_stats().format_report())
     
     # 输出处理结果摘要
     print(f"\n{'='*60}")
@@ -4252,7 +4281,7 @@ def summarize_text(text_path, model=None, api_key=None, base_url=None, stream=Fa
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(article)
         
-        print("文章生成完成!")
+        print(f"文章生成完成! {llm_stats().format_report()}")
         return output_path
     except Exception as e:
         print(f"文章生成失败: {str(e)}")
@@ -4283,6 +4312,16 @@ class TextSummaryComposite:
         self.target_api_url = os.getenv("OPENAI_COMPOSITE_API_URL") or os.getenv("CLAUDE_API_URL") or "https://api.openai.com/v1"
         self.target_model = os.getenv("OPENAI_COMPOSITE_MODEL") or os.getenv("CLAUDE_MODEL") or "gpt-3.5-turbo"
 
+        # 所有模型调用经过进程共用的 LLMClient，共用连接池、限流、响应缓存和调用统计
+        self.deepseek_llm = get_llm_client("DeepSeek", self.deepseek_api_key, self.deepseek_api_url, self.deepseek_model)
+        self.target_llm = get_llm_client("OpenAI", self.target_api_key, self.target_api_url, self.target_model)
+
+        # 长文本分段摘要：超过 single_pass_tokens 时按 chunk_tokens 切段并发提炼要点
+        self.single_pass_tokens = int(os.getenv("SUMMARY_SINGLE_PASS_TOKENS", str(DEFAULT_SINGLE_PASS_TOKENS)))
+        self.chunk_tokens = int(os.getenv("SUMMARY_CHUNK_TOKENS", str(DEFAULT_CHUNK_TOKENS)))
+        self.map_workers = int(os.getenv("SUMMARY_MAP_WORKERS", str(DEFAULT_MAP_WORKERS)))
+        self.chunk_cache = ChunkSummaryCache(SUMMARY_CHUNK_CACHE_DIR)
+
         # 检查必要的API密钥
         if not self.deepseek_api_key and not self.target_api_key:
             raise ValueError("缺少 API 密钥，请在设置中配置 DeepSeek 或 OpenAI API 密钥")
@@ -4328,6 +4367,14 @@ class TextSummaryComposite:
         :param output_model: 生成模型名称 ("OpenAI" 或 "DeepSeek")
         :return: 生成的摘要文本
         """
+        # 长文本先分段提炼要点（map），最终文章基于按时间排列的要点生成（reduce）
+        if estimate_tokens(content) > self.single_pass_tokens:
+            try:
+                content = self._condense_long_content(content, output_model)
+            except Exception as e:
+                print(f"❌ 分段摘要失败: {str(e)}")
+                return f"生成摘要失败: {str(e)}"
+
         # 准备提示词
         system_prompt = "你是一个专业的内容编辑和文章撰写专家。"
 
@@ -4349,6 +4396,33 @@ class TextSummaryComposite:
             print("⚡ 使用单模型生成模式...")
             return self._generate_summary_single_model(system_prompt, user_prompt, stream, output_model)
     
+    def _condense_long_content(self, content, output_model=None):
+        """
+        分段并发提炼长文本要点，返回供最终文章生成使用的要点文本
+        :param content: 转录文本（字幕格式时按字幕时间切段）
+        :param output_model: 提炼使用的模型 ("OpenAI" 或 "DeepSeek")
+        :return: 按时间顺序排列的各段要点
+        """
+        use_deepseek = output_model == "DeepSeek"
+        model_id = f"deepseek:{self.deepseek_model}" if use_deepseek else f"openai:{self.target_model}"
+        chunks = split_transcript(content, self.chunk_tokens)
+        print(f"📚 文本约 {estimate_tokens(content)} tokens，分为 {len(chunks)} 段并发提炼要点（并发 {self.map_workers}）...")
+        summaries = summarize_chunks(
+            chunks,
+            lambda system_prompt, user_prompt: self._chat_completion(system_prompt, user_prompt, use_deepseek),
+            model_id,
+            cache=self.chunk_cache,
+            max_workers=self.map_workers,
+        )
+        return combine_chunk_summaries(chunks, summaries)
+
+    def _chat_completion(self, system_prompt, user_prompt, use_deepseek=False):
+        """
+        非流式调用一次模型，失败时抛出异常（不返回错误文本，避免被当作结果缓存）
+        """
+        client = self.deepseek_llm if use_deepseek else self.target_llm
+        return client.complete(system_prompt, user_prompt, temperature=0.3, purpose="summary_map")
+
     def _generate_summary_single_model(self, system_prompt, user_prompt, stream=False, output_model=None):
         """
         单模型生成摘要（直接生成，不经过推理过程）
@@ -4407,79 +4481,31 @@ class TextSummaryComposite:
         使用 DeepSeek 直接生成摘要
         """
         try:
-            headers = {
-                "Authorization": f"Bearer {self.deepseek_api_key}",
-                "Content-Type": "application/json"
-            }
-
-            data = {
-                "model": self.deepseek_model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.7,
-                "stream": False
-            }
-
-            import requests
-            response = requests.post(
-                self.deepseek_api_url,
-                headers=headers,
-                json=data,
-                timeout=60
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"DeepSeek API 请求失败: {response.status_code}")
-
-            response_data = response.json()
-            if "choices" in response_data and len(response_data["choices"]) > 0:
-                content = response_data["choices"][0]["message"].get("content", "")
-                cleaned = clean_markdown_formatting(content)
-                return cleaned
-
-            raise Exception("无法从 DeepSeek 响应中提取内容")
+            content = self.deepseek_llm.complete(system_prompt, user_prompt, temperature=0.7, purpose="summary")
+            return clean_markdown_formatting(content)
 
         except Exception as e:
             print(f"DeepSeek 摘要生成失败: {str(e)}")
             return f"DeepSeek 生成失败: {str(e)}"
 
+    def _print_delta(self, content):
+        print(content, end="", flush=True)
+
     def _get_openai_summary(self, system_prompt, user_prompt, stream=False):
         """
         使用 OpenAI 直接生成摘要
         """
         try:
-            client = OpenAI(
-                api_key=self.target_api_key,
-                base_url=self.target_api_url
-            )
-
-            response = client.chat.completions.create(
-                model=self.target_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            article = self.target_llm.complete(
+                system_prompt, user_prompt,
                 temperature=0.7,
-                stream=stream
+                stream=stream,
+                on_delta=self._print_delta if stream else None,
+                purpose="summary"
             )
-
             if stream:
-                full_content = ""
-                for chunk in response:
-                    if chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        print(content, end="", flush=True)
-                        full_content += content
                 print()
-                return clean_markdown_formatting(full_content)
-            else:
-                if response.choices and len(response.choices) > 0:
-                    article = response.choices[0].message.content
-                    cleaned = clean_markdown_formatting(article)
-                    return cleaned
-                raise Exception("无法从 OpenAI 响应中提取内容")
+            return clean_markdown_formatting(article)
 
         except Exception as e:
             print(f"OpenAI 摘要生成失败: {str(e)}")
@@ -4490,23 +4516,7 @@ class TextSummaryComposite:
         使用 OpenAI 进行推理（用于两阶段模式的第一步）
         """
         try:
-            client = OpenAI(
-                api_key=self.target_api_key,
-                base_url=self.target_api_url
-            )
-
-            response = client.chat.completions.create(
-                model=self.target_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7
-            )
-
-            if response.choices and len(response.choices) > 0:
-                return response.choices[0].message.content
-            return "无法获取 OpenAI 推理结果"
+            return self.target_llm.complete(system_prompt, user_prompt, temperature=0.7, purpose="reasoning")
 
         except Exception as e:
             print(f"OpenAI 推理过程失败: {str(e)}")
@@ -4528,65 +4538,19 @@ class TextSummaryComposite:
 请基于上述推理过程，提供你的最终文章。直接输出文章内容，不需要解释你的思考过程。
 """
 
-            if use_openai:
-                client = OpenAI(
-                    api_key=self.target_api_key,
-                    base_url=self.target_api_url
-                )
-                response = client.chat.completions.create(
-                    model=self.target_model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": combined_prompt}
-                    ],
-                    temperature=0.7,
-                    stream=stream
-                )
-            else:  # DeepSeek
-                headers = {
-                    "Authorization": f"Bearer {self.deepseek_api_key}",
-                    "Content-Type": "application/json"
-                }
-                data = {
-                    "model": self.deepseek_model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": combined_prompt}
-                    ],
-                    "temperature": 0.7,
-                    "stream": stream
-                }
-                import requests
-                response = requests.post(
-                    self.deepseek_api_url,
-                    headers=headers,
-                    json=data,
-                    timeout=60
-                )
-                if response.status_code != 200:
-                    raise Exception(f"API 请求失败: {response.status_code}")
-                response_data = response.json()
-                if "choices" in response_data and len(response_data["choices"]) > 0:
-                    content = response_data["choices"][0]["message"].get("content", "")
-                    cleaned = clean_markdown_formatting(content)
-                    return cleaned
-                raise Exception("无法从响应中提取内容")
-
+            # DeepSeek 一直按非流式调用
+            stream = stream and use_openai
+            client = self.target_llm if use_openai else self.deepseek_llm
+            article = client.complete(
+                system_prompt, combined_prompt,
+                temperature=0.7,
+                stream=stream,
+                on_delta=self._print_delta if stream else None,
+                purpose="summary"
+            )
             if stream:
-                full_content = ""
-                for chunk in response:
-                    if chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        print(content, end="", flush=True)
-                        full_content += content
                 print()
-                return clean_markdown_formatting(full_content)
-            else:
-                if response.choices and len(response.choices) > 0:
-                    article = response.choices[0].message.content
-                    cleaned = clean_markdown_formatting(article)
-                    return cleaned
-                raise Exception("无法从响应中提取内容")
+            return clean_markdown_formatting(article)
 
         except Exception as e:
             print(f"生成摘要失败: {str(e)}")
@@ -4600,59 +4564,25 @@ class TextSummaryComposite:
         :return: 推理过程文本
         """
         try:
-            # 准备请求头和数据
-            headers = {
-                "Authorization": f"Bearer {self.deepseek_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": self.deepseek_model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.7,
-                "stream": False
-            }
-            
-            # 发送请求
-            import requests
-            response = requests.post(
-                self.deepseek_api_url,
-                headers=headers,
-                json=data
-            )
-            
-            # 检查响应
-            if response.status_code != 200:
-                raise Exception(f"DeepSeek API 请求失败: {response.status_code}, {response.text}")
-            
-            # 解析响应
-            response_data = response.json()
-            
-            # 提取推理内容
-            if "choices" in response_data and len(response_data["choices"]) > 0:
-                message = response_data["choices"][0]["message"]
-                
-                # 检查是否有原生推理内容
-                if "reasoning_content" in message:
-                    return message["reasoning_content"]
-                
-                # 如果没有原生推理内容，尝试从普通内容中提取
-                content = message.get("content", "")
-                
-                # 尝试从内容中提取 <div className="think-block">...</div> 标签
-                import re
-                think_match = re.search(r'<div className="think-block">(.*?)</div>', content, re.DOTALL)
-                if think_match:
-                    return think_match.group(1).strip()
-                
-                # 如果没有找到标签，则使用完整内容作为推理
-                return content
-            
-            raise Exception("无法从 DeepSeek 响应中提取推理内容")
-        
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+            result = self.deepseek_llm.chat(messages, temperature=0.7, purpose="reasoning")
+
+            # 优先使用原生推理内容
+            if result.reasoning:
+                return result.reasoning
+
+            # 尝试从内容中提取 <div className="think-block">...</div> 标签
+            import re
+            think_match = re.search(r'<div className="think-block">(.*?)</div>', result.text, re.DOTALL)
+            if think_match:
+                return think_match.group(1).strip()
+
+            # 如果没有找到标签，则使用完整内容作为推理
+            return result.text
+
         except Exception as e:
             print(f"获取 DeepSeek 推理过程失败: {str(e)}")
             # 返回一个简单的提示，表示推理过程获取失败
@@ -4667,12 +4597,6 @@ class TextSummaryComposite:
         :return: 生成的摘要文本
         """
         try:
-            # 创建 OpenAI 客户端
-            client = OpenAI(
-                api_key=self.target_api_key,
-                base_url=self.target_api_url
-            )
-            
             # 构造结合推理过程的提示词
             combined_prompt = f"""这是我的原始请求：
             
@@ -4685,24 +4609,9 @@ class TextSummaryComposite:
             请基于上述推理过程，提供你的最终文章。直接输出文章内容，不需要解释你的思考过程。
             """
             
-            # 发送请求
-            response = client.chat.completions.create(
-                model=self.target_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": combined_prompt}
-                ],
-                temperature=0.7
-            )
-            
-            # 提取回答
-            if response.choices and len(response.choices) > 0:
-                article = response.choices[0].message.content
-                # 清理 Markdown 格式
-                cleaned_markdown = clean_markdown_formatting(article)
-                return cleaned_markdown
-            
-            raise Exception("无法从目标模型响应中提取内容")
+            article = self.target_llm.complete(system_prompt, combined_prompt, temperature=0.7, purpose="summary")
+            # 清理 Markdown 格式
+            return clean_markdown_formatting(article)
         
         except Exception as e:
             print(f"获取目标模型摘要失败: {str(e)}")
@@ -4718,12 +4627,6 @@ class TextSummaryComposite:
         :return: 生成的摘要文本
         """
         try:
-            # 创建 OpenAI 客户端
-            client = OpenAI(
-                api_key=self.target_api_key,
-                base_url=self.target_api_url
-            )
-            
             # 构造结合推理过程的提示词
             combined_prompt = f"""这是我的原始请求：
             
@@ -4736,30 +4639,14 @@ class TextSummaryComposite:
             请基于上述推理过程，提供你的最终文章。直接输出文章内容，不需要解释你的思考过程。
             """
             
-            # 发送流式请求
-            stream_response = client.chat.completions.create(
-                model=self.target_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": combined_prompt}
-                ],
+            print("生成文章中...")
+            full_response = self.target_llm.complete(
+                system_prompt, combined_prompt,
                 temperature=0.7,
-                stream=True
+                stream=True,
+                on_delta=lambda content: print(".", end="", flush=True),
+                purpose="summary"
             )
-            
-            # 收集完整响应
-            full_response = ""
-            
-            print("生成文章中...")
-            for chunk in stream_response:
-                if not chunk.choices:
-                    continue
-                content_chunk = chunk.choices[0].delta.content
-                if content_chunk:
-                    # 打印进度
-                    print(".", end="", flush=True)
-                    # 收集完整响应
-                    full_response += content_chunk
             print("\n文章生成完成!")
             
             # 清理 Markdown 格式
@@ -4905,7 +4792,7 @@ def check_cookies_file(cookies_file):
     print(f"检测到有效的cookies文件: {cookies_file}")
     return cookies_file
 
-def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir=DEFAULT_SUMMARY_DIR, download_video=False, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, cookies_file=None, enable_transcription=True, generate_article=True, prefer_native_subtitles=True, enable_translation_polish=None, target_language="zh-CN"):
+def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir=DEFAULT_SUMMARY_DIR, download_video=False, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, cookies_file=None, enable_transcription=True, generate_article=True, prefer_native_subtitles=True, enable_translation_polish=None, target_language="zh-CN", stage_gate=None, summary_stage=None):
     """
     处理YouTube视频的主函数
     :param youtube_url: YouTube视频链接
@@ -4924,18 +4811,27 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
     :param enable_transcription: 是否执行转录，默认为True
     :param generate_article: 是否生成文章摘要，默认为True
     :param prefer_native_subtitles: 是否优先使用原生字幕，默认为True
+    :param stage_gate: 阶段门控(stage) -> 上下文管理器，批量流水线用它限制下载/转录/翻译/摘要各阶段并发
+    :param summary_stage: 后台文章生成阶段（批量处理使用）；提供时文章交给该阶段生成，返回其 Future
     :return: 总结文件的路径或字幕文件路径（根据设置而定）
     """
     try:
         # 验证cookies文件
         valid_cookies_file = check_cookies_file(cookies_file)
         target_language = normalize_target_language(target_language)
+
+        if summary_stage is not None and generate_article:
+            resumable = summary_stage.lookup(youtube_url, **_summary_options(summary_dir, custom_prompt, template_path))
+            if resumable:
+                print(f"上次已完成转录，跳过下载和转录直接续上文章生成: {resumable.text_path}")
+                return summary_stage.submit(youtube_url, resumable.text_path, **resumable.options)
         
         # 0. 优先检查原生字幕（如果启用了此选项，且需要生成文章或字幕/翻译）
         native_subtitle_text = None
         if prefer_native_subtitles and (generate_article or generate_subtitles or embed_subtitles or translate_to_chinese):
             print("0. 检查视频是否有原生字幕...")
-            subtitle_info = check_youtube_subtitles(youtube_url, valid_cookies_file)
+            with _stage(stage_gate, 'download'):
+                subtitle_info = check_youtube_subtitles(youtube_url, valid_cookies_file)
             
             if subtitle_info.get('error'):
                 error_type = subtitle_info.get('error')
@@ -4967,13 +4863,14 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
 
                         print(f"尝试下载手动字幕语言: {manual_langs}")
 
-                        subtitle_files = download_youtube_subtitles(
-                            youtube_url,
-                            output_dir=NATIVE_SUBTITLES_DIR,
-                            languages=manual_langs,
-                            download_auto=False,
-                            cookies_file=valid_cookies_file
-                        )
+                        with _stage(stage_gate, 'download'):
+                            subtitle_files = download_youtube_subtitles(
+                                youtube_url,
+                                output_dir=NATIVE_SUBTITLES_DIR,
+                                languages=manual_langs,
+                                download_auto=False,
+                                cookies_file=valid_cookies_file
+                            )
 
                         if subtitle_files:
                             subtitle_file = subtitle_files[0]
@@ -4993,14 +4890,15 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
                                         if len(possible_lang) <= 7 and all(c.isalpha() or c in ('-', '_') for c in possible_lang):
                                             video_title_base = subtitle_basename[:-(len(possible_lang) + 1)]
 
-                                    translated_subtitle_file = translate_subtitle_file(
-                                        subtitle_file,
-                                        target_language=target_language,
-                                        base_name=video_title_base,
-                                        output_dir=SUBTITLES_DIR,
-                                        keep_lang_suffix=False,  # 与视频完全同名，只保留扩展名不同
-                                        enable_translation_polish=enable_translation_polish,
-                                    )
+                                    with _stage(stage_gate, 'translate'):
+                                        translated_subtitle_file = translate_subtitle_file(
+                                            subtitle_file,
+                                            target_language=target_language,
+                                            base_name=video_title_base,
+                                            output_dir=SUBTITLES_DIR,
+                                            keep_lang_suffix=False,  # 与视频完全同名，只保留扩展名不同
+                                            enable_translation_polish=enable_translation_polish,
+                                        )
                                     if translated_subtitle_file:
                                         print(f"已基于手动原生字幕生成中文字幕文件: {translated_subtitle_file}")
                                 except Exception as e:
@@ -5015,29 +4913,38 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
                                 if download_video:
                                     try:
                                         print("\n检测到用户勾选了“下载视频”，将同时下载/复用视频文件...")
-                                        video_file_for_native = download_youtube_video(
-                                            youtube_url,
-                                            output_dir=VIDEOS_DIR,
-                                            audio_only=False,
-                                            cookies_file=valid_cookies_file,
-                                        )
+                                        with _stage(stage_gate, 'download'):
+                                            video_file_for_native = download_youtube_video(
+                                                youtube_url,
+                                                output_dir=VIDEOS_DIR,
+                                                audio_only=False,
+                                                cookies_file=valid_cookies_file,
+                                            )
                                         print(f"视频文件已就绪: {video_file_for_native}")
                                     except Exception as e:
                                         print(f"⚠️ 使用原生字幕时下载视频失败: {str(e)}")
                                 if generate_article:
                                     print(f"\n直接使用原生字幕生成文章摘要...")
-                                    summary_path = generate_summary(
-                                        native_subtitle_text,
-                                        model,
-                                        api_key,
-                                        base_url,
-                                        stream,
-                                        summary_dir,
-                                        custom_prompt,
-                                        template_path
-                                    )
+                                    try:
+                                        native_text_path = _save_native_subtitle_transcript(subtitle_file, native_subtitle_text)
+                                        summary_path = _summarize_transcript(
+                                            youtube_url,
+                                            native_text_path,
+                                            summary_stage=summary_stage,
+                                            stage_gate=stage_gate,
+                                            model=model,
+                                            api_key=api_key,
+                                            base_url=base_url,
+                                            stream=stream,
+                                            summary_dir=summary_dir,
+                                            custom_prompt=custom_prompt,
+                                            template_path=template_path
+                                        )
+                                    except Exception as e:
+                                        print(f"基于原生字幕生成文章失败: {str(e)}")
+                                        summary_path = None
                                     if summary_path:
-                                        print(f"摘要已生成: {summary_path}")
+                                        print(f"摘要已生成: {summary_path}" if summary_stage is None else "文章已交给后台生成")
                                         return summary_path
                                     else:
                                         print("摘要生成失败，将退回到音频转写")
@@ -5070,13 +4977,14 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
 
                         print(f"尝试下载自动字幕语言: {auto_langs}")
 
-                        subtitle_files = download_youtube_subtitles(
-                            youtube_url,
-                            output_dir=NATIVE_SUBTITLES_DIR,
-                            languages=auto_langs,
-                            download_auto=True,
-                            cookies_file=valid_cookies_file
-                        )
+                        with _stage(stage_gate, 'download'):
+                            subtitle_files = download_youtube_subtitles(
+                                youtube_url,
+                                output_dir=NATIVE_SUBTITLES_DIR,
+                                languages=auto_langs,
+                                download_auto=True,
+                                cookies_file=valid_cookies_file
+                            )
 
                         if subtitle_files:
                             subtitle_file = subtitle_files[0]
@@ -5095,14 +5003,15 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
                                         if len(possible_lang) <= 7 and all(c.isalpha() or c in ('-', '_') for c in possible_lang):
                                             video_title_base = subtitle_basename[:-(len(possible_lang) + 1)]
 
-                                    translated_subtitle_file = translate_subtitle_file(
-                                        subtitle_file,
-                                        target_language=target_language,
-                                        base_name=video_title_base,
-                                        output_dir=SUBTITLES_DIR,
-                                        keep_lang_suffix=False,
-                                        enable_translation_polish=enable_translation_polish,
-                                    )
+                                    with _stage(stage_gate, 'translate'):
+                                        translated_subtitle_file = translate_subtitle_file(
+                                            subtitle_file,
+                                            target_language=target_language,
+                                            base_name=video_title_base,
+                                            output_dir=SUBTITLES_DIR,
+                                            keep_lang_suffix=False,
+                                            enable_translation_polish=enable_translation_polish,
+                                        )
                                     if translated_subtitle_file:
                                         print(f"已基于自动原生字幕生成中文字幕文件: {translated_subtitle_file}")
                                 except Exception as e:
@@ -5116,29 +5025,38 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
                                 if download_video:
                                     try:
                                         print("\n检测到用户勾选了“下载视频”，将同时下载/复用视频文件...")
-                                        video_file_for_native = download_youtube_video(
-                                            youtube_url,
-                                            output_dir=VIDEOS_DIR,
-                                            audio_only=False,
-                                            cookies_file=valid_cookies_file,
-                                        )
+                                        with _stage(stage_gate, 'download'):
+                                            video_file_for_native = download_youtube_video(
+                                                youtube_url,
+                                                output_dir=VIDEOS_DIR,
+                                                audio_only=False,
+                                                cookies_file=valid_cookies_file,
+                                            )
                                         print(f"视频文件已就绪: {video_file_for_native}")
                                     except Exception as e:
                                         print(f"⚠️ 使用原生字幕时下载视频失败: {str(e)}")
                                 if generate_article:
                                     print(f"\n直接使用自动字幕生成文章摘要...")
-                                    summary_path = generate_summary(
-                                        native_subtitle_text,
-                                        model,
-                                        api_key,
-                                        base_url,
-                                        stream,
-                                        summary_dir,
-                                        custom_prompt,
-                                        template_path
-                                    )
+                                    try:
+                                        native_text_path = _save_native_subtitle_transcript(subtitle_file, native_subtitle_text)
+                                        summary_path = _summarize_transcript(
+                                            youtube_url,
+                                            native_text_path,
+                                            summary_stage=summary_stage,
+                                            stage_gate=stage_gate,
+                                            model=model,
+                                            api_key=api_key,
+                                            base_url=base_url,
+                                            stream=stream,
+                                            summary_dir=summary_dir,
+                                            custom_prompt=custom_prompt,
+                                            template_path=template_path
+                                        )
+                                    except Exception as e:
+                                        print(f"基于原生字幕生成文章失败: {str(e)}")
+                                        summary_path = None
                                     if summary_path:
-                                        print(f"摘要已生成: {summary_path}")
+                                        print(f"摘要已生成: {summary_path}" if summary_stage is None else "文章已交给后台生成")
                                         return summary_path
                                     else:
                                         print("摘要生成失败，继续使用Whisper转录")
@@ -5154,37 +5072,38 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
                     if subtitle_info.get('has_manual_subtitles') or subtitle_info.get('has_auto_subtitles'):
                         print("⚠️  检测到原生字幕，但下载或解析失败，将改用Whisper转录")
         
-        print("1. 开始下载YouTube内容...")
-        audio_path = None
+        with _stage(stage_gate, 'download'):
+            print("1. 开始下载YouTube内容...")
+            audio_path = None
         
-        if download_video:
-            print("下载视频（最佳画质）...")
-            try:
-                # 使用videos目录存储视频
-                file_path = download_youtube_video(youtube_url, output_dir=VIDEOS_DIR, audio_only=False, cookies_file=valid_cookies_file)
-                print(f"视频已下载到: {file_path}")
+            if download_video:
+                print("下载视频（最佳画质）...")
+                try:
+                    # 使用videos目录存储视频
+                    file_path = download_youtube_video(youtube_url, output_dir=VIDEOS_DIR, audio_only=False, cookies_file=valid_cookies_file)
+                    print(f"视频已下载到: {file_path}")
                 
-                # 检查文件是否存在
-                if not os.path.exists(file_path):
-                    raise Exception(f"下载的视频文件不存在: {file_path}")
+                    # 检查文件是否存在
+                    if not os.path.exists(file_path):
+                        raise Exception(f"下载的视频文件不存在: {file_path}")
                 
-                # 如果下载的是视频，我们需要提取音频
-                print("从视频中提取音频...")
-                try:
-                    audio_path = extract_audio_from_video(file_path, output_dir=DOWNLOADS_DIR)
-                    print(f"音频已提取到: {audio_path}")
+                    # 如果下载的是视频，我们需要提取音频
+                    print("从视频中提取音频...")
+                    try:
+                        audio_path = extract_audio_from_video(file_path, output_dir=DOWNLOADS_DIR)
+                        print(f"音频已提取到: {audio_path}")
+                    except Exception as e:
+                        print(f"从视频提取音频失败: {str(e)}")
+                        print("尝试直接下载音频作为备选方案...")
+                        audio_path = download_youtube_video(youtube_url, output_dir=DOWNLOADS_DIR, audio_only=True, cookies_file=valid_cookies_file)
                 except Exception as e:
-                    print(f"从视频提取音频失败: {str(e)}")
-                    print("尝试直接下载音频作为备选方案...")
+                    print(f"视频下载失败: {str(e)}")
+                    print("尝试改为下载音频...")
                     audio_path = download_youtube_video(youtube_url, output_dir=DOWNLOADS_DIR, audio_only=True, cookies_file=valid_cookies_file)
-            except Exception as e:
-                print(f"视频下载失败: {str(e)}")
-                print("尝试改为下载音频...")
+            else:
+                print("仅下载音频...")
+                # 使用downloads目录存储音频
                 audio_path = download_youtube_video(youtube_url, output_dir=DOWNLOADS_DIR, audio_only=True, cookies_file=valid_cookies_file)
-        else:
-            print("仅下载音频...")
-            # 使用downloads目录存储音频
-            audio_path = download_youtube_video(youtube_url, output_dir=DOWNLOADS_DIR, audio_only=True, cookies_file=valid_cookies_file)
         
         # 如果只下载视频而不需要转录或生成文章，直接返回
         if not enable_transcription and not generate_article and download_video:
@@ -5215,6 +5134,7 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
                 output_basename=output_basename,
                 enable_translation_polish=enable_translation_polish,
                 target_language=target_language,
+                stage_gate=stage_gate,
             )
             print(f"转录文本已保存到: {text_path}")
             if subtitle_path:
@@ -5255,17 +5175,23 @@ def process_youtube_video(youtube_url, model=None, api_key=None, base_url=None,
             return subtitle_path if subtitle_path else text_path
             
         print("\n5. 开始生成文章...")
-        summary_path = summarize_text(
-            text_path, 
-            model=model, 
-            api_key=api_key, 
-            base_url=base_url, 
+        summary_path = _summarize_transcript(
+            youtube_url,
+            text_path,
+            summary_stage=summary_stage,
+            stage_gate=stage_gate,
+            model=model,
+            api_key=api_key,
+            base_url=base_url,
             stream=stream,
-            output_dir=summary_dir,
+            summary_dir=summary_dir,
             custom_prompt=custom_prompt,
             template_path=template_path
         )
-        print(f"文章已保存到: {summary_path}")
+        if summary_stage is not None:
+            print("文章已交给后台生成，继续处理下一个视频")
+        else:
+            print(f"文章已保存到: {summary_path}")
         
         return summary_path
     except Exception as e:
@@ -5457,7 +5383,7 @@ def show_download_history():
         print(f"   文件路径: {file_path}")
         print()
 
-def process_youtube_videos_batch(youtube_urls, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir="summaries", download_video=False, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, cookies_file=None, enable_transcription=True, generate_article=True, prefer_native_subtitles=True, enable_translation_polish=None, target_language="zh-CN"):
+def process_youtube_videos_batch(youtube_urls, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir="summaries", download_video=False, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, cookies_file=None, enable_transcription=True, generate_article=True, prefer_native_subtitles=True, enable_translation_polish=None, target_language="zh-CN", max_workers=None, stage_limits=None, skip_processed=True, series_dir=None):
     """
     批量处理多个YouTube视频
     :param youtube_urls: YouTube视频链接列表
@@ -5477,67 +5403,89 @@ def process_youtube_videos_batch(youtube_urls, model=None, api_key=None, base_ur
     :param enable_transcription: 是否执行转录，默认为True
     :param generate_article: 是否生成文章，默认为True
     :param prefer_native_subtitles: 是否优先使用原生字幕，默认为True
-    :return: 处理结果的字典，键为URL，值为对应的总结文件路径或错误信息
+    :param max_workers: 同时处于流水线中的视频数，默认读取环境变量 YOUTUBE_BATCH_WORKERS（默认3）
+    :param stage_limits: 各阶段并发上限，如 {"download": 3, "transcribe": 1}，未列出的阶段使用默认值
+    :param skip_processed: 是否跳过已处理过的视频（按下载历史中的产物记录），默认为True
+    :param series_dir: 系列项目目录；提供时同时按其 videohub_project.json 清单判断是否已处理
+    :return: 处理结果的字典，键为URL，值为对应的总结文件路径或错误信息；跳过的视频带 skipped=True
     """
-    results = {}
+    if max_workers is None:
+        max_workers = _safe_int(os.getenv("YOUTUBE_BATCH_WORKERS", "3"), 3)
+    target_language = normalize_target_language(target_language)
+    key = processing_key(
+        download_video=download_video,
+        enable_transcription=enable_transcription,
+        generate_article=generate_article,
+        generate_subtitles=generate_subtitles,
+        embed_subtitles=embed_subtitles,
+        translate_to_chinese=translate_to_chinese,
+        target_language=target_language,
+    )
+    processed_lookups = []
+    if skip_processed:
+        processed_lookups.append(lambda url, video_id: get_processed_output(url, key))
+        if series_dir:
+            processed_lookups.append(series_processed_lookup(series_dir, key))
+
+    summary_stage = None
+    if generate_article:
+        # 文章生成与视频流水线解耦：后台阶段的并发上限沿用 summarize 阶段上限
+        summary_limit = (stage_limits or {}).get('summarize')
+        summary_stage = create_summary_stage(model=model, api_key=api_key, base_url=base_url, max_workers=summary_limit)
+        stage_limits = dict(stage_limits or {}, summarize=summary_stage.max_workers)
+        summary_stage.resume()
+
+    pipeline = YouTubeBatchPipeline(
+        process_fn=process_youtube_video,
+        max_workers=max_workers,
+        stage_limits=stage_limits,
+        processed_lookups=processed_lookups,
+        on_processed=lambda url, output_path: mark_video_processed(url, key, output_path),
+        video_id_fn=extract_youtube_video_id,
+        summary_stage=summary_stage,
+    )
     total_urls = len(youtube_urls)
-    
+
     print(f"开始批量处理 {total_urls} 个YouTube视频...")
     print(f"下载选项: {'完整视频' if download_video else '仅音频'}")
-    
-    for i, url in enumerate(youtube_urls):
-        print(f"\n处理第 {i+1}/{total_urls} 个视频: {url}")
-        try:
-            summary_path = process_youtube_video(
-                url,
-                model=model,
-                api_key=api_key,
-                base_url=base_url,
-                whisper_model_size=whisper_model_size,
-                stream=stream,
-                summary_dir=summary_dir,
-                download_video=download_video,  # 确保正确传递download_video参数
-                custom_prompt=custom_prompt,
-                template_path=template_path,
-                generate_subtitles=generate_subtitles,
-                translate_to_chinese=translate_to_chinese,
-                embed_subtitles=embed_subtitles,
-                cookies_file=cookies_file,
-                enable_transcription=enable_transcription,
-                generate_article=generate_article,
-                prefer_native_subtitles=True,  # 批处理时默认使用原生字幕优化
-                enable_translation_polish=enable_translation_polish,
-                target_language=target_language,
-            )
-            
-            if summary_path:
-                print(f"视频处理成功: {url}")
-                results[url] = {
-                    "status": "success",
-                    "summary_path": summary_path
-                }
-            else:
-                print(f"视频处理失败: {url}")
-                results[url] = {
-                    "status": "failed",
-                    "error": "处理过程中出现错误，请查看日志获取详细信息"
-                }
-        except Exception as e:
-            print(f"处理视频时出错: {url}")
-            print(f"错误详情: {str(e)}")
-            results[url] = {
-                "status": "failed",
-                "error": str(e)
-            }
+    print(f"流水线并发: {pipeline.max_workers} 个视频，阶段上限 {pipeline.stage_limits}")
+
+    results = pipeline.run(
+        youtube_urls,
+        model=model,
+        api_key=api_key,
+        base_url=base_url,
+        whisper_model_size=whisper_model_size,
+        stream=stream,
+        summary_dir=summary_dir,
+        download_video=download_video,
+        custom_prompt=custom_prompt,
+        template_path=template_path,
+        generate_subtitles=generate_subtitles,
+        translate_to_chinese=translate_to_chinese,
+        embed_subtitles=embed_subtitles,
+        cookies_file=cookies_file,
+        enable_transcription=enable_transcription,
+        generate_article=generate_article,
+        prefer_native_subtitles=True,  # 批处理时默认使用原生字幕优化
+        enable_translation_polish=enable_translation_polish,
+        target_language=target_language,
+    )
+    if summary_stage is not None:
+        summary_stage.wait()
     
     # 打印处理结果统计
     success_count = sum(1 for result in results.values() if result["status"] == "success")
     failed_count = sum(1 for result in results.values() if result["status"] == "failed")
+    skipped_count = sum(1 for result in results.values() if result.get("skipped"))
     
     print("\n批量处理完成!")
     print(f"总计: {total_urls} 个视频")
-    print(f"成功: {success_count} 个视频")
+    print(f"成功: {success_count} 个视频（其中跳过已处理 {skipped_count} 个）")
     print(f"失败: {failed_count} 个视频")
+    print("\n各阶段利用率:")
+    for line in format_stage_report(pipeline.stats()):
+        print(line)
     
     if failed_count > 0:
         print("\n失败的视频:")
@@ -5677,7 +5625,7 @@ def normalize_youtube_video_url(url: str) -> str:
     except Exception:
         return url
 
-def process_youtube_playlist(playlist_url, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir="summaries", download_video=False, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, cookies_file=None, enable_transcription=True, generate_article=True, prefer_native_subtitles=True, enable_translation_polish=None, target_language="zh-CN"):
+def process_youtube_playlist(playlist_url, model=None, api_key=None, base_url=None, whisper_model_size="medium", stream=True, summary_dir="summaries", download_video=False, custom_prompt=None, template_path=None, generate_subtitles=False, translate_to_chinese=True, embed_subtitles=False, cookies_file=None, enable_transcription=True, generate_article=True, prefer_native_subtitles=True, enable_translation_polish=None, target_language="zh-CN", max_workers=None, stage_limits=None, skip_processed=True, series_dir=None):
     """
     处理YouTube播放列表，自动提取所有视频并批量处理
     :param playlist_url: YouTube播放列表链接
@@ -5697,6 +5645,10 @@ def process_youtube_playlist(playlist_url, model=None, api_key=None, base_url=No
     :param enable_transcription: 是否执行转录，默认为True
     :param generate_article: 是否生成文章，默认为True
     :param prefer_native_subtitles: 是否优先使用原生字幕，默认为True
+    :param max_workers: 同时处于流水线中的视频数，见 process_youtube_videos_batch
+    :param stage_limits: 各阶段并发上限，见 process_youtube_videos_batch
+    :param skip_processed: 是否跳过已处理过的视频，默认为True
+    :param series_dir: 系列项目目录，提供时同时按其清单判断是否已处理
     :return: 处理结果的字典，键为URL，值为对应的总结文件路径或错误信息
     """
     print(f"开始处理YouTube播放列表: {playlist_url}")
@@ -5731,6 +5683,10 @@ def process_youtube_playlist(playlist_url, model=None, api_key=None, base_url=No
         prefer_native_subtitles=prefer_native_subtitles,
         enable_translation_polish=enable_translation_polish,
         target_language=target_language,
+        max_workers=max_workers,
+        stage_limits=stage_limits,
+        skip_processed=skip_processed,
+        series_dir=series_dir,
     )
 
 def process_local_text(text_path, model=None, api_key=None, base_url=None, stream=True, summary_dir="summaries", custom_prompt=None, template_path=None):
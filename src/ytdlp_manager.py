@@ -12,6 +12,11 @@ from typing import Optional, Dict, Any
 import yt_dlp
 from paths_config import LOCAL_YTDLP_DIR, YTDLP_CONFIG_FILE
 
+try:
+    from .ytdlp_result import build_download_result, parse_printed_results, result_print_args
+except ImportError:
+    from ytdlp_result import build_download_result, parse_printed_results, result_print_args
+
 
 class YtDlpManager:
     """yt-dlp 管理器"""
@@ -76,7 +81,7 @@ class YtDlpManager:
             progress_callback: 进度回调函数
 
         Returns:
-            下载结果字典
+            yt-dlp 信息字典，两种模式都带 requested_downloads[*].filepath（实际输出文件）
         """
         if self.is_exe_mode():
             return self._run_exe(url, ydl_opts, progress_callback)
@@ -112,8 +117,9 @@ class YtDlpManager:
         if ydl_opts.get('format'):
             cmd_args.extend(['-f', ydl_opts['format']])
 
-        if ydl_opts.get('cookiesfile'):
-            cmd_args.extend(['--cookies', ydl_opts['cookiesfile']])
+        cookie_file = ydl_opts.get('cookiefile') or ydl_opts.get('cookiesfile')
+        if cookie_file:
+            cmd_args.extend(['--cookies', cookie_file])
 
         # 添加其他常用选项
         if ydl_opts.get('proxy'):
@@ -135,9 +141,15 @@ class YtDlpManager:
                 langs = ydl_opts['subtitleslangs']
                 if isinstance(langs, list):
                     cmd_args.extend(['--sub-langs', ','.join(langs)])
-
-        # 输出信息 JSON
-        cmd_args.append('--dump-json')
+            for pp in ydl_opts.get('postprocessors') or []:
+                if pp.get('key') == 'FFmpegExtractAudio':
+                    cmd_args.extend(['-x', '--audio-format', pp.get('preferredcodec', 'best')])
+            if ydl_opts.get('merge_output_format'):
+                cmd_args.extend(['--merge-output-format', ydl_opts['merge_output_format']])
+            # 文件移动到最终位置后打印实际路径
+            cmd_args.extend(result_print_args())
+        else:
+            cmd_args.append('--dump-json')
         cmd_args.append(url)
 
         # 执行命令
@@ -150,9 +162,16 @@ class YtDlpManager:
         if result.returncode != 0:
             raise Exception(f"yt-dlp.exe 执行失败: {result.stderr}")
 
-        # 解析 JSON 输出
-        import json
-        return json.loads(result.stdout)
+        if ydl_opts.get('skip_download', False):
+            return json.loads(result.stdout)
+
+        downloads = parse_printed_results(result.stdout)
+        if not downloads:
+            raise Exception(f"yt-dlp.exe 未报告输出文件（请更新 yt-dlp 以支持 --print after_move）: {result.stdout[-500:]}")
+        info = {key: value for key, value in downloads[-1].items() if key != 'path'}
+        info['filepath'] = downloads[-1]['path']
+        info['requested_downloads'] = [{'filepath': item['path']} for item in downloads]
+        return info
 
     def download_video(
         self,
@@ -161,7 +180,7 @@ class YtDlpManager:
         audio_only: bool = False,
         cookies_file: str = None,
         progress_callback=None
-    ) -> Optional[str]:
+    ) -> Optional[Dict[str, Any]]:
         """
         下载视频
 
@@ -173,7 +192,7 @@ class YtDlpManager:
             progress_callback: 进度回调
 
         Returns:
-            下载的文件路径
+            {"path", "id", "title", "duration", "ext", "format_id", "format"}，失败时为 None
         """
         ydl_opts = {
             'quiet': True,
@@ -199,9 +218,7 @@ class YtDlpManager:
 
         try:
             info = self.run(url, ydl_opts, progress_callback)
-            if info and 'requested_downloads' in info:
-                return info['requested_downloads'][0].get('filepath')
-            return None
+            return build_download_result(info)
         except Exception as e:
             print(f"[ERROR] 下载失败: {e}")
             return None
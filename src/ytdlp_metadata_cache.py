@@ -0,0 +1,194 @@
+"""
+yt-dlp 元数据缓存
+
+同一个视频的字幕检查、标题查询和下载各自调用一次 extract_info，
+对短视频来说提取往返比下载本身还慢。这里按规范化的视频 ID 把提取结果
+（格式、字幕、时长、标题等）保存为 <id>.info.json，TTL 内直接复用。
+文件内容与 yt-dlp --write-info-json 相同，可直接交给 --load-info-json 下载。
+
+cookies、代理、extractor_args 等选项会改变提取到的格式和直链（登录后才有的格式、
+按地区签发的地址），这些选项不同的提取结果按 extraction_profile() 分开保存，互不复用。
+格式选择（format）不影响提取结果：下载时 yt-dlp 会按当次选项重新从格式列表中选择。
+"""
+
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_TTL_SECONDS = 12 * 3600
+# 格式/字幕直链带 expire 参数，距过期不足该时间的缓存只用于查询，不再用于下载
+URL_EXPIRY_MARGIN_SECONDS = 600
+
+# 下载后才有的字段，不写入缓存，避免复用时误认为文件已存在
+_TRANSIENT_KEYS = ("requested_downloads", "filepath", "_filename", "filename")
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# 影响提取结果的 yt-dlp 选项
+_PROFILE_OPTION_KEYS = (
+    "cookiefile",
+    "cookiesfrombrowser",
+    "username",
+    "extractor_args",
+    "proxy",
+    "geo_verification_proxy",
+    "geo_bypass_country",
+    "source_address",
+)
+
+
+def extraction_profile(ydl_opts: Optional[Dict[str, Any]]) -> str:
+    """
+    影响提取结果的选项指纹；没有这类选项时返回空串
+    Python 库选项和命令行下载换算出的同一组选项得到相同的指纹
+    """
+    selected: Dict[str, Any] = {}
+    for key in _PROFILE_OPTION_KEYS:
+        value = (ydl_opts or {}).get(key)
+        if not value:
+            continue
+        if key == "cookiefile":
+            value = os.path.abspath(value)
+        elif key == "cookiesfrombrowser":
+            # (浏览器, 配置目录, keyring, 容器)，只有浏览器名时与 (浏览器, None, None, None) 等价
+            value = [str(value[0]).strip().lower(), *[part for part in value[1:] if part]]
+        selected[key] = value
+    if not selected:
+        return ""
+    payload = json.dumps(selected, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _url_expiry(url: Optional[str]) -> Optional[float]:
+    if not url:
+        return None
+    query = parse_qs(urlparse(url).query)
+    value = (query.get("expire") or [None])[0]
+    if value is None:
+        # 部分直链把参数放在路径里：/expire/1700000000/
+        match = re.search(r"/expire/(\d+)", url)
+        value = match.group(1) if match else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def url_expiry(info: Dict[str, Any]) -> Optional[float]:
+    """提取结果中所有格式和字幕直链里最早的过期时间（Unix 时间戳），没有则返回 None"""
+    urls = [info.get("url")]
+    urls.extend(item.get("url") for item in info.get("formats") or [])
+    for key in ("subtitles", "automatic_captions"):
+        for tracks in (info.get(key) or {}).values():
+            urls.extend(track.get("url") for track in tracks or [])
+    expiries = [expiry for expiry in map(_url_expiry, urls) if expiry is not None]
+    return min(expiries) if expiries else None
+
+
+def sanitize_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """去掉下载过程字段和 yt-dlp 内部字段，转成可 JSON 序列化的字典"""
+    cleaned = {
+        key: value
+        for key, value in info.items()
+        if key not in _TRANSIENT_KEYS and not key.startswith("__")
+    }
+    return json.loads(json.dumps(cleaned, ensure_ascii=False, default=str))
+
+
+class MetadataCache:
+    """按视频 ID 和提取选项指纹缓存 yt-dlp 提取结果（内存 + 磁盘两级）"""
+
+    def __init__(self, cache_dir: str, ttl: float = DEFAULT_TTL_SECONDS):
+        """
+        :param cache_dir: 缓存目录
+        :param ttl: 有效期（秒），<= 0 表示禁用缓存
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def path_for(self, video_id: str, profile: str = "") -> str:
+        """:param profile: extraction_profile() 的结果，为空时使用不带指纹的文件名"""
+        suffix = f".{profile}" if profile else ""
+        return os.path.join(self.cache_dir, f"{video_id}{suffix}.info.json")
+
+    def _valid_id(self, video_id: Optional[str]) -> bool:
+        return self.ttl > 0 and bool(video_id) and bool(_VIDEO_ID_RE.match(video_id))
+
+    def _load(self, path: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._memory.get(path)
+        if cached and cached[0] == mtime:
+            return cached
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._memory[path] = (mtime, info)
+        return mtime, info
+
+    def get(self, video_id: Optional[str], need_urls: bool = False, profile: str = "") -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的提取结果（返回副本，可放心修改）
+        :param need_urls: 用于下载时为 True，要求格式/字幕直链未临近过期
+        :param profile: 提取选项指纹，只复用同一组选项下的提取结果
+        :return: 提取结果；未缓存、已超过 TTL 或直链将过期时返回 None
+        """
+        if not self._valid_id(video_id):
+            return None
+        loaded = self._load(self.path_for(video_id, profile))
+        if loaded is None:
+            return None
+        fetched_at, info = loaded
+        now = time.time()
+        if now - fetched_at > self.ttl:
+            return None
+        if need_urls:
+            expiry = url_expiry(info)
+            if expiry is not None and expiry - now < URL_EXPIRY_MARGIN_SECONDS:
+                return None
+        return copy.deepcopy(info)
+
+    def fresh_path(self, video_id: Optional[str], need_urls: bool = False, profile: str = "") -> Optional[str]:
+        """缓存有效时返回 info.json 路径（供 yt-dlp --load-info-json 使用）"""
+        if self.get(video_id, need_urls=need_urls, profile=profile) is None:
+            return None
+        return self.path_for(video_id, profile)
+
+    def put(self, video_id: Optional[str], info: Optional[Dict[str, Any]], profile: str = "") -> None:
+        if not self._valid_id(video_id) or not info:
+            return
+        try:
+            cleaned = sanitize_info(info)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self.path_for(video_id, profile)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cleaned, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._memory[path] = (os.path.getmtime(path), cleaned)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"写入 yt-dlp 元数据缓存失败: {e}")
+
+    def invalidate(self, video_id: Optional[str], profile: str = "") -> None:
+        if not video_id:
+            return
+        path = self.path_for(video_id, profile)
+        with self._lock:
+            self._memory.pop(path, None)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
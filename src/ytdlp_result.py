@@ -0,0 +1,71 @@
+"""
+yt-dlp 下载结果解析
+
+下载完成后直接从 yt-dlp 拿到最终文件路径，而不是扫描输出目录猜测：
+- Python 库模式：extract_info(download=True) 返回的 requested_downloads[*].filepath
+- 可执行文件模式：--print after_move:... 在文件移动到最终位置后输出一行 JSON
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+# 带前缀输出，便于从混杂的下载日志中准确识别结果行
+RESULT_MARKER = "[videohub-result]"
+RESULT_FIELDS = ("id", "title", "duration", "ext", "format_id", "format", "filepath")
+
+
+def result_print_args() -> List[str]:
+    """
+    yt-dlp 命令行参数：文件移动到最终位置后打印结果
+    --print 默认隐含 --quiet，追加 --progress 保留下载进度输出
+    """
+    template = "after_move:" + RESULT_MARKER + "%(.{" + ",".join(RESULT_FIELDS) + "})j"
+    return ["--print", template, "--progress"]
+
+
+def downloaded_filepath(info: Optional[Dict[str, Any]]) -> Optional[str]:
+    """从 extract_info(download=True) 的结果中取最终文件路径（合并和后处理之后）"""
+    if not info:
+        return None
+    for item in reversed(info.get("requested_downloads") or []):
+        if item.get("filepath"):
+            return item["filepath"]
+    return info.get("filepath") or None
+
+
+def build_download_result(info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    统一的下载结果结构
+
+    Returns:
+        {"path", "id", "title", "duration", "ext", "format_id", "format"}，找不到文件路径时返回 None
+    """
+    path = downloaded_filepath(info)
+    if not path:
+        return None
+    return {
+        "path": path,
+        "id": info.get("id"),
+        "title": info.get("title"),
+        "duration": info.get("duration"),
+        "ext": info.get("ext"),
+        "format_id": info.get("format_id"),
+        "format": info.get("format"),
+    }
+
+
+def parse_printed_results(output: str) -> List[Dict[str, Any]]:
+    """解析 result_print_args() 输出的结果行，按输出顺序返回结构化结果"""
+    results = []
+    for line in (output or "").splitlines():
+        _, marker, payload = line.partition(RESULT_MARKER)
+        if not marker:
+            continue
+        try:
+            info = json.loads(payload)
+        except ValueError:
+            continue
+        result = build_download_result(info)
+        if result:
+            results.append(result)
+    return results
@@ -0,0 +1,39 @@
+from src.audio_utils import build_combine_command, escape_filter_path
+
+
+def test_combine_without_subtitles_keeps_copy_video_fast_path():
+    cmd = build_combine_command("in.mp4", "dub.wav", "out.mp4")
+
+    assert cmd[cmd.index("-c:v") + 1] == "copy"
+    assert "-filter_complex" not in cmd
+    assert cmd[cmd.index("-map") + 1] == "0:v:0"
+    assert "-shortest" in cmd
+
+
+def test_combine_with_subtitles_mixes_and_burns_in_one_encode(tmp_path):
+    subtitle = tmp_path / "burn.ass"
+    cmd = build_combine_command(
+        "in.mp4",
+        "dub.wav",
+        "out.mp4",
+        keep_original_audio=True,
+        original_audio_volume=0.2,
+        subtitle_path=str(subtitle),
+    )
+
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert cmd.count("-filter_complex") == 1
+    assert "[0:a]volume=0.2[bg];[bg][1:a]amix=inputs=2:duration=first[aout]" in graph
+    assert f"[0:v:0]ass={escape_filter_path(str(subtitle))}[vout]" in graph
+    assert cmd[cmd.index("-c:v") + 1] == "libx264"
+    assert "copy" not in cmd
+    maps = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map"]
+    assert maps == ["[vout]", "[aout]"]
+
+
+def test_escape_filter_path_quotes_and_escapes_option_separator(tmp_path):
+    subtitle = tmp_path / "a:b" / "sub title.srt"
+
+    escaped = escape_filter_path(str(subtitle))
+
+    assert escaped == "'" + str(subtitle).replace(":", "\\:") + "'"
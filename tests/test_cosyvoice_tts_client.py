@@ -0,0 +1,114 @@
+import struct
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import requests
+
+from src.cosyvoice_tts_client import CosyVoiceTTSClient
+
+
+class FakeStreamResponse:
+    def __init__(self, blocks, *, status_code=200, headers=None):
+        self._blocks = blocks
+        self.status_code = status_code
+        self.ok = 200 <= status_code < 300
+        self.headers = headers or {}
+        self.text = ""
+
+    def iter_content(self, chunk_size):
+        for block in self._blocks:
+            if isinstance(block, Exception):
+                raise block
+            yield block
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_stream_reassembles_pcm_split_across_blocks():
+    pcm = struct.pack("<4h", 0, 16384, -16384, 32767)
+    calls = []
+
+    def fake_post(url, **kwargs):
+        calls.append({"url": url, **kwargs})
+        # Split in the middle of a sample to exercise the carry-over buffer.
+        return FakeStreamResponse([pcm[:3], pcm[3:]], headers={"X-Sample-Rate": "22050"})
+
+    client = CosyVoiceTTSClient(
+        base_url="http://tts.local", speaker="中文女", session=SimpleNamespace(post=fake_post)
+    )
+    audio, sample_rate = client.synthesize_array("<i>你好</i>。")
+
+    assert sample_rate == 22050
+    np.testing.assert_allclose(audio, [0.0, 0.5, -0.5, 32767 / 32768], atol=1e-6)
+    assert calls[0]["url"] == "http://tts.local/tts/sft/stream"
+    assert calls[0]["stream"] is True
+    assert calls[0]["params"]["persist"] == "false"
+    assert calls[0]["json"]["text"] == "你好。"
+
+
+def _frame(*samples):
+    pcm = struct.pack(f"<{len(samples)}h", *samples)
+    return struct.pack("<I", len(pcm)) + pcm
+
+
+def test_framed_stream_checks_the_segment_count():
+    frames = _frame(0, 16384) + _frame(-16384)
+    headers = {"X-Sample-Rate": "22050", "X-Framing": "segments", "X-Segments": "2"}
+    responses = [FakeStreamResponse([frames[:5], frames[5:]], headers=headers)]
+    calls = []
+
+    def fake_post(url, **kwargs):
+        calls.append(kwargs["params"])
+        return responses.pop(0)
+
+    client = CosyVoiceTTSClient(base_url="http://tts.local", session=SimpleNamespace(post=fake_post))
+    audio, _sample_rate = client.synthesize_array("你好。")
+
+    np.testing.assert_allclose(audio, [0.0, 0.5, -0.5])
+    assert calls[0]["framed"] == "true"
+
+    responses.append(FakeStreamResponse([_frame(0, 16384)], headers=dict(headers, **{"X-Segments": "3"})))
+    with pytest.raises(RuntimeError, match="1/3"):
+        client.synthesize_array("你好。")
+
+
+def test_aborted_stream_raises_instead_of_returning_partial_audio():
+    aborted = requests.exceptions.ChunkedEncodingError("Connection broken")
+
+    def fake_post(url, **kwargs):
+        return FakeStreamResponse([struct.pack("<2h", 0, 1), aborted], headers={"X-Sample-Rate": "22050"})
+
+    client = CosyVoiceTTSClient(base_url="http://tts.local", session=SimpleNamespace(post=fake_post))
+    with pytest.raises(RuntimeError, match="中断"):
+        client.synthesize_array("你好。")
+
+
+def test_stream_falls_back_to_file_mode_on_old_service(tmp_path):
+    import soundfile as sf
+
+    wav_path = tmp_path / "out.wav"
+    sf.write(wav_path, np.zeros(100, dtype=np.float32), 16000)
+
+    class FileResponse:
+        ok = True
+        status_code = 200
+
+        def json(self):
+            return {"file_path": str(wav_path)}
+
+    def fake_post(url, **kwargs):
+        if url.endswith("/stream"):
+            return FakeStreamResponse([], status_code=404)
+        return FileResponse()
+
+    client = CosyVoiceTTSClient(base_url="http://tts.local", session=SimpleNamespace(post=fake_post))
+    audio, sample_rate = client.synthesize_array("测试。")
+
+    assert sample_rate == 16000
+    assert len(audio) == 100
+    assert client.stream is False
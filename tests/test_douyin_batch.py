@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "douyin"))
+
+from batch import BatchDownloader, DownloadIndex, HostRateLimiter, aweme_id_from_url  # noqa: E402
+
+
+def _fake_download(tmp_path, calls, fail_first=()):
+    lock = threading.Lock()
+    attempts = {}
+
+    def download(url, position):
+        aweme_id = url.rsplit("/", 1)[1]
+        with lock:
+            calls.append(aweme_id)
+            attempts[aweme_id] = attempts.get(aweme_id, 0) + 1
+            if aweme_id in fail_first and attempts[aweme_id] == 1:
+                return {"success": False, "error": "timeout"}
+        path = tmp_path / f"{aweme_id}.mp4"
+        path.write_bytes(b"video")
+        return {
+            "success": True,
+            "video_info": {"aweme_id": aweme_id},
+            "downloaded_files": [{"type": "video", "path": str(path)}],
+        }
+
+    return download
+
+
+def _items(ids):
+    return [(aweme_id, f"https://www.douyin.com/video/{aweme_id}") for aweme_id in ids]
+
+
+def test_aweme_id_from_url_without_network():
+    assert aweme_id_from_url("https://www.douyin.com/video/7301234567890123456") == "7301234567890123456"
+    assert aweme_id_from_url("https://www.douyin.com/jingxuan?modal_id=7301234567890123456") == "7301234567890123456"
+    assert aweme_id_from_url("https://v.douyin.com/Rd4EHcN/") is None
+
+
+def test_rerun_skips_indexed_videos(tmp_path):
+    index_path = tmp_path / "download_index.json"
+    ids = [str(7000000000 + i) for i in range(6)]
+    calls = []
+
+    batch = BatchDownloader(index=DownloadIndex(str(index_path)), max_workers=3, host_interval=0)
+    first = batch.run(_items(ids[:4]), _fake_download(tmp_path, calls))
+    assert all(r["success"] for r in first)
+
+    calls.clear()
+    batch = BatchDownloader(index=DownloadIndex(str(index_path)), max_workers=3, host_interval=0)
+    results = batch.run(_items(ids), _fake_download(tmp_path, calls))
+
+    assert sorted(calls) == ids[4:]
+    assert [r.get("skipped", False) for r in results] == [True] * 4 + [False] * 2
+
+
+def test_deleted_file_is_downloaded_again(tmp_path):
+    index = DownloadIndex(str(tmp_path / "download_index.json"))
+    calls = []
+    BatchDownloader(index=index, host_interval=0).run(_items(["7000000001"]), _fake_download(tmp_path, calls))
+    (tmp_path / "7000000001.mp4").unlink()
+
+    calls.clear()
+    BatchDownloader(index=index, host_interval=0).run(_items(["7000000001"]), _fake_download(tmp_path, calls))
+    assert calls == ["7000000001"]
+
+
+def test_failed_download_is_retried_with_backoff(tmp_path):
+    calls = []
+    batch = BatchDownloader(max_workers=2, host_interval=0, max_retries=2, retry_delay=0.01)
+    results = batch.run(_items(["7000000001", "7000000002"]), _fake_download(tmp_path, calls, fail_first={"7000000002"}))
+
+    assert all(r["success"] for r in results)
+    assert calls.count("7000000002") == 2
+    assert 0.005 <= batch.backoff(1) <= 0.01
+
+
+def test_concurrency_is_bounded(tmp_path):
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def download(url, position):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {"success": True}
+
+    ids = [str(7000000000 + i) for i in range(8)]
+    BatchDownloader(max_workers=3, host_interval=0).run(_items(ids), download)
+    assert peak[0] == 3
+
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    limiter = HostRateLimiter(min_interval=0.05)
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.wait("https://www.douyin.com/video/1")
+    limiter.wait("https://v.douyin.com/abc")
+    assert time.monotonic() - started >= 0.1
+    assert time.monotonic() - started < 0.15
+
+
+def test_batch_retries_replace_per_range_retries(tmp_path):
+    from src.douyin.downloader import DouyinDownloader
+
+    class Config(dict):
+        def get(self, key, default=None):
+            return super().get(key, default)
+
+    class Extractor:
+        def __init__(self):
+            self.range_retries = []
+
+        def download_video(self, url, download_dir, save_metadata=False, max_retries=None):
+            self.range_retries.append(max_retries)
+            return {"success": False, "error": "timeout"}
+
+    downloader = DouyinDownloader.__new__(DouyinDownloader)
+    downloader.config = Config(download_dir=str(tmp_path), max_retries=2, retry_delay=0, host_request_interval=0)
+    downloader.douyinvd_extractor = Extractor()
+
+    result = downloader.download_videos_batch(["https://www.douyin.com/video/7000000001"])
+
+    assert result["failed_count"] == 1
+    assert downloader.douyinvd_extractor.range_retries == [0, 0, 0]
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "douyin"))
+
+import ranged_downloader  # noqa: E402
+from ranged_downloader import RangedDownloader, RangedDownloadError  # noqa: E402
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    supports_range = True
+    # 每个连接的限速（字节/秒），模拟 CDN 对单连接限速
+    bytes_per_second = None
+    fail_after = None
+    requests_seen: list = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        type(self).requests_seen.append(range_header)
+        start, end = 0, len(PAYLOAD) - 1
+        if range_header and self.supports_range:
+            spec = range_header.split("=", 1)[1]
+            first, last = spec.split("-")
+            start = int(first)
+            end = int(last) if last else len(PAYLOAD) - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+
+        sent = 0
+        step = 64 * 1024
+        while sent < len(body):
+            if self.fail_after is not None and sent >= self.fail_after:
+                return
+            chunk = body[sent:sent + step]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if self.bytes_per_second:
+                time.sleep(len(chunk) / self.bytes_per_second)
+
+
+@pytest.fixture
+def server():
+    handler = type("Handler", (_Handler,), {"requests_seen": []})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{httpd.server_address[1]}/video.mp4"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_multi_connection_download_matches_payload(server, tmp_path):
+    handler, url = server
+    target = tmp_path / "video.mp4"
+
+    downloader = RangedDownloader(connections=4, min_split_size=512 * 1024)
+    downloader.download(url, str(target))
+
+    assert target.read_bytes() == PAYLOAD
+    ranged = [r for r in handler.requests_seen if r and r != "bytes=0-0"]
+    assert len(ranged) == 4
+    assert not (tmp_path / "video.mp4.part").exists()
+    assert not (tmp_path / "video.mp4.part.json").exists()
+
+
+def test_parallel_ranges_beat_single_connection_when_throttled(server, tmp_path):
+    handler, url = server
+    handler.bytes_per_second = 4 * 1024 * 1024
+
+    started = time.perf_counter()
+    RangedDownloader(connections=1).download(url, str(tmp_path / "single.mp4"))
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    RangedDownloader(connections=4, min_split_size=512 * 1024).download(url, str(tmp_path / "multi.mp4"))
+    multi = time.perf_counter() - started
+
+    assert (tmp_path / "multi.mp4").read_bytes() == PAYLOAD
+    assert multi < single * 0.6
+
+
+def test_resume_fetches_only_missing_bytes(server, tmp_path):
+    handler, url = server
+    target = tmp_path / "video.mp4"
+    handler.fail_after = 256 * 1024
+
+    downloader = RangedDownloader(connections=2, min_split_size=512 * 1024, max_retries=0, timeout=5)
+    with pytest.raises(RangedDownloadError):
+        downloader.download(url, str(target))
+
+    state = json.loads((tmp_path / "video.mp4.part.json").read_text())
+    assert all(item["done"] > 0 for item in state["ranges"])
+    assert not target.exists()
+
+    handler.fail_after = None
+    handler.requests_seen.clear()
+    downloader.download(url, str(target))
+
+    assert target.read_bytes() == PAYLOAD
+    resumed_starts = sorted(
+        int(r.split("=")[1].split("-")[0]) for r in handler.requests_seen if r != "bytes=0-0"
+    )
+    expected = sorted(item["start"] + item["done"] for item in state["ranges"])
+    assert resumed_starts == expected
+
+
+def test_changed_remote_file_discards_stale_progress(server, tmp_path):
+    _, url = server
+    target = tmp_path / "video.mp4"
+    (tmp_path / "video.mp4.part").write_bytes(b"\0" * 10)
+    (tmp_path / "video.mp4.part.json").write_text(
+        json.dumps({"size": len(PAYLOAD), "etag": '"old"', "last_modified": "", "ranges": []})
+    )
+
+    RangedDownloader(connections=2, min_split_size=512 * 1024).download(url, str(target))
+    assert target.read_bytes() == PAYLOAD
+
+
+def test_falls_back_to_single_stream_without_range_support(server, tmp_path):
+    handler, url = server
+    handler.supports_range = False
+    target = tmp_path / "video.mp4"
+
+    RangedDownloader(connections=4, min_split_size=512 * 1024).download(url, str(target))
+
+    assert target.read_bytes() == PAYLOAD
+    assert not (tmp_path / ("video.mp4" + ranged_downloader.PART_SUFFIX)).exists()
+
+
+def test_truncated_existing_file_is_downloaded_again(server, tmp_path):
+    handler, url = server
+    target = tmp_path / "video.mp4"
+    target.write_bytes(PAYLOAD[:1000])
+
+    downloader = RangedDownloader(connections=2, min_split_size=512 * 1024)
+    downloader.download(url, str(target))
+    assert target.read_bytes() == PAYLOAD
+
+    handler.requests_seen.clear()
+    downloader.download(url, str(target))
+    assert handler.requests_seen == ["bytes=0-0"]
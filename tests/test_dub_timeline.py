@@ -0,0 +1,70 @@
+import numpy as np
+
+from src.dub_timeline import MAX_TEMPO, align_dub_clips, plan_dub_timeline, time_stretch
+
+SAMPLE_RATE = 8000
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def classify(text):
+    return "question" if text.endswith("？") else "statement"
+
+
+def test_plan_precomputes_types_speeds_slots_and_lead_ins():
+    segments = [
+        {"start": 0.0, "end": 1.0, "text": "第一句。"},
+        {"start": 2.0, "end": 3.0, "text": "第二句？"},
+        {"start": 3.5, "end": 4.0, "text": "第三句。"},
+    ]
+
+    plan = plan_dub_timeline(segments, speed=1.0, classify=classify)
+
+    assert plan.sentence_types == ["statement", "question", "statement"]
+    np.testing.assert_allclose(plan.slot_durations[:2], [2.0, 1.5])
+    assert np.isinf(plan.slot_ends[-1])
+    np.testing.assert_allclose(plan.speeds, [1.0, 0.95, 1.0])
+    # 问句前 1 秒间隙 × (1.5 - 1)
+    np.testing.assert_allclose(plan.lead_ins, [0.0, 0.5, 0.0])
+
+
+def test_time_stretch_shortens_without_dropping_content():
+    clip = tone(1.0)
+    stretched = time_stretch(clip, 1.25, SAMPLE_RATE)
+
+    assert len(stretched) == int(round(len(clip) / 1.25))
+    assert np.abs(stretched).max() > 0.3
+
+
+def test_align_compresses_overruns_and_does_not_accumulate_drift():
+    segments = [{"start": float(i), "end": float(i) + 0.8, "text": "句子。"} for i in range(50)]
+    plan = plan_dub_timeline(segments)
+    # 每段都比 1 秒的时间槽长 20%，逐段累加时会漂移 10 秒
+    clips = [tone(1.2) for _ in segments]
+
+    audio, report = align_dub_clips(plan, clips, SAMPLE_RATE)
+
+    # 最后一段之后没有字幕，不需要压缩
+    assert report.stretched == 49
+    assert report.overrun_segments == 0
+    assert len(audio) / SAMPLE_RATE < 49 + 1.2 + 0.01
+
+
+def test_align_reanchors_after_gap_when_tempo_cap_is_hit():
+    segments = [
+        {"start": 0.0, "end": 1.0, "text": "很长的一句。"},
+        {"start": 1.0, "end": 2.0, "text": "紧跟的一句。"},
+        {"start": 10.0, "end": 11.0, "text": "间隙后的一句。"},
+    ]
+    plan = plan_dub_timeline(segments)
+    clips = [tone(2.0), tone(0.5), tone(0.5)]
+
+    audio, report = align_dub_clips(plan, clips, SAMPLE_RATE)
+
+    assert report.max_tempo == MAX_TEMPO
+    assert report.overrun_segments == 1
+    last_onset = np.flatnonzero(np.abs(audio) > 1e-4)[-1] / SAMPLE_RATE
+    assert abs(last_onset - 10.5) < 0.01
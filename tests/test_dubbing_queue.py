@@ -0,0 +1,97 @@
+import time
+
+from src import dubbing_queue as dq
+from src.dubbing_engine import DubbingTask
+
+
+class FakeEngine:
+    """按真实阶段顺序走一遍门控，每个阶段短暂占用。"""
+
+    def __init__(self, log_callback=None, stage_gate=None):
+        self.log_callback = log_callback
+        self.stage_gate = stage_gate
+
+    def dub_video(self, task):
+        for stage in ("download", "transcribe", "translate", "tts", "combine"):
+            with self.stage_gate(stage):
+                time.sleep(0.02)
+        if task.video_path == "broken.mp4":
+            raise RuntimeError("boom")
+        return f"{task.video_path}.dubbed.mp4"
+
+
+def test_queue_runs_tasks_concurrently_within_stage_limits(monkeypatch):
+    monkeypatch.setattr(dq, "get_video_duration", lambda path: 120.0)
+    queue = dq.DubbingQueue(max_workers=4, stage_limits={"download": 3}, engine_factory=FakeEngine)
+
+    jobs = queue.submit_many(DubbingTask(video_path=f"v{i}.mp4") for i in range(6))
+    queue.wait(timeout=10)
+    queue.shutdown()
+
+    assert all(job.status == "completed" for job in jobs)
+    assert jobs[0].output_path == "v0.mp4.dubbed.mp4"
+    assert queue.peak_active["transcribe"] == 1
+    assert queue.peak_active["tts"] == 1
+    assert 1 < queue.peak_active["download"] <= 3
+
+    stats = queue.stats()
+    assert stats["completed"] == 6
+    assert stats["dubbed_minutes"] == 12.0
+    assert stats["dubbed_minutes_per_hour"] > 0
+    assert jobs[0].dubbed_minutes_per_hour > 0
+    assert set(jobs[0].stage_seconds) == {"download", "transcribe", "translate", "tts", "combine"}
+
+
+def test_failed_task_is_reported_without_stopping_queue(monkeypatch):
+    monkeypatch.setattr(dq, "get_video_duration", lambda path: 60.0)
+    queue = dq.DubbingQueue(max_workers=2, engine_factory=FakeEngine)
+
+    broken = queue.submit(DubbingTask(video_path="broken.mp4"))
+    ok = queue.submit(DubbingTask(video_path="ok.mp4"))
+    queue.wait(timeout=10)
+    queue.shutdown()
+
+    assert broken.status == "failed"
+    assert broken.error == "boom"
+    assert ok.status == "completed"
+    assert queue.stats()["failed"] == 1
+    assert all(count == 0 for count in queue.stage_limiter._active.values())
+
+
+def test_burn_subtitle_copy_is_removed_on_cleanup(tmp_path, monkeypatch):
+    from src.dubbing_engine import VideoDubbingEngine
+
+    monkeypatch.setattr(VideoDubbingEngine, "_get_temp_dir", lambda self: str(tmp_path))
+    subtitle = tmp_path / "zh.srt"
+    subtitle.write_text("1\n00:00:00,000 --> 00:00:01,000\n你好\n", encoding="utf-8")
+    engine = VideoDubbingEngine(log_callback=lambda message: None)
+    task = DubbingTask(video_path="in.mp4", subtitle_path=str(subtitle), subtitle_burn_mode="single")
+
+    burn_path = engine._select_burn_subtitle(task)
+    assert burn_path != str(subtitle) and (tmp_path / burn_path).exists()
+    engine._cleanup_temp_files(task)
+
+    assert not (tmp_path / burn_path).exists() and subtitle.exists()
+    assert task.temp_files == []
+
+
+def test_whisper_model_cache_keeps_only_the_last_model(monkeypatch):
+    from src import youtube_transcriber
+
+    loads = []
+    monkeypatch.setattr(youtube_transcriber, "_WHISPER_MODELS", {})
+    monkeypatch.setattr(
+        youtube_transcriber.whisper, "load_model", lambda size, device=None: loads.append((size, device)) or object()
+    )
+
+    first = youtube_transcriber.load_whisper_model("small", "cpu")
+    again = youtube_transcriber.load_whisper_model("small", "cpu")
+    other = youtube_transcriber.load_whisper_model("base", "cpu")
+
+    assert first is again and other is not first
+    assert list(youtube_transcriber._WHISPER_MODELS.values()) == [other]
+
+    # 切回之前的大小时重新加载，旧模型已被释放
+    youtube_transcriber.load_whisper_model("small", "cpu")
+    assert loads == [("small", "cpu"), ("base", "cpu"), ("small", "cpu")]
+    assert list(youtube_transcriber._WHISPER_MODELS) == [("small", "cpu")]
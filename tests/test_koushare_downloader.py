@@ -62,6 +62,8 @@ def test_signature_is_stable_and_normalizes_boolean(monkeypatch):
 def test_set_token_updates_and_clears_authorization_header():
     downloader.set_token("token-for-test")
     assert downloader._get_session().headers["Authorization"] == "token-for-test"
+    # m3u8 里的 CDN/第三方地址不能拿到登录 token
+    assert "Authorization" not in downloader._get_media_session().headers
 
     downloader.set_token("")
     assert "Authorization" not in downloader._get_session().headers
@@ -136,7 +138,7 @@ def test_download_uses_video_title_and_selected_stream(monkeypatch, tmp_path):
         captured["output_path"] = output_path
         Path(output_path).write_bytes(b"video")
 
-    monkeypatch.setattr(downloader, "download_with_ffmpeg", fake_download)
+    monkeypatch.setattr(downloader, "download_hls", fake_download)
 
     result = downloader.download(
         "https://www.koushare.com/video/details/203628",
@@ -147,3 +149,110 @@ def test_download_uses_video_title_and_selected_stream(monkeypatch, tmp_path):
     assert result["title"] == "测试_课程"
     assert Path(result["file_path"]).name == "测试_课程.mp4"
     assert captured["stream_url"] == "https://cdn/fhd.m3u8"
+
+
+class _BytesResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.text = content.decode("utf-8", errors="replace")
+
+    def raise_for_status(self):
+        return None
+
+
+class _CdnSession:
+    headers = {}
+
+    def __init__(self, files):
+        self.files = files
+        self.requested = []
+
+    def get(self, url, *_args, **_kwargs):
+        self.requested.append(url)
+        return _BytesResponse(self.files[url])
+
+
+def _fake_remux(paths, output_path, _work_dir, init_uri=None):
+    with open(output_path, "wb") as out:
+        for path in paths:
+            out.write(Path(path).read_bytes())
+
+
+def test_hls_playlist_parses_keys_sequence_and_relative_uris(monkeypatch):
+    playlist = "\n".join([
+        "#EXTM3U",
+        "#EXT-X-MEDIA-SEQUENCE:7",
+        '#EXT-X-KEY:METHOD=AES-128,URI="key.bin",IV=0x000102030405060708090a0b0c0d0e0f',
+        "#EXTINF:4.0,",
+        "seg0.ts",
+        "#EXT-X-KEY:METHOD=NONE",
+        "#EXTINF:2.5,",
+        "https://other/seg1.ts",
+        "#EXT-X-ENDLIST",
+    ])
+    session = _CdnSession({"https://cdn/v/index.m3u8": playlist.encode()})
+    monkeypatch.setattr(downloader, "_get_media_session", lambda: session)
+
+    parsed = downloader._load_hls_playlist("https://cdn/v/index.m3u8")
+
+    first, second = parsed["segments"]
+    assert first["uri"] == "https://cdn/v/seg0.ts"
+    assert first["sequence"] == 7
+    assert first["key"]["uri"] == "https://cdn/v/key.bin"
+    assert first["key"]["iv"] == bytes(range(16))
+    assert second["key"] is None
+    assert parsed["total_duration"] == 6.5
+    assert downloader._parse_m3u8("https://cdn/v/index.m3u8") == (2, 6.5)
+
+
+def test_hls_rejects_sample_aes_for_ffmpeg_fallback(monkeypatch):
+    playlist = '#EXTM3U\n#EXT-X-KEY:METHOD=SAMPLE-AES,URI="k"\n#EXTINF:1,\na.ts\n'
+    monkeypatch.setattr(downloader, "_get_media_session", lambda: _CdnSession({"https://cdn/i.m3u8": playlist.encode()}))
+    with pytest.raises(downloader.HlsUnsupportedError):
+        downloader._load_hls_playlist("https://cdn/i.m3u8")
+
+
+def test_download_hls_fetches_segments_and_resumes(monkeypatch, tmp_path):
+    segments = {f"https://cdn/seg{i}.ts": bytes([i]) * 100 for i in range(12)}
+    playlist = "#EXTM3U\n" + "".join(f"#EXTINF:2.0,\nseg{i}.ts\n" for i in range(12))
+    files = {"https://cdn/index.m3u8": playlist.encode(), **segments}
+    session = _CdnSession(files)
+    monkeypatch.setattr(downloader, "_get_media_session", lambda: session)
+    monkeypatch.setattr(downloader, "_remux_segments", _fake_remux)
+
+    output = tmp_path / "out.mp4"
+    work_dir = tmp_path / "out.mp4.segments"
+    work_dir.mkdir()
+    for i in range(5):
+        (work_dir / f"{i:05d}.ts").write_bytes(bytes([i]) * 100)
+
+    progress = []
+    downloader.download_hls("https://cdn/index.m3u8", str(output), lambda msg, pct: progress.append(msg))
+
+    assert output.read_bytes() == b"".join(segments.values())
+    fetched = [url for url in session.requested if url.endswith(".ts")]
+    assert sorted(fetched) == sorted(f"https://cdn/seg{i}.ts" for i in range(5, 12))
+    assert "已下载分片 12/12（95%）" in progress
+    assert not work_dir.exists()
+
+
+def test_download_hls_decrypts_aes128_segments(monkeypatch, tmp_path):
+    aes = pytest.importorskip("Crypto.Cipher.AES")
+    key = hashlib.md5(b"key").digest()
+    plain = [b"segment-%d" % i * 10 for i in range(3)]
+
+    def encrypt(data, sequence):
+        pad = 16 - len(data) % 16
+        iv = sequence.to_bytes(16, "big")
+        return aes.new(key, aes.MODE_CBC, iv).encrypt(data + bytes([pad]) * pad)
+
+    playlist = '#EXTM3U\n#EXT-X-MEDIA-SEQUENCE:3\n#EXT-X-KEY:METHOD=AES-128,URI="k.bin"\n'
+    playlist += "".join(f"#EXTINF:1.0,\ns{i}.ts\n" for i in range(3))
+    files = {"https://cdn/i.m3u8": playlist.encode(), "https://cdn/k.bin": key}
+    files.update({f"https://cdn/s{i}.ts": encrypt(plain[i], 3 + i) for i in range(3)})
+    monkeypatch.setattr(downloader, "_get_media_session", lambda: _CdnSession(files))
+    monkeypatch.setattr(downloader, "_remux_segments", _fake_remux)
+
+    output = tmp_path / "out.mp4"
+    downloader.download_hls("https://cdn/i.m3u8", str(output))
+    assert output.read_bytes() == b"".join(plain)
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# live_recorder 依赖 execjs/distro 等录制环境，缺失时跳过
+async_http = pytest.importorskip("live_recorder.http_clients.async_http")
+
+
+@pytest.fixture
+def room_server():
+    seen = {"connections": set(), "cookies": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            seen["connections"].add(self.client_address)
+            seen["cookies"].append(self.headers.get("Cookie"))
+            body = b"room"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Set-Cookie", "session=abc; Path=/")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/room", seen
+    server.shutdown()
+
+
+def test_requests_share_one_keep_alive_connection(room_server):
+    url, seen = room_server
+
+    async def sweep():
+        results = [await async_http.async_req(url, http2=False) for _ in range(5)]
+        client = async_http.get_async_client(http2=False)
+        await async_http.aclose_clients()
+        return results, client
+
+    results, client = asyncio.run(sweep())
+
+    assert results == ["room"] * 5
+    assert len(seen["connections"]) == 1
+    assert client.is_closed
+
+
+def test_shared_client_does_not_leak_cookies_between_requests(room_server):
+    url, seen = room_server
+
+    async def sweep():
+        cookies = await async_http.async_req(url, http2=False, return_cookies=True)
+        await async_http.async_req(url, http2=False)
+        await async_http.aclose_clients()
+        return cookies
+
+    assert asyncio.run(sweep()) == {"session": "abc"}
+    assert seen["cookies"] == [None, None]
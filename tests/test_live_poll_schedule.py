@@ -0,0 +1,79 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from live_poll_schedule import HOT_LEAD_SECONDS, PollSchedule  # noqa: E402
+from live_room_poller import LiveRoomPoller  # noqa: E402
+
+URL = "https://live.douyin.com/1"
+
+
+def _at(day, hour, minute=0):
+    return time.mktime((2026, 3, day, hour, minute, 0, 0, 0, -1))
+
+
+def test_offline_and_error_back_off_exponentially_up_to_cap():
+    schedule = PollSchedule(None, base_interval=60, max_interval=600, jitter=0)
+    now = _at(2, 3)
+
+    assert [schedule.record(URL, False, now=now) for _ in range(5)] == [60, 120, 240, 480, 600]
+    assert schedule.record(URL, True, now=now) == 60
+    assert schedule.record(URL, False, now=now) == 60
+    assert schedule.record(URL, False, error=True, now=now) == 120
+    assert schedule.record(URL, False, error=True, now=now) == 240
+
+
+def test_learned_live_hours_poll_more_often():
+    schedule = PollSchedule(None, base_interval=60, max_interval=3600, jitter=0)
+    for day in (2, 3):
+        # 同一小时多次检查只计一次
+        for minute in (0, 10, 20):
+            schedule.record(URL, True, now=_at(day, 20, minute))
+    for _ in range(10):
+        schedule.record(URL, False, now=_at(4, 3))
+
+    assert schedule.record(URL, False, now=_at(4, 20, 30)) == schedule.hot_interval
+    assert schedule.is_hot(URL, now=_at(4, 19, 50))
+    # 热门时段前：退避间隔被截断到热门时段（含提前量）开始
+    assert schedule.record(URL, False, now=_at(4, 19)) == 3600 - HOT_LEAD_SECONDS
+    assert schedule.record(URL, False, now=_at(4, 12)) == 3600
+    assert schedule.rooms[URL].hour_weights[20] == 1.9
+
+
+def test_schedule_persists_and_jitter_spreads_checks(tmp_path):
+    path = tmp_path / "poll_schedule.json"
+    schedule = PollSchedule(str(path), base_interval=100, jitter=0.1)
+    delays = {schedule.record(f"{URL}{i}", False) for i in range(20)}
+    assert len(delays) > 1 and all(90 <= delay <= 110 for delay in delays)
+    schedule.save()
+
+    restored = PollSchedule(str(path), base_interval=100)
+    urls = [f"{URL}{i}" for i in range(20)] + ["https://www.huya.com/new"]
+    assert restored.due(urls) == ["https://www.huya.com/new"]
+    assert restored.rooms[f"{URL}0"].offline_streak == 1
+    assert 80 < restored.seconds_until_next(urls[:20]) <= 110
+
+
+def test_poller_only_checks_due_rooms_and_records_results():
+    schedule = PollSchedule(None, base_interval=60, jitter=0)
+    results = {"https://a.example/1": True, "https://a.example/2": False, "https://a.example/3": None}
+    checked = []
+
+    async def check(url):
+        checked.append(url)
+        if url == "https://a.example/4":
+            raise RuntimeError("boom")
+        return results[url]
+
+    poller = LiveRoomPoller(check, lambda url: "a", platform_intervals={}, schedule=schedule)
+    urls = list(results) + ["https://a.example/4"]
+    asyncio.run(poller.sweep(schedule.due(urls)))
+
+    assert sorted(checked) == urls
+    assert schedule.due(urls) == ["https://a.example/3"]
+    assert schedule.rooms["https://a.example/4"].error_streak == 1
+    assert schedule.rooms["https://a.example/1"].last_live > 0
@@ -0,0 +1,83 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from live_room_poller import LiveRoomPoller, PlatformRateLimiter  # noqa: E402
+
+
+def _platform(url):
+    return url.split("/")[2].split(".")[-2]
+
+
+def test_sweep_checks_rooms_concurrently_under_limit():
+    active = 0
+    peak = 0
+    checked = []
+
+    async def check(url):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        checked.append(url)
+        active -= 1
+
+    urls = [f"https://live.example{i % 5}.com/{i}" for i in range(100)]
+    poller = LiveRoomPoller(check, _platform, max_concurrency=50, platform_intervals={}, log=None)
+    poller.rate_limiter.default_interval = 0
+    elapsed = asyncio.run(poller.sweep(urls + urls[:10]))
+
+    assert sorted(checked) == sorted(urls)
+    assert peak == 50
+    # 串行需要 100 × 0.05 = 5 秒
+    assert elapsed < 0.5
+
+
+def test_platform_interval_spaces_requests_per_platform():
+    starts = {}
+
+    async def check(url):
+        starts.setdefault(_platform(url), []).append(time.monotonic())
+
+    urls = [f"https://live.douyin.com/{i}" for i in range(4)] + [f"https://www.huya.com/{i}" for i in range(4)]
+    poller = LiveRoomPoller(check, _platform, platform_intervals={"douyin": 0.05, "huya": 0})
+    asyncio.run(poller.sweep(urls))
+
+    douyin = starts["douyin"]
+    assert all(later - earlier >= 0.04 for earlier, later in zip(douyin, douyin[1:]))
+    assert starts["huya"][-1] - starts["huya"][0] < 0.03
+
+
+def test_failures_are_logged_and_run_stops_on_flag():
+    logs = []
+    sweeps = []
+
+    async def check(url):
+        raise RuntimeError("boom")
+
+    poller = LiveRoomPoller(check, _platform, platform_intervals={}, log=logs.append)
+    poller.rate_limiter.default_interval = 0
+
+    def is_running():
+        sweeps.append(None)
+        return len(sweeps) < 3
+
+    asyncio.run(poller.run(["https://live.douyin.com/1"], interval=0, is_running=is_running))
+
+    assert any("boom" in message for message in logs)
+
+
+def test_rate_limiter_without_interval_does_not_wait():
+    limiter = PlatformRateLimiter({}, default_interval=0)
+
+    async def acquire_many():
+        started = time.monotonic()
+        for _ in range(100):
+            await limiter.acquire("douyin")
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire_many()) < 0.05
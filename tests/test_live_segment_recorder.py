@@ -0,0 +1,120 @@
+import json
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from live_segment_recorder import SegmentRecorder, parse_progress  # noqa: E402
+
+# 假 ffmpeg：第一次运行按 FAKE_MODE 输出分段，之后的运行都直接失败（模拟直播已结束）
+FAKE_FFMPEG = r'''#!{python}
+import json, os, shutil, sys, time
+args = sys.argv[1:]
+if "-movflags" in args:
+    shutil.copyfile(args[args.index("-i") + 1], args[-1])
+    sys.exit(0)
+calls = os.environ["FAKE_CALLS"]
+with open(calls, "a") as f:
+    f.write(json.dumps(args) + "\n")
+if sum(1 for _ in open(calls)) > 1:
+    sys.exit(1)
+pattern = args[-1]
+start = int(args[args.index("-segment_start_number") + 1])
+mode = os.environ["FAKE_MODE"]
+
+def progress(seconds):
+    sys.stderr.write("size=    1024KiB time=00:00:%05.2f bitrate=2048.0kbits/s speed=1x    \r" % seconds)
+
+if mode == "segments":
+    for i in range(3):
+        path = pattern % (start + i)
+        sys.stderr.write("[segment @ 0x1] Opening '%s' for writing\n" % path)
+        with open(path, "wb") as f:
+            f.write(b"x" * 1000)
+        # 远超管道缓冲区的 stderr 输出，读取方不消费就会卡住
+        for n in range(3000):
+            progress(i * 10 + n / 1000)
+    sys.stderr.flush()
+elif mode == "stall":
+    sys.stderr.write("[segment @ 0x1] Opening '%s' for writing\n" % (pattern % start))
+    open(pattern % start, "wb").write(b"x" * 100)
+    progress(1.0)
+    sys.stderr.flush()
+    time.sleep(60)
+elif mode == "grow":
+    path = pattern % start
+    sys.stderr.write("[segment @ 0x1] Opening '%s' for writing\n" % path)
+    progress(1.0)
+    sys.stderr.flush()
+    with open(path, "wb") as f:
+        f.write(b"x" * 4096)
+    sys.stdin.read(1)  # 等待 q
+'''
+
+
+def _fake_ffmpeg(tmp_path, monkeypatch, mode):
+    script = tmp_path / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.replace("{python}", sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    calls = tmp_path / "calls.jsonl"
+    monkeypatch.setenv("FAKE_CALLS", str(calls))
+    monkeypatch.setenv("FAKE_MODE", mode)
+    return str(script), calls
+
+
+def _record(tmp_path, ffmpeg, **kwargs):
+    logs = []
+    out_dir = tmp_path / "out"
+    recorder = SegmentRecorder("https://cdn.example/live.flv", str(out_dir), "room", ffmpeg=ffmpeg,
+                               max_reconnects=0, log=logs.append, **kwargs).start()
+    recorder.join(timeout=30)
+    assert not recorder.is_alive()
+    recorder.wait_remux(timeout=30)
+    return recorder, out_dir, logs
+
+
+def test_parse_progress():
+    line = "frame=  250 fps= 25 q=-1.0 size=    1024KiB time=00:01:02.50 bitrate= 838.9kbits/s speed=1.0x"
+    assert parse_progress(line) == {"out_seconds": 62.5, "bitrate_kbps": 838.9}
+    assert parse_progress("size=N/A time=00:00:01.00 bitrate=N/A speed=1x") == {"out_seconds": 1.0}
+    assert parse_progress("[segment @ 0x1] Opening 'a.ts' for writing") is None
+
+
+def test_segments_are_drained_remuxed_and_numbered_across_reconnects(tmp_path, monkeypatch):
+    ffmpeg, calls = _fake_ffmpeg(tmp_path, monkeypatch, "segments")
+
+    recorder, out_dir, logs = _record(tmp_path, ffmpeg)
+
+    assert sorted(os.listdir(out_dir)) == ["room_000.mp4", "room_001.mp4", "room_002.mp4"]
+    assert recorder.bitrate_kbps == 2048.0
+    runs = [json.loads(line) for line in calls.read_text().splitlines()]
+    assert len(runs) == 2
+    assert runs[1][runs[1].index("-segment_start_number") + 1] == "3"
+    assert recorder.reconnects == 1
+
+
+def test_stalled_stream_is_killed_and_reconnected(tmp_path, monkeypatch):
+    ffmpeg, calls = _fake_ffmpeg(tmp_path, monkeypatch, "stall")
+
+    started = time.monotonic()
+    recorder, out_dir, logs = _record(tmp_path, ffmpeg, stall_timeout=1.5, convert_to_mp4=False)
+
+    assert time.monotonic() - started < 15
+    assert any("判定断流" in message for message in logs)
+    assert len(calls.read_text().splitlines()) == 2
+    assert recorder.outputs == [str(out_dir / "room_000.ts")]
+
+
+def test_size_limit_rotates_segment(tmp_path, monkeypatch):
+    ffmpeg, calls = _fake_ffmpeg(tmp_path, monkeypatch, "grow")
+
+    recorder, out_dir, logs = _record(tmp_path, ffmpeg, segment_size_mb=0.002)
+
+    runs = [json.loads(line) for line in calls.read_text().splitlines()]
+    assert runs[1][runs[1].index("-segment_start_number") + 1] == "1"
+    assert recorder.reconnects == 0
+    assert os.listdir(out_dir) == ["room_000.mp4"]
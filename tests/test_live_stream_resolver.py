@@ -0,0 +1,70 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from live_stream_resolver import LiveStreamResolver, platform_for  # noqa: E402
+
+
+def test_platform_for_matches_room_urls():
+    assert platform_for("https://live.douyin.com/745964462470").name == "douyin"
+    assert platform_for("https://www.huya.com/52333").name == "huya"
+    assert platform_for("https://live.bilibili.com/320").name == "bilibili"
+    assert platform_for("https://www.twitch.tv/gamerbee").name == "twitch"
+    assert platform_for("https://example.com/room/1") is None
+
+
+def test_resolve_builds_stream_url_with_quality_and_proxy():
+    calls = []
+
+    async def get_huya_stream_data(url, proxy_addr=None, cookies=None):
+        calls.append(("fetch", url, proxy_addr))
+        return {"anchor_name": "主播A", "is_live": True}
+
+    async def get_huya_stream_url(json_data, video_quality):
+        calls.append(("stream", video_quality))
+        return {
+            "anchor_name": json_data["anchor_name"],
+            "is_live": True,
+            "title": "标题",
+            "quality": video_quality,
+            "flv_url": "https://cdn.example/a.flv",
+            "record_url": "https://cdn.example/a.flv",
+        }
+
+    spider = SimpleNamespace(get_huya_stream_data=get_huya_stream_data)
+    stream = SimpleNamespace(get_huya_stream_url=get_huya_stream_url)
+    resolver = LiveStreamResolver(spider, stream, quality="高清", proxy_addr="127.0.0.1:7890",
+                                  proxy_platforms=["虎牙", "TikTok"])
+
+    room = asyncio.run(resolver.resolve("https://www.huya.com/52333"))
+
+    assert calls == [("fetch", "https://www.huya.com/52333", "127.0.0.1:7890"), ("stream", "HD")]
+    assert room.is_live and room.record_url == "https://cdn.example/a.flv"
+    assert room.platform == "huya" and room.anchor_name == "主播A"
+    assert resolver.cached("https://www.huya.com/52333") is room
+
+
+def test_offline_room_keeps_cached_metadata():
+    responses = [
+        {"anchor_name": "主播B", "is_live": True, "record_url": "https://cdn.example/b.m3u8"},
+        {"anchor_name": "", "is_live": False},
+        [],  # trace_error_decorator 出错时返回 []
+    ]
+
+    async def get_bigo_stream_url(url, proxy_addr=None, cookies=None):
+        assert proxy_addr is None
+        return responses.pop(0)
+
+    resolver = LiveStreamResolver(SimpleNamespace(get_bigo_stream_url=get_bigo_stream_url), SimpleNamespace(),
+                                  proxy_addr="127.0.0.1:7890", proxy_platforms=["TikTok"])
+    url = "https://www.bigo.tv/123"
+
+    assert asyncio.run(resolver.resolve(url)).is_live
+    for _ in range(2):
+        room = asyncio.run(resolver.resolve(url))
+        assert not room.is_live and room.record_url == ""
+        assert room.anchor_name == "主播B"
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import llm_client
+from src.llm_client import (
+    LLMClient,
+    LLMResponseCache,
+    LLMStats,
+    ProviderLimiter,
+    base_url_from_endpoint,
+    cache_key,
+    get_llm_client,
+)
+
+
+class FakeCompletions:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def create(self, model, messages, stream=False, **params):
+        self.requests.append(dict(params, model=model, messages=messages, stream=stream))
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        if stream:
+            return iter(
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))]) for part in reply
+            )
+        message = SimpleNamespace(content=reply, reasoning_content="思考")
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _client(tmp_path, replies, **cache_kwargs):
+    client = LLMClient("DeepSeek", "key", "https://api.deepseek.com/v1/chat/completions", "deepseek-chat",
+                       cache=LLMResponseCache(str(tmp_path), **cache_kwargs), stats=LLMStats())
+    completions = FakeCompletions(replies)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def test_normalized_prompts_hit_cache_and_params_are_part_of_key(tmp_path):
+    client, completions = _client(tmp_path, ["你好", "hello"])
+
+    first = client.chat([{"role": "user", "content": "翻译：hello  \r\n"}], temperature=0.3, purpose="translate")
+    again = client.chat([{"role": "user", "content": "翻译：hello"}], temperature=0.3, purpose="translate")
+    other = client.chat([{"role": "user", "content": "翻译：hello"}], temperature=0.7, purpose="translate")
+
+    assert (first.text, first.cached, again.text, again.cached) == ("你好", False, "你好", True)
+    assert again.reasoning == "思考"
+    assert other.text == "hello" and not other.cached
+    assert len(completions.requests) == 2 and "max_tokens" not in completions.requests[0]
+    assert client.base_url == "https://api.deepseek.com/v1"
+
+    snapshot = client.stats.snapshot()
+    assert (snapshot["calls"], snapshot["cache_hits"], snapshot["prompt_tokens"]) == (3, 1, 20)
+    assert snapshot["by_purpose"]["translate"]["cache_hits"] == 1
+    assert "缓存命中 1 次（33%）" in client.stats.format_report()
+
+
+def test_bypass_and_failures_do_not_reuse_results(tmp_path, monkeypatch):
+    client, completions = _client(tmp_path, ["A", "B", RuntimeError("503"), "C", "D"])
+    messages = [{"role": "user", "content": "同一个问题"}]
+
+    assert client.chat(messages).text == "A"
+    assert client.chat(messages, use_cache=False).text == "B"
+    assert client.chat(messages).text == "B"
+    monkeypatch.setenv("LLM_CACHE", "0")
+    with pytest.raises(RuntimeError):
+        client.chat(messages)
+    assert client.chat(messages).text == "C"
+    monkeypatch.delenv("LLM_CACHE")
+    assert client.complete("系统", "新问题") == "D"
+    assert client.stats.errors == 1 and len(completions.requests) == 5
+
+
+def test_stream_deltas_are_cached_and_replayed(tmp_path):
+    client, _completions = _client(tmp_path, [["第一", "段"]])
+    deltas = []
+
+    result = client.chat([{"role": "user", "content": "写一段"}], stream=True, on_delta=deltas.append)
+    replay = client.chat([{"role": "user", "content": "写一段"}], stream=True, on_delta=deltas.append)
+
+    assert result.text == replay.text == "第一段" and replay.cached
+    assert deltas == ["第一", "段", "第一段"]
+
+
+def test_expired_entries_miss_and_size_limit_prunes_least_recently_used(tmp_path):
+    cache = LLMResponseCache(str(tmp_path), ttl=60, max_bytes=1400)
+    keys = [cache_key("u", "m", [{"role": "user", "content": str(i)}], {}) for i in range(6)]
+    for index, key in enumerate(keys[:5]):
+        cache.put(key, {"text": "x" * 200})
+        past = time.time() - 50 + index
+        os.utime(cache._path(key), (past, past))
+    assert cache.get(keys[0])["text"] == "x" * 200
+
+    cache.put(keys[5], {"text": "y" * 200})
+    remaining = [key for key in keys if os.path.exists(cache._path(key))]
+    assert keys[0] in remaining and keys[1] not in remaining and keys[5] in remaining
+    assert sum(os.path.getsize(cache._path(key)) for key in remaining) <= 1260
+
+    path = cache._path(keys[0])
+    with open(path, "r", encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["created"] = time.time() - 120
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    assert cache.get(keys[0]) is None and not os.path.exists(path)
+
+
+def test_endpoint_urls_are_reduced_to_base_url():
+    assert base_url_from_endpoint("https://api.deepseek.com/v1/chat/completions/") == "https://api.deepseek.com/v1"
+    assert base_url_from_endpoint("https://api.openai.com/v1") == "https://api.openai.com/v1"
+
+
+def test_factory_shares_clients_and_connection_pools_per_endpoint_and_key(monkeypatch):
+    created = []
+    monkeypatch.setattr(llm_client, "_sdk_clients", {})
+    monkeypatch.setattr(llm_client, "_llm_clients", {})
+    monkeypatch.setattr("openai.OpenAI", lambda **kwargs: created.append(kwargs) or SimpleNamespace(**kwargs))
+
+    chat = get_llm_client("DeepSeek", "k1", "https://api.deepseek.com/v1/chat/completions", "deepseek-chat")
+    assert get_llm_client("DeepSeek", "k1", "https://api.deepseek.com/v1", "deepseek-chat") is chat
+    reasoner = get_llm_client("DeepSeek", "k1", "https://api.deepseek.com/v1", "deepseek-reasoner")
+    other_key = get_llm_client("DeepSeek", "k2", "https://api.deepseek.com/v1", "deepseek-chat")
+
+    assert reasoner is not chat and reasoner.client is chat.client
+    assert other_key.client is not chat.client
+    assert [kwargs["api_key"] for kwargs in created] == ["k1", "k2"]
+    assert chat.limiter is other_key.limiter
+
+
+def test_limiter_caps_concurrency_across_threads_and_coroutines(tmp_path):
+    client, completions = _client(tmp_path, [f"r{i}" for i in range(8)])
+    client.limiter = ProviderLimiter(max_concurrency=2)
+    lock = threading.Lock()
+    active = peak = 0
+    create = completions.create
+
+    def slow_create(**kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return create(**kwargs)
+
+    completions.create = slow_create
+    threads = [threading.Thread(target=client.complete, args=("s", f"q{i}")) for i in range(4)]
+    for thread in threads:
+        thread.start()
+
+    async def run_async():
+        return await asyncio.gather(*(client.acomplete("s", f"a{i}") for i in range(4)))
+
+    answers = asyncio.run(run_async())
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2 and len(completions.requests) == 8
+    assert all(answer.startswith("r") for answer in answers)
+
+
+def test_limiter_spaces_requests_to_requests_per_minute():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = ProviderLimiter(max_concurrency=0, rpm=2, clock=lambda: now[0], sleep=sleep)
+    starts = []
+    for _ in range(5):
+        with limiter.slot():
+            starts.append(now[0])
+        now[0] += 1
+
+    assert starts == [0, 1, 60, 61, 120]
+    assert sleeps == [58, 58]
+
+
+def test_provider_limits_come_from_environment(monkeypatch):
+    monkeypatch.setattr(llm_client, "_limiters", {})
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "6")
+    monkeypatch.setenv("LLM_RPM_DEEP_SEEK", "30")
+
+    limiter = llm_client.provider_limiter("Deep-Seek")
+    assert (limiter.max_concurrency, limiter.rpm) == (6, 30)
+    assert llm_client.provider_limiter("OpenAI").rpm == 0
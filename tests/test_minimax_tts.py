@@ -1,4 +1,5 @@
 import io
+import json
 import subprocess
 import sys
 import wave
@@ -40,7 +41,7 @@ def test_client_writes_wav_and_builds_expected_payload(monkeypatch, tmp_path):
         }
     )
     post = Mock(return_value=response)
-    monkeypatch.setattr("src.minimax_tts_client.requests.post", post)
+    monkeypatch.setattr("src.minimax_tts_client.requests.Session.post", post)
 
     target = tmp_path / "sample.wav"
     client = MiniMaxTTSClient(
@@ -72,7 +73,7 @@ def test_client_rejects_zero_duration_wav(monkeypatch, tmp_path):
         }
     )
     monkeypatch.setattr(
-        "src.minimax_tts_client.requests.post", Mock(return_value=response)
+        "src.minimax_tts_client.requests.Session.post", Mock(return_value=response)
     )
 
     client = MiniMaxTTSClient(api_key="sk-test", max_retries=0)
@@ -91,7 +92,7 @@ def test_client_retries_rate_limit(monkeypatch, tmp_path):
         }
     )
     post = Mock(side_effect=[make_response(status_code=429), success])
-    monkeypatch.setattr("src.minimax_tts_client.requests.post", post)
+    monkeypatch.setattr("src.minimax_tts_client.requests.Session.post", post)
     monkeypatch.setattr("src.minimax_tts_client.time.sleep", Mock())
 
     client = MiniMaxTTSClient(api_key="sk-test", max_retries=1)
@@ -118,7 +119,7 @@ def test_client_retries_application_rate_limit(monkeypatch, tmp_path):
     )
     post = Mock(side_effect=[limited, success])
     sleep = Mock()
-    monkeypatch.setattr("src.minimax_tts_client.requests.post", post)
+    monkeypatch.setattr("src.minimax_tts_client.requests.Session.post", post)
     monkeypatch.setattr("src.minimax_tts_client.time.sleep", sleep)
 
     client = MiniMaxTTSClient(
@@ -135,7 +136,7 @@ def test_client_retries_application_rate_limit(monkeypatch, tmp_path):
 def test_client_redacts_keys_from_http_errors(monkeypatch, tmp_path):
     secret = "sk-test-secret-value"
     response = make_response(status_code=401, text=f"invalid token {secret}")
-    monkeypatch.setattr("src.minimax_tts_client.requests.post", Mock(return_value=response))
+    monkeypatch.setattr("src.minimax_tts_client.requests.Session.post", Mock(return_value=response))
     client = MiniMaxTTSClient(api_key=secret, max_retries=0)
 
     with pytest.raises(RuntimeError) as exc_info:
@@ -145,6 +146,59 @@ def test_client_redacts_keys_from_http_errors(monkeypatch, tmp_path):
     assert "[REDACTED]" in str(exc_info.value)
 
 
+def test_client_reuses_pooled_connections_across_threads(tmp_path):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    body = json.dumps(
+        {
+            "data": {"audio": make_wav_bytes().hex(), "status": 2},
+            "base_resp": {"status_code": 0, "status_msg": "success"},
+        }
+    ).encode()
+    connections = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            with lock:
+                connections.add(self.client_address)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = MiniMaxTTSClient(
+        api_key="sk-test",
+        api_url=f"http://127.0.0.1:{server.server_port}/v1/t2a_v2",
+        max_retries=0,
+        min_request_interval=0,
+        pool_size=4,
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(lambda i: client.synthesize(f"第{i}句。", tmp_path / f"{i}.wav"), range(40))
+            )
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert len(results) == 40
+    assert len(connections) <= 4
+
+
 def test_dubbing_engine_routes_minimax_and_merges_subtitle_audio(monkeypatch, tmp_path):
     subtitle_path = tmp_path / "sample.srt"
     subtitle_path.write_text(
@@ -222,7 +276,10 @@ def test_exe_download_command_is_resumable_and_bounded(monkeypatch, tmp_path):
         captured["timeout_seconds"] = timeout_seconds
         output = tmp_path / "sample_pZypOP-D7LU.mp4"
         output.write_bytes(b"video")
-        return subprocess.CompletedProcess(cmd, 0, stdout="downloaded", stderr="")
+        # 目录里的旧文件不应再被当作下载结果
+        (tmp_path / "older_pZypOP-D7LU.mp4").write_bytes(b"old")
+        printed = json.dumps({"id": "pZypOP-D7LU", "ext": "mp4", "duration": 42, "filepath": str(output)})
+        return subprocess.CompletedProcess(cmd, 0, stdout=f"[download] 100%\n[videohub-result]{printed}", stderr="")
 
     monkeypatch.setattr(youtube_transcriber, "_run_process_with_live_output", fake_run)
     monkeypatch.setenv("YTDLP_DOWNLOAD_TIMEOUT_SECONDS", "1800")
@@ -245,7 +302,9 @@ def test_exe_download_command_is_resumable_and_bounded(monkeypatch, tmp_path):
     assert "--merge-output-format" in cmd
     assert "-k" not in cmd
     assert captured["timeout_seconds"] == 1800
+    assert "--print" in cmd and cmd[cmd.index("--print") + 1].startswith("after_move:")
     assert info["filepath"].endswith("sample_pZypOP-D7LU.mp4")
+    assert info["duration"] == 42
 
 
 def test_live_process_timeout_terminates_command():
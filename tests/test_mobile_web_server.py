@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import mobile_web_server  # noqa: E402
+from mobile_web_server import DownloadJobPool, create_app  # noqa: E402
+
+
+class _BlockingJobs:
+    """假的下载函数：每个任务阻塞到 release() 后才结束，记录并发峰值"""
+
+    def __init__(self):
+        self.release_event = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.started = []
+
+    def __call__(self, pool, job_id, url):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.started.append(url)
+        pool.update(job_id, status="downloading", progress=10)
+        self.release_event.wait(5)
+        with self.lock:
+            self.active -= 1
+        pool.update(job_id, status="finished", progress=100, file=None, filename="video.mp4")
+
+    def wait_started(self, count):
+        deadline = time.time() + 5
+        while len(self.started) < count and time.time() < deadline:
+            time.sleep(0.01)
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    fake = _BlockingJobs()
+    pool = DownloadJobPool(workers=2, job_ttl=3600, state_file=tmp_path / "jobs.json", run_job=fake)
+    yield fake, pool
+    fake.release_event.set()
+    pool.shutdown(timeout=2)
+
+
+def test_pool_caps_concurrency_and_reports_queue_position(jobs):
+    fake, pool = jobs
+    client = create_app(pool).test_client()
+
+    ids = []
+    for i in range(4):
+        response = client.post("/api/download", json={"url": f"https://example.com/v/{i}"})
+        assert response.status_code == 200
+        ids.append(response.get_json()["id"])
+    fake.wait_started(2)
+    time.sleep(0.05)
+
+    assert fake.peak == 2
+    last = client.get(f"/api/jobs/{ids[3]}").get_json()
+    assert last["status"] == "queued"
+    assert last["queue_position"] == 2
+    assert last["queue_length"] == 2
+    assert "temp_files" not in last and "file" not in last
+    assert client.get(f"/api/jobs/{ids[0]}").get_json()["queue_position"] is None
+
+    fake.release_event.set()
+    deadline = time.time() + 5
+    while time.time() < deadline and any(pool.get(job_id)["status"] != "finished" for job_id in ids):
+        time.sleep(0.01)
+    assert all(pool.get(job_id)["status"] == "finished" for job_id in ids)
+    assert fake.peak == 2
+
+
+def test_full_queue_is_rejected(tmp_path):
+    fake = _BlockingJobs()
+    pool = DownloadJobPool(workers=1, state_file=tmp_path / "jobs.json", max_queued=1, run_job=fake)
+    client = create_app(pool).test_client()
+    try:
+        assert client.post("/api/download", json={"url": "https://example.com/v/1"}).status_code == 200
+        fake.wait_started(1)
+        assert client.post("/api/download", json={"url": "https://example.com/v/2"}).status_code == 200
+        response = client.post("/api/download", json={"url": "https://example.com/v/3"})
+        assert response.status_code == 429
+        assert response.get_json()["success"] is False
+    finally:
+        fake.release_event.set()
+        pool.shutdown(timeout=2)
+
+
+def test_unfinished_jobs_are_requeued_after_restart(tmp_path):
+    state_file = tmp_path / "jobs.json"
+    pool = DownloadJobPool(workers=1, state_file=state_file, run_job=lambda *args: None)
+    done = pool.submit("https://example.com/v/done")
+    pending = pool.submit("https://example.com/v/pending")
+    pool.update(done["id"], status="finished", progress=100, filename="done.mp4")
+    pool.update(pending["id"], status="downloading", progress=40)
+
+    saved = json.loads(state_file.read_text(encoding="utf-8"))
+    assert saved[done["id"]]["status"] == "finished"
+
+    restarted = DownloadJobPool(workers=1, state_file=state_file, run_job=lambda *args: None)
+    assert restarted.get(done["id"])["status"] == "finished"
+    resumed = restarted.public_job(pending["id"])
+    assert resumed["status"] == "queued"
+    assert resumed["queue_position"] == 1
+
+
+def test_expired_jobs_and_temp_files_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(mobile_web_server, "DOWNLOAD_DIR", tmp_path)
+    final_file = tmp_path / "clip_abc.mp4"
+    final_file.write_bytes(b"video")
+    leftover = tmp_path / "clip_abc.f137.mp4"
+    (tmp_path / "clip_abc.f137.mp4.part").write_bytes(b"partial")
+    (tmp_path / "clip_abc.f137.mp4.ytdl").write_text("{}")
+
+    pool = DownloadJobPool(workers=1, job_ttl=60, state_file=tmp_path / "jobs.json", run_job=lambda *args: None)
+    job = pool.submit("https://example.com/v/1")
+    pool.add_temp_files(job["id"], str(leftover) + ".part", str(leftover), str(final_file))
+    pool.update(job["id"], status="finished", file=str(final_file), filename=final_file.name)
+
+    assert pool.evict_expired(now=time.time() + 30) == []
+    assert pool.evict_expired(now=time.time() + 120) == [job["id"]]
+
+    assert pool.get(job["id"]) is None
+    assert final_file.exists()
+    assert not (tmp_path / "clip_abc.f137.mp4.part").exists()
+    assert not (tmp_path / "clip_abc.f137.mp4.ytdl").exists()
+    assert job["id"] not in json.loads((tmp_path / "jobs.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def served_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(mobile_web_server, "DOWNLOAD_DIR", tmp_path)
+    video = tmp_path / "演讲_abc.mp4"
+    video.write_bytes(bytes(range(256)) * 40)
+    pool = DownloadJobPool(workers=1, state_file=tmp_path / "jobs.json", run_job=lambda *args: None)
+    job = pool.submit("https://example.com/v/1")
+    pool.update(job["id"], status="finished", file=str(video), filename=video.name)
+    yield create_app(pool), f"/files/{job['id']}", video.read_bytes()
+    pool.shutdown(timeout=2)
+
+
+def test_file_download_supports_range_and_validators(served_file):
+    app, path, data = served_file
+    client = app.test_client()
+
+    full = client.get(path)
+    assert full.status_code == 200
+    assert full.data == data
+    assert full.headers["Accept-Ranges"] == "bytes"
+    assert "filename*=UTF-8''" in full.headers["Content-Disposition"]
+    etag = full.headers["ETag"]
+
+    partial = client.get(path, headers={"Range": "bytes=100-299"})
+    assert partial.status_code == 206
+    assert partial.data == data[100:300]
+    assert partial.headers["Content-Range"] == f"bytes 100-299/{len(data)}"
+
+    tail = client.get(path, headers={"Range": "bytes=-16", "If-Range": etag})
+    assert tail.status_code == 206 and tail.data == data[-16:]
+
+    assert client.get(path, headers={"Range": "bytes=0-9", "If-Range": '"stale"'}).data == data
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(path, headers={"If-Modified-Since": full.headers["Last-Modified"]}).status_code == 304
+    assert client.get(path, headers={"Range": f"bytes={len(data)}-"}).status_code == 416
+
+
+def test_file_download_uses_sendfile_on_builtin_server(served_file, monkeypatch):
+    import http.client
+    import socket as socket_module
+
+    from werkzeug.serving import make_server
+
+    app, path, data = served_file
+    sendfile_calls = []
+    original_sendfile = socket_module.socket.sendfile
+
+    def tracking_sendfile(self, file, offset=0, count=None):
+        sendfile_calls.append((offset, count))
+        return original_sendfile(self, file, offset, count)
+
+    monkeypatch.setattr(socket_module.socket, "sendfile", tracking_sendfile)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+        connection.request("GET", path, headers={"Range": "bytes=1000-"})
+        response = connection.getresponse()
+        assert response.status == 206
+        assert response.read() == data[1000:]
+        connection.close()
+    finally:
+        server.shutdown()
+    assert sendfile_calls == [(1000, len(data) - 1000)]
@@ -0,0 +1,205 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from src.speech_vad import (
+    SAMPLE_RATE,
+    detect_speech_regions,
+    extract_speech,
+    prepare_speech_audio,
+    remap_transcription,
+    text_accuracy,
+)
+
+
+def _speech(seconds, rng):
+    """音节节奏（约 4Hz）调制的噪声，模拟语音的能量起伏"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.4 + 0.6 * np.abs(np.sin(2 * np.pi * 2 * t))
+    return (0.2 * envelope * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _synthetic(layout, noise=0.001, seed=0):
+    """layout: [("silence"|"speech", 秒), ...]，返回音频和语音的真实区间"""
+    rng = np.random.default_rng(seed)
+    parts, truth, position = [], [], 0.0
+    for kind, seconds in layout:
+        if kind == "speech":
+            parts.append(_speech(seconds, rng))
+            truth.append((position, position + seconds))
+        else:
+            parts.append(np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32))
+        position += seconds
+    audio = np.concatenate(parts)
+    return audio + (noise * rng.standard_normal(len(audio))).astype(np.float32), truth
+
+
+def test_regions_cover_speech_and_skip_long_silence():
+    audio, truth = _synthetic([("silence", 30), ("speech", 8), ("silence", 0.3), ("speech", 4),
+                               ("silence", 60), ("speech", 10), ("silence", 20)])
+    regions = detect_speech_regions(audio)
+
+    # 0.3 秒的停顿不切开；两段长静音被跳过
+    assert len(regions) == 2
+    (first_start, first_end), (second_start, second_end) = regions
+    assert abs(first_start - truth[0][0]) < 0.3 and abs(first_end - truth[1][1]) < 0.3
+    assert abs(second_start - truth[2][0]) < 0.3 and abs(second_end - truth[2][1]) < 0.3
+
+    speech_seconds = sum(end - start for start, end in regions)
+    assert speech_seconds < 0.25 * len(audio) / SAMPLE_RATE
+
+
+def test_short_speech_in_long_silence_is_detected():
+    audio, truth = _synthetic([("silence", 90), ("speech", 3), ("silence", 90)])
+    regions = detect_speech_regions(audio)
+
+    assert len(regions) == 1
+    assert abs(regions[0][0] - truth[0][0]) < 0.3 and abs(regions[0][1] - truth[0][1]) < 0.3
+
+
+def test_clicks_and_silent_audio_produce_no_regions():
+    audio, _truth = _synthetic([("silence", 10)])
+    audio[SAMPLE_RATE * 5:SAMPLE_RATE * 5 + 800] = 0.5
+    assert detect_speech_regions(audio) == []
+    assert detect_speech_regions(np.zeros(SAMPLE_RATE * 3, dtype=np.float32)) == []
+
+
+def test_timestamps_are_remapped_to_original_timeline():
+    audio, _truth = _synthetic([("silence", 20), ("speech", 5), ("silence", 40), ("speech", 5)])
+    speech, timeline = prepare_speech_audio(audio)
+    (first_start, _first_end), (second_start, _second_end) = [(orig, orig + d) for _s, orig, d in timeline.pieces]
+    second_offset = timeline.pieces[1][0]
+    assert len(speech) < len(audio) / 5
+
+    result = {"segments": [
+        {"start": 1.0, "end": 2.5, "words": [{"start": 1.0, "end": 1.4}]},
+        {"start": second_offset + 0.5, "end": second_offset + 3.0},
+    ]}
+    remap_transcription(result, timeline)
+
+    assert abs(result["segments"][0]["start"] - (first_start + 1.0)) < 1e-6
+    assert abs(result["segments"][0]["words"][0]["end"] - (first_start + 1.4)) < 1e-6
+    assert abs(result["segments"][1]["start"] - (second_start + 0.5)) < 1e-6
+    # 落在拼接间隔里的时间归到前一区间末尾，不会跑到静音中间
+    assert timeline.to_original(second_offset - 0.1) == timeline.pieces[0][1] + timeline.pieces[0][2]
+
+
+def test_mostly_speech_audio_is_transcribed_whole():
+    audio, _truth = _synthetic([("speech", 20), ("silence", 0.4), ("speech", 20)])
+    assert prepare_speech_audio(audio) == (None, None)
+    assert extract_speech(audio, [])[1].pieces == []
+
+
+def test_transcription_only_sees_speech_when_vad_enabled(tmp_path, monkeypatch):
+    from src import youtube_transcriber
+
+    audio, _truth = _synthetic([("silence", 30), ("speech", 5), ("silence", 30)])
+    seen = []
+
+    class FakeModel:
+        def transcribe(self, audio_input, **params):
+            seen.append(audio_input)
+            return {"text": "hello", "language": "en", "segments": [{"start": 0.5, "end": 4.0, "text": "hello"}]}
+
+    monkeypatch.setattr(youtube_transcriber, "configure_cuda_for_whisper", lambda: "cpu")
+    monkeypatch.setattr(youtube_transcriber, "get_optimal_whisper_params", lambda device: {})
+    monkeypatch.setattr(youtube_transcriber, "load_whisper_model", lambda size, device: FakeModel())
+    monkeypatch.setattr(youtube_transcriber.whisper, "load_audio", lambda path: audio)
+
+    youtube_transcriber.transcribe_audio_unified("a.wav", output_dir=str(tmp_path), enable_vad=False)
+    text_path, _subtitle = youtube_transcriber.transcribe_audio_unified("a.wav", output_dir=str(tmp_path),
+                                                                        enable_vad=True)
+
+    assert seen[0] == "a.wav"
+    assert isinstance(seen[1], np.ndarray) and len(seen[1]) < len(audio) / 5
+    assert open(text_path, encoding="utf-8").read() == "hello"
+
+
+def test_text_accuracy_counts_missing_and_extra_words():
+    assert text_accuracy("the quick brown fox", "the quick brown fox") == 1.0
+    assert text_accuracy("the quick brown fox", "the quick fox thank you") == 0.25
+    assert text_accuracy("今天天气很好", "今天天气好") == 5 / 6
+
+
+def _fixture_clips(tmp_path, references):
+    """每个语音片段写成 wav，旁边放同名 .txt 参考文本"""
+    import soundfile as sf
+
+    rng = np.random.default_rng(1)
+    clips = []
+    for i, reference in enumerate(references):
+        clip = tmp_path / f"clip{i}.wav"
+        sf.write(clip, _speech(3, rng), SAMPLE_RATE)
+        clip.with_suffix(".txt").write_text(reference, encoding="utf-8")
+        clips.append(str(clip))
+    return clips
+
+
+def _fake_whisper(references):
+    """按检测到的有声区间依次输出参考文本；整段转录时在开头静音里多出一句幻觉字幕"""
+    seen = []
+
+    def transcribe(audio, **params):
+        seen.append(len(audio))
+        segments = [{"start": start, "end": end, "text": text}
+                    for (start, end), text in zip(detect_speech_regions(audio), references)]
+        if len(audio) > 60 * SAMPLE_RATE:
+            segments.insert(0, {"start": 1.0, "end": 3.0, "text": "thank you"})
+        return {"text": " ".join(segment["text"] for segment in segments), "segments": segments}
+
+    return transcribe, seen
+
+
+def test_benchmark_cli_reports_speed_and_accuracy(tmp_path, monkeypatch, capsys):
+    import sys
+    from types import SimpleNamespace
+
+    import soundfile as sf
+
+    from src import speech_vad
+
+    references = ["the quick brown fox", "jumps over the lazy dog"]
+    clips = _fixture_clips(tmp_path, references)
+    transcribe, seen = _fake_whisper(references)
+
+    def load_audio(path, ffmpeg="ffmpeg"):
+        return sf.read(path, dtype="float32")[0]
+
+    def build_synthetic_audio(clip_paths, output_path, silence_seconds, ffmpeg="ffmpeg"):
+        # 代替 ffmpeg lavfi：静音与片段按相同的布局拼接
+        parts, regions, position = [], [], 0.0
+        for clip, silence in zip(list(clip_paths) + [None], silence_seconds):
+            parts.append(np.zeros(int(silence * SAMPLE_RATE), dtype=np.float32))
+            position += silence
+            if clip is not None:
+                parts.append(load_audio(clip))
+                regions.append((position, position + len(parts[-1]) / SAMPLE_RATE))
+                position = regions[-1][1]
+        sf.write(output_path, np.concatenate(parts), SAMPLE_RATE)
+        return regions
+
+    monkeypatch.setattr(speech_vad, "_load_audio", load_audio)
+    monkeypatch.setattr(speech_vad, "build_synthetic_audio", build_synthetic_audio)
+    monkeypatch.setitem(sys.modules, "whisper", SimpleNamespace(
+        load_model=lambda size, device: SimpleNamespace(transcribe=transcribe)))
+
+    speech_vad.main(["--clips", *clips, "--model", "tiny"])
+    output = capsys.readouterr().out
+
+    assert "full: 转录 171 秒音频" in output and "静音中的分段 1 个" in output
+    assert "vad: 转录 7 秒音频" in output and "准确度 100.0%" in output and "静音中的分段 0 个" in output
+    assert "VAD 加速" in output and "准确度变化 +22.2%" in output
+    assert seen[0] > 15 * seen[1]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="需要 ffmpeg")
+def test_benchmark_builds_the_lavfi_set_with_ffmpeg(tmp_path):
+    from src.speech_vad import benchmark
+
+    references = ["the quick brown fox", "jumps over the lazy dog"]
+    transcribe, _seen = _fake_whisper(references)
+    report = benchmark(_fixture_clips(tmp_path, references), silence_seconds=(30, 90), transcribe=transcribe)
+
+    assert report["vad"]["accuracy"] == 1.0 and report["vad"]["segments_in_silence"] == 0
+    assert report["vad"]["audio_seconds"] < report["full"]["audio_seconds"] / 10
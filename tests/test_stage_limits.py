@@ -0,0 +1,35 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from src.stage_limits import StageLimiter
+
+
+def _record():
+    return SimpleNamespace(stage=None, stage_seconds={}, stage_wait_seconds={})
+
+
+def test_gate_caps_concurrency_and_accounts_wait_and_busy_time():
+    limiter = StageLimiter({"transcribe": 1, "download": 2}, {"download": 3})
+    records = [_record() for _ in range(3)]
+
+    def work(record):
+        with limiter.gate(record, "transcribe"):
+            time.sleep(0.05)
+        with limiter.gate(record, "upload"):
+            pass
+
+    threads = [threading.Thread(target=work, args=(record,)) for record in records]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = limiter.stats(records, wall_seconds=0.15)
+    assert limiter.limits == {"transcribe": 1, "download": 3}
+    assert stats["stage_peak_concurrency"]["transcribe"] == 1
+    assert stats["stage_peak_concurrency"]["upload"] >= 1
+    assert stats["stage_busy_seconds"]["transcribe"] >= 0.15
+    assert stats["stage_wait_seconds"]["transcribe"] >= 0.14
+    assert 0.9 < stats["stage_utilization"]["transcribe"] <= 1.2
+    assert all(record.stage == "upload" for record in records)
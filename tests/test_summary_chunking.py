@@ -0,0 +1,102 @@
+import threading
+import time
+
+from src.summary_chunking import (
+    ChunkSummaryCache,
+    estimate_tokens,
+    split_transcript,
+    summarize_chunks,
+)
+
+
+def _srt(count, text="这是一句用来测试分段的字幕内容。"):
+    blocks = []
+    for i in range(count):
+        start, end = i * 5, i * 5 + 4
+        blocks.append(f"{i + 1}\n00:{start // 60:02d}:{start % 60:02d},000 --> 00:{end // 60:02d}:{end % 60:02d},500\n{text}{i}\n")
+    return "\n".join(blocks)
+
+
+def test_subtitles_split_on_cue_boundaries_within_budget():
+    chunks = split_transcript(_srt(100), max_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk.text) <= 100 for chunk in chunks)
+    lines = [line for chunk in chunks for line in chunk.text.splitlines()]
+    assert lines == [f"这是一句用来测试分段的字幕内容。{i}" for i in range(100)]
+    assert chunks[0].time_range.startswith("00:00:00-")
+    assert chunks[1].start == chunks[0].end + 0.5
+    assert chunks[-1].time_range.endswith("00:08:19")
+
+
+def test_plain_text_splits_between_sentences_and_hard_splits_long_runs():
+    sentences = [f"Sentence number {i} talks about topic {i}. " for i in range(40)]
+    chunks = split_transcript("".join(sentences) + "x" * 400, max_tokens=50)
+
+    body = chunks[:-3]
+    assert all(chunk.text.endswith(".") for chunk in body)
+    assert " ".join(chunk.text for chunk in body) == "".join(sentences).strip()
+    assert "".join(chunk.text for chunk in chunks[-3:]) == "x" * 400
+    assert all(chunk.time_range == "" for chunk in chunks)
+
+
+def test_chunks_are_summarized_concurrently_and_cached(tmp_path):
+    chunks = split_transcript(_srt(60), max_tokens=100)
+    lock = threading.Lock()
+    active = peak = 0
+    prompts = []
+
+    def complete(system_prompt, user_prompt):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+            prompts.append(user_prompt)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return f"要点 {len(user_prompt)}"
+
+    cache = ChunkSummaryCache(str(tmp_path))
+    first = summarize_chunks(chunks, complete, "openai:gpt", cache=cache, max_workers=4, log=lambda message: None)
+    assert len(first) == len(chunks) and peak == 4
+    assert any(f"第 1/{len(chunks)} 个片段（00:00:00-" in prompt for prompt in prompts)
+
+    prompts.clear()
+    again = summarize_chunks(chunks, complete, "openai:gpt", cache=ChunkSummaryCache(str(tmp_path)),
+                             log=lambda message: None)
+    assert again == first and prompts == []
+
+    summarize_chunks(chunks[:1], complete, "deepseek:chat", cache=cache, log=lambda message: None)
+    assert len(prompts) == 1
+
+
+def test_long_transcript_reruns_only_reduce_for_new_style(tmp_path, monkeypatch):
+    from src import youtube_transcriber
+
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setenv("SUMMARY_SINGLE_PASS_TOKENS", "200")
+    monkeypatch.setenv("SUMMARY_CHUNK_TOKENS", "100")
+    monkeypatch.setattr(youtube_transcriber, "SUMMARY_CHUNK_CACHE_DIR", str(tmp_path))
+    map_calls = []
+    reduce_prompts = []
+    monkeypatch.setattr(
+        youtube_transcriber.TextSummaryComposite, "_chat_completion",
+        lambda self, system_prompt, user_prompt, use_deepseek=False: map_calls.append(user_prompt) or "要点",
+    )
+    monkeypatch.setattr(
+        youtube_transcriber.TextSummaryComposite, "_get_openai_summary",
+        lambda self, system_prompt, user_prompt, stream=False: reduce_prompts.append(user_prompt) or "文章",
+    )
+
+    content = _srt(60)
+    composite = youtube_transcriber.TextSummaryComposite()
+    assert composite.generate_summary(content, custom_prompt="风格A：{content}", output_model="OpenAI") == "文章"
+    chunk_count = len(map_calls)
+    assert chunk_count > 1
+    assert reduce_prompts[0].startswith("风格A：（原文较长")
+    assert "【第 1 段 00:00:00-" in reduce_prompts[0]
+
+    composite.generate_summary(content, custom_prompt="风格B：{content}", output_model="OpenAI")
+    assert len(map_calls) == chunk_count
+    assert reduce_prompts[1].startswith("风格B：")
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+
+from src.summary_stage import BackgroundSummaryStage, job_key
+from src.youtube_batch_pipeline import YouTubeBatchPipeline
+
+
+def _summarizer(tmp_path, calls, seconds=0.0):
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def summarize(text_path, output_dir=None, custom_prompt=None, template_path=None):
+        with lock:
+            calls.append(text_path)
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(seconds)
+        with lock:
+            active["now"] -= 1
+        if "broken" in text_path:
+            raise RuntimeError("model unavailable")
+        output = tmp_path / f"{text_path.rsplit('/', 1)[-1]}.md"
+        output.write_text("article", encoding="utf-8")
+        return str(output)
+
+    return summarize, active
+
+
+def _transcript(tmp_path, name):
+    path = tmp_path / name
+    path.write_text("transcript", encoding="utf-8")
+    return str(path)
+
+
+def test_jobs_run_concurrently_up_to_limit_and_failures_are_reported(tmp_path):
+    calls = []
+    summarize, active = _summarizer(tmp_path, calls, seconds=0.1)
+    stage = BackgroundSummaryStage(summarize, max_workers=2, log=lambda message: None)
+
+    started = time.perf_counter()
+    futures = [stage.submit(f"video{i}", _transcript(tmp_path, f"t{i}.txt"), output_dir="out") for i in range(4)]
+    broken = stage.submit("video-broken", _transcript(tmp_path, "broken.txt"), output_dir="out")
+    assert stage.submit("video0", "ignored.txt", output_dir="out") is futures[0]
+    jobs = stage.wait()
+    elapsed = time.perf_counter() - started
+
+    assert active["peak"] == 2 and len(calls) == 5
+    assert 0.25 < elapsed < 0.45
+    assert [future.result().status for future in futures] == ["done"] * 4
+    assert broken.result().status == "failed" and broken.result().error == "model unavailable"
+    assert len(jobs) == 5
+
+
+def test_interrupted_jobs_resume_and_finished_jobs_are_reused(tmp_path):
+    state_path = tmp_path / "summary_queue.json"
+    pending_text = _transcript(tmp_path, "pending.txt")
+    done_summary = tmp_path / "done.md"
+    done_summary.write_text("article", encoding="utf-8")
+    options = {"output_dir": "out", "custom_prompt": None, "template_path": None}
+    jobs = {
+        job_key("video-a", options): {"key": job_key("video-a", options), "source": "video-a",
+                                      "text_path": pending_text, "options": options, "status": "running"},
+        job_key("video-b", options): {"key": job_key("video-b", options), "source": "video-b",
+                                      "text_path": "gone.txt", "options": options, "status": "done",
+                                      "summary_path": str(done_summary), "finished_at": time.time()},
+        job_key("video-c", options): {"key": job_key("video-c", options), "source": "video-c",
+                                      "text_path": str(tmp_path / "missing.txt"), "options": options,
+                                      "status": "pending"},
+    }
+    state_path.write_text(json.dumps({"jobs": jobs}), encoding="utf-8")
+
+    calls = []
+    summarize, _active = _summarizer(tmp_path, calls)
+    stage = BackgroundSummaryStage(summarize, state_path=str(state_path), log=lambda message: None)
+
+    assert stage.lookup("video-a", **options).text_path == pending_text
+    assert stage.lookup("video-c", **options) is None
+    assert stage.resume() == 1
+    reused = stage.submit("video-b", "gone.txt", **options)
+    assert reused.done() and reused.result().summary_path == str(done_summary)
+    stage.wait()
+
+    assert calls == [pending_text]
+    saved = json.loads(state_path.read_text(encoding="utf-8"))["jobs"]
+    assert saved[job_key("video-a", options)]["status"] == "done"
+
+
+def test_stages_sharing_a_state_file_keep_each_others_records(tmp_path):
+    state_path = str(tmp_path / "summary_queue.json")
+    calls = []
+    summarize, _active = _summarizer(tmp_path, calls, seconds=0.01)
+    local = BackgroundSummaryStage(summarize, max_workers=2, state_path=state_path, log=lambda message: None)
+    youtube = BackgroundSummaryStage(summarize, max_workers=2, state_path=state_path, log=lambda message: None)
+
+    submitters = [
+        threading.Thread(target=lambda stage=stage, name=name: [
+            stage.submit(f"{name}{i}", _transcript(tmp_path, f"{name}{i}.txt"), output_dir="out") for i in range(5)
+        ])
+        for stage, name in ((local, "local"), (youtube, "youtube"))
+    ]
+    for thread in submitters:
+        thread.start()
+    for thread in submitters:
+        thread.join()
+    jobs = local.wait() + youtube.wait()
+
+    assert [job.status for job in jobs] == ["done"] * 10
+    saved = json.loads(open(state_path, encoding="utf-8").read())["jobs"]
+    assert sorted(state["source"] for state in saved.values()) == sorted(job.source for job in jobs)
+    assert all(state["status"] == "done" for state in saved.values())
+    assert sorted(path.name for path in tmp_path.iterdir() if ".tmp" in path.name or ".lock" in path.name) == []
+
+
+def test_pipeline_frees_worker_slots_while_summaries_run(tmp_path):
+    calls = []
+    summarize, active = _summarizer(tmp_path, calls, seconds=0.1)
+    stage = BackgroundSummaryStage(summarize, max_workers=3, log=lambda message: None)
+    processed = {}
+
+    def process(url, stage_gate=None, summary_stage=None, **kwargs):
+        with stage_gate("transcribe"):
+            time.sleep(0.02)
+        return summary_stage.submit(url, _transcript(tmp_path, url.rsplit("=", 1)[1]), output_dir="out")
+
+    pipeline = YouTubeBatchPipeline(
+        process_fn=process,
+        max_workers=1,
+        stage_limits={"summarize": 3},
+        on_processed=lambda url, path: processed.__setitem__(url, path),
+        summary_stage=stage,
+    )
+    urls = [f"https://www.youtube.com/watch?v=video{i}" for i in range(3)]
+    started = time.perf_counter()
+    results = pipeline.run(urls)
+    elapsed = time.perf_counter() - started
+
+    # 串行需要 3 × (0.02 + 0.1) 秒；文章在后台并发生成
+    assert elapsed < 0.3 and active["peak"] >= 2
+    assert all(result["status"] == "success" for result in results.values())
+    assert sorted(processed) == sorted(urls)
+    stats = pipeline.stats()
+    assert stats["success"] == 3 and stats["stage_busy_seconds"]["summarize"] >= 0.3
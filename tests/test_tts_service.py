@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import torch
+
+import tts_service
+from tts_service import PromptCacheEntry
+
+
+class FakeZeroShotModel:
+    sample_rate = 22050
+
+    def __init__(self, register_delay=0.0):
+        self.frontend = SimpleNamespace(spk2info={})
+        self.register_delay = register_delay
+        self.registering = threading.Event()
+
+    def add_zero_shot_spk(self, prompt_text, prompt_speech_16k, zero_shot_spk_id):
+        self.registering.set()
+        time.sleep(self.register_delay)
+        self.frontend.spk2info[zero_shot_spk_id] = {"prompt_text": prompt_text}
+
+    def inference_zero_shot(self, text, prompt_text, prompt_speech_16k, zero_shot_spk_id="", stream=False):
+        yield {"tts_speech": torch.zeros(1, 220)}
+
+
+def test_evicting_a_prompt_during_registration_leaves_no_orphan_speaker(monkeypatch):
+    model = FakeZeroShotModel(register_delay=0.1)
+    monkeypatch.setattr(tts_service.STATE.zero_shot, "model", model)
+    prompt = PromptCacheEntry(("voice.wav", 1, 2, "参考文本"), torch.zeros(16000))
+
+    def register():
+        with tts_service.STATE.zero_shot.lock:
+            tts_service._ensure_zero_shot_speaker(model, prompt, "参考文本")
+
+    worker = threading.Thread(target=register)
+    worker.start()
+    assert model.registering.wait(1)
+    prompt.evicted = True
+    tts_service._release_zero_shot_speaker(prompt)
+    worker.join()
+
+    assert model.frontend.spk2info == {}
+    assert prompt.zero_shot_spk_id is None
+
+
+def test_partly_read_stream_does_not_block_other_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_service.ServiceConfig, "output_dir", tmp_path)
+    slot = tts_service.ModelSlot()
+    slot.model = FakeZeroShotModel()
+    text = "。".join(["一二三四五六七八九十" * 9] * 3) + "。"
+    assert len(tts_service.split_text(text)) >= 2
+
+    def infer(model, segment):
+        return model.inference_zero_shot(segment, "参考文本", None)
+
+    async def scenario():
+        response = tts_service._stream_tts(
+            mode="zero_shot", text=text, slot=slot, infer=infer, audio_format="pcm", persist=False
+        )
+        body = response.body_iterator
+        first = await body.__anext__()
+        other = await asyncio.wait_for(
+            asyncio.to_thread(tts_service._run_tts, mode="zero_shot", text="你好。", slot=slot, infer=infer),
+            timeout=5,
+        )
+        rest = [chunk async for chunk in body]
+        return first, other, rest
+
+    first, other, rest = asyncio.run(scenario())
+
+    assert first and rest and other.success and other.segments == 1
+    assert not slot.lock.locked()
+
+
+def test_stream_failure_after_first_segment_aborts_the_body(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_service.ServiceConfig, "output_dir", tmp_path)
+    slot = tts_service.ModelSlot()
+    slot.model = FakeZeroShotModel()
+    text = "。".join(["一二三四五六七八九十" * 9] * 3) + "。"
+    segments = tts_service.split_text(text)
+    calls = []
+
+    def infer(model, segment):
+        calls.append(segment)
+        if len(calls) > 1:
+            raise RuntimeError("cuda error")
+        return model.inference_zero_shot(segment, "参考文本", None)
+
+    async def scenario():
+        response = tts_service._stream_tts(
+            mode="zero_shot", text=text, slot=slot, infer=infer, audio_format="pcm", persist=False, framed=True
+        )
+        first = await response.body_iterator.__anext__()
+        try:
+            await response.body_iterator.__anext__()
+        except RuntimeError as exc:
+            return response, first, exc
+        return response, first, None
+
+    response, first, error = asyncio.run(scenario())
+
+    assert response.headers["X-Framing"] == "segments"
+    assert response.headers["X-Segments"] == str(len(segments))
+    assert int.from_bytes(first[:4], "little") == len(first) - 4 == 220 * 2
+    assert str(error) == "cuda error"
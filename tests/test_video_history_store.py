@@ -0,0 +1,91 @@
+import json
+import threading
+
+from src.video_history_store import VideoHistoryStore
+
+
+def _video_id(url):
+    return url.rsplit("=", 1)[1] if "watch?v=" in url else url.rsplit("/", 1)[1] if "youtu.be/" in url else ""
+
+
+def test_json_history_is_migrated_once_and_merged_by_video_id(tmp_path):
+    legacy = tmp_path / "downloaded_videos.json"
+    legacy.write_text(
+        json.dumps(
+            [
+                {
+                    "url": "https://www.youtube.com/watch?v=abc123XYZ_0",
+                    "file_path": "/videos/old.mp4",
+                    "first_download_time": "2024-01-01 10:00:00",
+                    "last_download_time": "2024-01-01 10:00:00",
+                    "id": "abc123XYZ_0",
+                    "title": "Demo",
+                },
+                {
+                    "url": "https://youtu.be/abc123XYZ_0",
+                    "file_path": "/videos/new.mp4",
+                    "first_download_time": "2024-02-01 10:00:00",
+                    "last_download_time": "2024-02-01 10:00:00",
+                    "processed": {"article": {"path": "/summaries/demo.md", "time": "2024-02-01 11:00:00"}},
+                },
+                {"url": "https://www.bilibili.com/video/BV1xx", "file_path": "/videos/bili.mp4"},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    db_path = str(tmp_path / "downloaded_videos.sqlite3")
+
+    store = VideoHistoryStore(db_path, legacy_json_path=str(legacy), video_id_fn=_video_id)
+    videos = store.list_all()
+
+    assert len(videos) == 2
+    merged = store.find("https://www.youtube.com/watch?v=abc123XYZ_0")
+    assert merged["file_path"] == "/videos/new.mp4"
+    assert merged["first_download_time"] == "2024-01-01 10:00:00"
+    assert merged["title"] == "Demo"
+    assert merged["processed"]["article"]["path"] == "/summaries/demo.md"
+    assert store.find("https://www.bilibili.com/video/BV1xx")["file_path"] == "/videos/bili.mp4"
+    store.close()
+
+    # 迁移只做一次：之后改动 JSON 不会再导入
+    legacy.write_text(json.dumps([{"url": "https://example.com/extra", "file_path": "/x.mp4"}]), encoding="utf-8")
+    reopened = VideoHistoryStore(db_path, legacy_json_path=str(legacy), video_id_fn=_video_id)
+    assert len(reopened.list_all()) == 2
+    assert reopened.find("https://example.com/extra") is None
+
+
+def test_record_download_upserts_and_keeps_first_time(tmp_path):
+    store = VideoHistoryStore(str(tmp_path / "history.sqlite3"), video_id_fn=_video_id)
+    store.mark_processed("https://youtu.be/abc123XYZ_0", "transcript", "/t.txt")
+    store.record_download("https://www.youtube.com/watch?v=abc123XYZ_0", "/a.mp3")
+    first = store.find("https://youtu.be/abc123XYZ_0")
+    store.record_download(
+        "https://www.youtube.com/watch?v=abc123XYZ_0", "/a.mp4", {"id": "abc123XYZ_0", "title": "Demo", "duration": 42}
+    )
+
+    video = store.find("https://youtu.be/abc123XYZ_0")
+    assert len(store.list_all()) == 1
+    assert video["file_path"] == "/a.mp4"
+    assert video["title"] == "Demo" and video["duration"] == 42
+    assert video["first_download_time"] == first["first_download_time"]
+    assert video["processed"]["transcript"]["path"] == "/t.txt"
+
+
+def test_concurrent_writers_do_not_lose_records(tmp_path):
+    db_path = str(tmp_path / "history.sqlite3")
+    stores = [VideoHistoryStore(db_path, video_id_fn=_video_id) for _ in range(2)]
+
+    def write(store, start):
+        for i in range(start, 100, 2):
+            store.record_download(f"https://www.youtube.com/watch?v=video{i:05d}", f"/v/{i}.mp4")
+            store.mark_processed(f"https://youtu.be/video{i:05d}", "article", f"/s/{i}.md")
+
+    threads = [threading.Thread(target=write, args=(store, index)) for index, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    videos = VideoHistoryStore(db_path, video_id_fn=_video_id).list_all()
+    assert len(videos) == 100
+    assert all(video["processed"]["article"]["path"].endswith(".md") for video in videos)
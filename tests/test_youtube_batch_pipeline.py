@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+
+from src.youtube_batch_pipeline import YouTubeBatchPipeline, processing_key, series_processed_lookup
+
+
+def _fake_process(tmp_path, calls, download_seconds=0.05, transcribe_seconds=0.05):
+    lock = threading.Lock()
+
+    def process(url, stage_gate=None, **kwargs):
+        with lock:
+            calls.append(url)
+        with stage_gate("download"):
+            time.sleep(download_seconds)
+        with stage_gate("transcribe"):
+            time.sleep(transcribe_seconds)
+        with stage_gate("translate"):
+            pass
+        output = tmp_path / f"{url.rsplit('=', 1)[1]}.md"
+        output.write_text("summary", encoding="utf-8")
+        return str(output)
+
+    return process
+
+
+def _urls(count):
+    return [f"https://www.youtube.com/watch?v=video{i:05d}" for i in range(count)]
+
+
+def test_downloads_overlap_serial_transcription(tmp_path):
+    calls = []
+    pipeline = YouTubeBatchPipeline(
+        process_fn=_fake_process(tmp_path, calls),
+        max_workers=4,
+        stage_limits={"download": 3, "transcribe": 1},
+    )
+    started = time.perf_counter()
+    results = pipeline.run(_urls(4))
+    elapsed = time.perf_counter() - started
+
+    assert all(result["status"] == "success" for result in results.values())
+    stats = pipeline.stats()
+    assert stats["stage_peak_concurrency"]["download"] == 3
+    assert stats["stage_peak_concurrency"]["transcribe"] == 1
+    # 串行需要 4 × (0.05 + 0.05) 秒；流水线只受转录阶段限制
+    assert elapsed < 0.35
+    assert 0 < stats["stage_utilization"]["transcribe"] <= 1
+
+
+def test_processed_entries_are_skipped(tmp_path):
+    calls = []
+    done = {}
+    pipeline = YouTubeBatchPipeline(
+        process_fn=_fake_process(tmp_path, calls, 0, 0),
+        processed_lookups=[lambda url, video_id: done.get(url)],
+        on_processed=lambda url, path: done.__setitem__(url, path),
+    )
+    pipeline.run(_urls(2))
+
+    calls.clear()
+    results = pipeline.run(_urls(3) + _urls(1))
+
+    assert calls == [_urls(3)[2]]
+    assert [result.get("skipped", False) for result in results.values()] == [True, True, False]
+    assert pipeline.stats()["skipped"] == 2
+
+
+def test_failures_do_not_stop_the_batch(tmp_path):
+    def process(url, stage_gate=None, **kwargs):
+        if url.endswith("00001"):
+            raise RuntimeError("network down")
+        return None if url.endswith("00002") else str(tmp_path / "ok.md")
+
+    results = YouTubeBatchPipeline(process_fn=process).run(_urls(3))
+
+    assert results[_urls(1)[0]]["status"] == "success"
+    assert results[_urls(2)[1]] == {"status": "failed", "error": "network down"}
+    assert results[_urls(3)[2]]["status"] == "failed"
+
+
+def test_series_manifest_lookup_matches_video_id(tmp_path):
+    summary = tmp_path / "summaries" / "Episode 1_abc123XYZ_0.md"
+    summary.parent.mkdir()
+    summary.write_text("summary", encoding="utf-8")
+    manifest = {
+        "episodes": [
+            {
+                "id": "Episode 1_abc123XYZ_0",
+                "video": "Episode 1_abc123XYZ_0.mp4",
+                "subtitles": {"source": [], "translated": [], "polished": []},
+                "transcripts": [],
+                "summaries": ["summaries/Episode 1_abc123XYZ_0.md"],
+                "rendered_videos": [],
+            }
+        ]
+    }
+    (tmp_path / "videohub_project.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    article = series_processed_lookup(str(tmp_path), processing_key(generate_article=True))
+    subtitles = series_processed_lookup(
+        str(tmp_path), processing_key(generate_article=False, generate_subtitles=True)
+    )
+
+    assert article("https://youtu.be/abc123XYZ_0", "abc123XYZ_0") == str(summary)
+    assert article("https://youtu.be/other", "other") is None
+    assert subtitles("https://youtu.be/abc123XYZ_0", "abc123XYZ_0") is None
+
+
+def test_batch_records_outputs_and_skips_on_rerun(tmp_path, monkeypatch):
+    from src import youtube_transcriber
+
+    calls = []
+    monkeypatch.setattr(youtube_transcriber, "VIDEO_LIST_FILE", str(tmp_path / "downloaded_videos.json"))
+    monkeypatch.setattr(youtube_transcriber, "process_youtube_video", _fake_process(tmp_path, calls, 0, 0))
+
+    first = youtube_transcriber.process_youtube_videos_batch(_urls(2), max_workers=2)
+    assert all(result["status"] == "success" for result in first.values())
+
+    calls.clear()
+    second = youtube_transcriber.process_youtube_videos_batch(_urls(3), max_workers=2)
+    assert calls == [_urls(3)[2]]
+    assert [result.get("skipped", False) for result in second.values()] == [True, True, False]
+
+    # 换一种处理选项（只生成字幕）时不复用文章产物
+    calls.clear()
+    youtube_transcriber.process_youtube_videos_batch(_urls(1), generate_article=False, generate_subtitles=True)
+    assert calls == _urls(1)
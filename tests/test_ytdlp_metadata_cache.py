@@ -0,0 +1,118 @@
+import os
+import time
+
+from src.ytdlp_metadata_cache import MetadataCache, extraction_profile, sanitize_info, url_expiry
+
+
+def _info(video_id="abc123XYZ_0", expire=None):
+    expire = int(expire if expire is not None else time.time() + 6 * 3600)
+    return {
+        "id": video_id,
+        "title": "Demo",
+        "duration": 42,
+        "formats": [{"format_id": "140", "url": f"https://rr1.googlevideo.com/videoplayback?expire={expire}&id=1"}],
+        "subtitles": {"en": [{"ext": "vtt", "url": f"https://www.youtube.com/api/timedtext?v=x&expire={expire + 60}"}]},
+        "automatic_captions": {},
+    }
+
+
+def test_put_get_round_trip_strips_download_fields(tmp_path):
+    cache = MetadataCache(str(tmp_path))
+    info = dict(_info(), requested_downloads=[{"filepath": "/tmp/x.mp4"}], filepath="/tmp/x.mp4", __postprocessors=[object()])
+
+    cache.put("abc123XYZ_0", info)
+    cached = MetadataCache(str(tmp_path)).get("abc123XYZ_0")
+
+    assert cached["title"] == "Demo"
+    assert "requested_downloads" not in cached and "filepath" not in cached and "__postprocessors" not in cached
+    assert os.path.exists(cache.path_for("abc123XYZ_0"))
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = MetadataCache(str(tmp_path), ttl=60)
+    cache.put("abc123XYZ_0", _info())
+    assert cache.get("abc123XYZ_0") is not None
+
+    old = time.time() - 120
+    os.utime(cache.path_for("abc123XYZ_0"), (old, old))
+    assert cache.get("abc123XYZ_0") is None
+
+
+def test_expiring_urls_are_not_used_for_downloads(tmp_path):
+    cache = MetadataCache(str(tmp_path))
+    soon = time.time() + 60
+    cache.put("abc123XYZ_0", _info(expire=soon))
+
+    assert url_expiry(_info(expire=soon)) == int(soon)
+    assert cache.get("abc123XYZ_0") is not None
+    assert cache.get("abc123XYZ_0", need_urls=True) is None
+    assert cache.fresh_path("abc123XYZ_0", need_urls=True) is None
+
+
+def test_invalid_ids_and_disabled_cache_are_ignored(tmp_path):
+    MetadataCache(str(tmp_path)).put("../escape", _info())
+    assert not any(tmp_path.iterdir())
+
+    disabled = MetadataCache(str(tmp_path), ttl=0)
+    disabled.put("abc123XYZ_0", _info())
+    assert disabled.get("abc123XYZ_0") is None
+
+
+def test_entries_are_only_reused_under_the_same_extraction_options(tmp_path):
+    cookies = tmp_path / "cookies.txt"
+    cache = MetadataCache(str(tmp_path))
+    anonymous = extraction_profile({"quiet": True, "format": "bestaudio"})
+    with_cookies = extraction_profile({"cookiefile": str(cookies), "quiet": True})
+
+    cache.put("abc123XYZ_0", _info(), profile=anonymous)
+
+    assert anonymous == "" and with_cookies
+    assert cache.get("abc123XYZ_0", profile=with_cookies) is None
+    assert extraction_profile({"cookiesfrombrowser": ("chrome ", None, None, None)}) == extraction_profile(
+        {"cookiesfrombrowser": ("Chrome",)}
+    )
+    assert extraction_profile({"proxy": "http://a"}) != extraction_profile({"proxy": "http://b"})
+
+
+def test_sanitize_info_makes_values_json_safe():
+    cleaned = sanitize_info({"id": "x", "obj": object(), "_filename": "a.mp4"})
+    assert isinstance(cleaned["obj"], str)
+    assert "_filename" not in cleaned
+
+
+def test_subtitle_check_and_title_lookup_share_one_extraction(tmp_path, monkeypatch):
+    from src import youtube_transcriber
+
+    extractions = []
+
+    class FakeYoutubeDL:
+        def __init__(self, opts):
+            self.params = opts
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            extractions.append(url)
+            return _info()
+
+    monkeypatch.setattr(youtube_transcriber, "YTDLP_METADATA_CACHE", MetadataCache(str(tmp_path)))
+    monkeypatch.setattr(youtube_transcriber.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+
+    url = "https://www.youtube.com/watch?v=abc123XYZ_0"
+    subtitles = youtube_transcriber.check_youtube_subtitles(url)
+    title = youtube_transcriber.get_youtube_video_title("https://youtu.be/abc123XYZ_0")
+
+    assert subtitles["manual_languages"] == ["en"]
+    assert title["title"] == "Demo" and title["duration"] == "00:42"
+    assert extractions == [url]
+
+    # 带 cookies 的提取可能拿到不同的格式和直链，不复用匿名提取结果
+    cookies = tmp_path / "cookies.txt"
+    cookies.write_text("# Netscape HTTP Cookie File\n", encoding="utf-8")
+    youtube_transcriber.check_youtube_subtitles(url, cookies_file=str(cookies))
+    youtube_transcriber.check_youtube_subtitles(url, cookies_file=str(cookies))
+    assert extractions == [url, url]
@@ -0,0 +1,67 @@
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from ytdlp_result import (  # noqa: E402
+    RESULT_MARKER,
+    build_download_result,
+    downloaded_filepath,
+    parse_printed_results,
+    result_print_args,
+)
+
+
+def test_print_args_report_after_move_and_keep_progress():
+    args = result_print_args()
+    assert args[0] == "--print"
+    assert args[1].startswith("after_move:" + RESULT_MARKER)
+    assert "filepath" in args[1]
+    assert "--progress" in args
+
+
+def test_downloaded_filepath_prefers_final_requested_download():
+    info = {
+        "filepath": "/tmp/video.f137.mp4",
+        "requested_downloads": [{"filepath": "/tmp/video.mp4"}],
+    }
+    assert downloaded_filepath(info) == "/tmp/video.mp4"
+    assert downloaded_filepath({"filepath": "/tmp/a.mp3"}) == "/tmp/a.mp3"
+    assert downloaded_filepath(None) is None
+
+
+def test_build_download_result_has_structured_fields():
+    info = {
+        "id": "abc",
+        "title": "Title",
+        "duration": 61.5,
+        "ext": "mp4",
+        "format_id": "137+140",
+        "format": "137 - 1920x1080+140",
+        "requested_downloads": [{"filepath": "/tmp/Title_abc.mp4"}],
+    }
+    assert build_download_result(info) == {
+        "path": "/tmp/Title_abc.mp4",
+        "id": "abc",
+        "title": "Title",
+        "duration": 61.5,
+        "ext": "mp4",
+        "format_id": "137+140",
+        "format": "137 - 1920x1080+140",
+    }
+    assert build_download_result({"id": "abc"}) is None
+
+
+def test_parse_printed_results_ignores_log_noise():
+    printed = json.dumps({"id": "abc", "filepath": "/tmp/a [1].mp4", "duration": 3})
+    output = "\n".join([
+        "[debug] Command-line config: [...]",
+        "[download] 100% of 1.00MiB",
+        RESULT_MARKER + "not json",
+        RESULT_MARKER + printed,
+    ])
+    results = parse_printed_results(output)
+    assert [r["path"] for r in results] == ["/tmp/a [1].mp4"]
+    assert results[0]["duration"] == 3
@@ -8,16 +8,21 @@ other local clients can call.
 from __future__ import annotations
 
 import argparse
+import hashlib
+import inspect
+import itertools
 import os
 import re
 import socket
+import struct
 import sys
 import threading
 import time
 import uuid
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterator, Literal
 
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
 os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
@@ -26,6 +31,7 @@ import torch
 import torchaudio
 import onnxruntime
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 
@@ -37,6 +43,7 @@ DEFAULT_INSTRUCT_MODEL_DIR = ROOT_DIR / "pretrained_models" / "CosyVoice-300M-In
 
 MAX_SEGMENT_CHARS = 140
 MIN_SEGMENT_CHARS = 100
+PROMPT_SAMPLE_RATE = 16000
 
 
 class ServiceConfig:
@@ -46,6 +53,10 @@ class ServiceConfig:
     output_dir: Path = Path(os.getenv("COSYVOICE_OUTPUT_DIR", DEFAULT_OUTPUT_DIR))
     cosyvoice_repo_path: str = os.getenv("COSYVOICE_REPO_PATH", "")
     fp16: bool = os.getenv("COSYVOICE_FP16", "0").lower() in {"1", "true", "yes", "on"}
+    prompt_cache_size: int = max(0, int(os.getenv("COSYVOICE_PROMPT_CACHE_SIZE", "16")))
+    # Retention for outputs/: 0 disables the respective limit.
+    output_max_age_hours: float = float(os.getenv("COSYVOICE_OUTPUT_MAX_AGE_HOURS", "24"))
+    output_max_files: int = int(os.getenv("COSYVOICE_OUTPUT_MAX_FILES", "500"))
 
 
 class ModelSlot:
@@ -54,6 +65,98 @@ class ModelSlot:
         self.lock = threading.Lock()
 
 
+PromptCacheKey = tuple[str, int, int, str]
+
+
+class PromptCacheEntry:
+    def __init__(self, key: PromptCacheKey, speech_16k: torch.Tensor) -> None:
+        self.key = key
+        self.speech_16k = speech_16k
+        # Set once the prompt features have been registered on the zero-shot
+        # model via ``add_zero_shot_spk``; ``None`` means "not precomputed".
+        self.zero_shot_spk_id: str | None = None
+        self.evicted = False
+
+
+class PromptCache:
+    """Bounded LRU of resampled prompt wavs and precomputed zero-shot speakers.
+
+    Dubbing jobs call ``/tts/zero_shot`` once per subtitle line with the same
+    reference voice, so the prompt is keyed by path, mtime, size and prompt
+    text: editing or replacing the wav invalidates the entry automatically.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[PromptCacheKey, PromptCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.feature_hits = 0
+
+    @staticmethod
+    def make_key(prompt_wav_path: Path, prompt_text: str) -> PromptCacheKey:
+        stat = prompt_wav_path.stat()
+        return (str(prompt_wav_path), stat.st_mtime_ns, stat.st_size, prompt_text)
+
+    def get_or_load(
+        self,
+        key: PromptCacheKey,
+        loader: Callable[[], torch.Tensor],
+        on_evict: Callable[[PromptCacheEntry], None] | None = None,
+    ) -> PromptCacheEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Load outside the lock so a slow resample does not block cache hits
+        # for other voices; a concurrent duplicate load is harmless.
+        entry = PromptCacheEntry(key, loader())
+        if self.max_entries <= 0:
+            return entry
+
+        evicted: list[PromptCacheEntry] = []
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                _, old_entry = self._entries.popitem(last=False)
+                old_entry.evicted = True
+                evicted.append(old_entry)
+                self.evictions += 1
+
+        if on_evict is not None:
+            for old_entry in evicted:
+                on_evict(old_entry)
+        return entry
+
+    def record_feature_hit(self) -> None:
+        with self._lock:
+            self.feature_hits += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "precomputed_speakers": sum(1 for item in self._entries.values() if item.zero_shot_spk_id),
+                "feature_hits": self.feature_hits,
+            }
+
+
 class CosyVoiceState:
     def __init__(self) -> None:
         self.sft = ModelSlot()
@@ -64,6 +167,7 @@ class CosyVoiceState:
         self.torch_cuda_available: bool = torch.cuda.is_available()
         self.torch_cuda_device_name: str | None = torch.cuda.get_device_name(0) if torch.cuda.is_available() else None
         self.onnxruntime_providers: list[str] = onnxruntime.get_available_providers()
+        self.prompt_cache = PromptCache(ServiceConfig.prompt_cache_size)
 
 
 STATE = CosyVoiceState()
@@ -86,6 +190,9 @@ class InstructRequest(BaseModel):
     instruction: str = Field(..., description="Speaking style instruction.")
 
 
+StreamFormat = Literal["pcm", "wav"]
+
+
 class TTSResponse(BaseModel):
     success: bool
     file_path: str
@@ -190,11 +297,89 @@ def health() -> dict[str, Any]:
             "fp16": ServiceConfig.fp16,
         },
         "output_dir": str(ServiceConfig.output_dir.resolve()),
+        "prompt_cache": STATE.prompt_cache.stats(),
     }
 
 
 @app.post("/tts/sft", response_model=TTSResponse)
 def tts_sft(payload: SFTRequest) -> TTSResponse:
+    text, infer = _prepare_sft(payload)
+    return _run_tts(mode="sft", text=text, slot=STATE.sft, infer=infer)
+
+
+@app.post("/tts/sft/stream")
+def tts_sft_stream(
+    payload: SFTRequest,
+    audio_format: StreamFormat = "pcm",
+    persist: bool = False,
+    framed: bool = False,
+) -> StreamingResponse:
+    text, infer = _prepare_sft(payload)
+    return _stream_tts(
+        mode="sft",
+        text=text,
+        slot=STATE.sft,
+        infer=infer,
+        audio_format=audio_format,
+        persist=persist,
+        framed=framed,
+    )
+
+
+@app.post("/tts/zero_shot", response_model=TTSResponse)
+def tts_zero_shot(payload: ZeroShotRequest) -> TTSResponse:
+    text, infer = _prepare_zero_shot(payload)
+    return _run_tts(mode="zero_shot", text=text, slot=STATE.zero_shot, infer=infer)
+
+
+@app.post("/tts/zero_shot/stream")
+def tts_zero_shot_stream(
+    payload: ZeroShotRequest,
+    audio_format: StreamFormat = "pcm",
+    persist: bool = False,
+    framed: bool = False,
+) -> StreamingResponse:
+    text, infer = _prepare_zero_shot(payload)
+    return _stream_tts(
+        mode="zero_shot",
+        text=text,
+        slot=STATE.zero_shot,
+        infer=infer,
+        audio_format=audio_format,
+        persist=persist,
+        framed=framed,
+    )
+
+
+@app.post("/tts/instruct", response_model=TTSResponse)
+def tts_instruct(payload: InstructRequest) -> TTSResponse:
+    text, infer = _prepare_instruct(payload)
+    return _run_tts(mode="instruct", text=text, slot=STATE.instruct, infer=infer)
+
+
+@app.post("/tts/instruct/stream")
+def tts_instruct_stream(
+    payload: InstructRequest,
+    audio_format: StreamFormat = "pcm",
+    persist: bool = False,
+    framed: bool = False,
+) -> StreamingResponse:
+    text, infer = _prepare_instruct(payload)
+    return _stream_tts(
+        mode="instruct",
+        text=text,
+        slot=STATE.instruct,
+        infer=infer,
+        audio_format=audio_format,
+        persist=persist,
+        framed=framed,
+    )
+
+
+InferFn = Callable[[Any, str], Any]
+
+
+def _prepare_sft(payload: SFTRequest) -> tuple[str, InferFn]:
     text = _normalize_text(payload.text)
     speaker = payload.speaker.strip()
     if not text:
@@ -202,16 +387,10 @@ def tts_sft(payload: SFTRequest) -> TTSResponse:
     if not speaker:
         raise HTTPException(status_code=400, detail="speaker 不能为空")
 
-    return _run_tts(
-        mode="sft",
-        text=text,
-        slot=STATE.sft,
-        infer=lambda model, segment: model.inference_sft(segment, speaker, stream=False),
-    )
+    return text, lambda model, segment: model.inference_sft(segment, speaker, stream=False)
 
 
-@app.post("/tts/zero_shot", response_model=TTSResponse)
-def tts_zero_shot(payload: ZeroShotRequest) -> TTSResponse:
+def _prepare_zero_shot(payload: ZeroShotRequest) -> tuple[str, InferFn]:
     text = _normalize_text(payload.text)
     prompt_text = _normalize_text(payload.prompt_text)
     prompt_wav_path = Path(payload.prompt_wav_path).expanduser().resolve()
@@ -225,20 +404,26 @@ def tts_zero_shot(payload: ZeroShotRequest) -> TTSResponse:
         raise HTTPException(status_code=503, detail="CosyVoice load_wav 未初始化")
 
     try:
-        prompt_speech_16k = _load_prompt_wav(prompt_wav_path, 16000)
+        prompt = STATE.prompt_cache.get_or_load(
+            PromptCache.make_key(prompt_wav_path, prompt_text),
+            lambda: _load_prompt_wav(prompt_wav_path, PROMPT_SAMPLE_RATE),
+            on_evict=_release_zero_shot_speaker,
+        )
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"参考音频读取失败: {exc}") from exc
 
-    return _run_tts(
-        mode="zero_shot",
-        text=text,
-        slot=STATE.zero_shot,
-        infer=lambda model, segment: model.inference_zero_shot(segment, prompt_text, prompt_speech_16k, stream=False),
-    )
+    def infer(model: Any, segment: str):
+        spk_id = _ensure_zero_shot_speaker(model, prompt, prompt_text)
+        if spk_id:
+            return model.inference_zero_shot(
+                segment, prompt_text, prompt.speech_16k, zero_shot_spk_id=spk_id, stream=False
+            )
+        return model.inference_zero_shot(segment, prompt_text, prompt.speech_16k, stream=False)
 
+    return text, infer
 
-@app.post("/tts/instruct", response_model=TTSResponse)
-def tts_instruct(payload: InstructRequest) -> TTSResponse:
+
+def _prepare_instruct(payload: InstructRequest) -> tuple[str, InferFn]:
     text = _normalize_text(payload.text)
     speaker = payload.speaker.strip()
     instruction = _normalize_text(payload.instruction)
@@ -256,7 +441,22 @@ def tts_instruct(payload: InstructRequest) -> TTSResponse:
             return model.inference_instruct2(segment, instruction, stream=False)
         raise RuntimeError("当前 CosyVoice 模型不支持 instruct 推理接口")
 
-    return _run_tts(mode="instruct", text=text, slot=STATE.instruct, infer=infer)
+    return text, infer
+
+
+def _iter_segment_audio(slot: ModelSlot, segments: list[str], infer: InferFn) -> Iterator[torch.Tensor]:
+    """Yield one 2D audio tensor per text segment.
+
+    The model lock is held only while a segment is synthesized, never across
+    ``yield``: a slow or vanished streaming client must not block other
+    requests for the same model.
+    """
+    for segment in segments:
+        with slot.lock:
+            chunk = _collect_inference_audio(infer(slot.model, segment))
+        if chunk is None:
+            raise RuntimeError(f"生成失败，未返回音频: {segment[:30]}")
+        yield _ensure_2d_audio(chunk.detach().cpu())
 
 
 def _run_tts(
@@ -264,7 +464,7 @@ def _run_tts(
     mode: str,
     text: str,
     slot: ModelSlot,
-    infer: Callable[[Any, str], Any],
+    infer: InferFn,
 ) -> TTSResponse:
     if slot.model is None:
         raise HTTPException(status_code=503, detail=f"{mode} 模型未加载")
@@ -276,20 +476,14 @@ def _run_tts(
 
     output_path = _make_output_path(mode)
     try:
-        with slot.lock:
-            audios = []
-            sample_rate = int(getattr(slot.model, "sample_rate", 22050))
-            for segment in segments:
-                chunk = _collect_inference_audio(infer(slot.model, segment))
-                if chunk is None:
-                    raise RuntimeError(f"生成失败，未返回音频: {segment[:30]}")
-                audios.append(_ensure_2d_audio(chunk.detach().cpu()))
-
+        sample_rate = int(getattr(slot.model, "sample_rate", 22050))
+        audios = list(_iter_segment_audio(slot, segments, infer))
         if not audios:
             raise RuntimeError("生成失败，未得到任何音频")
 
         merged_audio = torch.cat(audios, dim=1)
         _save_wav(output_path, merged_audio, sample_rate)
+        _prune_output_dir()
         return TTSResponse(
             success=True,
             file_path=str(output_path.resolve()),
@@ -303,6 +497,101 @@ def _run_tts(
         raise HTTPException(status_code=500, detail=f"{mode} 语音生成失败: {exc}") from exc
 
 
+def _stream_tts(
+    *,
+    mode: str,
+    text: str,
+    slot: ModelSlot,
+    infer: InferFn,
+    audio_format: StreamFormat,
+    persist: bool,
+    framed: bool = False,
+) -> StreamingResponse:
+    """Stream 16-bit mono audio back segment by segment as ``split_text`` pieces finish.
+
+    The first segment is synthesized before the response starts so that model
+    errors still surface as a proper HTTP status instead of a truncated body.
+    A later failure aborts the connection rather than ending the body cleanly.
+    With ``framed`` (pcm only) every segment is prefixed by its byte length as
+    a little-endian uint32, so clients can check the count against ``X-Segments``.
+    """
+    if slot.model is None:
+        raise HTTPException(status_code=503, detail=f"{mode} 模型未加载")
+
+    segments = split_text(text)
+    if not segments:
+        raise HTTPException(status_code=400, detail="文本分段后为空")
+
+    sample_rate = int(getattr(slot.model, "sample_rate", 22050))
+    audio_iter = _iter_segment_audio(slot, segments, infer)
+    try:
+        first_chunk = next(audio_iter)
+    except Exception as exc:
+        audio_iter.close()
+        raise HTTPException(status_code=500, detail=f"{mode} 语音生成失败: {exc}") from exc
+
+    output_path = _make_output_path(mode) if persist else None
+    framed = framed and audio_format == "pcm"
+
+    def body() -> Iterator[bytes]:
+        persisted: list[torch.Tensor] = []
+        completed = False
+        try:
+            if audio_format == "wav":
+                yield _streaming_wav_header(sample_rate)
+            for chunk in itertools.chain([first_chunk], audio_iter):
+                if output_path is not None:
+                    persisted.append(chunk)
+                pcm = _to_pcm16_bytes(chunk)
+                yield struct.pack("<I", len(pcm)) + pcm if framed else pcm
+            completed = True
+        except Exception as exc:
+            # Headers are already sent; re-raise so the server aborts the
+            # chunked body instead of ending it as if the audio were complete.
+            print(f"{mode} 流式语音生成中断: {exc}", flush=True)
+            raise
+        finally:
+            audio_iter.close()
+            if completed and output_path is not None and persisted:
+                _save_wav(output_path, torch.cat(persisted, dim=1), sample_rate)
+                _prune_output_dir()
+
+    headers = {
+        "X-Sample-Rate": str(sample_rate),
+        "X-Channels": "1",
+        "X-Sample-Format": "s16le",
+        "X-Segments": str(len(segments)),
+    }
+    if framed:
+        headers["X-Framing"] = "segments"
+    if output_path is not None:
+        headers["X-File-Path"] = str(output_path.resolve())
+    media_type = "audio/wav" if audio_format == "wav" else "audio/L16"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+def _to_pcm16_bytes(audio: torch.Tensor) -> bytes:
+    mono = audio.float().mean(dim=0) if audio.shape[0] > 1 else audio.float().squeeze(0)
+    pcm = (mono.clamp(-1.0, 1.0) * 32767.0).round().to(torch.int16)
+    return pcm.numpy().tobytes()
+
+
+def _streaming_wav_header(sample_rate: int) -> bytes:
+    """WAV header for a body of unknown length (sizes set to 0xFFFFFFFF, as ffmpeg does)."""
+    channels = 1
+    bits = 16
+    byte_rate = sample_rate * channels * bits // 8
+    unknown = 0xFFFFFFFF
+    return (
+        b"RIFF"
+        + struct.pack("<I", unknown)
+        + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, channels * bits // 8, bits)
+        + b"data"
+        + struct.pack("<I", unknown)
+    )
+
+
 def _collect_inference_audio(result_iter: Any) -> torch.Tensor | None:
     tensors: list[torch.Tensor] = []
     for item in result_iter:
@@ -360,6 +649,73 @@ def _load_prompt_wav(prompt_wav_path: Path, sample_rate: int) -> torch.Tensor:
     return torch.from_numpy(audio).float()
 
 
+def _supports_zero_shot_speaker(model: Any) -> bool:
+    """CosyVoice releases with ``add_zero_shot_spk`` can reuse prompt features."""
+    if not hasattr(model, "add_zero_shot_spk"):
+        return False
+    try:
+        return "zero_shot_spk_id" in inspect.signature(model.inference_zero_shot).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _ensure_zero_shot_speaker(model: Any, prompt: PromptCacheEntry, prompt_text: str) -> str | None:
+    """Register the prompt's speaker/prompt features once; call under the slot lock."""
+    if prompt.zero_shot_spk_id:
+        STATE.prompt_cache.record_feature_hit()
+        return prompt.zero_shot_spk_id
+    if prompt.evicted or ServiceConfig.prompt_cache_size <= 0 or not _supports_zero_shot_speaker(model):
+        return None
+
+    spk_id = "videohub_prompt_" + hashlib.sha1(repr(prompt.key).encode("utf-8")).hexdigest()[:16]
+    try:
+        model.add_zero_shot_spk(prompt_text, prompt.speech_16k, spk_id)
+    except Exception as exc:
+        print(f"CosyVoice 预计算参考音色失败，回退到逐段提取: {exc}", flush=True)
+        return None
+    prompt.zero_shot_spk_id = spk_id
+    return spk_id
+
+
+def _release_zero_shot_speaker(prompt: PromptCacheEntry) -> None:
+    # Same lock as ``_ensure_zero_shot_speaker``: a registration already in
+    # flight finishes first and is then removed, instead of being orphaned.
+    with STATE.zero_shot.lock:
+        spk_id = prompt.zero_shot_spk_id
+        prompt.zero_shot_spk_id = None
+        model = STATE.zero_shot.model
+        if not spk_id or model is None:
+            return
+        spk2info = getattr(getattr(model, "frontend", None), "spk2info", None)
+        if isinstance(spk2info, dict):
+            spk2info.pop(spk_id, None)
+
+
+def _prune_output_dir() -> None:
+    """Apply the ``outputs/`` retention policy (max age and max file count)."""
+    output_dir = ServiceConfig.output_dir
+    if not output_dir.exists():
+        return
+
+    entries = []
+    for path in output_dir.glob("*.wav"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+
+    cutoff = time.time() - ServiceConfig.output_max_age_hours * 3600 if ServiceConfig.output_max_age_hours > 0 else None
+    for index, (mtime, path) in enumerate(entries):
+        too_many = ServiceConfig.output_max_files > 0 and index >= ServiceConfig.output_max_files
+        too_old = cutoff is not None and mtime < cutoff
+        if too_many or too_old:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
 def _make_output_path(mode: str) -> Path:
     ServiceConfig.output_dir.mkdir(parents=True, exist_ok=True)
     timestamp = time.strftime("%Y%m%d_%H%M%S")